@@ -0,0 +1,249 @@
+"""Benchmark del flujo de órdenes con datos sintéticos (sin servidor Streamlit).
+
+Genera historiales realistas (servicios, firmantes, 1 a N materiales por orden)
+de varios tamaños, los escribe en un directorio temporal con el backend elegido
+y mide cada etapa de la aplicación:
+
+- carga_inicial:       primer OrdenesCompartidas.vista() (parseo del historial)
+- consecutivos:        reservar los siguientes números de orden y solicitud
+- duplicados:          comprobación de orden/solicitud existente (por consulta)
+- guardar_orden:       reservar + confirmar una orden (persistencia en disco)
+- excel:               escribir_excel del historial completo (y excel_incremental: solo el último día)
+- html_orden:          generar_html_orden de una orden
+- dataframe_historial: consulta filtrada + DataFrame de una página del historial
+- busqueda:            búsqueda de texto libre
+- indicadores:         recálculo completo de los indicadores con pandas
+
+Cada corrida se anexa como una línea JSON a --salida (por defecto
+benchmarks/resultados.jsonl) con la fecha, el commit y los tiempos, para poder
+comparar corridas entre sí (--comparar muestra la relación con la anterior).
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_ordenes.py [--escalas 1000,10000,100000] [--almacen json|sqlite|particionado] [--comparar]
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nucleo.almacenamiento import guardar_json_atomico, crear_almacen  # noqa: E402
+from nucleo.analitica import recalcular  # noqa: E402
+from nucleo.asignador import AsignadorConsecutivos  # noqa: E402
+from nucleo.compartido import OrdenesCompartidas  # noqa: E402
+from nucleo.exportacion import escribir_excel  # noqa: E402
+from nucleo.logo import LOGO_URL  # noqa: E402
+from nucleo.materiales import CAMPO_MATERIALES, nuevo_material  # noqa: E402
+from nucleo.numeracion import generar_solicitud_nro  # noqa: E402
+from nucleo.particiones import escribir_particiones  # noqa: E402
+from nucleo.opciones import DEPENDENCIAS, SERVICIOS_SOLICITUD, TIPOS_MANTENIMIENTO  # noqa: E402
+from nucleo import renderizado  # noqa: E402
+
+ESCALAS = (1_000, 10_000, 100_000)
+SALIDA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados.jsonl')
+
+FIRMANTES = {
+    "Elaboro": ["Magaly Gómez - Técnica", "Oscar Muñoz - Operario", "Luis Pardo - Electricista"],
+    "Reviso": ["Danna Hernandez - Coordinadora Mantenimiento", "Hery Peña - Biomédico"],
+    "Aprobo": ["Luis Rodríguez - Gerente", "Marta Salazar - Subgerente Administrativa"],
+}
+MATERIALES = [
+    ("Bombillo LED 18W", "UNIDAD"), ("Cable encauchetado 3x12", "METRO"), ("Tubería PVC 1/2", "METRO"),
+    ("Breaker 20A", "UNIDAD"), ("Tomacorriente doble", "UNIDAD"), ("Pintura tipo 1", "GALÓN"),
+    ("Silicona", "UNIDAD"), ("Filtro de aire acondicionado", "UNIDAD"), ("Cinta aislante", "ROLLO"),
+    ("Chapa de seguridad", "UNIDAD"), ("Grifo lavamanos", "UNIDAD"), ("Sensor de oximetría", "UNIDAD"),
+]
+MOTIVOS = [
+    "Falla en lámpara de {s}", "Cambio de tomacorriente en {s}", "Mantenimiento preventivo de ventilador en {s}",
+    "Fuga de agua en baño de {s}", "Revisión de aire acondicionado de {s}", "Puerta descuadrada en {s}",
+    "Calibración de monitor de signos vitales en {s}", "Pintura de pared en {s}",
+]
+MAX_MATERIALES = 6
+
+
+def generar_ordenes(n, semilla=0):
+    """`n` órdenes sintéticas (números y solicitudes 1..n) con fechas crecientes."""
+    rnd = random.Random(semilla)
+    inicio = date.today() - timedelta(days=max(365, n // 20))
+    paso = (date.today() - inicio).days / max(n, 1)
+    ordenes = []
+    for i in range(n):
+        servicio = rnd.choice(SERVICIOS_SOLICITUD)
+        materiales = [nuevo_material(item, unidad, rnd.randint(1, 20))
+                      for item, unidad in rnd.sample(MATERIALES, rnd.randint(1, MAX_MATERIALES))]
+        ordenes.append({
+            "Número de Orden": i + 1,
+            "Solicitud N°": generar_solicitud_nro(i + 1),
+            "Fecha": (inicio + timedelta(days=int(i * paso))).strftime("%Y-%m-%d"),
+            "Dependencia Solicitante": rnd.choice(DEPENDENCIAS),
+            "Servicio Aplicado": servicio,
+            "Responsable Designado": rnd.choice(FIRMANTES["Reviso"]),
+            "Motivo": rnd.choice(MOTIVOS).format(s=servicio.title()),
+            "Tipo de Mantenimiento": rnd.choice(TIPOS_MANTENIMIENTO),
+            CAMPO_MATERIALES: materiales,
+            "Elaboró": rnd.choice(FIRMANTES["Elaboro"]),
+            "Revisó": rnd.choice(FIRMANTES["Reviso"]),
+            "Aprobó": rnd.choice(FIRMANTES["Aprobo"]),
+        })
+    return ordenes
+
+
+def directorio_sintetico():
+    return {rol: {nombre: {"display": nombre, "cc": str(100000 + i)} for i, nombre in enumerate(nombres)}
+            for rol, nombres in FIRMANTES.items()}
+
+
+def cronometrar(funcion, repeticiones=1):
+    """Segundos promedio por repetición de `funcion()`."""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def escribir_historial(ordenes, tipo, carpeta):
+    """Deja el historial en disco como lo tendría la aplicación y devuelve las rutas del backend."""
+    if tipo == 'sqlite':
+        rutas = {'db_path': os.path.join(carpeta, 'ordenes.db')}
+        crear_almacen(tipo, **rutas).agregar_ordenes(ordenes)
+    elif tipo == 'particionado':
+        rutas = {
+            'carpeta': os.path.join(carpeta, 'ordenes_anuales'),
+            'directorio_path': os.path.join(carpeta, 'directorio_data.json'),
+        }
+        escribir_particiones(ordenes, rutas['carpeta'])
+    else:
+        rutas = {
+            'ordenes_path': os.path.join(carpeta, 'ordenes_data.json'),
+            'diario_path': os.path.join(carpeta, 'ordenes_diario.jsonl'),
+            'directorio_path': os.path.join(carpeta, 'directorio_data.json'),
+        }
+        guardar_json_atomico(ordenes, rutas['ordenes_path'], indent=None)
+    return rutas
+
+
+def medir_escala(n, tipo, repeticiones):
+    """Tiempos (segundos) de cada etapa para un historial de `n` órdenes."""
+    import pandas as pd
+
+    resultados = {}
+    carpeta = tempfile.mkdtemp(prefix=f'bench_{n}_')
+    try:
+        ordenes = generar_ordenes(n)
+        rutas = escribir_historial(ordenes, tipo, carpeta)
+        del ordenes
+
+        compartidas = OrdenesCompartidas(crear_almacen(tipo, **rutas))
+        resultados['carga_inicial'] = cronometrar(compartidas.vista)
+        vista = compartidas.vista()
+
+        asignador = AsignadorConsecutivos(compartidas, os.path.join(carpeta, 'reservas.json'))
+        resultados['consecutivos'] = cronometrar(lambda: asignador.reservar('bench'), repeticiones)
+
+        rnd = random.Random(1)
+        indice = compartidas.indice
+        consultas = [rnd.randint(1, 2 * n) for _ in range(1000)]
+        resultados['duplicados'] = cronometrar(
+            lambda: [indice.existe_orden(c) or indice.existe_solicitud(generar_solicitud_nro(c)) for c in consultas]
+        ) / len(consultas)
+
+        plantilla = generar_ordenes(1, semilla=2)[0]
+
+        def guardar():
+            reserva = asignador.reservar('bench')
+            orden = dict(plantilla, **{"Número de Orden": reserva['orden'],
+                                       "Solicitud N°": generar_solicitud_nro(reserva['solicitud'])})
+            asignador.confirmar('bench', orden)
+        resultados['guardar_orden'] = cronometrar(guardar, repeticiones)
+
+        vista = compartidas.vista()
+        resultados['excel'] = cronometrar(lambda: escribir_excel(io.BytesIO(), vista, compartidas.columnas))
+        guardar()
+        resultados['excel_incremental'] = cronometrar(
+            lambda: escribir_excel(io.BytesIO(), compartidas.vista(), compartidas.columnas, desde=vista[-1]['Fecha']))
+
+        directorio = directorio_sintetico()
+        muestra = [vista[rnd.randrange(len(vista))] for _ in range(repeticiones)]
+        resultados['html_orden'] = cronometrar(
+            lambda: [renderizado.generar_html_orden(o, directorio, LOGO_URL) for o in muestra]) / len(muestra)
+
+        vista = compartidas.vista()
+        filtros = {'desde': vista[len(vista) // 2]['Fecha'], 'hasta': None,
+                   "Servicio Aplicado": "UCI ADULTOS", "Tipo de Mantenimiento": "Correctivo"}
+
+        def pagina_historial():
+            posiciones = compartidas.consultar(vista, filtros)
+            return pd.DataFrame([vista[i] for i in posiciones[:50]])
+        resultados['dataframe_historial'] = cronometrar(pagina_historial, repeticiones)
+        resultados['busqueda'] = cronometrar(lambda: compartidas.consultar(vista, {}, "ventilador uci"), repeticiones)
+        resultados['indicadores'] = cronometrar(lambda: recalcular(vista))
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+    return resultados
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _ultima_corrida(salida):
+    try:
+        with open(salida, encoding='utf-8') as f:
+            lineas = [l for l in f if l.strip()]
+    except FileNotFoundError:
+        return None
+    return json.loads(lineas[-1]) if lineas else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del flujo de órdenes con datos sintéticos.")
+    parser.add_argument('--escalas', default=','.join(str(e) for e in ESCALAS),
+                        help="Tamaños del historial separados por comas (ej. 1000,10000,100000,1000000).")
+    parser.add_argument('--almacen', default='json', choices=['json', 'sqlite', 'particionado'])
+    parser.add_argument('--repeticiones', type=int, default=20, help="Repeticiones de las etapas rápidas.")
+    parser.add_argument('--salida', default=SALIDA, help="Archivo JSONL donde se anexan los resultados.")
+    parser.add_argument('--comparar', action='store_true', help="Comparar con la corrida anterior de --salida.")
+    args = parser.parse_args(argv)
+
+    anterior = _ultima_corrida(args.salida) if args.comparar else None
+    corrida = {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "almacen": args.almacen,
+        "resultados": {},
+    }
+    for n in (int(e) for e in args.escalas.split(',') if e.strip()):
+        print(f"== {n} órdenes ({args.almacen}) ==")
+        resultados = medir_escala(n, args.almacen, args.repeticiones)
+        corrida["resultados"][str(n)] = resultados
+        previos = (anterior or {}).get("resultados", {}).get(str(n), {})
+        for etapa, segundos in resultados.items():
+            linea = f"  {etapa:<22}{segundos * 1000:>12.3f} ms"
+            if previos.get(etapa):
+                linea += f"   x{segundos / previos[etapa]:.2f} vs {anterior['commit'] or 'anterior'}"
+            print(linea)
+
+    with open(args.salida, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(corrida, ensure_ascii=False) + '\n')
+    print(f"Resultados anexados a {args.salida}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,39 +1,83 @@
 import streamlit as st
-import pandas as pd
 from datetime import date
-import io
-import json
 import os # Importamos os para gestionar archivos
+import time
+import uuid
+from functools import partial
+from nucleo.almacenamiento import (
+    ORDENES_DATA_FILE, DIRECTORIO_DATA_FILE, ErrorAlmacenamiento, crear_almacen, guardar_json_atomico
+)
+from nucleo.asignador import DURACION_RESERVA, AsignadorConsecutivos, ConsecutivoNoDisponible
+from nucleo.compartido import OrdenesCompartidas
+from nucleo.directorio import DIRECTORIO_INICIAL, ROLES, CedulaDuplicada, DirectorioFirmantes
+from nucleo.exportacion import escribir_excel
+from nucleo import analitica, estados, importacion, metricas, registro, renderizado, tareas
+from nucleo.materiales import CAMPO_MATERIALES, formatear_materiales, nuevo_material
+from nucleo.numeracion import generar_solicitud_nro
+from nucleo.opciones import DEPENDENCIAS, SERVICIOS_SOLICITUD, TIPOS_MANTENIMIENTO
 
 # =========================================================================
 # === 0. FUNCIONES ESENCIALES INICIALES Y MANEJO DE ARCHIVOS ===
 # =========================================================================
 
-# Nombres de archivos para persistencia
-ORDENES_DATA_FILE = 'ordenes_data.json'
-DIRECTORIO_DATA_FILE = 'directorio_data.json'
-LOGO_URL = "https://yt3.googleusercontent.com/ytc/AIdro_mbSWHDUC7Kw_vwBstPvA2M0-SynIdMOdiq1oLmPP6RAGw=s900-c-k-c0x00ffffff-no-rj" 
+# Inicio del rerun (métricas por etapa, ver nucleo.metricas; sin costo si están desactivadas)
+inicio_rerun = time.perf_counter()
 
-def generar_solicitud_nro(current_num):
-    """Genera el formato de solicitud (ej. '09-11') a partir del número base."""
-    return f"09-{current_num:02d}"
+# Los nombres de archivos de persistencia viven en nucleo.almacenamiento y el
+# logo/plantilla de impresión en nucleo.renderizado
+
+@st.cache_resource
+def obtener_almacen():
+    """Backend de almacenamiento (JSON o SQLite según MC_ORDENES_ALMACEN), uno por proceso."""
+    return crear_almacen()
+
+@st.cache_resource
+def obtener_ordenes_compartidas():
+    """Historial de órdenes compartido por todas las sesiones (se parsea una sola vez)."""
+    return OrdenesCompartidas(obtener_almacen())
+
+@st.cache_resource
+def obtener_asignador():
+    """Asignador de consecutivos con reservas, compartido por todas las sesiones."""
+    return AsignadorConsecutivos(obtener_ordenes_compartidas())
+
+@st.cache_resource
+def obtener_tareas():
+    """Exportaciones en segundo plano (Excel y lotes), compartidas por todas las sesiones."""
+    return tareas.GestorTareas()
+
+@st.cache_resource
+def obtener_indicadores():
+    """Contadores pre-agregados de la pestaña de indicadores (persistidos en disco)."""
+    return analitica.IndicadoresOrdenes()
+
+almacen = obtener_almacen()
+ordenes_compartidas = obtener_ordenes_compartidas()
+asignador = obtener_asignador()
 
 def cargar_datos_persistentes(file_path, default_value):
-    """Carga datos desde un archivo JSON o devuelve el valor por defecto si falla."""
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, 'r') as f:
-                return json.load(f)
-        except Exception:
-            # Si hay error al leer o el archivo está corrupto, usa el valor por defecto
-            return default_value
-    return default_value
+    """Carga datos persistentes desde el backend configurado.
+
+    Para las órdenes devuelve una vista de solo lectura del historial compartido.
+    """
+    try:
+        if file_path == ORDENES_DATA_FILE:
+            return ordenes_compartidas.vista()
+        if file_path == DIRECTORIO_DATA_FILE:
+            return almacen.cargar_directorio(default_value)
+        return default_value
+    except ErrorAlmacenamiento as e:
+        # No continuamos con datos vacíos: el siguiente guardado borraría el historial
+        st.error(f"Error al cargar los datos: {e}")
+        st.stop()
 
 def guardar_datos_persistentes(data, file_path):
-    """Guarda datos en un archivo JSON."""
+    """Guarda datos en el backend configurado (escritura atómica)."""
     try:
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=4)
+        if file_path == DIRECTORIO_DATA_FILE:
+            almacen.guardar_directorio(data)
+        else:
+            guardar_json_atomico(data, file_path)
         return True
     except Exception as e:
         st.error(f"Error al guardar los datos en {file_path}: {e}")
@@ -43,63 +87,85 @@ def guardar_datos_persistentes(data, file_path):
 # === 1. CONFIGURACIÓN Y ESTADO INICIAL ===
 # =========================================================================
 
-# Listas de Opciones Fijas
-DEPENDENCIAS = ["Electrico", "Infraestructura", "Biomedico", "Otro"]
-TIPOS_MANTENIMIENTO = ["Correctivo", "Preventivo", "Predictivo", "Inspección", "Instalación"]
-
-SERVICIOS_SOLICITUD = [
-    "UCI ADULTOS", "PEDIATRIA", "GINECOLOGIA", "CALL CENTER", 
-    "CONSULTA EXTERNA", "APS", "UCI NEONATAL", "UCI INTERMEDIA", 
-    "CIRUGIA", "HOSPITALIZACION", "URGENCIAS", "ODONTOLOGÍA", 
-    "FISIOTERAPIA", "P Y P", "LABORATORIO", "GASTROENTEROLOGÍA", "OTRO"
-]
-
-# Directorio de Trabajadores/Firmantes INICIAL (Usado como fallback)
-DIRECTORIO_TRABAJADORES_INICIAL = {
-    "Elaboro": {
-        "Magaly Gómez - Técnica": {"display": "Magaly Gómez - Técnica", "cc": "111111"},
-        "Oscar Muñoz - Operario": {"display": "Oscar Muñoz - Operario", "cc": "222222"}
-    },
-    "Reviso": {
-        "Danna Hernandez - Coordinadora Mantenimiento": {"display": "Danna Hernandez - Coordinadora Mantenimiento", "cc": "333333"},
-        "Hery Peña - Biomédico": {"display": "Hery Peña - Biomédico", "cc": "444444"},
-        "Jefe de Mantenimiento - Ingeniería": {"display": "Jefe de Mantenimiento - Ingeniería", "cc": "555555"}
-    },
-    "Aprobo": {
-        "Gerente de Operaciones - Gerente": {"display": "Gerente de Operaciones - Gerente", "cc": "666666"},
-        "Jefe de Almacén - Logística": {"display": "Jefe de Almacén - Logística", "cc": "777777"}
-    }
+# Listas de Opciones Fijas (DEPENDENCIAS, TIPOS_MANTENIMIENTO, SERVICIOS_SOLICITUD) en nucleo.opciones
+
+# Opciones del historial paginado
+OPCION_TODOS = "(Todos)"
+TAMANOS_PAGINA = [25, 50, 100, 200]
+# Órdenes que se muestran en la tabla de trabajo abierto (las más recientes)
+LIMITE_TRABAJO = 200
+FILA_MATERIAL_VACIA = {"Ítem": "", "Unidad": "UNIDAD", "Cantidad": 0}
+# Exportaciones que se muestran en el panel de descargas de la sesión y cada cuánto se consulta su avance
+TAREAS_SESION = 5
+INTERVALO_TAREAS = 1.0
+CAMPOS_TRABAJO = ["Número de Orden", "Fecha", "Servicio Aplicado", "Responsable Designado", "Motivo", CAMPO_MATERIALES]
+
+# Widgets de pestañas que solo se ejecutan abiertas: Streamlit descarta el estado
+# de un widget que no se dibujó en el rerun, así que se reasigna mientras están cerradas
+CLAVES_PERSISTENTES = {
+    'historial': ['hist_busqueda', 'hist_filtrar_fechas', 'hist_desde', 'hist_hasta', 'hist_servicio', 'hist_tipo',
+                  'hist_dependencia', 'hist_responsable', 'hist_tamano_pagina', 'hist_pagina',
+                  'excel_filtrar_fechas', 'excel_desde', 'excel_hasta', 'excel_por_mes'],
+    'trabajo': ['trabajo_estado', 'trabajo_responsable', 'trabajo_almacen', 'trabajo_numero', 'trabajo_usuario'],
+    'indicadores': ['indicadores_dimension'],
 }
 
+# Directorio de Trabajadores/Firmantes INICIAL (fallback sin archivo) en nucleo.directorio, compartido con la CLI
+
 
 # --- Inicializar el estado de la sesión CARGANDO LOS DATOS ---
 
+if metricas.HABILITADO and 'metricas_sesion' not in st.session_state:
+    st.session_state.metricas_sesion = metricas.RegistroTiempos()
+metricas_sesion = st.session_state.get('metricas_sesion')
+
 if 'directorio_personal' not in st.session_state:
-    st.session_state.directorio_personal = cargar_datos_persistentes(DIRECTORIO_DATA_FILE, DIRECTORIO_TRABAJADORES_INICIAL)
+    st.session_state.directorio_personal = DirectorioFirmantes(
+        cargar_datos_persistentes(DIRECTORIO_DATA_FILE, DIRECTORIO_INICIAL)
+    )
 
-if 'orden_data' not in st.session_state:
-    st.session_state.orden_data = cargar_datos_persistentes(ORDENES_DATA_FILE, [])
+# Vista del historial compartido; incorpora lo guardado por otras sesiones en cada rerun
+with metricas.medir('carga_historial', metricas_sesion):
+    orden_data = cargar_datos_persistentes(ORDENES_DATA_FILE, [])
 
-# Determinar consecutivos a partir de los datos cargados o valores iniciales
-ult_orden = max([d['Número de Orden'] for d in st.session_state.orden_data] or [928])
-ult_solicitud_str = max([d['Solicitud N°'] for d in st.session_state.orden_data if d['Solicitud N°'].startswith('09-')] or ['09-10'])
-try:
-    ult_solicitud = int(ult_solicitud_str.split('-')[-1])
-except ValueError:
-    ult_solicitud = 10
+# Consecutivos desde el índice de números usados (máximos mantenidos al guardar, O(1))
+indice_consecutivos = ordenes_compartidas.indice
 
-if 'siguiente_orden_numero' not in st.session_state:
-    st.session_state.siguiente_orden_numero = ult_orden + 1
-    
-if 'siguiente_solicitud_numero' not in st.session_state:
-    st.session_state.siguiente_solicitud_numero = ult_solicitud + 1
+def aplicar_reserva(reserva):
+    """Usa los consecutivos reservados como siguientes números del formulario."""
+    st.session_state.reserva_consecutivos = reserva
+    st.session_state.siguiente_orden_numero = reserva['orden']
+    st.session_state.siguiente_solicitud_numero = reserva['solicitud']
+    # Los campos del formulario se llenan desde sus claves al inicio del próximo
+    # rerun (la clave de un widget no se puede escribir después de crearlo)
+    st.session_state.numeros_reservados = True
 
-# Variables para guardar los valores editados
-if 'current_orden_nro_input' not in st.session_state:
-    st.session_state.current_orden_nro_input = st.session_state.siguiente_orden_numero
+# Cada sesión reserva sus consecutivos para que dos técnicos no reciban el mismo número
+if 'token_reserva' not in st.session_state:
+    st.session_state.token_reserva = uuid.uuid4().hex
 
-if 'current_solicitud_nro_input' not in st.session_state:
-    st.session_state.current_solicitud_nro_input = generar_solicitud_nro(st.session_state.siguiente_solicitud_numero)
+reserva_actual = st.session_state.get('reserva_consecutivos')
+if reserva_actual is None or reserva_actual['expira'] - time.time() < DURACION_RESERVA / 2:
+    try:
+        with metricas.medir('consecutivos', metricas_sesion):
+            reserva_nueva = asignador.reservar(st.session_state.token_reserva)
+    except ErrorAlmacenamiento as e:
+        st.error(f"No se pudieron reservar los consecutivos: {e}")
+        st.stop()
+    if reserva_actual is None or (reserva_nueva['orden'], reserva_nueva['solicitud']) != (reserva_actual['orden'], reserva_actual['solicitud']):
+        aplicar_reserva(reserva_nueva)
+    else:
+        # Renovación: se conservan los valores que el usuario haya editado
+        st.session_state.reserva_consecutivos = reserva_nueva
+
+# Números de una reserva nueva en los campos editables, antes de crear los widgets
+if st.session_state.pop('numeros_reservados', False) or 'orden_nro_input' not in st.session_state:
+    st.session_state.orden_nro_input = st.session_state.reserva_consecutivos['orden']
+    st.session_state.solicitud_nro_input = generar_solicitud_nro(st.session_state.reserva_consecutivos['solicitud'])
+
+# Filas iniciales del editor de materiales (el catálogo agrega ítems aquí)
+if 'materiales_base' not in st.session_state:
+    st.session_state.materiales_base = [dict(FILA_MATERIAL_VACIA) for _ in range(3)]
 
 # Bandera de control para la descarga
 if 'mostrar_descarga_ultima_orden' not in st.session_state:
@@ -113,248 +179,173 @@ if 'mostrar_descarga_ultima_orden' not in st.session_state:
 
 def guardar_orden(nueva_orden):
     """Guarda la orden, actualiza CONSECUTIVOS y GUARDA EN DISCO."""
-    st.session_state.orden_data.append(nueva_orden)
-    
-    # Lógica para actualizar los consecutivos
-    nro_orden_guardado = int(nueva_orden['Número de Orden'])
-    
+    # --- PASO CRÍTICO: GUARDAR EN DISCO (anexado al diario, sin reescribir el historial) ---
+    # Se confirma la reserva: comprobación de duplicados y anexado bajo bloqueo entre procesos
     try:
-        solicitud_num_guardado = int(nueva_orden['Solicitud N°'].split('-')[-1]) 
-    except ValueError:
-        solicitud_num_guardado = 0 
-
-    # Actualizar la Orden N°: Si el número guardado es >= al consecutivo, avanzamos el consecutivo.
-    if nro_orden_guardado >= st.session_state.siguiente_orden_numero:
-        st.session_state.siguiente_orden_numero = nro_orden_guardado + 1
-    
-    if solicitud_num_guardado >= st.session_state.siguiente_solicitud_numero:
-        st.session_state.siguiente_solicitud_numero = solicitud_num_guardado + 1
-        
-    st.session_state.current_orden_nro_input = st.session_state.siguiente_orden_numero
-    st.session_state.current_solicitud_nro_input = generar_solicitud_nro(st.session_state.siguiente_solicitud_numero)
+        with metricas.medir('guardar_orden', metricas_sesion):
+            asignador.confirmar(st.session_state.token_reserva, nueva_orden)
+    except ConsecutivoNoDisponible as e:
+        st.error(f"{e} Se asignaron nuevos consecutivos; revisa el formulario y vuelve a guardar.")
+        aplicar_reserva(asignador.reservar(st.session_state.token_reserva))
+        return False
+    except ErrorAlmacenamiento as e:
+        st.error(f"Error al guardar la orden: {e}")
+        return False
 
-    # --- PASO CRÍTICO: GUARDAR EN DISCO ---
-    guardar_datos_persistentes(st.session_state.orden_data, ORDENES_DATA_FILE)
+    # Reserva los consecutivos para la próxima orden de esta sesión
+    aplicar_reserva(asignador.reservar(st.session_state.token_reserva))
+    # Suma solo la orden nueva a los indicadores
+    obtener_indicadores().actualizar(ordenes_compartidas.vista())
 
     st.success(f"✅ Orden de Mantenimiento #{nueva_orden['Número de Orden']} guardada con éxito y **persistencia en disco**.")
+    return True
 
-@st.cache_data
-def convert_df_to_excel(df):
-    """Convierte un DataFrame a un archivo Excel (xlsx) en memoria."""
-    output = io.BytesIO()
-    df.to_excel(output, index=False, sheet_name='Ordenes_Mantenimiento')
-    processed_data = output.getvalue()
-    return processed_data
+@metricas.cronometrado('excel')
+def exportar_excel(desde, hasta, por_mes, progreso, salida):
+    """Escribe el Excel (xlsx) del historial; corre como tarea en segundo plano (nucleo.tareas).
+
+    Las filas salen del índice por fecha de la copia compartida y el archivo
+    terminado queda en disco, así que repetir la misma descarga no lo regenera.
+    """
+    progreso(0, "Cargando el historial")
+    # Con el historial particionado, primero se cargan los años archivados del rango
+    ordenes_compartidas.cargar_anios(desde, hasta)
+    escribir_excel(salida, ordenes_compartidas.vista(), ordenes_compartidas.columnas, desde, hasta, por_mes, progreso)
+
+@metricas.cronometrado('lote_html')
+def exportar_lote(por_numero, desde, hasta, como_zip, directorio, progreso, salida):
+    """HTML multipágina o ZIP de las órdenes del rango (números o fechas); tarea en segundo plano."""
+    # Solo se cargan los años archivados que pueden contener el rango pedido
+    if por_numero:
+        ordenes_compartidas.cargar_numeros(desde, hasta)
+        seleccion = [o for o in ordenes_compartidas.vista().cargadas() if desde <= o['Número de Orden'] <= hasta]
+    else:
+        ordenes_compartidas.cargar_anios(desde, hasta)
+        seleccion = [o for o in ordenes_compartidas.vista().cargadas() if desde <= o['Fecha'] <= hasta]
+    if not seleccion:
+        raise tareas.SinResultado("No hay órdenes en el rango seleccionado.")
+    seleccion.sort(key=lambda o: o['Número de Orden'])
+    seleccion = [ordenes_compartidas.con_despachos(o) for o in seleccion]
+    progreso(0, f"{len(seleccion)} órdenes")
+    if como_zip:
+        renderizado.generar_zip_lote(seleccion, directorio, progreso=progreso, salida=salida)
+    else:
+        salida.write(renderizado.generar_html_lote(seleccion, directorio, progreso=progreso).encode('utf-8'))
+
+def enviar_exportacion(clave, funcion, descripcion, nombre, mime):
+    """Encola una exportación y la agrega al panel de descargas de la sesión."""
+    tarea_id = obtener_tareas().enviar(clave, funcion, descripcion, nombre, mime)
+    ids = st.session_state.setdefault('tareas_exportacion', [])
+    if tarea_id in ids:
+        ids.remove(tarea_id)
+    ids.append(tarea_id)
+    del ids[:-TAREAS_SESION]
+
+def panel_exportaciones(sondeando):
+    """Avance y descarga de las exportaciones de la sesión.
+
+    Se dibuja como fragmento: mientras hay tareas en curso se vuelve a ejecutar solo
+    cada INTERVALO_TAREAS segundos, sin rerun completo; al terminar todas, un rerun
+    completo lo vuelve a crear sin intervalo.
+    """
+    gestor = obtener_tareas()
+    consultadas = [gestor.consultar(i) for i in st.session_state.get('tareas_exportacion', [])]
+    consultadas = [t for t in consultadas if t is not None]
+    st.session_state.tareas_exportacion = [t['id'] for t in consultadas]
+    if not consultadas:
+        return
+    st.subheader("Descargas")
+    for tarea in reversed(consultadas):
+        if tarea['estado'] == tareas.LISTA:
+            st.download_button(
+                label=f"⬇️ {tarea['descripcion']}",
+                data=partial(gestor.datos, tarea['id']),
+                file_name=tarea['nombre'],
+                mime=tarea['mime'],
+                on_click='ignore',
+                key=f"descarga_{tarea['id']}"
+            )
+        elif tarea['aviso']:
+            st.warning(f"{tarea['descripcion']}: {tarea['mensaje']}")
+        elif tarea['estado'] == tareas.FALLIDA:
+            st.error(f"Falló la exportación {tarea['descripcion']}: {tarea['mensaje']}")
+            if tarea['error'] is not None:
+                with st.expander("Detalle del error"):
+                    st.exception(tarea['error'])
+        else:
+            detalle = f" ({tarea['mensaje']})" if tarea['mensaje'] else ""
+            st.progress(tarea['progreso'], text=f"⏳ {tarea['descripcion']}{detalle}")
+    if sondeando and all(t['estado'] in tareas.TERMINADAS for t in consultadas):
+        st.rerun()
+
+def guardar_cambios_directorio(cambios):
+    """Persiste solo los firmantes agregados, modificados o eliminados."""
+    try:
+        almacen.aplicar_cambios_directorio(cambios, st.session_state.directorio_personal.como_dict())
+    except (ErrorAlmacenamiento, OSError) as e:
+        st.error(f"Error al guardar los datos en {DIRECTORIO_DATA_FILE}: {e}")
+        return False
+    return True
 
 def agregar_personal(rol, nombre, profesion, cc):
     nombre_key = f"{nombre} - {profesion}"
     if nombre_key and rol:
-        if nombre_key not in st.session_state.directorio_personal[rol]:
-            st.session_state.directorio_personal[rol][nombre_key] = {"display": nombre_key, "cc": cc}
-            sorted_keys = sorted(st.session_state.directorio_personal[rol].keys())
-            st.session_state.directorio_personal[rol] = {k: st.session_state.directorio_personal[rol][k] for k in sorted_keys}
-            
-            # --- PASO CRÍTICO: GUARDAR DIRECTORIO EN DISCO ---
-            guardar_datos_persistentes(st.session_state.directorio_personal, DIRECTORIO_DATA_FILE)
-            
+        try:
+            cambios = st.session_state.directorio_personal.agregar(rol, nombre_key, cc)
+        except CedulaDuplicada as e:
+            st.warning(f"⚠️ {e}")
+            return
+
+        # --- PASO CRÍTICO: GUARDAR DIRECTORIO EN DISCO (solo el registro nuevo) ---
+        if guardar_cambios_directorio(cambios):
             st.success(f"➕ **{nombre_key}** (C.C. {cc}) agregado a la lista de **{rol}**.")
-        else:
-            st.warning(f"⚠️ **{nombre_key}** ya existe en la lista de **{rol}**.")
 
 # Función para generar solo el HTML (MANTENIDA con el formato INSTITUCIONAL)
 def generar_html_orden(orden):
     """Genera una página HTML estructurada para la impresión a PDF, incluyendo el logo y formato institucional."""
-    
-    # Función de ayuda para buscar el CC del firmante.
-    def get_cc(rol, display_name):
-        directorio = st.session_state.directorio_personal.get(rol, {})
-        for key, value in directorio.items():
-            if value.get("display") == display_name:
-                return value.get("cc", "N/A")
-        return "N/A"
-
-    # --- Procesamiento de Materiales ---
-    materiales_html = ""
-    try:
-        if orden['Materiales Solicitados']:
-            items_raw = orden['Materiales Solicitados'].split('; ')
-            for item_full in items_raw:
-                if not item_full: continue 
-                try:
-                    nombre_y_resto = item_full.split('. ', 1)[-1].strip()
-                    parts = nombre_y_resto.rsplit(' (', 1)
-                    nombre_material = parts[0].strip()
-                    cantidad_unidad = parts[1].replace(')', '').strip() if len(parts) > 1 else 'N/A'
-                    
-                    cantidad_parts = cantidad_unidad.split(' ', 1)
-                    cantidad = cantidad_parts[0]
-                    unidad = cantidad_parts[1] if len(cantidad_parts) > 1 else 'UNIDAD'
-
-                    materiales_html += f"<tr><td>{nombre_material}</td><td>{unidad}</td><td>{cantidad}</td><td></td><td></td><td></td></tr>"
-                except Exception:
-                    materiales_html += f"<tr><td>{item_full}</td><td>N/A</td><td>N/A</td><td></td><td></td><td></td></tr>"
-        else:
-            materiales_html = "".join(["<tr><td></td><td></td><td></td><td></td><td></td><td></td></tr>"] * 3)
-            
-    except Exception:
-        materiales_html = "".join(["<tr><td>Error al cargar</td><td></td><td></td><td></td><td></td><td></td></tr>"] * 3)
-
-    # --- Obtener C.C. del personal de firma ---
-    elaboro_cc = get_cc("Elaboro", orden['Elaboró'])
-    reviso_cc = get_cc("Reviso", orden['Revisó'])
-    aprobo_cc = get_cc("Aprobo", orden['Aprobó'])
-    
-    style_content = """
-        body { font-family: Arial, sans-serif; font-size: 9pt; padding: 10px 20px; }
-        .container { border: 1px solid #000; padding: 0; }
-        h2, h3 { color: #333; margin: 0; padding: 0; text-align: center; font-size: 11pt; }
-        table { width: 100%; border-collapse: collapse; margin-bottom: 5px; }
-        th, td { border: 1px solid #000; padding: 4px; text-align: left; font-size: 9pt; vertical-align: middle; }
-        th { background-color: #f0f0f0; text-align: center; font-weight: bold; }
-        .header-table td { border: none; padding: 2px 4px; font-size: 8pt; }
-        .logo-cell { width: 15%; text-align: center; }
-        .logo-cell img { max-width: 80px; height: auto; }
-        .title-cell { width: 50%; text-align: center; font-size: 12pt; font-weight: bold; }
-        .info-cell { width: 35%; }
-        .info-table td { border: 1px solid #000; padding: 4px; }
-        .signature-area { display: flex; justify-content: space-around; margin-top: 20px; text-align: center; }
-        .signature-box { width: 30%; padding-top: 5px; margin-top: 15px; }
-        .signature-line { border-top: 1px solid #000; padding-top: 5px; margin-bottom: 5px; }
-        .firma-info { font-size: 8pt; }
-        .celda-vacia { height: 20px; }
-        .recepcion-box { 
-            margin-top: 10px; 
-            font-size: 9pt; 
-            border: 1px solid #000; 
-            padding: 5px;
-            /* Estilo específico para la línea de recibido */
-            display: flex;
-            justify-content: space-between;
-        }
-        .recepcion-text {
-             white-space: nowrap; 
-             overflow: hidden; 
-             text-overflow: clip;
-             flex-grow: 1;
-        }
-    """
-
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Orden de Mantenimiento N° {orden['Número de Orden']}</title>
-        <style>
-            {style_content}
-        </style>
-    </head>
-    <body>
-
-        <div class="container">
-            <table class="header-table">
-                <tr>
-                    <td rowspan="4" class="logo-cell" style="border-right: 1px solid #000;">
-                        <img src="{LOGO_URL}" alt="Logo del Hospital">
-                    </td>
-                    <td colspan="2" class="title-cell" style="border-bottom: 1px solid #000;">
-                        HOSPITAL REGIONAL ALFONSO JARAMILLO SALAZAR
-                    </td>
-                    <td class="info-cell" style="width: 20%;">
-                        <strong>Código:</strong> GTAF-A-05-P-EEC-FPA-01
-                    </td>
-                </tr>
-                <tr>
-                    <td colspan="2" class="title-cell" style="border-bottom: 1px solid #000;">
-                        GESTIÓN DE LA TECNOLOGÍA Y DEL AMBIENTE FÍSICO
-                    </td>
-                    <td class="info-cell">
-                        <strong>Versión:</strong> 02
-                    </td>
-                </tr>
-                <tr>
-                    <td colspan="2" class="title-cell">
-                        FORMATO: ORDEN DE MANTENIMIENTO
-                    </td>
-                    <td class="info-cell">
-                        <strong>Fecha Aprobación:</strong> 2014/01/02
-                    </td>
-                </tr>
-            </table>
-
-            <table>
-                <tr>
-                    <td style="width: 50%;"><strong>DEPENDENCIA SOLICITANTE:</strong> {orden['Dependencia Solicitante']}</td>
-                    <td style="width: 25%;"><strong>FECHA:</strong> {orden['Fecha']}</td>
-                    <td style="width: 25%;"><strong>SOLICITUD N°:</strong> {orden['Solicitud N°']}</td>
-                </tr>
-                <tr>
-                    <td colspan="3"><strong>SERVICIO APLICADO:</strong> {orden['Servicio Aplicado']}</td>
-                </tr>
-                <tr>
-                    <td colspan="3" class="celda-vacia"></td>
-                </tr>
-                <tr>
-                    <td colspan="3" style="text-align: center; background-color: #f0f0f0;"><strong>ORDEN DE MANTENIMIENTO N°:</strong> {orden['Número de Orden']}</td>
-                </tr>
-                <tr>
-                    <td colspan="3"><strong>RESPONSABLE DESIGNADO:</strong> {orden['Responsable Designado']}</td>
-                </tr>
-                <tr>
-                    <td colspan="3"><strong>TIPO DE MANTENIMIENTO:</strong> {orden['Tipo de Mantenimiento']}</td>
-                </tr>
-                <tr>
-                    <td colspan="3"><strong>MOTIVO / DESCRIPCIÓN DEL TRABAJO:</strong> {orden['Motivo']}</td>
-                </tr>
-            </table>
-
-            <h3>MATERIALES SOLICITADOS (PEDIDO ALMACÉN)</h3>
-            <table>
-                <tr>
-                    <th style="width: 35%;">DETALLE</th>
-                    <th style="width: 15%;">UNIDAD DE MEDIDA</th>
-                    <th style="width: 10%;">CANTIDAD PEDIDA</th>
-                    <th style="width: 10%;">CANTIDAD DESPACHADA</th>
-                    <th style="width: 10%;">VALOR UNITARIO</th>
-                    <th style="width: 20%;">VALOR TOTAL</th>
-                </tr>
-                {materiales_html}
-            </table>
-            
-            <div style="padding: 5px;">
-                <p style="font-size: 9pt;"><strong>OBSERVACIONES / CONCLUSIONES:</strong> __________________________________________________________________________________________________________________________________________________________</p>
-                
-                <table style="margin-top: 15px; border: none;">
-                    <tr style="border: none;">
-                        <td style="width: 33%; border: 1px solid #000; text-align: center; padding-bottom: 15px;">
-                            <div class="signature-line"></div>
-                            <span class="firma-info"><strong>ELABORÓ:</strong> {orden['Elaboró']}</span><br>
-                            <span class="firma-info">C.C.: {elaboro_cc}</span>
-                        </td>
-                        <td style="width: 34%; border: 1px solid #000; text-align: center; padding-bottom: 15px;">
-                            <div class="signature-line"></div>
-                            <span class="firma-info"><strong>REVISÓ:</strong> {orden['Revisó']}</span><br>
-                            <span class="firma-info">C.C.: {reviso_cc}</span>
-                        </td>
-                        <td style="width: 33%; border: 1px solid #000; text-align: center; padding-bottom: 15px;">
-                            <div class="signature-line"></div>
-                            <span class="firma-info"><strong>APROBÓ:</strong> {orden['Aprobó']}</span><br>
-                            <span class="firma-info">C.C.: {aprobo_cc}</span>
-                        </td>
-                    </tr>
-                </table>
-                
-                <div class="recepcion-box">
-                    <span style="white-space: nowrap;">RECIBIDO POR: ____________________________________________________________________</span>
-                    <span style="white-space: nowrap;">C.C.: _______________________________________________________________________</span>
-                </div>
+    with metricas.medir('html_orden', metricas_sesion):
+        # Con las cantidades despachadas y los valores registrados por almacén
+        return renderizado.generar_html_orden(ordenes_compartidas.con_despachos(orden), st.session_state.directorio_personal)
 
-            </div>
-            
-        </div>
-    </body>
-    </html>
-    """
-    return html_content
+def registrar_eventos_orden(eventos, mensaje):
+    """Guarda cambios de estado o despachos (eventos pequeños, sin reescribir la orden)."""
+    try:
+        ordenes_compartidas.registrar_eventos(eventos)
+    except ErrorAlmacenamiento as e:
+        st.error(f"No se guardó el cambio: {e}")
+        return False
+    # El aviso sobrevive al rerun que refresca la tabla
+    st.toast(mensaje, icon="✅")
+    return True
+
+def filas_materiales_actuales():
+    """Filas del editor de materiales con las ediciones ya aplicadas en la sesión."""
+    filas = [dict(fila) for fila in st.session_state.materiales_base]
+    cambios = st.session_state.get('materiales_editor') or {}
+    for i, valores in cambios.get('edited_rows', {}).items():
+        filas[int(i)].update(valores)
+    borradas = set(cambios.get('deleted_rows', []))
+    filas = [fila for i, fila in enumerate(filas) if i not in borradas]
+    filas += [dict(FILA_MATERIAL_VACIA, **fila) for fila in cambios.get('added_rows', [])]
+    return filas
+
+def agregar_material_catalogo(item, unidad):
+    """Pone un ítem del catálogo en la primera fila vacía del editor (o en una nueva)."""
+    filas = filas_materiales_actuales()
+    fila = next((f for f in filas if not (isinstance(f["Ítem"], str) and f["Ítem"].strip())), None)
+    if fila is None:
+        fila = dict(FILA_MATERIAL_VACIA)
+        filas.append(fila)
+    fila.update({"Ítem": item, "Unidad": unidad, "Cantidad": fila["Cantidad"] or 1})
+    # Datos nuevos para el editor: Streamlit lo reinicia con las ediciones ya incluidas
+    st.session_state.materiales_base = filas
+
+def cantidad_de(valor):
+    """Número de una celda del editor (entero si no tiene decimales), o None si está vacía."""
+    if valor is None or valor != valor:
+        return None
+    valor = float(valor)
+    return int(valor) if valor.is_integer() else valor
 
 # =========================================================================
 # === 3. INTERFAZ DE LA APLICACIÓN (PESTAÑAS) ===
@@ -363,28 +354,40 @@ def generar_html_orden(orden):
 st.title("Sistema Automatizado de Órdenes de Mantenimiento 🛠️")
 st.markdown("---")
 
-tab_orden, tab_historial, tab_personal = st.tabs(["📝 Nueva Orden", "📊 Historial y Descarga", "🧑‍💻 Gestión de Personal"])
+# Ejecución perezosa: historial, indicadores y personal solo corren con su pestaña
+# abierta (la de nueva orden siempre, para no perder el borrador del formulario)
+tab_orden, tab_historial, tab_trabajo, tab_indicadores, tab_personal = st.tabs(
+    ["📝 Nueva Orden", "📊 Historial y Descarga", "🔧 Trabajo Abierto", "📈 Indicadores", "🧑‍💻 Gestión de Personal"],
+    key='pestana_activa',
+    on_change='rerun'
+)
+for pestana, tab in (('historial', tab_historial), ('trabajo', tab_trabajo), ('indicadores', tab_indicadores)):
+    if not tab.open:
+        for clave in CLAVES_PERSISTENTES[pestana]:
+            if clave in st.session_state:
+                st.session_state[clave] = st.session_state[clave]
 
 # -------------------------------------------------------------------------
 # === PESTAÑA 1: NUEVA ORDEN DE MANTENIMIENTO ===
 # -------------------------------------------------------------------------
 with tab_orden:
-    
+    import pandas as pd  # Importaciones pesadas solo donde se usan
+
     if 'ultima_orden_guardada' not in st.session_state and st.session_state.mostrar_descarga_ultima_orden:
         st.session_state.mostrar_descarga_ultima_orden = False
 
-
-    with st.form(key='orden_form'):
+    # Contenedor en lugar de st.form: el catálogo de materiales sugiere mientras se escribe
+    with st.container(border=True):
         
         # --- Campo de Número de Orden EDITABLE ---
         col_title_1, col_title_2 = st.columns([0.6, 0.4])
         with col_title_1:
              st.subheader("Datos de la Orden")
         with col_title_2:
-            st.session_state.current_orden_nro_input = st.number_input(
+            # Valor inicial desde st.session_state.orden_nro_input (ver aplicar_reserva)
+            st.number_input(
                 "**Número de Orden** (Editable)", 
                 min_value=1,
-                value=int(st.session_state.current_orden_nro_input),
                 step=1,
                 key='orden_nro_input',
                 help="Puedes cambiar el número si necesitas reasignar un consecutivo."
@@ -396,9 +399,8 @@ with tab_orden:
             st.text_input("Fecha", value=fecha_actual, disabled=True)
         with col2:
             # --- Campo de Solicitud N° EDITABLE ---
-            st.session_state.current_solicitud_nro_input = st.text_input(
+            st.text_input(
                 "**Solicitud N°** (Editable)", 
-                value=st.session_state.current_solicitud_nro_input, 
                 help="Formato: 09-XX. ¡Edita si necesitas reasignar!",
                 key='solicitud_nro_input'
             )
@@ -420,38 +422,60 @@ with tab_orden:
         # --- Campo de Responsable (Flexible) ---
         st.markdown("### Responsable Designado")
         
-        opciones_elaboro = [data["display"] for data in st.session_state.directorio_personal["Elaboro"].values()]
-        opciones_reviso = [data["display"] for data in st.session_state.directorio_personal["Reviso"].values()]
-        opciones_responsable = sorted(list(set(opciones_elaboro + opciones_reviso)))
+        # Listas memorizadas en el directorio (se recalculan solo si cambia)
+        opciones_elaboro = st.session_state.directorio_personal.opciones("Elaboro")
+        opciones_reviso = st.session_state.directorio_personal.opciones("Reviso")
         
         responsable_designado = st.selectbox(
             "Responsable Designado para la Ejecución", 
-            options=opciones_responsable,
+            options=st.session_state.directorio_personal.responsables(),
             help="Puede ser cualquier persona de los roles 'Elaboró' o 'Revisó'."
         )
         
-        # --- Solicitud de Materiales (Máx. 3 Ítems) ---
-        st.markdown("### Solicitud de Materiales (Máx. 3 Ítems)")
+        # --- Solicitud de Materiales (sin límite de ítems) ---
+        st.markdown("### Solicitud de Materiales")
+        # Catálogo: sugerencias del historial; la elegida ocupa la primera fila vacía de la tabla
+        with st.expander("🔎 Catálogo de Materiales"):
+            texto_material = st.text_input("Buscar material", key='catalogo_busqueda', placeholder="Ej.: bombillo",
+                                           help="Sugerencias del historial, las más pedidas primero. "
+                                                "Al elegir una, ocupa la primera fila vacía de la tabla.")
+            with metricas.medir('catalogo_sugerencias', metricas_sesion):
+                sugerencias = ordenes_compartidas.materiales.sugerir(texto_material)
+            if texto_material and not sugerencias:
+                st.caption("Sin coincidencias en el catálogo; escriba el ítem directamente en la tabla.")
+            for i, (item_sugerido, unidad_sugerida, veces) in enumerate(sugerencias):
+                st.button(f"➕ {item_sugerido} ({unidad_sugerida}) · pedido {veces} {'vez' if veces == 1 else 'veces'}",
+                          key=f'catalogo_sugerencia_{i}', on_click=agregar_material_catalogo,
+                          args=(item_sugerido, unidad_sugerida))
+            st.caption(f"{len(ordenes_compartidas.materiales)} materiales distintos en el catálogo.")
+        materiales_editados = st.data_editor(
+            pd.DataFrame(st.session_state.materiales_base, columns=list(FILA_MATERIAL_VACIA)),
+            column_config={
+                "Ítem": st.column_config.TextColumn("Ítem Solicitado", help="Ej: Bombillo LED"),
+                "Unidad": st.column_config.TextColumn("Unidad", default="UNIDAD"),
+                "Cantidad": st.column_config.NumberColumn("Cantidad", min_value=0, step=1, default=0),
+            },
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            key='materiales_editor'
+        )
         materiales = []
-        for i in range(1, 4):
-            st.markdown(f"**Ítem {i}:**")
-            col_m1, col_m2, col_m3 = st.columns(3)
-            with col_m1:
-                item = st.text_input(f"Ítem Solicitado {i}", key=f"item_{i}", placeholder="Ej: Bombillo LED")
-            with col_m2:
-                unidad = st.text_input(f"Unidad {i}", value="UNIDAD", key=f"unidad_{i}")
-            with col_m3:
-                cantidad = st.number_input(f"Cantidad {i}", min_value=0, step=1, value=0, key=f"cantidad_{i}")
-            
-            if item and cantidad > 0:
-                materiales.append(f"{i}. {item} ({cantidad} {unidad})")
+        for fila in materiales_editados.to_dict('records'):
+            item = fila["Ítem"].strip() if isinstance(fila["Ítem"], str) else ""
+            unidad = fila["Unidad"].strip() if isinstance(fila["Unidad"], str) and fila["Unidad"].strip() else "UNIDAD"
+            cantidad = fila["Cantidad"]
+            if item and pd.notna(cantidad) and cantidad > 0:
+                # La escritura más usada del catálogo: "BOMBILLO LED" se guarda como "Bombillo LED"
+                item = (ordenes_compartidas.materiales.buscar(item) or (item,))[0]
+                materiales.append(nuevo_material(item, unidad, int(cantidad)))
 
         st.markdown("---")
 
         # --- Firmas/Roles de Flujo ---
         st.subheader("Personal de Flujo y Firmas")
         
-        opciones_aprobo = [data["display"] for data in st.session_state.directorio_personal["Aprobo"].values()]
+        opciones_aprobo = st.session_state.directorio_personal.opciones("Aprobo")
         
         col_e, col_r, col_a = st.columns(3)
         with col_e:
@@ -463,13 +487,13 @@ with tab_orden:
 
         st.markdown("---")
         
-        submit_button = st.form_submit_button(label='Guardar Orden y Generar Siguiente Consecutivo')
+        submit_button = st.button(label='Guardar Orden y Generar Siguiente Consecutivo', type='primary')
 
         if submit_button:
             
             # --- Validaciones ---
             try:
-                orden_nro_final = int(st.session_state.current_orden_nro_input)
+                orden_nro_final = int(st.session_state.orden_nro_input)
                 if orden_nro_final <= 0:
                      st.error("El Número de Orden debe ser un número entero positivo.")
                      st.stop()
@@ -477,19 +501,17 @@ with tab_orden:
                 st.error("El Número de Orden debe ser un número entero válido.")
                 st.stop()
                 
-            solicitud_nro_final = st.session_state.current_solicitud_nro_input
+            solicitud_nro_final = st.session_state.solicitud_nro_input
             if not solicitud_nro_final.startswith('09-') or not solicitud_nro_final.split('-')[-1].isdigit():
                 st.error("El Número de Solicitud debe seguir el formato '09-XX'.")
                 st.stop()
                 
-            nros_existentes = [d["Número de Orden"] for d in st.session_state.orden_data]
-            solicitudes_existentes = [d["Solicitud N°"] for d in st.session_state.orden_data]
-            
-            if orden_nro_final in nros_existentes:
+            # Búsquedas O(1) en el índice en lugar de recorrer el historial
+            if indice_consecutivos.existe_orden(orden_nro_final):
                  st.error(f"El Número de Orden **{orden_nro_final}** ya existe. Por favor, elige otro o revísalo.")
                  st.stop()
             
-            if solicitud_nro_final in solicitudes_existentes:
+            if indice_consecutivos.existe_solicitud(solicitud_nro_final):
                  st.error(f"El Número de Solicitud **{solicitud_nro_final}** ya existe. Por favor, elige otro o revísalo.")
                  st.stop()
                  
@@ -507,12 +529,13 @@ with tab_orden:
                 "Responsable Designado": responsable_designado,
                 "Motivo": motivo_orden,
                 "Tipo de Mantenimiento": tipo_mant,
-                "Materiales Solicitados": "; ".join(materiales),
+                "Materiales Solicitados": materiales,
                 "Elaboró": elaboro,
                 "Revisó": reviso,
                 "Aprobó": aprobo
             }
-            guardar_orden(nueva_orden)
+            if not guardar_orden(nueva_orden):
+                st.stop()
             
             st.session_state.ultima_orden_guardada = nueva_orden
             st.session_state.mostrar_descarga_ultima_orden = True
@@ -546,118 +569,447 @@ with tab_orden:
 # === PESTAÑA 2: HISTORIAL Y DESCARGA (Excel XLSX) ===
 # -------------------------------------------------------------------------
 with tab_historial:
-    st.header("Historial de Órdenes Guardadas")
+    if tab_historial.open:
+        import pandas as pd
+
+        st.header("Historial de Órdenes Guardadas")
     
-    if st.session_state.orden_data:
-        df = pd.DataFrame(st.session_state.orden_data)
-        st.dataframe(df, use_container_width=True)
+        if orden_data:
+            # --- Filtros (se resuelven con los índices por columna del historial compartido) ---
+            indice_columnas = ordenes_compartidas.columnas
+            texto_busqueda = st.text_input(
+                "🔎 Buscar en motivo, materiales y servicio",
+                placeholder="Ej.: ventilador uci neonatal",
+                key='hist_busqueda',
+                help="No distingue tildes ni mayúsculas; los resultados se ordenan por relevancia."
+            )
+            with st.expander("Filtros", expanded=False):
+                col_f1, col_f2 = st.columns(2)
+                with col_f1:
+                    filtro_fechas = st.checkbox("Filtrar por fecha", key='hist_filtrar_fechas')
+                    hist_desde = st.date_input("Fecha desde", value=date.today().replace(day=1), key='hist_desde',
+                                               disabled=not filtro_fechas)
+                    filtro_servicio = st.selectbox("Servicio Aplicado", [OPCION_TODOS] + indice_columnas.valores("Servicio Aplicado"),
+                                                   key='hist_servicio')
+                    filtro_tipo = st.selectbox("Tipo de Mantenimiento", [OPCION_TODOS] + indice_columnas.valores("Tipo de Mantenimiento"),
+                                               key='hist_tipo')
+                with col_f2:
+                    filtro_dependencia = st.selectbox("Dependencia Solicitante", [OPCION_TODOS] + indice_columnas.valores("Dependencia Solicitante"),
+                                                      key='hist_dependencia')
+                    hist_hasta = st.date_input("Fecha hasta", value=date.today(), key='hist_hasta',
+                                               disabled=not filtro_fechas)
+                    filtro_responsable = st.selectbox("Responsable Designado", [OPCION_TODOS] + indice_columnas.valores("Responsable Designado"),
+                                                      key='hist_responsable')
+
+            filtros_historial = {
+                'desde': hist_desde.strftime("%Y-%m-%d") if filtro_fechas else None,
+                'hasta': hist_hasta.strftime("%Y-%m-%d") if filtro_fechas else None,
+                "Servicio Aplicado": None if filtro_servicio == OPCION_TODOS else filtro_servicio,
+                "Dependencia Solicitante": None if filtro_dependencia == OPCION_TODOS else filtro_dependencia,
+                "Tipo de Mantenimiento": None if filtro_tipo == OPCION_TODOS else filtro_tipo,
+                "Responsable Designado": None if filtro_responsable == OPCION_TODOS else filtro_responsable,
+            }
+            with metricas.medir('historial_consulta', metricas_sesion):
+                posiciones = ordenes_compartidas.consultar(orden_data, filtros_historial, texto_busqueda)
+
+            # --- Paginación: solo se materializa la página visible ---
+            col_p1, col_p2 = st.columns(2)
+            with col_p1:
+                tamano_pagina = st.selectbox("Órdenes por página", TAMANOS_PAGINA, key='hist_tamano_pagina')
+            total_paginas = max(1, -(-len(posiciones) // tamano_pagina))
+            if st.session_state.get('hist_pagina', 1) > total_paginas:
+                # Los filtros redujeron el resultado: se vuelve a la última página disponible
+                st.session_state.hist_pagina = total_paginas
+            with col_p2:
+                pagina = st.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas,
+                                         step=1, key='hist_pagina')
+
+            inicio_pagina = (pagina - 1) * tamano_pagina
+            pagina_ordenes = [orden_data[i] for i in posiciones[inicio_pagina:inicio_pagina + tamano_pagina]]
+            if pagina_ordenes:
+                with metricas.medir('historial_dataframe', metricas_sesion):
+                    df = registro.tabla(pagina_ordenes)
+                    if CAMPO_MATERIALES in df.columns:
+                        df[CAMPO_MATERIALES] = df[CAMPO_MATERIALES].map(formatear_materiales)
+                st.dataframe(df, use_container_width=True, hide_index=True)
+                st.caption(f"Mostrando {inicio_pagina + 1}–{inicio_pagina + len(pagina_ordenes)} de {len(posiciones)} órdenes "
+                           f"(total en el historial: {len(orden_data)}).")
+                anios_archivados = ordenes_compartidas.anios_archivados()
+                if anios_archivados:
+                    st.caption(f"🗄️ Años archivados ({anios_archivados[0]}–{anios_archivados[-1]}): se cargan al "
+                               "filtrar, buscar, exportar o llegar a sus páginas.")
+            else:
+                st.info("Ninguna orden cumple la búsqueda y los filtros seleccionados.")
         
-        # Descarga (Excel)
-        excel_data = convert_df_to_excel(df)
-        st.download_button(
-            label="⬇️ Descargar Historial Completo (Excel XLSX)",
-            data=excel_data,
-            file_name=f'Ordenes_Mantenimiento_{date.today().strftime("%Y%m%d")}.xlsx',
-            mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 
-        )
+            # Descarga (Excel): el archivo se genera solo al pulsar el botón
+            with st.expander("Opciones de descarga (Excel)"):
+                filtrar_fechas = st.checkbox("Solo un rango de fechas", key='excel_filtrar_fechas')
+                col_e1, col_e2 = st.columns(2)
+                with col_e1:
+                    excel_desde = st.date_input("Desde", value=date.today().replace(day=1), key='excel_desde',
+                                                disabled=not filtrar_fechas)
+                with col_e2:
+                    excel_hasta = st.date_input("Hasta", value=date.today(), key='excel_hasta',
+                                                disabled=not filtrar_fechas)
+                excel_por_mes = st.checkbox("Una hoja por mes", key='excel_por_mes')
+            rango_excel = ((excel_desde.strftime("%Y-%m-%d"), excel_hasta.strftime("%Y-%m-%d"))
+                           if filtrar_fechas else (None, None))
+            # El archivo se genera en segundo plano; la sesión sigue respondiendo mientras tanto
+            if st.button("📦 Preparar Historial Completo (Excel XLSX)" if not filtrar_fechas
+                         else "📦 Preparar Historial del Rango (Excel XLSX)"):
+                enviar_exportacion(
+                    ('excel', len(orden_data), *rango_excel, excel_por_mes),
+                    partial(exportar_excel, *rango_excel, excel_por_mes),
+                    "Historial (Excel)" if not filtrar_fechas else f"Historial {rango_excel[0]} a {rango_excel[1]} (Excel)",
+                    f'Ordenes_Mantenimiento_{date.today().strftime("%Y%m%d")}.xlsx',
+                    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                )
+
+            # --- Reimpresión por lote (HTML multipágina o ZIP) ---
+            st.markdown("---")
+            st.subheader("Reimpresión de Órdenes por Lote")
+            with st.form("form_lote_html"):
+                criterio_lote = st.radio("Seleccionar por", ["Número de Orden", "Fecha"], horizontal=True)
+                col_l1, col_l2 = st.columns(2)
+                with col_l1:
+                    nro_desde = st.number_input("Orden desde", min_value=1, step=1,
+                                                value=max(1, indice_consecutivos.ultima_orden - 99))
+                    fecha_desde = st.date_input("Fecha desde", value=date.today().replace(day=1))
+                with col_l2:
+                    nro_hasta = st.number_input("Orden hasta", min_value=1, step=1, value=indice_consecutivos.ultima_orden)
+                    fecha_hasta = st.date_input("Fecha hasta", value=date.today())
+                formato_lote = st.radio("Formato", ["HTML único (una orden por hoja)", "ZIP (un archivo HTML por orden)"])
+                generar_lote = st.form_submit_button("Generar Lote")
+
+            if generar_lote:
+                if criterio_lote == "Número de Orden":
+                    rango_lote = (nro_desde, nro_hasta)
+                    sufijo_lote = f"{nro_desde}_a_{nro_hasta}"
+                else:
+                    rango_lote = (fecha_desde.strftime("%Y-%m-%d"), fecha_hasta.strftime("%Y-%m-%d"))
+                    sufijo_lote = f"{fecha_desde.strftime('%Y%m%d')}_a_{fecha_hasta.strftime('%Y%m%d')}"
+                como_zip = formato_lote.startswith("ZIP")
+                directorio_lote = st.session_state.directorio_personal
+                # La clave incluye lo que cambia el documento: órdenes, despachos y firmantes
+                enviar_exportacion(
+                    ('lote', criterio_lote, *rango_lote, como_zip, len(orden_data),
+                     ordenes_compartidas.estados.aplicados, directorio_lote.version),
+                    partial(exportar_lote, criterio_lote == "Número de Orden", *rango_lote, como_zip, directorio_lote),
+                    f"Lote {sufijo_lote.replace('_', ' ')} ({'ZIP' if como_zip else 'HTML'})",
+                    f'Ordenes_Mantenimiento_{sufijo_lote}.{"zip" if como_zip else "html"}',
+                    'application/zip' if como_zip else 'text/html',
+                )
+
+            # --- Exportaciones de la sesión (en curso y listas para descargar) ---
+            tareas_activas = any(
+                t is not None and t['estado'] not in tareas.TERMINADAS
+                for t in map(obtener_tareas().consultar, st.session_state.get('tareas_exportacion', [])))
+            st.fragment(panel_exportaciones, run_every=INTERVALO_TAREAS if tareas_activas else None)(tareas_activas)
         
-    else:
-        st.info("Aún no hay órdenes de mantenimiento registradas en esta sesión.")
+        else:
+            st.info("Aún no hay órdenes de mantenimiento registradas en esta sesión.")
+
+        # --- Importación masiva de órdenes históricas (Excel/CSV) ---
+        st.markdown("---")
+        with st.expander("📥 Importar Órdenes Históricas (Excel XLSX / CSV)"):
+            st.caption(
+                "Una orden por fila. Columnas obligatorias: Número de Orden, Solicitud N° (09-XX), Fecha, "
+                "Dependencia Solicitante y Servicio Aplicado. Opcionales: Responsable Designado, Motivo, "
+                "Tipo de Mantenimiento, Materiales Solicitados, Elaboró, Revisó y Aprobó."
+            )
+            with st.form("form_importar_ordenes"):
+                archivo_importacion = st.file_uploader("Archivo a importar", type=["xlsx", "csv"])
+                solo_validar = st.checkbox("Solo validar (no guardar)")
+                importar = st.form_submit_button("Validar e Importar")
+
+            if importar and archivo_importacion is not None:
+                try:
+                    with st.spinner("Validando archivo..."):
+                        ordenes_importadas, rechazos = importacion.preparar_importacion(
+                            archivo_importacion, indice_consecutivos, nombre=archivo_importacion.name)
+                    if ordenes_importadas and not solo_validar:
+                        with st.spinner(f"Guardando {len(ordenes_importadas)} órdenes..."):
+                            # Una sola escritura en el backend para todo el lote
+                            asignador.confirmar_lote(ordenes_importadas)
+                            obtener_indicadores().actualizar(ordenes_compartidas.vista())
+                        st.success(f"✅ {len(ordenes_importadas)} órdenes importadas al historial.")
+                    elif ordenes_importadas:
+                        st.info(f"{len(ordenes_importadas)} órdenes válidas (no se guardó nada).")
+                    if len(rechazos):
+                        st.warning(f"⚠️ {len(rechazos)} filas rechazadas.")
+                        st.dataframe(rechazos, use_container_width=True, hide_index=True)
+                        st.download_button(
+                            label="⬇️ Descargar Reporte de Rechazos (CSV)",
+                            data=rechazos.to_csv(index=False).encode('utf-8-sig'),
+                            file_name='rechazos_importacion.csv',
+                            mime='text/csv',
+                            key='download_rechazos_importacion'
+                        )
+                except (ValueError, ErrorAlmacenamiento) as e:
+                    st.error(f"No se pudo importar el archivo: {e}")
 
 
 # -------------------------------------------------------------------------
-# === PESTAÑA 3: GESTIÓN DE PERSONAL ===
+# === PESTAÑA 3: TRABAJO ABIERTO (estados y despachos de almacén) ===
+# -------------------------------------------------------------------------
+with tab_trabajo:
+    if tab_trabajo.open:
+        import pandas as pd
+
+        st.header("Trabajo Abierto")
+        estados_ordenes = ordenes_compartidas.estados
+        conteos = estados_ordenes.conteos()
+        col_t1, col_t2, col_t3, col_t4 = st.columns(4)
+        col_t1.metric("Abiertas", conteos[estados.ABIERTA])
+        col_t2.metric("En ejecución", conteos[estados.EN_EJECUCION])
+        col_t3.metric("Esperando almacén", conteos['esperando_almacen'])
+        col_t4.metric("Cerradas", conteos[estados.CERRADA])
+
+        # --- Cola de trabajo: cruces de los conjuntos por estado y por responsable ---
+        col_f1, col_f2, col_f3 = st.columns([0.35, 0.4, 0.25])
+        with col_f1:
+            filtro_estado = st.selectbox("Estado", [None, *estados.ESTADOS], key='trabajo_estado',
+                                         format_func=lambda e: "Pendientes (abiertas y en ejecución)" if e is None
+                                         else estados.ETIQUETAS[e])
+        with col_f2:
+            filtro_responsable = st.selectbox("Responsable Designado",
+                                              [OPCION_TODOS] + ordenes_compartidas.columnas.valores("Responsable Designado"),
+                                              key='trabajo_responsable')
+        with col_f3:
+            solo_almacen = st.checkbox("Solo esperando almacén", key='trabajo_almacen',
+                                       help="Órdenes pendientes con materiales sin despachar completos.")
+        with metricas.medir('trabajo_consulta', metricas_sesion):
+            total_trabajo, ordenes_trabajo = ordenes_compartidas.trabajo(
+                (filtro_estado,) if filtro_estado else None,
+                None if filtro_responsable == OPCION_TODOS else filtro_responsable,
+                solo_almacen, LIMITE_TRABAJO)
+        if ordenes_trabajo:
+            df_trabajo = registro.tabla(ordenes_trabajo, CAMPOS_TRABAJO)
+            df_trabajo.insert(1, "Estado", [estados.ETIQUETAS[estados_ordenes.estado(o['Número de Orden'])]
+                                            for o in ordenes_trabajo])
+            df_trabajo[CAMPO_MATERIALES] = df_trabajo[CAMPO_MATERIALES].map(formatear_materiales)
+            st.dataframe(df_trabajo, use_container_width=True, hide_index=True)
+            st.caption(f"Mostrando {len(ordenes_trabajo)} de {total_trabajo} órdenes.")
+        else:
+            st.info("Ninguna orden cumple los filtros seleccionados.")
+        if ordenes_compartidas.anios_archivados():
+            st.caption("🗄️ Las órdenes de años archivados entran a esta lista cuando su año se carga.")
+
+        # --- Cambio de estado y despacho de una orden ---
+        st.markdown("---")
+        st.subheader("Actualizar una Orden")
+        col_u1, col_u2 = st.columns(2)
+        with col_u1:
+            numero_trabajo = int(st.number_input("Número de Orden", min_value=1, step=1, key='trabajo_numero',
+                                                 value=max(1, indice_consecutivos.ultima_orden)))
+        with col_u2:
+            registrado_por = st.selectbox("Registrado por", st.session_state.directorio_personal.responsables(),
+                                          key='trabajo_usuario')
+        orden_trabajo = ordenes_compartidas.buscar(numero_trabajo)
+        if orden_trabajo is None:
+            st.warning(f"No existe la orden {numero_trabajo}.")
+        else:
+            estado_actual = estados_ordenes.estado(numero_trabajo)
+            st.markdown(f"**Estado:** {estados.ETIQUETAS[estado_actual]} · **Servicio:** {orden_trabajo.get('Servicio Aplicado')} "
+                        f"· **Responsable:** {orden_trabajo.get('Responsable Designado')}  \n{orden_trabajo.get('Motivo') or ''}")
+
+            siguientes = estados.TRANSICIONES[estado_actual]
+            if siguientes:
+                with st.form("form_estado_orden"):
+                    nuevo_estado = st.radio("Nuevo estado", siguientes, format_func=estados.ETIQUETAS.get, horizontal=True)
+                    nota_estado = st.text_input("Nota (opcional)", max_chars=300)
+                    if st.form_submit_button("Cambiar Estado"):
+                        if registrar_eventos_orden(
+                                [estados.evento_estado(numero_trabajo, nuevo_estado, registrado_por, nota_estado)],
+                                f"Orden #{numero_trabajo}: {estados.ETIQUETAS[nuevo_estado]}."):
+                            st.rerun()
+
+            materiales_trabajo = ordenes_compartidas.con_despachos(orden_trabajo).get(CAMPO_MATERIALES) or []
+            if estado_actual in estados.ACTIVOS and materiales_trabajo:
+                despachos_actuales = estados_ordenes.despachos(numero_trabajo)
+                with st.form("form_despacho_orden"):
+                    st.markdown("**Despacho de Almacén**")
+                    despacho_editado = st.data_editor(
+                        pd.DataFrame({
+                            "Ítem": [m["item"] for m in materiales_trabajo],
+                            "Unidad": [m["unidad"] for m in materiales_trabajo],
+                            "Pedida": [m["cantidad"] for m in materiales_trabajo],
+                            "Despachada": [m["cantidad_despachada"] for m in materiales_trabajo],
+                            "Valor Unitario": [m["valor_unitario"] for m in materiales_trabajo],
+                        }, dtype=object),
+                        column_config={
+                            "Despachada": st.column_config.NumberColumn("Cantidad Despachada", min_value=0),
+                            "Valor Unitario": st.column_config.NumberColumn("Valor Unitario", min_value=0),
+                        },
+                        disabled=["Ítem", "Unidad", "Pedida"],
+                        hide_index=True,
+                        use_container_width=True,
+                        key=f'despacho_{numero_trabajo}'
+                    )
+                    if st.form_submit_button("Registrar Despacho"):
+                        # Solo las líneas que cambiaron; una línea sin cantidad no se despacha
+                        lineas = []
+                        for linea, fila in enumerate(despacho_editado.to_dict('records')):
+                            cantidad, valor = cantidad_de(fila["Despachada"]), cantidad_de(fila["Valor Unitario"])
+                            if cantidad is not None and (cantidad, valor) != despachos_actuales.get(linea):
+                                lineas.append((linea, cantidad, valor))
+                        if not lineas:
+                            st.info("No hay cantidades despachadas nuevas que guardar.")
+                        elif registrar_eventos_orden([estados.evento_despacho(numero_trabajo, lineas, registrado_por)],
+                                                     f"Despacho de la orden #{numero_trabajo} registrado."):
+                            st.rerun()
+
+            st.download_button(
+                label="⬇️ Descargar Orden con Despachos (HTML para Imprimir a PDF)",
+                data=partial(generar_html_orden, orden_trabajo),
+                file_name=f'Orden_Mantenimiento_N_{numero_trabajo}.html',
+                mime='text/html',
+                on_click='ignore',
+                key='download_html_trabajo'
+            )
+
+
+# -------------------------------------------------------------------------
+# === PESTAÑA 4: INDICADORES (contadores pre-agregados) ===
+# -------------------------------------------------------------------------
+with tab_indicadores:
+    if tab_indicadores.open:
+        st.header("Indicadores de Mantenimiento")
+        with metricas.medir('indicadores', metricas_sesion):
+            indicadores = obtener_indicadores().datos(orden_data)
+
+        if not indicadores['procesadas']:
+            st.info("Aún no hay órdenes de mantenimiento registradas para calcular indicadores.")
+        else:
+            por_tipo = {tipo: sum(meses.values()) for tipo, meses in indicadores['conteos']['tipo'].items()}
+            mes_actual = date.today().strftime("%Y-%m")
+            col_i1, col_i2, col_i3, col_i4 = st.columns(4)
+            col_i1.metric("Órdenes registradas", indicadores['procesadas'])
+            col_i2.metric("Órdenes este mes", sum(meses.get(mes_actual, 0) for meses in indicadores['conteos']['tipo'].values()))
+            col_i3.metric("Correctivas", por_tipo.get("Correctivo", 0))
+            col_i4.metric("Preventivas", por_tipo.get("Preventivo", 0))
+
+            dimension = st.radio(
+                "Ver órdenes por mes según",
+                ["servicio", "tipo", "responsable", "dependencia"],
+                format_func=lambda d: analitica.DIMENSIONES[d],
+                horizontal=True,
+                key='indicadores_dimension'
+            )
+            tabla_dimension = analitica.tabla(indicadores, dimension)
+            st.bar_chart(tabla_dimension.head(10).T)
+            st.dataframe(tabla_dimension, use_container_width=True)
+
+            st.subheader("Consumo de Materiales (cantidad total solicitada)")
+            st.dataframe(analitica.tabla_materiales(indicadores), use_container_width=True, hide_index=True)
+
+            if st.button("🔄 Recalcular indicadores", help="Rehace los contadores desde el historial completo (reparación)."):
+                with st.spinner("Recalculando indicadores..."):
+                    obtener_indicadores().reemplazar(analitica.recalcular(orden_data))
+                st.success("Indicadores recalculados desde el historial completo.")
+                st.rerun()
+
+
+# -------------------------------------------------------------------------
+# === PESTAÑA 5: GESTIÓN DE PERSONAL ===
 # -------------------------------------------------------------------------
 with tab_personal:
-    st.header("Administración de Personal y Firmantes")
+    if tab_personal.open:
+        st.header("Administración de Personal y Firmantes")
     
-    # 1. FORMULARIO PARA AGREGAR PERSONAL 
-    st.info("Ingresa el Nombre, el Cargo y el Número de Identificación para añadir un nuevo firmante. Para eliminar, usa la tabla de abajo.")
-    with st.form("form_agregar_personal"):
-        st.subheader("Agregar Nuevo Empleado/Firmante")
+        # 1. FORMULARIO PARA AGREGAR PERSONAL 
+        st.info("Ingresa el Nombre, el Cargo y el Número de Identificación para añadir un nuevo firmante. Para eliminar, usa la tabla de abajo.")
+        with st.form("form_agregar_personal"):
+            st.subheader("Agregar Nuevo Empleado/Firmante")
         
-        col_n, col_p, col_c = st.columns(3)
-        with col_n:
-            nombre_nuevo = st.text_input("Nombre Completo")
-        with col_p:
-            profesion_nueva = st.text_input("Profesión / Cargo (Ej: Técnico, Biomédico)")
-        with col_c:
-            cc_nuevo = st.text_input("Número de Identificación (C.C.)", max_chars=15)
+            col_n, col_p, col_c = st.columns(3)
+            with col_n:
+                nombre_nuevo = st.text_input("Nombre Completo")
+            with col_p:
+                profesion_nueva = st.text_input("Profesión / Cargo (Ej: Técnico, Biomédico)")
+            with col_c:
+                cc_nuevo = st.text_input("Número de Identificación (C.C.)", max_chars=15)
             
-        rol_a_modificar = st.selectbox(
-            "Selecciona el Rol de Firma que tendrá",
-            options=list(st.session_state.directorio_personal.keys())
-        )
+            rol_a_modificar = st.selectbox(
+                "Selecciona el Rol de Firma que tendrá",
+                options=st.session_state.directorio_personal.roles
+            )
             
-        agregar_button = st.form_submit_button("Agregar a la Lista")
+            agregar_button = st.form_submit_button("Agregar a la Lista")
         
-        if agregar_button:
-            if nombre_nuevo and profesion_nueva and cc_nuevo:
-                agregar_personal(rol_a_modificar, nombre_nuevo, profesion_nueva, cc_nuevo)
-            else:
-                st.error("Debes ingresar el Nombre, la Profesión/Cargo y el Número de Identificación.")
+            if agregar_button:
+                if nombre_nuevo and profesion_nueva and cc_nuevo:
+                    agregar_personal(rol_a_modificar, nombre_nuevo, profesion_nueva, cc_nuevo)
+                else:
+                    st.error("Debes ingresar el Nombre, la Profesión/Cargo y el Número de Identificación.")
 
-    st.markdown("---")
+        st.markdown("---")
     
-    # 2. DIRECTORIO ACTUAL CON EDICIÓN Y ELIMINACIÓN HABILITADA
-    st.subheader("Directorio de Firmantes Actual (Edita o usa el icono de 'cubo de basura' para eliminar)")
+        # 2. DIRECTORIO ACTUAL CON EDICIÓN Y ELIMINACIÓN HABILITADA
+        st.subheader("Directorio de Firmantes Actual (Edita o usa el icono de 'cubo de basura' para eliminar)")
     
-    data_mostrar = []
-    for rol, personas_dict in st.session_state.directorio_personal.items():
-        nombre_rol_display = rol.replace('o', 'ó').replace('e', 'e') 
-        for key, data in personas_dict.items():
-            data_mostrar.append({
-                "ID_Rol": rol, 
-                "Rol de Firma": nombre_rol_display, 
-                "Nombre - Cargo": data["display"], 
-                "CC": data["cc"]
-            })
-            
-    df_directorio = pd.DataFrame(data_mostrar)
+        df_directorio = st.session_state.directorio_personal.tabla()
     
-    edited_df = st.data_editor(
-        df_directorio,
-        column_config={
-            "ID_Rol": st.column_config.Column(disabled=True, width="small"),
-            "Rol de Firma": st.column_config.SelectboxColumn(
-                "Rol de Firma", 
-                options=["Elaboro", "Reviso", "Aprobo"]
-            ),
-            "Nombre - Cargo": st.column_config.Column(required=True),
-            "CC": st.column_config.Column("C.C.", required=True, width="small")
-        },
-        hide_index=False, 
-        num_rows="dynamic", 
-        use_container_width=True,
-        key='data_editor_directorio'
-    )
+        edited_df = st.data_editor(
+            df_directorio,
+            column_config={
+                "ID_Rol": st.column_config.Column(disabled=True, width="small"),
+                "Rol de Firma": st.column_config.SelectboxColumn(
+                    "Rol de Firma", 
+                    options=list(ROLES)
+                ),
+                "Nombre - Cargo": st.column_config.Column(required=True),
+                "CC": st.column_config.Column("C.C.", required=True, width="small")
+            },
+            hide_index=False, 
+            num_rows="dynamic", 
+            use_container_width=True,
+            key='data_editor_directorio'
+        )
     
-    # 3. Lógica para GUARDAR los cambios del editor de datos
-    if st.button("Guardar Cambios Editados del Directorio", type="primary"):
-        nuevo_directorio = {"Elaboro": {}, "Reviso": {}, "Aprobo": {}}
-        
-        for index, row in edited_df.iterrows():
-            
-            if pd.isna(row["Nombre - Cargo"]) or pd.isna(row["CC"]):
-                continue 
+        # 3. Lógica para GUARDAR los cambios del editor de datos
+        if st.button("Guardar Cambios Editados del Directorio", type="primary"):
+            # Diferencia por columnas entre la tabla mostrada y la editada: solo se escriben los cambios
+            try:
+                cambios, avisos = st.session_state.directorio_personal.diferencias(df_directorio, edited_df)
+            except CedulaDuplicada as e:
+                st.error(f"No se guardaron los cambios: {e}")
+                st.stop()
+            for aviso in avisos:
+                st.warning(aviso)
 
-            rol_key = row["Rol de Firma"].replace('ó', 'o').replace('é', 'e')
+            if not cambios["eliminar"] and not cambios["guardar"]:
+                st.info("No hay cambios que guardar en el directorio.")
+            else:
+                st.session_state.directorio_personal.aplicar(cambios)
             
-            if rol_key not in nuevo_directorio:
-                 st.warning(f"Rol '{row['Rol de Firma']}' no válido. Omitiendo empleado.")
-                 continue
+                # --- PASO CRÍTICO: GUARDAR DIRECTORIO EN DISCO ---
+                if guardar_cambios_directorio(cambios):
+                    st.success("💾 Directorio de personal actualizado y guardado con éxito.")
+                    st.rerun()
 
-            nombre_key = row["Nombre - Cargo"]
-            
-            nuevo_directorio[rol_key][nombre_key] = {
-                "display": nombre_key,
-                "cc": str(row["CC"]) 
-            }
-        
-        st.session_state.directorio_personal = nuevo_directorio
-        
-        # --- PASO CRÍTICO: GUARDAR DIRECTORIO EN DISCO ---
-        guardar_datos_persistentes(st.session_state.directorio_personal, DIRECTORIO_DATA_FILE)
-        
-        st.success("💾 Directorio de personal actualizado y guardado con éxito.")
-        st.rerun()
+
+# =========================================================================
+# === 4. PANEL DE RENDIMIENTO (solo administración) ===
+# =========================================================================
+
+# Visible solo con ?admin=<MC_ORDENES_ADMIN_CLAVE> en la URL
+if metricas.es_admin(st.query_params.get('admin')):
+    with st.sidebar:
+        st.header("⏱️ Rendimiento")
+        if not metricas.HABILITADO:
+            st.info("Las métricas están desactivadas (inicie la aplicación con MC_ORDENES_METRICAS=1).")
+        else:
+            st.caption(f"Últimas {metricas.VENTANA} mediciones por etapa; tiempos en milisegundos.")
+            st.subheader("Esta sesión")
+            st.dataframe(metricas.tabla(metricas_sesion), hide_index=True)
+            st.subheader("Proceso (todas las sesiones)")
+            st.dataframe(metricas.tabla(metricas.REGISTRO_PROCESO), hide_index=True)
+            st.caption(f"Archivo Prometheus: {os.path.abspath(metricas.METRICAS_FILE)}")
+            st.caption(f"Textos compartidos entre órdenes (internados): {registro.textos_internados()}")
+            cache_html = renderizado.CACHE_CUERPOS.estadisticas()
+            st.caption(f"Órdenes renderizadas en caché: {cache_html['cuerpos']}/{cache_html['maximo']} "
+                       f"({cache_html['aciertos']} aciertos, {cache_html['fallos']} fallos)")
+
+metricas.registrar('rerun', time.perf_counter() - inicio_rerun, metricas_sesion)
+metricas.escribir_prometheus()
@@ -0,0 +1 @@
+"""Lógica de dominio del sistema de órdenes de mantenimiento (independiente de Streamlit)."""
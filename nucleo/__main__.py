@@ -0,0 +1,7 @@
+"""Punto de entrada de `python -m nucleo` (ver nucleo.cli)."""
+
+import sys
+
+from nucleo.cli import main
+
+sys.exit(main())
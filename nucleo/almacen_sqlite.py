@@ -0,0 +1,286 @@
+"""Backend SQLite (módulo estándar sqlite3, modo WAL) para órdenes y directorio.
+
+Cada orden se guarda completa en la columna `datos` (JSON) y los campos por los
+que se busca se copian a columnas indexadas, de modo que las consultas de
+duplicados, consecutivos e historial no necesitan cargar todas las órdenes.
+
+La aplicación mantiene igualmente la copia en memoria de OrdenesCompartidas (la
+usan la paginación, la búsqueda de texto, los estados y el catálogo), pero la
+búsqueda por número y los filtros sobre columnas indexadas se resuelven aquí:
+devuelven ids, que la copia convierte en posiciones (ids_entre).
+"""
+
+import json
+import sqlite3
+import threading
+
+from nucleo.almacenamiento import ORDENES_DB_FILE, SUFIJO_BLOQUEO, ErrorAlmacenamiento, bloqueo_archivo
+from nucleo.numeracion import numero_solicitud
+from nucleo.registro import a_json, leer_orden
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS ordenes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    numero INTEGER NOT NULL,
+    solicitud TEXT NOT NULL,
+    solicitud_num INTEGER,
+    fecha TEXT,
+    servicio TEXT,
+    responsable TEXT,
+    datos TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_ordenes_numero ON ordenes(numero);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_ordenes_solicitud ON ordenes(solicitud);
+CREATE INDEX IF NOT EXISTS ix_ordenes_solicitud_num ON ordenes(solicitud_num);
+CREATE INDEX IF NOT EXISTS ix_ordenes_fecha ON ordenes(fecha);
+CREATE INDEX IF NOT EXISTS ix_ordenes_servicio ON ordenes(servicio);
+CREATE INDEX IF NOT EXISTS ix_ordenes_responsable ON ordenes(responsable);
+
+CREATE TABLE IF NOT EXISTS eventos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    numero INTEGER NOT NULL,
+    datos TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS directorio (
+    rol TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    display TEXT NOT NULL,
+    cc TEXT,
+    pos_rol INTEGER NOT NULL,
+    pos INTEGER NOT NULL,
+    PRIMARY KEY (rol, clave)
+);
+"""
+
+# Campo de la orden -> columna indexada
+COLUMNAS_FILTRO = {
+    'Número de Orden': 'numero',
+    'Solicitud N°': 'solicitud',
+    'Fecha': 'fecha',
+    'Servicio Aplicado': 'servicio',
+    'Responsable Designado': 'responsable',
+}
+
+
+def fila_orden(orden):
+    """Convierte una orden en la fila de la tabla `ordenes`."""
+    return (
+        int(orden['Número de Orden']),
+        orden['Solicitud N°'],
+        numero_solicitud(orden['Solicitud N°']),
+        orden.get('Fecha'),
+        orden.get('Servicio Aplicado'),
+        orden.get('Responsable Designado'),
+        json.dumps(orden, default=a_json),
+    )
+
+
+def _orden(datos):
+    """Deserializa la columna `datos` llevando la orden al esquema actual (compacta)."""
+    return leer_orden(json.loads(datos))
+
+
+class AlmacenSQLite:
+    """Backend SQLite con una conexión por hilo (cada sesión de Streamlit corre en su hilo)."""
+
+    nombre = 'sqlite'
+    # OrdenesCompartidas resuelve buscar y consultar con las consultas por id de abajo
+    indexado = True
+
+    def __init__(self, db_path=ORDENES_DB_FILE):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def _conexion(self):
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.db_path, timeout=30)
+            conexion.execute('PRAGMA journal_mode=WAL')
+            conexion.execute('PRAGMA synchronous=NORMAL')
+            conexion.executescript(ESQUEMA)
+            self._local.conexion = conexion
+        return conexion
+
+    def firma_datos(self):
+        """Firma barata que cambia cuando se insertan órdenes (las órdenes no se reescriben)."""
+        return self._conexion().execute('SELECT MAX(id) FROM ordenes').fetchone()[0]
+
+    def cambios_desde(self, marca):
+        """Órdenes con id posterior a `marca`; devuelve (nuevas, marca_nueva)."""
+        filas = self._conexion().execute(
+            'SELECT id, datos FROM ordenes WHERE id > ? ORDER BY id', (marca or 0,)).fetchall()
+        if not filas:
+            return [], marca
+        return [_orden(datos) for _, datos in filas], filas[-1][0]
+
+    # --- Órdenes ---
+
+    def cargar_ordenes(self):
+        filas = self._conexion().execute('SELECT datos FROM ordenes ORDER BY id')
+        return [_orden(datos) for (datos,) in filas]
+
+    def agregar_orden(self, orden):
+        self.agregar_ordenes([orden])
+
+    def agregar_ordenes(self, ordenes):
+        """Inserta varias órdenes en una sola transacción (todas o ninguna)."""
+        conexion = self._conexion()
+        try:
+            with conexion:
+                conexion.executemany(
+                    'INSERT INTO ordenes (numero, solicitud, solicitud_num, fecha, servicio, responsable, datos) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (fila_orden(o) for o in ordenes),
+                )
+        except sqlite3.IntegrityError as e:
+            raise ErrorAlmacenamiento(f"Número de orden o de solicitud duplicado: {e}") from e
+        except sqlite3.Error as e:
+            raise ErrorAlmacenamiento(f"No se pudo guardar en {self.db_path}: {e}") from e
+
+    def buscar_orden(self, numero):
+        fila = self._conexion().execute('SELECT datos FROM ordenes WHERE numero = ?', (numero,)).fetchone()
+        return _orden(fila[0]) if fila else None
+
+    def existe_orden(self, numero):
+        return self._conexion().execute(
+            'SELECT 1 FROM ordenes WHERE numero = ?', (numero,)).fetchone() is not None
+
+    def existe_solicitud(self, solicitud):
+        return self._conexion().execute(
+            'SELECT 1 FROM ordenes WHERE solicitud = ?', (solicitud,)).fetchone() is not None
+
+    def maximos(self):
+        """Devuelve (máximo número de orden, máximo sufijo de solicitud '09-XX')."""
+        return self._conexion().execute(
+            'SELECT (SELECT MAX(numero) FROM ordenes), (SELECT MAX(solicitud_num) FROM ordenes)').fetchone()
+
+    def _where(self, filtros):
+        condiciones, parametros = [], []
+        for campo, valor in (filtros or {}).items():
+            if valor is None:
+                continue
+            if campo == 'desde':
+                condiciones.append('fecha >= ?')
+            elif campo == 'hasta':
+                condiciones.append('fecha <= ?')
+            elif campo in COLUMNAS_FILTRO:
+                condiciones.append(f'{COLUMNAS_FILTRO[campo]} = ?')
+            else:
+                condiciones.append('json_extract(datos, ?) = ?')
+                parametros.append(f'$."{campo}"')
+            parametros.append(valor)
+        return (' WHERE ' + ' AND '.join(condiciones)) if condiciones else '', parametros
+
+    def consultar_ordenes(self, filtros=None, limite=None, desplazamiento=0):
+        where, parametros = self._where(filtros)
+        sql = f'SELECT datos FROM ordenes{where} ORDER BY id LIMIT ? OFFSET ?'
+        filas = self._conexion().execute(sql, parametros + [-1 if limite is None else limite, desplazamiento])
+        return [_orden(datos) for (datos,) in filas]
+
+    def contar_ordenes(self, filtros=None):
+        where, parametros = self._where(filtros)
+        return self._conexion().execute(f'SELECT COUNT(*) FROM ordenes{where}', parametros).fetchone()[0]
+
+    # --- Consultas por id (posiciones de OrdenesCompartidas) ---
+
+    def ids_entre(self, desde, hasta):
+        """Ids en (desde, hasta], en orden: las posiciones de las órdenes leídas con cambios_desde."""
+        filas = self._conexion().execute(
+            'SELECT id FROM ordenes WHERE id > ? AND id <= ? ORDER BY id', (desde or 0, hasta or 0))
+        return [id_ for (id_,) in filas]
+
+    def id_de_orden(self, numero):
+        fila = self._conexion().execute('SELECT id FROM ordenes WHERE numero = ?', (numero,)).fetchone()
+        return fila[0] if fila else None
+
+    def ids_filtrados(self, filtros):
+        """Ids que cumplen `filtros`, del más reciente al más antiguo; None si algún campo no tiene columna."""
+        if any(v is not None and c not in ('desde', 'hasta') and c not in COLUMNAS_FILTRO for c, v in filtros.items()):
+            return None
+        where, parametros = self._where(filtros)
+        return [id_ for (id_,) in self._conexion().execute(f'SELECT id FROM ordenes{where} ORDER BY id DESC', parametros)]
+
+    def reescribir_ordenes(self):
+        """Guarda en el esquema actual las órdenes que aún están en un formato anterior."""
+        conexion = self._conexion()
+        cambios = []
+        for id_, datos in conexion.execute('SELECT id, datos FROM ordenes'):
+            actual = json.dumps(_orden(datos), default=a_json)
+            if actual != datos:
+                cambios.append((actual, id_))
+        with conexion:
+            conexion.executemany('UPDATE ordenes SET datos = ? WHERE id = ?', cambios)
+        return len(cambios)
+
+    # --- Eventos del ciclo de vida (nucleo.estados) ---
+
+    def firma_eventos(self):
+        return self._conexion().execute('SELECT MAX(id) FROM eventos').fetchone()[0]
+
+    def eventos_desde(self, marca):
+        """Eventos con id posterior a `marca`; devuelve (eventos, marca_nueva)."""
+        filas = self._conexion().execute(
+            'SELECT id, datos FROM eventos WHERE id > ? ORDER BY id', (marca or 0,)).fetchall()
+        if not filas:
+            return [], marca
+        return [json.loads(datos) for _, datos in filas], filas[-1][0]
+
+    def agregar_eventos(self, eventos):
+        conexion = self._conexion()
+        try:
+            with conexion:
+                conexion.executemany('INSERT INTO eventos (numero, datos) VALUES (?, ?)',
+                                     ((e["orden"], json.dumps(e)) for e in eventos))
+        except sqlite3.Error as e:
+            raise ErrorAlmacenamiento(f"No se pudieron guardar los eventos en {self.db_path}: {e}") from e
+
+    def bloqueo_eventos(self):
+        """Bloqueo entre procesos para validar y anexar eventos sin que otro cambie el estado en medio."""
+        return bloqueo_archivo(self.db_path + '.estados' + SUFIJO_BLOQUEO)
+
+    # --- Directorio de firmantes ---
+
+    def cargar_directorio(self, default_value):
+        filas = self._conexion().execute(
+            'SELECT rol, clave, display, cc FROM directorio ORDER BY pos_rol, pos, clave').fetchall()
+        if not filas:
+            return default_value
+        directorio = {}
+        for rol, clave, display, cc in filas:
+            directorio.setdefault(rol, {})[clave] = {"display": display, "cc": cc}
+        # Los roles sin personas también deben existir para los formularios
+        for rol in default_value:
+            directorio.setdefault(rol, {})
+        return directorio
+
+    def guardar_directorio(self, directorio):
+        conexion = self._conexion()
+        filas = [
+            (rol, clave, datos["display"], datos.get("cc"), pos_rol, pos)
+            for pos_rol, (rol, personas) in enumerate(directorio.items())
+            for pos, (clave, datos) in enumerate(personas.items())
+        ]
+        try:
+            with conexion:
+                conexion.execute('DELETE FROM directorio')
+                conexion.executemany(
+                    'INSERT INTO directorio (rol, clave, display, cc, pos_rol, pos) VALUES (?, ?, ?, ?, ?, ?)', filas)
+        except sqlite3.Error as e:
+            raise ErrorAlmacenamiento(f"No se pudo guardar el directorio en {self.db_path}: {e}") from e
+
+    def aplicar_cambios_directorio(self, cambios, completo):
+        """Escribe solo los firmantes eliminados/modificados; si la tabla está vacía guarda `completo`."""
+        conexion = self._conexion()
+        if conexion.execute('SELECT 1 FROM directorio LIMIT 1').fetchone() is None:
+            return self.guardar_directorio(completo)
+        roles = list(completo)
+        try:
+            with conexion:
+                conexion.executemany('DELETE FROM directorio WHERE rol = ? AND clave = ?', cambios["eliminar"])
+                conexion.executemany(
+                    'INSERT OR REPLACE INTO directorio (rol, clave, display, cc, pos_rol, pos) VALUES (?, ?, ?, ?, ?, 0)',
+                    [(rol, clave, datos["display"], datos.get("cc"), roles.index(rol) if rol in roles else len(roles))
+                     for rol, clave, datos in cambios["guardar"]])
+        except sqlite3.Error as e:
+            raise ErrorAlmacenamiento(f"No se pudo guardar el directorio en {self.db_path}: {e}") from e
@@ -0,0 +1,746 @@
+"""Capa de almacenamiento de órdenes y del directorio de firmantes.
+
+El backend se elige con la variable de entorno MC_ORDENES_ALMACEN:
+- 'json' (por defecto): instantánea JSON + diario de solo anexado (JSONL).
+- 'sqlite': base de datos SQLite con índices (ver nucleo/almacen_sqlite.py).
+- 'particionado': un archivo JSON por año + manifiesto + diario, con los años
+  anteriores cargados bajo demanda (ver nucleo/particiones.py).
+
+Los cambios posteriores de una orden (estado, despachos; ver nucleo.estados) son
+eventos pequeños que se anexan a su propio registro en cada backend.
+
+Backend JSON: cada orden guardada se anexa como una línea al diario, de modo que el costo de
+guardar no depende del tamaño del historial. Cuando el diario supera
+DIARIO_MAX_BYTES se compacta en la instantánea (el antiguo `ordenes_data.json`)
+en un hilo de fondo. Al iniciar se reconstruye el estado leyendo la instantánea
+y reproduciendo el diario. Después, cada proceso sigue el diario por su archivo
+abierto, también cuando una compactación lo renombra, y nunca vuelve a leer la
+instantánea por una compactación (ver AlmacenJSON._seguir_diario).
+"""
+
+import atexit
+import contextlib
+import json
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo queda la exclusión entre hilos del mismo proceso
+    fcntl = None
+
+from nucleo.numeracion import IndiceConsecutivos
+from nucleo.registro import a_json, leer_orden
+
+# Nombres de archivos para persistencia
+ORDENES_DATA_FILE = 'ordenes_data.json'
+ORDENES_DIARIO_FILE = 'ordenes_diario.jsonl'
+DIRECTORIO_DATA_FILE = 'directorio_data.json'
+ORDENES_EVENTOS_FILE = 'ordenes_eventos.jsonl'
+ORDENES_DB_FILE = 'ordenes.db'
+ORDENES_PARTICIONES_DIR = 'ordenes_anuales'
+
+# Tamaño del diario a partir del cual se compacta en la instantánea
+DIARIO_MAX_BYTES = 2 * 1024 * 1024
+
+SUFIJO_COMPACTANDO = '.compactando'
+SUFIJO_COMPACTADO = '.compactado'
+SUFIJO_BLOQUEO = '.lock'
+
+# Seguir el diario por su archivo abierto. En Windows un archivo abierto no se
+# puede renombrar ni borrar, así que ahí se reabre por ruta en cada lectura y una
+# compactación obliga a releer la instantánea.
+MANTENER_DIARIO_ABIERTO = os.name != 'nt'
+# Diarios ya leídos que se recuerdan para reconocer su compactación
+DIARIOS_RECORDADOS = 8
+
+# Protege el renombrado del diario frente a anexados concurrentes del mismo proceso
+# (entre procesos se usa además bloqueo_archivo sobre `<diario>.lock`)
+_lock_diario = threading.Lock()
+# Evita dos compactaciones simultáneas
+_lock_compactacion = threading.Lock()
+# Hilos de compactación lanzados por este proceso (ver lanzar_compactacion)
+_compactaciones = []
+_lock_compactaciones = threading.Lock()
+
+
+class ErrorAlmacenamiento(Exception):
+    """Error al leer o escribir los datos persistentes."""
+
+
+# =========================================================================
+# === BLOQUEOS ENTRE PROCESOS ===
+# =========================================================================
+
+@contextlib.contextmanager
+def bloqueo_archivo(ruta, bloqueante=True):
+    """Bloqueo exclusivo entre procesos (fcntl.flock) sobre el archivo `ruta`.
+
+    Con bloqueante=False entrega False si otro proceso ya tiene el bloqueo.
+    Ojo: flock no es reentrante dentro del mismo proceso si se abre otra vez el
+    mismo archivo, así que no se debe anidar sobre la misma ruta.
+    """
+    fd = os.open(ruta, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            modo = fcntl.LOCK_EX if bloqueante else fcntl.LOCK_EX | fcntl.LOCK_NB
+            try:
+                fcntl.flock(fd, modo)
+            except BlockingIOError:
+                yield False
+                return
+        yield True
+    finally:
+        os.close(fd)
+
+
+# =========================================================================
+# === ARCHIVOS JSON (ESCRITURA ATÓMICA) ===
+# =========================================================================
+
+def cargar_json(file_path, default_value):
+    """Carga datos desde un archivo JSON o devuelve el valor por defecto si no existe.
+
+    A diferencia de antes, un archivo corrupto lanza ErrorAlmacenamiento en vez de
+    devolver el valor por defecto (que luego sobrescribiría los datos reales).
+    """
+    if not os.path.exists(file_path):
+        return default_value
+    try:
+        with open(file_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise ErrorAlmacenamiento(f"No se pudo leer {file_path}: {e}") from e
+
+
+def guardar_json_atomico(data, file_path, indent=4):
+    """Escribe en un temporal del mismo directorio y lo renombra sobre el destino.
+
+    Un fallo a mitad de la escritura deja intacto el archivo anterior.
+    """
+    directorio = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', suffix='.json', dir=directorio)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent, default=a_json)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+# =========================================================================
+# === DIARIO DE ÓRDENES (JSONL) ===
+# =========================================================================
+
+def anexar_al_diario(registros, diario_path):
+    """Anexa registros al diario con una única escritura O_APPEND seguida de fsync.
+
+    Devuelve (inodo, tamaño antes, tamaño después) del diario, o None si no había nada que escribir.
+    """
+    payload = ''.join(json.dumps(r, default=a_json) + '\n' for r in registros).encode('utf-8')
+    if not payload:
+        return None
+    with _lock_diario, bloqueo_archivo(diario_path + SUFIJO_BLOQUEO):
+        fd = os.open(diario_path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            estado = os.fstat(fd)
+            # Si una escritura anterior quedó cortada, la aislamos en su propia línea
+            # para no corromper el registro que estamos anexando.
+            tamano = estado.st_size
+            if tamano and os.pread(fd, 1, tamano - 1) != b'\n':
+                payload = b'\n' + payload
+            vista = memoryview(payload)
+            while vista:
+                escritos = os.write(fd, vista)
+                vista = vista[escritos:]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    return estado.st_ino, tamano, tamano + len(payload)
+
+
+def _leer_lineas(f, desde):
+    """Lee registros completos de un diario abierto; devuelve (registros, posicion)."""
+    f.seek(desde)
+    contenido = f.read()
+    fin = contenido.rfind(b'\n') + 1
+    registros = []
+    for linea in contenido[:fin].splitlines():
+        if not linea.strip():
+            continue
+        try:
+            registros.append(json.loads(linea))
+        except ValueError:
+            continue
+    return registros, desde + fin
+
+
+def leer_diario(diario_path, desde=0):
+    """Lee el diario a partir del byte `desde`.
+
+    Devuelve (registros, posicion) donde `posicion` es el byte siguiente a la
+    última línea completa. Una línea final sin salto (escritura interrumpida) no
+    se consume; las líneas que no son JSON válido se descartan.
+    """
+    try:
+        with open(diario_path, 'rb') as f:
+            return _leer_lineas(f, desde)
+    except FileNotFoundError:
+        return [], desde
+
+
+def _leer_diario_con_inodo(diario_path, desde=0):
+    """Como leer_diario, pero devuelve también el inodo del archivo leído (o None)."""
+    try:
+        with open(diario_path, 'rb') as f:
+            inodo = os.fstat(f.fileno()).st_ino
+            registros, posicion = _leer_lineas(f, desde)
+            return registros, posicion, inodo
+    except FileNotFoundError:
+        return [], 0, None
+
+
+def _reproducir(ordenes, vistos, registros):
+    """Añade a `ordenes` los registros cuyo número de orden aún no se ha visto."""
+    for registro in registros:
+        nro = registro.get('Número de Orden')
+        if nro in vistos:
+            continue
+        vistos.add(nro)
+        ordenes.append(leer_orden(registro))
+
+
+def _cargar_instantanea(snapshot_path):
+    """Lee la instantánea y lleva cada orden al esquema actual, en su forma compacta (nucleo.registro)."""
+    ordenes = cargar_json(snapshot_path, [])
+    if not isinstance(ordenes, list):
+        raise ErrorAlmacenamiento(f"{snapshot_path} no contiene una lista de órdenes.")
+    for i, orden in enumerate(ordenes):
+        ordenes[i] = leer_orden(orden)
+    return ordenes
+
+
+def _firma_archivo(file_path):
+    try:
+        st_ = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return (st_.st_ino, st_.st_mtime_ns, st_.st_size)
+
+
+def _inodo(file_path):
+    try:
+        return os.stat(file_path).st_ino
+    except FileNotFoundError:
+        return None
+
+
+def marcar_compactacion(snapshot_path, diario_inodo, cantidad):
+    """Deja junto a la instantánea recién escrita qué diario integró y cuántas órdenes quedaron.
+
+    Con esto, un proceso que ya leyó ese diario completo sabe que la instantánea
+    nueva no trae nada que no tenga (AlmacenJSON._instantanea_al_dia).
+    """
+    guardar_json_atomico({"diario": diario_inodo, "cantidad": cantidad,
+                          "instantanea": _firma_archivo(snapshot_path)},
+                         snapshot_path + SUFIJO_COMPACTADO, indent=None)
+
+
+def _leer_compactacion(snapshot_path):
+    try:
+        marca = cargar_json(snapshot_path + SUFIJO_COMPACTADO, None)
+    except ErrorAlmacenamiento:
+        return None
+    return marca if isinstance(marca, dict) else None
+
+
+def _cargar_estado(snapshot_path, diario_path):
+    """Lee instantánea + diario pendiente de compactar + diario.
+
+    Devuelve (ordenes, vistos, firma_instantanea, inodo_diario, posicion_diario).
+    """
+    compactando = diario_path + SUFIJO_COMPACTANDO
+    while True:
+        firma = _firma_archivo(snapshot_path)
+        compactando_inodo = _inodo(compactando)
+        ordenes = _cargar_instantanea(snapshot_path)
+        vistos = {d.get('Número de Orden') for d in ordenes}
+        _reproducir(ordenes, vistos, leer_diario(compactando)[0])
+        registros, posicion, inodo = _leer_diario_con_inodo(diario_path)
+        _reproducir(ordenes, vistos, registros)
+        # Si una compactación renombró el diario o reemplazó la instantánea mientras
+        # leíamos, repetimos: lo leído podría faltar o quedar fuera de orden
+        if _firma_archivo(snapshot_path) == firma and _inodo(compactando) == compactando_inodo:
+            return ordenes, vistos, firma, inodo, posicion
+
+
+def cargar_ordenes(snapshot_path, diario_path):
+    """Reconstruye la lista de órdenes: instantánea + diario pendiente de compactar + diario."""
+    return _cargar_estado(snapshot_path, diario_path)[0]
+
+
+def compactar_ordenes(snapshot_path, diario_path):
+    """Integra el diario en la instantánea y lo vacía.
+
+    El diario se renombra primero a `*.compactando`, así los anexados nuevos van a
+    un diario limpio. Si el proceso se interrumpe, la carga siguiente combina ambos
+    archivos y descarta duplicados por número de orden. Antes de borrar el
+    renombrado se deja la marca de marcar_compactacion.
+    """
+    if not _lock_compactacion.acquire(blocking=False):
+        return False
+    try:
+        with bloqueo_archivo(snapshot_path + SUFIJO_BLOQUEO, bloqueante=False) as adquirido:
+            # Otro proceso ya está compactando
+            if not adquirido:
+                return False
+            compactando = diario_path + SUFIJO_COMPACTANDO
+            with _lock_diario, bloqueo_archivo(diario_path + SUFIJO_BLOQUEO):
+                if not os.path.exists(compactando):
+                    if not os.path.exists(diario_path):
+                        return False
+                    os.replace(diario_path, compactando)
+
+            inodo = os.stat(compactando).st_ino
+            ordenes = _cargar_instantanea(snapshot_path)
+            vistos = {d.get('Número de Orden') for d in ordenes}
+            _reproducir(ordenes, vistos, leer_diario(compactando)[0])
+            guardar_json_atomico(ordenes, snapshot_path)
+            marcar_compactacion(snapshot_path, inodo, len(ordenes))
+            os.unlink(compactando)
+            return True
+    finally:
+        _lock_compactacion.release()
+
+
+def lanzar_compactacion(compactar, *args):
+    """Corre `compactar(*args)` en un hilo daemon de fondo.
+
+    Al salir del intérprete atexit espera los que sigan en curso; quien termine de
+    otra forma (un proceso hijo, el cierre del servicio) llama a
+    esperar_compactaciones. Si aun así uno se corta, la carga siguiente combina el
+    diario renombrado con la instantánea.
+    """
+    with _lock_compactaciones:
+        _compactaciones[:] = [h for h in _compactaciones if h.is_alive()]
+        hilo = threading.Thread(target=compactar, args=args, daemon=True)
+        _compactaciones.append(hilo)
+        hilo.start()
+    return hilo
+
+
+def esperar_compactaciones():
+    """Espera a que terminen las compactaciones lanzadas por este proceso."""
+    with _lock_compactaciones:
+        hilos = list(_compactaciones)
+    for hilo in hilos:
+        hilo.join()
+
+
+atexit.register(esperar_compactaciones)
+
+
+def registrar_orden(orden, snapshot_path, diario_path):
+    """Anexa una orden al diario y, si el diario creció demasiado, lanza la compactación."""
+    registrar_ordenes([orden], snapshot_path, diario_path)
+
+
+def registrar_ordenes(ordenes, snapshot_path, diario_path):
+    """Anexa varias órdenes al diario en una sola escritura (misma compactación que registrar_orden).
+
+    Devuelve lo mismo que anexar_al_diario.
+    """
+    try:
+        escrito = anexar_al_diario(ordenes, diario_path)
+    except OSError as e:
+        raise ErrorAlmacenamiento(f"No se pudieron anexar las órdenes a {diario_path}: {e}") from e
+
+    if escrito and escrito[2] >= DIARIO_MAX_BYTES:
+        lanzar_compactacion(compactar_ordenes, snapshot_path, diario_path)
+    return escrito
+
+
+# =========================================================================
+# === BACKENDS DE ALMACENAMIENTO ===
+# =========================================================================
+
+def filtrar_orden(orden, filtros):
+    """Indica si una orden cumple los filtros de OrdenesCompartidas.consultar.
+
+    Claves admitidas: 'desde' y 'hasta' (fechas 'YYYY-MM-DD', inclusivas) y
+    cualquier campo de la orden comparado por igualdad.
+    """
+    for campo, valor in filtros.items():
+        if valor is None:
+            continue
+        if campo == 'desde':
+            if orden.get('Fecha', '') < valor:
+                return False
+        elif campo == 'hasta':
+            if orden.get('Fecha', '') > valor:
+                return False
+        elif orden.get(campo) != valor:
+            return False
+    return True
+
+
+class AlmacenJSON:
+    """Backend JSON: instantánea + diario de órdenes y un archivo JSON para el directorio.
+
+    Mantiene en memoria la última lectura y después solo lee la cola nueva del
+    diario (lo anexado por otras sesiones o procesos), aunque una compactación lo
+    renombre y reemplace la instantánea: las posiciones en memoria no cambian.
+
+    No ofrece búsquedas por número ni filtros: sin índices serían recorridos
+    completos, y OrdenesCompartidas.buscar y .consultar los resuelven con los
+    índices que mantiene en memoria (SQLite, en cambio, los consulta a la base).
+    """
+
+    nombre = 'json'
+
+    def __init__(self, ordenes_path=ORDENES_DATA_FILE, diario_path=ORDENES_DIARIO_FILE,
+                 directorio_path=DIRECTORIO_DATA_FILE, eventos_path=ORDENES_EVENTOS_FILE):
+        self.ordenes_path = ordenes_path
+        self.diario_path = diario_path
+        self.directorio_path = directorio_path
+        self.eventos_path = eventos_path
+        self._lock = threading.RLock()
+        self._ordenes = None
+        self._vistos = set()
+        self._indice = IndiceConsecutivos()
+        self._firma = None
+        # Diario que se sigue: archivo abierto (o ruta, ver MANTENER_DIARIO_ABIERTO), inodo y byte leído
+        self._flujo = None
+        self._flujo_ruta = None
+        self._diario_inodo = None
+        self._diario_pos = 0
+        # Inodo de cada diario leído hasta el final -> (órdenes en memoria al terminarlo,
+        # archivo que se mantiene abierto; ver _ya_leido)
+        self._terminados = {}
+
+    # --- Sincronización con disco ---
+
+    def _recargar(self):
+        """Lectura completa: instantánea y luego los diarios (al iniciar o si se perdió el hilo)."""
+        while True:
+            firma = _firma_archivo(self.ordenes_path)
+            ordenes = _cargar_instantanea(self.ordenes_path)
+            self._empezar(ordenes, {d.get('Número de Orden') for d in ordenes}, firma)
+            # Si otra compactación reemplazó la instantánea mientras leíamos, repetimos
+            if self._seguir_diario():
+                break
+        self._indice = IndiceConsecutivos(self._ordenes)
+
+    def _empezar(self, ordenes, vistos, firma):
+        """Toma `ordenes` (leídas de la instantánea con firma `firma`) como copia en memoria, sin diario."""
+        self._cerrar_flujo()
+        self._ordenes, self._vistos, self._firma = ordenes, vistos, firma
+        for _, f in self._terminados.values():
+            if f is not None:
+                f.close()
+        self._terminados = {}
+
+    def _cerrar_flujo(self):
+        if self._flujo is not None:
+            self._flujo.close()
+        self._flujo = self._flujo_ruta = self._diario_inodo = None
+        self._diario_pos = 0
+
+    def _abrir_flujo(self, ruta):
+        """Empieza a seguir el diario de `ruta` desde el principio; False si ya no existe."""
+        try:
+            f = open(ruta, 'rb')
+        except FileNotFoundError:
+            return False
+        self._cerrar_flujo()
+        self._diario_inodo = os.fstat(f.fileno()).st_ino
+        if MANTENER_DIARIO_ABIERTO:
+            self._flujo = f
+        else:
+            f.close()
+            self._flujo_ruta = ruta
+        return True
+
+    def _leer_flujo(self):
+        """Reproduce lo anexado al diario seguido desde la última lectura; False si ya no se puede leer."""
+        if self._diario_inodo is None:
+            return True
+        f = self._flujo
+        if f is None:
+            try:
+                f = open(self._flujo_ruta, 'rb')
+            except FileNotFoundError:
+                return False
+        try:
+            if os.fstat(f.fileno()).st_ino != self._diario_inodo:
+                return False
+            registros, self._diario_pos = _leer_lineas(f, self._diario_pos)
+        finally:
+            if f is not self._flujo:
+                f.close()
+        _reproducir(self._ordenes, self._vistos, registros)
+        return True
+
+    def _terminar_flujo(self):
+        """El diario seguido ya no recibe anexados: se lee hasta el final y se recuerda dónde terminó."""
+        if not self._leer_flujo():
+            return False
+        f, self._flujo = self._flujo, None
+        self._recordar_terminado(self._diario_inodo, f)
+        self._cerrar_flujo()
+        return True
+
+    def _recordar_terminado(self, inodo, archivo=None):
+        self._terminados[inodo] = (len(self._ordenes), archivo)
+        while len(self._terminados) > DIARIOS_RECORDADOS:
+            _, f = self._terminados.pop(next(iter(self._terminados)))
+            if f is not None:
+                f.close()
+
+    def _ya_leido(self, inodo):
+        """Indica si el diario con ese inodo ya se leyó hasta el final.
+
+        El sistema de archivos reasigna enseguida el inodo de un diario borrado, así
+        que solo cuenta si el diario terminado sigue abierto (un archivo abierto
+        conserva su inodo); sin MANTENER_DIARIO_ABIERTO basta con recordarlo.
+        """
+        terminado = self._terminados.get(inodo)
+        return terminado is not None and (terminado[1] is not None or not MANTENER_DIARIO_ABIERTO)
+
+    def _instantanea_al_dia(self):
+        """Indica si la copia en memoria contiene todo lo que tiene la instantánea actual.
+
+        La instantánea solo puede cambiar sin releerla cuando una compactación
+        integró un diario que ya se leyó completo: lo confirma la marca de
+        marcar_compactacion (mismo diario, misma cantidad de órdenes). Mientras esa
+        compactación no termina, el `*.compactando` es uno de esos diarios.
+        """
+        firma = _firma_archivo(self.ordenes_path)
+        if firma == self._firma:
+            return True
+        marca = _leer_compactacion(self.ordenes_path)
+        if (marca is not None and marca.get("instantanea") == (list(firma) if firma else None)
+                and marca.get("diario") in self._terminados
+                and self._terminados[marca["diario"]][0] == marca.get("cantidad")):
+            self._firma = firma
+            return True
+        return self._ya_leido(_inodo(self.diario_path + SUFIJO_COMPACTANDO))
+
+    def _seguir_diario(self):
+        """Lee lo nuevo de los diarios sin volver a leer la instantánea.
+
+        Un diario renombrado por una compactación se lee hasta el final por el
+        archivo abierto y luego se pasa al siguiente: el `*.compactando` si aún no
+        se leyó, si no el diario actual. Devuelve False si no se puede asegurar que
+        no falta nada (la instantánea cambió por otra cosa o se perdió un diario);
+        entonces hay que recargar.
+        """
+        compactando = self.diario_path + SUFIJO_COMPACTANDO
+        while True:
+            if not self._leer_flujo():
+                return False
+            if self._diario_inodo is not None:
+                if _inodo(self.diario_path) == self._diario_inodo:
+                    break
+                # Renombrado: lo anexado justo antes del renombrado se lee en _terminar_flujo
+                if not self._terminar_flujo():
+                    return False
+            if not self._instantanea_al_dia():
+                return False
+            inodo = _inodo(compactando)
+            siguiente = compactando if inodo is not None and not self._ya_leido(inodo) else self.diario_path
+            abierto = self._abrir_flujo(siguiente)
+            if siguiente == self.diario_path:
+                # Si una compactación lo renombró justo antes de abrirlo, lo abierto (si
+                # algo) es el diario nuevo: primero va el renombrado, para no alterar el orden
+                inodo = _inodo(compactando)
+                if inodo is not None and inodo != self._diario_inodo and not self._ya_leido(inodo):
+                    abierto = self._abrir_flujo(compactando)
+            if not abierto:
+                break
+        return self._instantanea_al_dia()
+
+    def _sincronizar(self):
+        """Actualiza la copia en memoria; devuelve la lista de órdenes nuevas leídas."""
+        with self._lock:
+            if self._ordenes is None:
+                self._recargar()
+                return None
+            antes = len(self._ordenes)
+            if not self._seguir_diario():
+                self._recargar()
+                return None
+            self._indice.agregar_ordenes(self._ordenes[antes:])
+            return self._ordenes[antes:]
+
+    def _incorporar_propias(self, ordenes, escrito):
+        """Incorpora lo que esta instancia acaba de anexar sin releerlo, si nadie anexó en medio.
+
+        Devuelve False si aún hay que sincronizar (lo anexado por otros, o confirmar
+        una compactación que ya integró este anexado).
+        """
+        if not escrito:
+            return False
+        if self._diario_inodo is None and escrito[1] == 0:
+            # Este anexado creó el diario; un lote grande pudo disparar ya su compactación
+            for ruta in (self.diario_path, self.diario_path + SUFIJO_COMPACTANDO):
+                if self._abrir_flujo(ruta) and self._diario_inodo == escrito[0]:
+                    break
+                self._cerrar_flujo()
+        elif (self._diario_inodo, self._diario_pos) != escrito[:2]:
+            return False
+        antes = len(self._ordenes)
+        _reproducir(self._ordenes, self._vistos, ordenes)
+        self._indice.agregar_ordenes(self._ordenes[antes:])
+        if self._diario_inodo is None:
+            # Ya compactado y borrado: la marca de la compactación dirá si solo tenía lo nuestro
+            self._recordar_terminado(escrito[0])
+            return False
+        self._diario_pos = escrito[2]
+        return True
+
+    def firma_datos(self):
+        """Firma barata (solo stat) que cambia cuando otro proceso o sesión guarda órdenes."""
+        compactando = self.diario_path + SUFIJO_COMPACTANDO
+        return (_firma_archivo(self.ordenes_path), _firma_archivo(self.diario_path), _firma_archivo(compactando))
+
+    def cambios_desde(self, marca):
+        """Órdenes posteriores a `marca` (cantidad ya leída); devuelve (nuevas, marca_nueva)."""
+        with self._lock:
+            self._sincronizar()
+            # La compactación conserva el orden, por lo que la posición sigue siendo válida
+            return self._ordenes[marca or 0:], len(self._ordenes)
+
+    # --- Órdenes ---
+
+    def cargar_ordenes(self):
+        with self._lock:
+            self._sincronizar()
+            return list(self._ordenes)
+
+    def agregar_orden(self, orden):
+        self.agregar_ordenes([orden])
+
+    def agregar_ordenes(self, ordenes):
+        """Anexa varias órdenes con una única escritura al diario (todas o ninguna)."""
+        with self._lock:
+            self._sincronizar()
+            numeros, solicitudes = set(), set()
+            for orden in ordenes:
+                numero, solicitud = orden.get('Número de Orden'), orden.get('Solicitud N°')
+                if numero in self._vistos or numero in numeros:
+                    raise ErrorAlmacenamiento(f"La orden {numero} ya existe.")
+                if solicitud is not None and (self._indice.existe_solicitud(solicitud) or solicitud in solicitudes):
+                    raise ErrorAlmacenamiento(f"La solicitud {solicitud} ya existe.")
+                numeros.add(numero)
+                solicitudes.add(solicitud)
+            escrito = self._registrar(ordenes)
+            if not self._incorporar_propias(ordenes, escrito):
+                self._sincronizar()
+
+    def _registrar(self, ordenes):
+        """Anexa al diario (y compacta si hace falta); devuelve lo mismo que anexar_al_diario."""
+        return registrar_ordenes(ordenes, self.ordenes_path, self.diario_path)
+
+    def existe_orden(self, numero):
+        with self._lock:
+            self._sincronizar()
+            return self._indice.existe_orden(numero)
+
+    def existe_solicitud(self, solicitud):
+        with self._lock:
+            self._sincronizar()
+            return self._indice.existe_solicitud(solicitud)
+
+    def maximos(self):
+        """Devuelve (máximo número de orden, máximo sufijo de solicitud '09-XX')."""
+        with self._lock:
+            self._sincronizar()
+            return self._indice.ordenes.maximo, self._indice.sufijos_solicitud.maximo
+
+    def contar_ordenes(self):
+        with self._lock:
+            self._sincronizar()
+            return len(self._ordenes)
+
+    def reescribir_ordenes(self):
+        """Reescribe todo el historial en el esquema actual (migraciones puntuales).
+
+        Bloquea los anexados mientras dura; devuelve la cantidad de órdenes escritas.
+        """
+        with self._lock, bloqueo_archivo(self.ordenes_path + SUFIJO_BLOQUEO), \
+                _lock_diario, bloqueo_archivo(self.diario_path + SUFIJO_BLOQUEO):
+            ordenes = _cargar_estado(self.ordenes_path, self.diario_path)[0]
+            guardar_json_atomico(ordenes, self.ordenes_path)
+            for ruta in (self.diario_path, self.diario_path + SUFIJO_COMPACTANDO):
+                if os.path.exists(ruta):
+                    os.unlink(ruta)
+            self._cerrar_flujo()
+            self._ordenes = None
+            return len(ordenes)
+
+    # --- Eventos del ciclo de vida (JSONL de solo anexado, sin compactar: son líneas cortas) ---
+
+    def firma_eventos(self):
+        return _firma_archivo(self.eventos_path)
+
+    def eventos_desde(self, marca):
+        """Eventos posteriores a `marca` (byte del registro); devuelve (eventos, marca_nueva)."""
+        return leer_diario(self.eventos_path, marca or 0)
+
+    def agregar_eventos(self, eventos):
+        try:
+            anexar_al_diario(eventos, self.eventos_path)
+        except OSError as e:
+            raise ErrorAlmacenamiento(f"No se pudieron anexar los eventos a {self.eventos_path}: {e}") from e
+
+    def bloqueo_eventos(self):
+        """Bloqueo entre procesos para validar y anexar eventos sin que otro cambie el estado en medio."""
+        # Distinto del bloqueo de anexar_al_diario sobre el mismo registro (flock no es reentrante)
+        return bloqueo_archivo(self.eventos_path + '.estados' + SUFIJO_BLOQUEO)
+
+    # --- Directorio de firmantes ---
+
+    def cargar_directorio(self, default_value):
+        return cargar_json(self.directorio_path, default_value)
+
+    def guardar_directorio(self, directorio):
+        guardar_json_atomico(directorio, self.directorio_path)
+
+    def aplicar_cambios_directorio(self, cambios, completo):
+        """Aplica solo los firmantes eliminados/modificados sobre lo guardado en disco.
+
+        El archivo es pequeño y se reescribe entero (atómico), pero se parte de su
+        contenido actual, así que no se pisan los cambios de otras sesiones.
+        Si aún no existe, se guarda `completo`.
+        """
+        with bloqueo_archivo(self.directorio_path + SUFIJO_BLOQUEO):
+            directorio = cargar_json(self.directorio_path, None)
+            if not isinstance(directorio, dict):
+                return guardar_json_atomico(completo, self.directorio_path)
+            for rol, clave in cambios["eliminar"]:
+                directorio.get(rol, {}).pop(clave, None)
+            for rol, clave, datos in cambios["guardar"]:
+                directorio.setdefault(rol, {})[clave] = datos
+            guardar_json_atomico(directorio, self.directorio_path)
+
+
+def crear_almacen(tipo=None, **rutas):
+    """Crea el backend indicado (o el de MC_ORDENES_ALMACEN; 'json' por defecto)."""
+    tipo = (tipo or os.environ.get('MC_ORDENES_ALMACEN') or 'json').lower()
+    if tipo == 'json':
+        return AlmacenJSON(**rutas)
+    if tipo == 'sqlite':
+        from nucleo.almacen_sqlite import AlmacenSQLite
+        return AlmacenSQLite(**rutas)
+    if tipo == 'particionado':
+        from nucleo.particiones import AlmacenParticionado
+        return AlmacenParticionado(**rutas)
+    raise ValueError(f"Backend de almacenamiento desconocido: {tipo!r} (use 'json', 'sqlite' o 'particionado').")
@@ -0,0 +1,273 @@
+"""Indicadores pre-agregados del historial (pestaña 📈 Indicadores).
+
+Los contadores se guardan en INDICADORES_DATA_FILE junto a los datos de órdenes:
+
+    {"procesadas": N,
+     "conteos": {"servicio": {"UCI ADULTOS": {"2025-03": 12, ...}, ...},
+                 "tipo": {...}, "responsable": {...}, "dependencia": {...}},
+     "materiales": {"Bombillo LED": {"UNIDAD": 40, ...}, ...}}
+
+`procesadas` es cuántas órdenes del historial (en su orden de llegada, que es el
+mismo para todos los procesos) ya están sumadas. Al guardar una orden solo se
+suman las que faltan, así que mostrar los indicadores no depende del tamaño del
+historial.
+
+Cada proceso suma en sus propios contadores (en memoria, bajo un lock) y los
+escribe a disco como mucho cada INTERVALO_GUARDADO segundos. Lo que no alcanzó
+a escribirse no se pierde: al arrancar, el proceso suma desde `procesadas` las
+órdenes que falten.
+
+Con el backend particionado, los años archivados que falten por contar no se
+cargan: se suman con el resumen de su segmento (`resumir`), que se calcula una
+sola vez y se guarda junto al segmento. Si el archivo se pierde o se sospecha de
+él, `recalcular` lo rehace completo con pandas (y los resúmenes de los años
+archivados con él):
+
+    python -m nucleo.analitica
+"""
+
+import copy
+import os
+import sys
+import threading
+import time
+
+from nucleo.almacenamiento import (
+    SUFIJO_BLOQUEO, ErrorAlmacenamiento, bloqueo_archivo, cargar_json, crear_almacen, guardar_json_atomico,
+)
+from nucleo import registro
+from nucleo.catalogo import clave_material
+from nucleo.materiales import CAMPO_MATERIALES
+
+INDICADORES_DATA_FILE = 'indicadores_data.json'
+# Segundos mínimos entre escrituras del archivo de contadores
+INTERVALO_GUARDADO = float(os.environ.get('MC_ORDENES_INDICADORES_INTERVALO', 5))
+
+# Dimensión del indicador -> campo de la orden
+DIMENSIONES = {
+    "servicio": "Servicio Aplicado",
+    "tipo": "Tipo de Mantenimiento",
+    "responsable": "Responsable Designado",
+    "dependencia": "Dependencia Solicitante",
+}
+SIN_DATO = "(sin dato)"
+
+
+def _vacios():
+    return {"procesadas": 0, "conteos": {d: {} for d in DIMENSIONES}, "materiales": {}}
+
+
+def _mes(orden):
+    return (orden.get('Fecha') or '')[:7] or SIN_DATO
+
+
+def resumir(ordenes):
+    """Contadores de una lista de órdenes (el resumen de un año archivado)."""
+    datos = _vacios()
+    IndicadoresOrdenes._sumar(datos, ordenes)
+    return datos
+
+
+def _combinar(datos, parcial):
+    """Suma a `datos` los contadores de `parcial` (órdenes que siguen a las ya contadas)."""
+    for dimension, valores in parcial['conteos'].items():
+        destino = datos['conteos'].setdefault(dimension, {})
+        for valor, meses in valores.items():
+            por_mes = destino.setdefault(valor, {})
+            for mes, n in meses.items():
+                por_mes[mes] = por_mes.get(mes, 0) + n
+    for item, unidades in parcial['materiales'].items():
+        por_unidad = datos['materiales'].setdefault(item, {})
+        for unidad, cantidad in unidades.items():
+            por_unidad[unidad] = por_unidad.get(unidad, 0) + cantidad
+    datos['procesadas'] += parcial['procesadas']
+
+
+class IndicadoresOrdenes:
+    """Contadores por dimensión y mes, y cantidades de material por ítem y unidad."""
+
+    def __init__(self, indicadores_path=INDICADORES_DATA_FILE, intervalo=INTERVALO_GUARDADO):
+        self.indicadores_path = indicadores_path
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        # Contadores vivos: se suman en el lugar, solo bajo self._lock
+        self._datos = None
+        # `procesadas` de lo último escrito a disco y hora de esa escritura
+        self._guardadas = 0
+        self._guardado = None
+        # Copia para mostrar (se rehace solo cuando los contadores avanzaron)
+        self._copia = None
+
+    def _leer(self):
+        try:
+            datos = cargar_json(self.indicadores_path, None)
+        except ErrorAlmacenamiento:
+            # Los contadores se pueden reconstruir: un archivo dañado se recalcula
+            datos = None
+        if not isinstance(datos, dict) or 'procesadas' not in datos:
+            return _vacios()
+        for dimension in DIMENSIONES:
+            datos['conteos'].setdefault(dimension, {})
+        return datos
+
+    @staticmethod
+    def _sumar(datos, ordenes):
+        conteos, materiales = datos['conteos'], datos['materiales']
+        for orden in ordenes:
+            mes = _mes(orden)
+            for dimension, campo in DIMENSIONES.items():
+                por_mes = conteos[dimension].setdefault(orden.get(campo) or SIN_DATO, {})
+                por_mes[mes] = por_mes.get(mes, 0) + 1
+            for m in orden.get(CAMPO_MATERIALES) or ():
+                if not m.get('item') or not m.get('cantidad'):
+                    continue
+                por_unidad = materiales.setdefault(m['item'].strip(), {})
+                unidad = m.get('unidad') or 'UNIDAD'
+                por_unidad[unidad] = por_unidad.get(unidad, 0) + m['cantidad']
+        datos['procesadas'] += len(ordenes)
+
+    @classmethod
+    def _sumar_desde(cls, datos, ordenes):
+        """Suma las posiciones de `ordenes` desde `procesadas`; los años archivados sin cargar, por su resumen."""
+        desde = datos['procesadas']
+        for inicio, fin in getattr(ordenes, 'archivados', ()):
+            if fin <= desde:
+                continue
+            if inicio > desde:
+                cls._sumar(datos, ordenes[desde:inicio])
+                desde = inicio
+            _combinar(datos, ordenes.resumir_archivado(inicio, desde, resumir, 'indicadores'))
+            desde = fin
+        cls._sumar(datos, ordenes[desde:])
+
+    def _cargar(self, ordenes):
+        datos = self._leer()
+        if datos['procesadas'] > len(ordenes):
+            # El archivo cuenta más órdenes que el historial (se restauró una copia): se cuenta de nuevo
+            datos = _vacios()
+        else:
+            self._guardadas = datos['procesadas']
+        return datos
+
+    def _guardar(self):
+        """Escribe los contadores si van por delante del archivo (otro proceso pudo escribir más)."""
+        with bloqueo_archivo(self.indicadores_path + SUFIJO_BLOQUEO):
+            if self._leer()['procesadas'] < self._datos['procesadas']:
+                guardar_json_atomico(self._datos, self.indicadores_path, indent=None)
+        self._guardadas, self._guardado = self._datos['procesadas'], time.monotonic()
+
+    def actualizar(self, ordenes):
+        """Suma las órdenes de `ordenes` que aún no están contadas.
+
+        `ordenes` es la vista de solo anexado del historial compartido. Escribe a
+        disco si pasaron `intervalo` segundos desde la última escritura.
+        """
+        with self._lock:
+            if self._datos is None:
+                self._datos = self._cargar(ordenes)
+            if self._datos['procesadas'] < len(ordenes):
+                self._sumar_desde(self._datos, ordenes)
+            if (self._datos['procesadas'] != self._guardadas
+                    and (self._guardado is None or time.monotonic() - self._guardado >= self.intervalo)):
+                self._guardar()
+
+    def datos(self, ordenes):
+        """Actualiza y devuelve una copia de los contadores para mostrarlos (no se modifica después)."""
+        self.actualizar(ordenes)
+        with self._lock:
+            if self._copia is None or self._copia['procesadas'] != self._datos['procesadas']:
+                self._copia = copy.deepcopy(self._datos)
+            return self._copia
+
+    def guardar(self):
+        """Escribe ya los contadores pendientes (p. ej. antes de terminar el proceso)."""
+        with self._lock:
+            if self._datos is not None and self._datos['procesadas'] != self._guardadas:
+                self._guardar()
+
+    def reemplazar(self, datos):
+        """Guarda contadores recalculados (ruta de reparación)."""
+        with self._lock, bloqueo_archivo(self.indicadores_path + SUFIJO_BLOQUEO):
+            guardar_json_atomico(datos, self.indicadores_path, indent=None)
+            self._datos, self._copia = datos, None
+            self._guardadas, self._guardado = datos['procesadas'], time.monotonic()
+
+
+def recalcular(ordenes):
+    """Recalcula todos los contadores desde cero con operaciones vectorizadas de pandas."""
+    import pandas as pd
+
+    datos = _vacios()
+    datos['procesadas'] = len(ordenes)
+    if not len(ordenes):
+        return datos
+
+    df = registro.tabla(ordenes, ['Fecha', CAMPO_MATERIALES] + list(DIMENSIONES.values()))
+    df['mes'] = df['Fecha'].fillna('').str[:7].replace('', SIN_DATO)
+    for dimension, campo in DIMENSIONES.items():
+        serie = df[campo].fillna('').replace('', SIN_DATO)
+        conteo = df.groupby([serie, 'mes']).size()
+        for (valor, mes), n in conteo.items():
+            datos['conteos'][dimension].setdefault(valor, {})[mes] = int(n)
+
+    materiales = df[CAMPO_MATERIALES].explode().dropna()
+    if not materiales.empty:
+        dm = pd.DataFrame.from_records([(m.get('item'), m.get('unidad'), m.get('cantidad')) for m in materiales],
+                                       columns=['item', 'unidad', 'cantidad'])
+        dm = dm[dm['item'].fillna('').str.strip().ne('') & dm['cantidad'].fillna(0).ne(0)]
+        dm['item'] = dm['item'].str.strip()
+        dm['unidad'] = dm['unidad'].fillna('').replace('', 'UNIDAD')
+        for (item, unidad), cantidad in dm.groupby(['item', 'unidad'])['cantidad'].sum().items():
+            cantidad = float(cantidad)
+            datos['materiales'].setdefault(item, {})[unidad] = int(cantidad) if cantidad.is_integer() else cantidad
+    return datos
+
+
+def tabla(datos, dimension):
+    """DataFrame valor x mes de una dimensión (filas ordenadas por total)."""
+    import pandas as pd
+
+    df = pd.DataFrame(datos['conteos'][dimension]).T.fillna(0).astype(int)
+    if df.empty:
+        return df
+    df = df[sorted(df.columns)]
+    return df.loc[df.sum(axis=1).sort_values(ascending=False).index]
+
+
+def tabla_materiales(datos):
+    """DataFrame de cantidades totales por ítem y unidad.
+
+    Las escrituras distintas de un mismo ítem ("BOMBILLO LED", "Bombillo LED")
+    se suman bajo la de mayor cantidad (misma clave que el catálogo de materiales).
+    """
+    import pandas as pd
+
+    filas = [(item, unidad, cantidad)
+             for item, por_unidad in datos['materiales'].items() for unidad, cantidad in por_unidad.items()]
+    df = pd.DataFrame(filas, columns=['Ítem', 'Unidad', 'Cantidad Total'])
+    if not df.empty:
+        clave = df['Ítem'].map(clave_material)
+        nombres = (df.assign(clave=clave).sort_values('Cantidad Total', ascending=False)
+                   .drop_duplicates('clave').set_index('clave')['Ítem'])
+        df = df.assign(**{'Ítem': clave.map(nombres)}).groupby(['Ítem', 'Unidad'], as_index=False)['Cantidad Total'].sum()
+    return df.sort_values('Cantidad Total', ascending=False, ignore_index=True)
+
+
+def main(argv=None):
+    almacen = crear_almacen()
+    try:
+        ordenes = almacen.cargar_ordenes()
+    except ErrorAlmacenamiento as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    IndicadoresOrdenes().reemplazar(recalcular(ordenes))
+    if hasattr(almacen, 'archivados'):
+        # Resúmenes de los años archivados (los usa actualizar para no cargarlos)
+        for i in range(len(almacen.archivados()[1])):
+            almacen.resumir_archivado(i, 0, resumir, 'indicadores', renovar=True)
+    print(f"Indicadores recalculados a partir de {len(ordenes)} órdenes ({almacen.nombre}).")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
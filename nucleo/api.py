@@ -0,0 +1,370 @@
+"""API HTTP local para que otros sistemas del hospital envíen órdenes (sin Streamlit).
+
+Servicio independiente (http.server de la biblioteca estándar) que corre junto a
+la aplicación y comparte su backend, sus reservas de consecutivos y sus bloqueos.
+
+    POST /ordenes            una orden (objeto JSON) o varias (lista); 202 con el id del envío
+    GET  /envios/<id>        estado del envío: en_cola, guardado (con los números) o rechazado
+    GET  /ordenes/<numero>   orden con ese número, su estado (abierta, en_ejecucion, cerrada,
+                             anulada; en_cola si aún espera) y sus despachos de almacén
+    GET  /salud              tamaño de la cola y último lote guardado
+
+Cada envío se valida al recibirlo con las reglas del formulario
+(nucleo.validacion: servicios, dependencias, firmantes del directorio) y, si es
+válido, entra a una cola. Un único hilo guardador junta lo que llegue en
+ESPERA_LOTE segundos (hasta LOTE_MAX órdenes), asigna los consecutivos que
+falten y lo guarda con AsignadorConsecutivos.asignar_lote: un bloqueo y un
+anexado al diario por lote en lugar de una escritura por orden. Si un lote
+falla (por ejemplo, un número fijado por el cliente que otra sesión acaba de
+usar), sus envíos se reintentan uno por uno y solo el culpable queda rechazado.
+Ante un error inesperado se rechazan los envíos de ese lote y el guardador
+sigue con los siguientes.
+
+Con MC_ORDENES_API_CLAVE definida, las peticiones deben traer
+`Authorization: Bearer <clave>`.
+
+Uso:
+    python -m nucleo.api [--host 127.0.0.1] [--puerto 8502]
+"""
+
+import argparse
+import hmac
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from nucleo import metricas
+from nucleo.almacenamiento import ErrorAlmacenamiento, crear_almacen, esperar_compactaciones
+from nucleo.directorio import DIRECTORIO_INICIAL, DirectorioFirmantes
+from nucleo.registro import a_json
+from nucleo.validacion import preparar_orden
+
+API_HOST = os.environ.get('MC_ORDENES_API_HOST', '127.0.0.1')
+API_PUERTO = int(os.environ.get('MC_ORDENES_API_PUERTO', '8502'))
+API_CLAVE = os.environ.get('MC_ORDENES_API_CLAVE', '')
+# Límites de un envío
+MAX_CUERPO = 2 * 1024 * 1024
+MAX_ORDENES_POR_ENVIO = 500
+# Órdenes en cola a partir de las cuales se responde 503
+COLA_MAX = 5000
+# Agrupación del guardador: tamaño máximo del lote y espera para completarlo (segundos)
+LOTE_MAX = 200
+ESPERA_LOTE = 0.25
+# Envíos cuyo estado se conserva para consulta
+ENVIOS_MAX = 10000
+# Cada cuánto se relee el directorio de firmantes para validar (segundos)
+RECARGA_DIRECTORIO = 10
+
+
+class ColaLlena(Exception):
+    """La cola de envíos superó COLA_MAX órdenes."""
+
+
+class ReceptorOrdenes:
+    """Cola de envíos validados y el hilo que los guarda por lotes."""
+
+    def __init__(self, ordenes_compartidas, asignador, indicadores=None):
+        self.ordenes = ordenes_compartidas
+        self.asignador = asignador
+        self.indicadores = indicadores
+        self._cola = queue.Queue()
+        self._lock = threading.Lock()
+        self._envios = OrderedDict()
+        self._pendientes = 0
+        self.ultimo_lote = None
+        # Lote que el guardador ya sacó de la cola y aún no termina
+        self._en_curso = ()
+        self._hilo = threading.Thread(target=self._ciclo, name='guardador-ordenes')
+        self._hilo.start()
+
+    # --- Envíos ---
+
+    def encolar(self, ordenes):
+        """Encola órdenes ya validadas; devuelve el id del envío."""
+        with self._lock:
+            if self._pendientes + len(ordenes) > COLA_MAX:
+                raise ColaLlena(f"Hay {self._pendientes} órdenes en cola; intente más tarde.")
+            envio_id = uuid.uuid4().hex
+            self._envios[envio_id] = {"estado": "en_cola", "recibido": time.time(), "ordenes": len(ordenes)}
+            while len(self._envios) > ENVIOS_MAX:
+                self._envios.popitem(last=False)
+            self._pendientes += len(ordenes)
+        self._cola.put((envio_id, ordenes))
+        return envio_id
+
+    def estado(self, envio_id):
+        with self._lock:
+            envio = self._envios.get(envio_id)
+            return dict(envio) if envio is not None else None
+
+    def en_cola(self, numero):
+        """True si una orden con ese número fijado por el cliente espera en la cola."""
+        with self._cola.mutex:
+            envios = [e for e in self._cola.queue if e is not None] + list(self._en_curso)
+        return any(o.get('Número de Orden') == numero for _, ordenes in envios for o in ordenes)
+
+    def pendientes(self):
+        with self._lock:
+            return self._pendientes
+
+    def detener(self):
+        """Guarda lo que quede en la cola y termina el hilo guardador."""
+        self._cola.put(None)
+        self._hilo.join()
+        esperar_compactaciones()
+        if self.indicadores is not None:
+            # Los contadores se escriben a disco cada tantos segundos: lo pendiente, ahora
+            try:
+                self.indicadores.guardar()
+            except (ErrorAlmacenamiento, OSError) as e:
+                print(f"Aviso: no se guardaron los indicadores: {e}", file=sys.stderr)
+
+    # --- Guardador ---
+
+    def _ciclo(self):
+        while True:
+            primero = self._cola.get()
+            if primero is None:
+                return
+            lote, total, fin = [primero], len(primero[1]), time.monotonic() + ESPERA_LOTE
+            self._en_curso = lote
+            detener = False
+            while total < LOTE_MAX:
+                try:
+                    envio = self._cola.get(timeout=max(0.0, fin - time.monotonic()))
+                except queue.Empty:
+                    break
+                if envio is None:
+                    detener = True
+                    break
+                lote.append(envio)
+                total += len(envio[1])
+            try:
+                self._guardar(lote)
+            except Exception as e:
+                # Un error inesperado no debe detener el guardador: solo se rechaza este lote
+                print(f"Aviso: falló el guardado de un lote de la API: {type(e).__name__}: {e}", file=sys.stderr)
+                for envio_id, ordenes in lote:
+                    self._terminar(envio_id, len(ordenes), {"estado": "rechazado", "error": f"Error interno: {e}"})
+            finally:
+                self._en_curso = ()
+            if detener:
+                return
+
+    def _guardar(self, lote):
+        # Copias: si el lote falla, los envíos se reintentan con los números originales
+        ordenes = [dict(o) for _, originales in lote for o in originales]
+        try:
+            with metricas.medir('api_lote'):
+                self.asignador.asignar_lote(ordenes)
+        except (ErrorAlmacenamiento, OSError, ValueError) as e:
+            if len(lote) > 1:
+                for envio in lote:
+                    self._guardar([envio])
+                return
+            self._terminar(lote[0][0], len(lote[0][1]), {"estado": "rechazado", "error": str(e).replace('**', '')})
+            return
+
+        posicion = 0
+        for envio_id, originales in lote:
+            guardadas = ordenes[posicion:posicion + len(originales)]
+            posicion += len(originales)
+            self._terminar(envio_id, len(originales), {
+                "estado": "guardado", "guardado": time.time(),
+                "numeros": [{"orden": o['Número de Orden'], "solicitud": o['Solicitud N°']} for o in guardadas],
+            })
+        self.ultimo_lote = {"ordenes": len(ordenes), "envios": len(lote), "hora": time.time()}
+        if self.indicadores is not None:
+            # Como guardar_orden: los indicadores suman solo lo nuevo
+            try:
+                self.indicadores.actualizar(self.ordenes.vista())
+            except (ErrorAlmacenamiento, OSError) as e:
+                print(f"Aviso: no se actualizaron los indicadores: {e}", file=sys.stderr)
+
+    def _terminar(self, envio_id, cantidad, resultado):
+        """Fija el resultado de un envío aún en cola (los ya terminados no cambian)."""
+        with self._lock:
+            envio = self._envios.get(envio_id)
+            if envio is not None and envio["estado"] != "en_cola":
+                return
+            self._pendientes -= cantidad
+            if envio is not None:
+                envio.update(resultado)
+
+
+# =========================================================================
+# === SERVIDOR HTTP ===
+# =========================================================================
+
+class _Directorio:
+    """Directorio de firmantes para validar, releído cada RECARGA_DIRECTORIO segundos."""
+
+    def __init__(self, almacen):
+        self.almacen = almacen
+        self._lock = threading.Lock()
+        self._directorio = None
+        self._leido = 0.0
+
+    def actual(self):
+        with self._lock:
+            if self._directorio is None or time.monotonic() - self._leido > RECARGA_DIRECTORIO:
+                self._directorio = DirectorioFirmantes(self.almacen.cargar_directorio(DIRECTORIO_INICIAL))
+                self._leido = time.monotonic()
+            return self._directorio
+
+
+class ManejadorAPI(BaseHTTPRequestHandler):
+    """Rutas de la API; el servidor lleva `receptor`, `ordenes` y `directorio`."""
+
+    server_version = 'MCOrdenesAPI/1.0'
+
+    def _responder(self, codigo, cuerpo, cabeceras=()):
+        datos = json.dumps(cuerpo, ensure_ascii=False, default=a_json).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(datos)))
+        for nombre, valor in cabeceras:
+            self.send_header(nombre, valor)
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def _autorizado(self):
+        if not API_CLAVE:
+            return True
+        encabezado = self.headers.get('Authorization', '')
+        if hmac.compare_digest(encabezado, f'Bearer {API_CLAVE}'):
+            return True
+        self._responder(401, {"error": "Falta la clave de la API o no es válida."})
+        return False
+
+    def _ruta(self):
+        return [parte for parte in self.path.split('?', 1)[0].split('/') if parte]
+
+    def do_POST(self):
+        if not self._autorizado():
+            return
+        if self._ruta() != ['ordenes']:
+            return self._responder(404, {"error": "Ruta no encontrada."})
+        try:
+            largo = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            largo = -1
+        if not 0 < largo <= MAX_CUERPO:
+            return self._responder(413 if largo > MAX_CUERPO else 400,
+                                   {"error": f"El cuerpo debe ser JSON de hasta {MAX_CUERPO} bytes."})
+        try:
+            datos = json.loads(self.rfile.read(largo))
+        except ValueError:
+            return self._responder(400, {"error": "El cuerpo no es JSON válido."})
+
+        registros = [datos] if isinstance(datos, dict) else datos
+        if not isinstance(registros, list) or not registros:
+            return self._responder(400, {"error": "Envíe una orden (objeto) o una lista de órdenes."})
+        if len(registros) > MAX_ORDENES_POR_ENVIO:
+            return self._responder(413, {"error": f"Máximo {MAX_ORDENES_POR_ENVIO} órdenes por envío."})
+
+        directorio = self.server.directorio.actual()
+        ordenes, rechazos = [], []
+        for i, registro in enumerate(registros):
+            if not isinstance(registro, dict):
+                rechazos.append({"registro": i, "errores": ["La orden debe ser un objeto JSON."]})
+                continue
+            orden, errores = preparar_orden(registro, directorio)
+            if errores:
+                rechazos.append({"registro": i, "errores": errores})
+            ordenes.append(orden)
+        if rechazos:
+            # Todo o nada, como la CLI: el cliente corrige y reenvía el envío completo
+            return self._responder(422, {"error": "Hay órdenes inválidas; no se encoló nada.", "rechazos": rechazos})
+
+        try:
+            envio_id = self.server.receptor.encolar(ordenes)
+        except ColaLlena as e:
+            return self._responder(503, {"error": str(e)}, [('Retry-After', '5')])
+        self._responder(202, {"id": envio_id, "estado": "en_cola", "ordenes": len(ordenes),
+                              "consulta": f"/envios/{envio_id}"})
+
+    def do_GET(self):
+        if not self._autorizado():
+            return
+        ruta = self._ruta()
+        if ruta == ['salud']:
+            receptor = self.server.receptor
+            return self._responder(200, {"cola": receptor.pendientes(), "ultimo_lote": receptor.ultimo_lote})
+        if len(ruta) == 2 and ruta[0] == 'envios':
+            estado = self.server.receptor.estado(ruta[1])
+            if estado is None:
+                return self._responder(404, {"error": "Envío desconocido (o demasiado antiguo)."})
+            return self._responder(200, dict(estado, id=ruta[1]))
+        if len(ruta) == 2 and ruta[0] == 'ordenes':
+            try:
+                numero = int(ruta[1])
+            except ValueError:
+                return self._responder(400, {"error": "El número de orden debe ser un entero."})
+            try:
+                orden = self.server.ordenes.buscar(numero)
+            except ErrorAlmacenamiento as e:
+                return self._responder(500, {"error": str(e)})
+            if orden is not None:
+                ordenes = self.server.ordenes
+                return self._responder(200, {"numero": numero, "estado": ordenes.estados.estado(numero),
+                                             "orden": ordenes.con_despachos(orden)})
+            if self.server.receptor.en_cola(numero):
+                return self._responder(200, {"numero": numero, "estado": "en_cola"})
+            return self._responder(404, {"numero": numero, "error": "No existe una orden con ese número."})
+        self._responder(404, {"error": "Ruta no encontrada."})
+
+
+class ServidorAPI(ThreadingHTTPServer):
+    # Las ráfagas de envíos no deben encontrar la cola de conexiones llena (por defecto, 5)
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def crear_servidor(host=API_HOST, puerto=API_PUERTO, almacen=None):
+    """Servidor HTTP listo para serve_forever(), con su receptor ya en marcha."""
+    from nucleo.analitica import IndicadoresOrdenes
+    from nucleo.asignador import AsignadorConsecutivos
+    from nucleo.compartido import OrdenesCompartidas
+
+    almacen = almacen or crear_almacen()
+    ordenes = OrdenesCompartidas(almacen)
+    ordenes.sincronizar()
+    servidor = ServidorAPI((host, puerto), ManejadorAPI)
+    servidor.ordenes = ordenes
+    servidor.directorio = _Directorio(almacen)
+    servidor.receptor = ReceptorOrdenes(ordenes, AsignadorConsecutivos(ordenes), IndicadoresOrdenes())
+    return servidor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API HTTP local para recibir órdenes de otros sistemas.")
+    parser.add_argument('--host', default=API_HOST)
+    parser.add_argument('--puerto', type=int, default=API_PUERTO)
+    args = parser.parse_args(argv)
+
+    try:
+        servidor = crear_servidor(args.host, args.puerto)
+    except (ErrorAlmacenamiento, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"API de órdenes en http://{args.host}:{args.puerto} (Ctrl+C para detener)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        # Lo que ya se aceptó (202) se guarda antes de salir
+        servidor.receptor.detener()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
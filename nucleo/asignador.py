@@ -0,0 +1,205 @@
+"""Asignación concurrente de consecutivos (Orden N° y Solicitud 09-XX) con reservas.
+
+Cuando una sesión abre el formulario recibe una reserva de corta duración con el
+siguiente número de orden y de solicitud que no estén usados ni reservados por
+otra sesión. Al guardar, la reserva se confirma: dentro de un bloqueo fcntl se
+sincroniza el historial, se comprueba que los números sigan libres y se anexa la
+orden. La sección crítica es solo un anexado al diario (o un INSERT), nunca una
+reescritura del historial completo.
+
+Las reservas viven en un JSON pequeño que se reescribe de forma atómica
+(temporal + rename) bajo el mismo bloqueo, así que también las ven la CLI y
+otros procesos.
+"""
+
+import time
+
+from nucleo.almacenamiento import (
+    SUFIJO_BLOQUEO, ErrorAlmacenamiento, bloqueo_archivo, cargar_json, guardar_json_atomico,
+)
+from nucleo.numeracion import generar_solicitud_nro, numero_solicitud
+
+RESERVAS_DATA_FILE = 'reservas_consecutivos.json'
+# Duración de una reserva sin guardar (segundos)
+DURACION_RESERVA = 15 * 60
+
+
+class ConsecutivoNoDisponible(ErrorAlmacenamiento):
+    """El número de orden o de solicitud ya está usado o reservado por otra sesión."""
+
+
+def solicitud_canonica(solicitud):
+    """(solicitud '09-XX' normalizada, sufijo); '09-5' y '09-05' son la misma solicitud.
+
+    Lanza ValueError si no tiene el formato 09-XX.
+    """
+    sufijo = numero_solicitud(solicitud.strip() if isinstance(solicitud, str) else solicitud)
+    if sufijo is None:
+        raise ValueError(f"El Número de Solicitud {solicitud!r} no sigue el formato '09-XX'.")
+    return generar_solicitud_nro(sufijo), sufijo
+
+
+class AsignadorConsecutivos:
+    """Entrega, confirma y libera reservas de consecutivos para varias sesiones/procesos."""
+
+    def __init__(self, ordenes_compartidas, reservas_path=RESERVAS_DATA_FILE, duracion=DURACION_RESERVA):
+        self.ordenes = ordenes_compartidas
+        self.reservas_path = reservas_path
+        self.duracion = duracion
+
+    def _bloqueo(self):
+        return bloqueo_archivo(self.reservas_path + SUFIJO_BLOQUEO)
+
+    def _leer_reservas(self, ahora):
+        """Reservas vigentes indexadas por token (las vencidas se descartan)."""
+        try:
+            reservas = cargar_json(self.reservas_path, {})
+        except ErrorAlmacenamiento:
+            # Las reservas son efímeras: si el archivo se dañó, se empieza de cero
+            reservas = {}
+        return {token: r for token, r in reservas.items() if r.get('expira', 0) > ahora}
+
+    def _guardar_reservas(self, reservas):
+        guardar_json_atomico(reservas, self.reservas_path, indent=None)
+
+    def reservar(self, token):
+        """Reserva (o renueva) para `token` un número de orden y de solicitud libres.
+
+        Devuelve un dict {'orden', 'solicitud', 'expira'}; `solicitud` es el sufijo numérico.
+        """
+        ahora = time.time()
+        with self._bloqueo():
+            self.ordenes.sincronizar()
+            indice = self.ordenes.indice
+            reservas = self._leer_reservas(ahora)
+            actual = reservas.pop(token, None)
+
+            ordenes_reservadas = {r['orden'] for r in reservas.values()}
+            solicitudes_reservadas = {r['solicitud'] for r in reservas.values()}
+
+            if actual and not indice.existe_orden(actual['orden']) and actual['orden'] not in ordenes_reservadas:
+                orden = actual['orden']
+            else:
+                orden = indice.siguiente_orden()
+                while orden in ordenes_reservadas:
+                    orden = indice.siguiente_orden_libre(orden)
+
+            if (actual and actual['solicitud'] not in indice.sufijos_solicitud
+                    and actual['solicitud'] not in solicitudes_reservadas):
+                solicitud = actual['solicitud']
+            else:
+                solicitud = indice.siguiente_solicitud()
+                while solicitud in solicitudes_reservadas:
+                    solicitud = indice.siguiente_solicitud_libre(solicitud)
+
+            reserva = {'orden': orden, 'solicitud': solicitud, 'expira': ahora + self.duracion}
+            reservas[token] = reserva
+            self._guardar_reservas(reservas)
+            return dict(reserva)
+
+    def confirmar(self, token, orden):
+        """Guarda `orden` si sus números siguen libres y libera la reserva de `token`.
+
+        Lanza ConsecutivoNoDisponible si otro proceso usó o reservó esos números.
+        """
+        ahora = time.time()
+        numero = int(orden['Número de Orden'])
+        solicitud, sufijo = solicitud_canonica(orden['Solicitud N°'])
+        orden['Solicitud N°'] = solicitud
+        with self._bloqueo():
+            # Incorpora lo guardado por otros procesos antes de comprobar duplicados
+            self.ordenes.sincronizar()
+            indice = self.ordenes.indice
+            reservas = self._leer_reservas(ahora)
+            otras = [r for t, r in reservas.items() if t != token]
+
+            if indice.existe_orden(numero):
+                raise ConsecutivoNoDisponible(f"El Número de Orden {numero} ya fue guardado por otra sesión.")
+            if sufijo in indice.sufijos_solicitud:
+                raise ConsecutivoNoDisponible(f"El Número de Solicitud {solicitud} ya fue guardado por otra sesión.")
+            if any(r['orden'] == numero for r in otras):
+                raise ConsecutivoNoDisponible(f"El Número de Orden {numero} está reservado por otra sesión.")
+            if any(r['solicitud'] == sufijo for r in otras):
+                raise ConsecutivoNoDisponible(f"El Número de Solicitud {solicitud} está reservado por otra sesión.")
+
+            self.ordenes.agregar(orden)
+
+            if reservas.pop(token, None) is not None:
+                self._guardar_reservas(reservas)
+
+    def confirmar_lote(self, ordenes):
+        """Guarda de una vez órdenes con números ya fijados (importación histórica).
+
+        Bajo el mismo bloqueo que `confirmar`: lanza ConsecutivoNoDisponible si
+        alguno de los números se usó o se reservó desde que se validaron, o si se
+        repite dentro del lote. Las solicitudes se guardan normalizadas ('09-05').
+        """
+        with self._bloqueo():
+            self.ordenes.sincronizar()
+            indice = self.ordenes.indice
+            reservas = self._leer_reservas(time.time())
+            ordenes_ocupadas = {r['orden'] for r in reservas.values()}
+            solicitudes_ocupadas = {r['solicitud'] for r in reservas.values()}
+            for orden in ordenes:
+                numero = int(orden['Número de Orden'])
+                solicitud, sufijo = solicitud_canonica(orden['Solicitud N°'])
+                if indice.existe_orden(numero) or numero in ordenes_ocupadas:
+                    raise ConsecutivoNoDisponible(f"El Número de Orden {numero} ya está usado o reservado.")
+                if sufijo in indice.sufijos_solicitud or sufijo in solicitudes_ocupadas:
+                    raise ConsecutivoNoDisponible(f"El Número de Solicitud {solicitud} ya está usado o reservado.")
+                ordenes_ocupadas.add(numero)
+                solicitudes_ocupadas.add(sufijo)
+            for orden in ordenes:
+                orden['Solicitud N°'] = solicitud_canonica(orden['Solicitud N°'])[0]
+            self.ordenes.agregar_lote(ordenes)
+
+    def asignar_lote(self, ordenes):
+        """Completa los consecutivos que falten y guarda las órdenes de una vez (CLI).
+
+        Equivale a reservar + confirmar por cada orden, pero con un solo bloqueo y
+        un solo anexado: a las órdenes sin 'Número de Orden' o sin 'Solicitud N°'
+        se les asignan los siguientes números libres (ni usados ni reservados por
+        otra sesión); los números que ya traen se comprueban como en
+        `confirmar_lote`. Las órdenes se completan (y sus solicitudes se
+        normalizan) en sitio.
+        """
+        with self._bloqueo():
+            self.ordenes.sincronizar()
+            indice = self.ordenes.indice
+            reservas = self._leer_reservas(time.time())
+            ordenes_ocupadas = {r['orden'] for r in reservas.values()}
+            solicitudes_ocupadas = {r['solicitud'] for r in reservas.values()}
+            for orden in ordenes:
+                if orden.get('Número de Orden') is not None:
+                    numero = orden['Número de Orden'] = int(orden['Número de Orden'])
+                    if indice.existe_orden(numero) or numero in ordenes_ocupadas:
+                        raise ConsecutivoNoDisponible(f"El Número de Orden {numero} ya está usado o reservado.")
+                    ordenes_ocupadas.add(numero)
+                if orden.get('Solicitud N°') is not None:
+                    solicitud, sufijo = solicitud_canonica(orden['Solicitud N°'])
+                    if sufijo in indice.sufijos_solicitud or sufijo in solicitudes_ocupadas:
+                        raise ConsecutivoNoDisponible(f"El Número de Solicitud {solicitud} ya está usado o reservado.")
+                    orden['Solicitud N°'] = solicitud
+                    solicitudes_ocupadas.add(sufijo)
+
+            numero, sufijo = indice.siguiente_orden() - 1, indice.siguiente_solicitud() - 1
+            for orden in ordenes:
+                if orden.get('Número de Orden') is None:
+                    numero = indice.siguiente_orden_libre(numero)
+                    while numero in ordenes_ocupadas:
+                        numero = indice.siguiente_orden_libre(numero)
+                    orden['Número de Orden'] = numero
+                if orden.get('Solicitud N°') is None:
+                    sufijo = indice.siguiente_solicitud_libre(sufijo)
+                    while sufijo in solicitudes_ocupadas:
+                        sufijo = indice.siguiente_solicitud_libre(sufijo)
+                    orden['Solicitud N°'] = generar_solicitud_nro(sufijo)
+            self.ordenes.agregar_lote(ordenes)
+            return ordenes
+
+    def liberar(self, token):
+        """Libera la reserva de `token` (por ejemplo, al cerrar el formulario sin guardar)."""
+        with self._bloqueo():
+            reservas = self._leer_reservas(time.time())
+            if reservas.pop(token, None) is not None:
+                self._guardar_reservas(reservas)
@@ -0,0 +1,191 @@
+"""Búsqueda de texto libre sobre el motivo, los materiales y el servicio de las órdenes.
+
+IndiceTexto es un índice invertido en memoria: para cada término guarda las
+posiciones de las órdenes que lo contienen y cuántas veces aparece. Los términos
+se normalizan sin tildes ni mayúsculas ("Lámpara" y "lampara" son el mismo
+término). El índice se actualiza orden por orden desde
+OrdenesCompartidas.sincronizar, es decir, también al guardar una orden nueva;
+nunca se reconstruye completo.
+
+Las consultas exigen todos los términos (en singular y cada uno también como
+prefijo, así "ventiladores" y "ventila" encuentran "ventilador") y ordenan el
+resultado con BM25.
+"""
+
+import bisect
+import math
+import re
+import threading
+import unicodedata
+
+from nucleo.materiales import CAMPO_MATERIALES
+
+CAMPOS_TEXTO = ("Motivo", CAMPO_MATERIALES, "Servicio Aplicado")
+# Longitud mínima para buscar un término también como prefijo
+LONGITUD_PREFIJO = 3
+# Parámetros habituales de BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_PATRON_TERMINO = re.compile(r'[a-z0-9ñ]+')
+
+
+def normalizar_texto(texto):
+    """Minúsculas y sin tildes ni diéresis (la ñ se conserva).
+
+    Primero se compone (NFC): una "ñ" que llega descompuesta ("n" + tilde, como
+    suele llegar texto pegado desde macOS) también se conserva.
+    """
+    texto = unicodedata.normalize('NFD', unicodedata.normalize('NFC', texto).lower().replace('ñ', '\0'))
+    return ''.join(c for c in texto if unicodedata.category(c) != 'Mn').replace('\0', 'ñ')
+
+
+_VOCALES = 'aeiou'
+# Terminaciones de plural -> singular, de la más larga a la más corta; la tercera
+# columna son las letras que deben precederla (None: cualquiera)
+_SUFIJOS_PLURAL = (
+    ('eses', 'es', None),       # meses -> mes, intereses -> interes
+    ('uses', 'us', None),       # autobuses -> autobus
+    ('ises', 'is', None),       # paises -> pais
+    ('xes', 'x', None),         # faxes -> fax
+    ('ces', 'z', _VOCALES),     # luces -> luz (dulces -> dulce)
+    ('res', 'r', 'aeou'),       # motores -> motor (aires -> aire, torres -> torre)
+    ('les', 'l', _VOCALES),     # canales -> canal
+    ('nes', 'n', _VOCALES),     # conexiones -> conexion
+    ('des', 'd', _VOCALES),     # paredes -> pared
+    ('jes', 'j', _VOCALES),     # relojes -> reloj
+    ('yes', 'y', _VOCALES),     # leyes -> ley
+    # "-is" y "-us" se dejan: suelen ser singulares (pais, autobus, virus)
+    ('s', '', 'aeobcdfghjklmnpqrtvwxyz'),  # cables -> cable, llaves -> llave, clases -> clase
+)
+
+
+def _singular(termino):
+    """Plural simple del español -> singular, según _SUFIJOS_PLURAL.
+
+    Los términos de hasta cuatro letras y los números quedan igual. Es una
+    aproximación: basta con que la consulta y el índice lleguen al mismo término,
+    por eso un singular terminado en "s" se reduce igual que su forma suelta
+    ("intereses" -> "interes" -> "intere", como "interes").
+    """
+    if len(termino) <= 4 or termino.isdigit() or not termino.endswith('s'):
+        return termino
+    for sufijo, reemplazo, previas in _SUFIJOS_PLURAL:
+        if termino.endswith(sufijo) and (previas is None or termino[-len(sufijo) - 1] in previas):
+            singular = termino[:-len(sufijo)] + reemplazo
+            return _singular(singular) if reemplazo.endswith('s') else singular
+    return termino
+
+
+def tokenizar(texto):
+    """Términos normalizados (sin tildes, en minúscula y en singular) de un texto."""
+    return [_singular(t) for t in _PATRON_TERMINO.findall(normalizar_texto(texto))] if texto else []
+
+
+def texto_orden(orden, campos=CAMPOS_TEXTO):
+    """Texto indexable de una orden (los materiales aportan el nombre de cada ítem)."""
+    partes = []
+    for campo in campos:
+        valor = orden.get(campo)
+        if not valor:
+            continue
+        if campo == CAMPO_MATERIALES and not isinstance(valor, str):
+            partes.extend(str(m.get('item') or '') for m in valor)
+        else:
+            partes.append(str(valor))
+    return ' '.join(partes)
+
+
+class IndiceTexto:
+    """Índice invertido término -> {posición: frecuencia} con ranking BM25."""
+
+    def __init__(self, campos=CAMPOS_TEXTO):
+        self.campos = tuple(campos)
+        self._lock = threading.Lock()
+        self._postings = {}
+        # Vocabulario ordenado para resolver prefijos con bisect; los términos nuevos
+        # esperan en _terminos_nuevos hasta la siguiente consulta por prefijo
+        self._terminos = []
+        self._terminos_nuevos = []
+        # Longitud de cada orden por posición (0 en las posiciones aún sin indexar)
+        self._longitudes = []
+        self._suma_longitudes = 0
+        self._documentos = 0
+
+    def __len__(self):
+        return self._documentos
+
+    def agregar_ordenes(self, ordenes, inicio=None):
+        """Indexa órdenes anexadas al final de la lista compartida (o desde la posición `inicio`)."""
+        with self._lock:
+            self._agregar(list(ordenes), inicio)
+
+    def _agregar(self, ordenes, inicio=None):
+        posicion = len(self._longitudes) if inicio is None else inicio
+        if posicion + len(ordenes) > len(self._longitudes):
+            self._longitudes.extend([0] * (posicion + len(ordenes) - len(self._longitudes)))
+        for orden in ordenes:
+            terminos = tokenizar(texto_orden(orden, self.campos))
+            for termino in terminos:
+                postings = self._postings.get(termino)
+                if postings is None:
+                    postings = self._postings[termino] = {}
+                    self._terminos_nuevos.append(termino)
+                postings[posicion] = postings.get(posicion, 0) + 1
+            self._longitudes[posicion] = len(terminos)
+            self._suma_longitudes += len(terminos)
+            self._documentos += 1
+            posicion += 1
+
+    def _expandir(self, termino):
+        """Términos del vocabulario iguales a `termino` o que empiezan por él."""
+        if len(termino) < LONGITUD_PREFIJO:
+            return [termino] if termino in self._postings else []
+        if self._terminos_nuevos:
+            nuevos, self._terminos_nuevos = self._terminos_nuevos, []
+            self._terminos = sorted(self._terminos + nuevos)
+        inicio = bisect.bisect_left(self._terminos, termino)
+        fin = bisect.bisect_left(self._terminos, termino + '\uffff')
+        return self._terminos[inicio:fin]
+
+    def buscar(self, consulta, n=None, limite=None):
+        """Posiciones que contienen todos los términos de `consulta`, de mayor a menor relevancia.
+
+        `n` limita la búsqueda a las primeras `n` órdenes (la vista de la sesión).
+        """
+        with self._lock:
+            return self._buscar(consulta, n, limite)
+
+    def _buscar(self, consulta, n, limite):
+        n = len(self._longitudes) if n is None else min(n, len(self._longitudes))
+        terminos = list(dict.fromkeys(tokenizar(consulta)))
+        if not terminos or not n or not self._documentos:
+            return []
+
+        # Por cada término de la consulta: {posición: puntaje} sumando sus expansiones
+        promedio = self._suma_longitudes / self._documentos
+        por_termino = []
+        for termino in terminos:
+            puntajes = {}
+            for expansion in self._expandir(termino):
+                postings = self._postings[expansion]
+                idf = math.log(1 + (self._documentos - len(postings) + 0.5) / (len(postings) + 0.5))
+                for posicion, frecuencia in postings.items():
+                    if posicion >= n:
+                        continue
+                    norma = BM25_K1 * (1 - BM25_B + BM25_B * self._longitudes[posicion] / promedio)
+                    puntaje = idf * frecuencia * (BM25_K1 + 1) / (frecuencia + norma)
+                    puntajes[posicion] = puntajes.get(posicion, 0.0) + puntaje
+            if not puntajes:
+                return []
+            por_termino.append(puntajes)
+
+        por_termino.sort(key=len)
+        resultado = dict(por_termino[0])
+        for puntajes in por_termino[1:]:
+            resultado = {p: s + puntajes[p] for p, s in resultado.items() if p in puntajes}
+            if not resultado:
+                return []
+        # A igual puntaje, primero la orden más reciente
+        posiciones = sorted(resultado, key=lambda p: (-resultado[p], -p))
+        return posiciones[:limite] if limite else posiciones
@@ -0,0 +1,128 @@
+"""Catálogo de materiales para autocompletar el formulario, armado desde el historial.
+
+Cada ítem se identifica por su clave normalizada (sin tildes, en minúscula y con
+los espacios colapsados), así "Bombillo LED", "BOMBILLO LED" y "bombillo  led"
+son el mismo material. Por clave se guarda cuántas veces se ha pedido, la
+escritura más usada (la que se sugiere) y la unidad más usada (la predeterminada).
+
+Las sugerencias salen de dos arreglos ordenados que se consultan con bisect:
+las claves completas (prefijo del nombre) y los pares (resto de la clave desde
+cada palabra, clave) para encontrar "led 18" dentro de "bombillo led 18w". Un
+prefijo es un rango contiguo en cada arreglo, así que la búsqueda no recorre el
+catálogo. Los resultados se memorizan hasta el siguiente cambio (sobre todo
+sirve a los prefijos de una o dos letras, que abarcan muchos ítems). El catálogo
+se actualiza orden por orden desde OrdenesCompartidas.sincronizar (también al
+guardar), nunca se reconstruye.
+"""
+
+import bisect
+import heapq
+import threading
+
+from nucleo.busqueda import normalizar_texto
+from nucleo.materiales import CAMPO_MATERIALES
+
+# Sugerencias que se muestran por defecto
+SUGERENCIAS_MAX = 8
+# Resultados memorizados como máximo (se vacían con cada cambio del catálogo)
+MEMO_MAX = 1024
+# Mayor que cualquier carácter de una clave: cierra el rango de un prefijo
+_FIN_PREFIJO = '\U0010ffff'
+
+
+def clave_material(item):
+    """Clave normalizada de un ítem ('' si está vacío)."""
+    return ' '.join(normalizar_texto(item).split()) if item else ''
+
+
+class _Entrada:
+    __slots__ = ('frecuencia', 'escrituras', 'unidades')
+
+    def __init__(self):
+        self.frecuencia = 0
+        self.escrituras = {}
+        self.unidades = {}
+
+    @property
+    def nombre(self):
+        return max(self.escrituras.items(), key=lambda par: par[1])[0]
+
+    @property
+    def unidad(self):
+        return max(self.unidades.items(), key=lambda par: par[1])[0] if self.unidades else 'UNIDAD'
+
+
+class CatalogoMateriales:
+    """Ítems distintos del historial con frecuencia, unidad predeterminada e índice de prefijos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entradas = {}
+        self._claves = []
+        self._restos = []
+        self._memo = {}
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def agregar_ordenes(self, ordenes):
+        """Suma los materiales de órdenes nuevas (las claves nuevas se insertan en orden)."""
+        with self._lock:
+            for orden in ordenes:
+                for material in orden.get(CAMPO_MATERIALES) or ():
+                    self._agregar(material.get('item'), material.get('unidad'))
+            self._memo.clear()
+
+    def _agregar(self, item, unidad):
+        if not isinstance(item, str):
+            return
+        item = ' '.join(item.split())
+        clave = clave_material(item)
+        if not clave:
+            return
+        entrada = self._entradas.get(clave)
+        if entrada is None:
+            entrada = self._entradas[clave] = _Entrada()
+            bisect.insort(self._claves, clave)
+            palabras = clave.split(' ')
+            for i in range(1, len(palabras)):
+                bisect.insort(self._restos, (' '.join(palabras[i:]), clave))
+        entrada.frecuencia += 1
+        entrada.escrituras[item] = entrada.escrituras.get(item, 0) + 1
+        if unidad:
+            entrada.unidades[unidad] = entrada.unidades.get(unidad, 0) + 1
+
+    def buscar(self, item):
+        """(nombre sugerido, unidad predeterminada) del ítem si ya está en el catálogo, o None."""
+        entrada = self._entradas.get(clave_material(item))
+        return None if entrada is None else (entrada.nombre, entrada.unidad)
+
+    def sugerir(self, texto, limite=SUGERENCIAS_MAX):
+        """Ítems que empiezan por `texto` (o que lo tienen a partir de una palabra), más pedidos primero.
+
+        Devuelve tuplas (nombre, unidad predeterminada, frecuencia). Los que
+        empiezan por el texto van antes que los que solo lo contienen como palabra.
+        """
+        prefijo = clave_material(texto)
+        if not prefijo:
+            return []
+        with self._lock:
+            memo = self._memo.get((prefijo, limite))
+            if memo is not None:
+                return memo
+            inicio = bisect.bisect_left(self._claves, prefijo)
+            fin = bisect.bisect_left(self._claves, prefijo + _FIN_PREFIJO, inicio)
+            por_nombre = self._claves[inicio:fin]
+            inicio = bisect.bisect_left(self._restos, (prefijo,))
+            fin = bisect.bisect_left(self._restos, (prefijo + _FIN_PREFIJO,), inicio)
+            por_palabra = {clave for _, clave in self._restos[inicio:fin]}.difference(por_nombre)
+            # Solo se ordenan los mejores, no todo el rango
+            claves = heapq.nlargest(limite, por_nombre, key=lambda c: self._entradas[c].frecuencia)
+            if len(claves) < limite:
+                claves += heapq.nlargest(limite - len(claves), por_palabra, key=lambda c: self._entradas[c].frecuencia)
+            resultado = [(self._entradas[c].nombre, self._entradas[c].unidad, self._entradas[c].frecuencia)
+                         for c in claves]
+            if len(self._memo) >= MEMO_MAX:
+                self._memo.clear()
+            self._memo[(prefijo, limite)] = resultado
+            return resultado
@@ -0,0 +1,263 @@
+"""Interfaz de línea de comandos para operar sin el servidor de Streamlit.
+
+Usa el mismo backend (MC_ORDENES_ALMACEN), el mismo asignador de consecutivos y
+los mismos bloqueos entre procesos que la aplicación, así que se puede correr
+con la aplicación en marcha (tareas nocturnas, cargas masivas).
+
+Uso:
+    python -m nucleo crear ordenes.json|ordenes.csv|ordenes.xlsx [--simular]
+    python -m nucleo exportar historial.xlsx [--desde AAAA-MM-DD] [--hasta AAAA-MM-DD] [--por-mes]
+    python -m nucleo html 1200 1205-1210 [--salida RUTA] [--zip]
+    python -m nucleo personal listar [--rol Elaboro|Reviso|Aprobo]
+    python -m nucleo personal agregar ROL NOMBRE PROFESION CC
+    python -m nucleo estado cerrada 1200 1205-1210 [--usuario NOMBRE] [--nota TEXTO]
+    python -m nucleo pendientes [--responsable NOMBRE] [--almacen]
+
+`crear` recibe una lista de órdenes en JSON (las claves del esquema) o una
+tabla con las columnas de la importación (nucleo.importacion). El Número de
+Orden y la Solicitud N° son opcionales: los que falten se asignan como en el
+formulario (siguientes libres, sin chocar con las reservas de las sesiones
+abiertas) y todas las órdenes se guardan con un solo anexado.
+
+Códigos de salida: 0 correcto, 1 error, 2 alguna orden rechazada (no se guardó nada).
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from nucleo.almacenamiento import ErrorAlmacenamiento, crear_almacen
+from nucleo.directorio import DIRECTORIO_INICIAL, ROLES, DirectorioFirmantes
+from nucleo.estados import ESTADOS, ETIQUETAS, evento_estado
+from nucleo.validacion import preparar_orden, texto
+
+# Columnas sin las que no se puede crear una orden desde una tabla
+COLUMNAS_CREAR = ("Dependencia Solicitante", "Servicio Aplicado")
+
+
+def _contexto():
+    """(almacen, ordenes_compartidas, directorio) con el backend configurado."""
+    from nucleo.compartido import OrdenesCompartidas
+
+    almacen = crear_almacen()
+    directorio = DirectorioFirmantes(almacen.cargar_directorio(DIRECTORIO_INICIAL))
+    return almacen, OrdenesCompartidas(almacen), directorio
+
+
+# =========================================================================
+# === CREAR ÓRDENES ===
+# =========================================================================
+
+def leer_registros(ruta):
+    """Registros de órdenes desde JSON (lista u objeto) o desde una tabla xlsx/csv."""
+    if os.path.splitext(ruta)[1].lower() == '.json':
+        with open(ruta, encoding='utf-8') as f:
+            datos = json.load(f)
+        return [datos] if isinstance(datos, dict) else list(datos)
+
+    from nucleo import importacion
+
+    df = importacion.mapear_columnas(importacion.leer_archivo(ruta), COLUMNAS_CREAR)
+    return [{campo: valor or None for campo, valor in fila.items()} for fila in df.to_dict('records')]
+
+
+def crear(args):
+    from nucleo.analitica import IndicadoresOrdenes
+    from nucleo.asignador import AsignadorConsecutivos
+
+    _, compartidas, directorio = _contexto()
+    registros = leer_registros(args.archivo)
+    ordenes, rechazos = [], []
+    for fila, registro in enumerate(registros, start=1):
+        orden, errores = preparar_orden(registro, directorio)
+        if errores:
+            rechazos.append((fila, errores))
+        ordenes.append(orden)
+
+    for fila, errores in rechazos:
+        print(f"  Registro {fila}: {' '.join(errores)}", file=sys.stderr)
+    if rechazos:
+        print(f"Órdenes rechazadas: {len(rechazos)} de {len(registros)}; no se guardó nada.")
+        return 2
+    if args.simular:
+        print(f"Órdenes válidas (simulación, no se guardó nada): {len(ordenes)}")
+        return 0
+
+    AsignadorConsecutivos(compartidas).asignar_lote(ordenes)
+    # Como guardar_orden: los indicadores suman solo lo nuevo
+    IndicadoresOrdenes().actualizar(compartidas.vista())
+    for orden in ordenes:
+        print(f"{orden['Número de Orden']}\t{orden['Solicitud N°']}\t{orden['Fecha']}")
+    print(f"Órdenes creadas: {len(ordenes)}", file=sys.stderr)
+    return 0
+
+
+# =========================================================================
+# === EXPORTAR Y RENDERIZAR ===
+# =========================================================================
+
+def exportar(args):
+    from nucleo.exportacion import escribir_excel
+
+    _, compartidas, _ = _contexto()
+    compartidas.sincronizar()
+    compartidas.cargar_anios(args.desde, args.hasta)
+    escribir_excel(args.salida, compartidas.vista(), compartidas.columnas, args.desde, args.hasta, args.por_mes)
+    print(f"Historial exportado a {args.salida}")
+    return 0
+
+
+def numeros_de(argumentos):
+    """Números de orden desde argumentos como '1200' o '1205-1210' (rango inclusivo)."""
+    numeros = []
+    for argumento in argumentos:
+        inicio, _, fin = argumento.partition('-')
+        try:
+            inicio = int(inicio)
+            fin = int(fin) if fin else inicio
+        except ValueError:
+            raise ValueError(f"Número o rango de orden inválido: {argumento!r}.") from None
+        if fin < inicio:
+            raise ValueError(f"Rango de órdenes invertido: {argumento!r} (escriba primero el menor, p. ej. '{fin}-{inicio}').")
+        numeros.extend(range(inicio, fin + 1))
+    return numeros
+
+
+def html(args):
+    from nucleo import renderizado
+
+    numeros = numeros_de(args.numeros)
+    _, compartidas, directorio = _contexto()
+    compartidas.sincronizar()
+    compartidas.cargar_numeros(min(numeros), max(numeros))
+    buscados = set(numeros)
+    por_numero = {o['Número de Orden']: o for o in compartidas.vista().cargadas() if o['Número de Orden'] in buscados}
+    faltantes = [n for n in numeros if n not in por_numero]
+    if faltantes:
+        print(f"Órdenes no encontradas: {', '.join(map(str, faltantes))}", file=sys.stderr)
+    ordenes = [compartidas.con_despachos(por_numero[n]) for n in dict.fromkeys(numeros) if n in por_numero]
+    if not ordenes:
+        return 1
+
+    if args.zip:
+        salida = args.salida or 'Ordenes_Mantenimiento.zip'
+        datos = renderizado.generar_zip_lote(ordenes, directorio)
+    elif len(ordenes) == 1:
+        salida = args.salida or f"Orden_Mantenimiento_N_{ordenes[0]['Número de Orden']}.html"
+        datos = renderizado.generar_html_orden(ordenes[0], directorio).encode('utf-8')
+    else:
+        salida = args.salida or 'Ordenes_Mantenimiento.html'
+        datos = renderizado.generar_html_lote(ordenes, directorio).encode('utf-8')
+    with open(salida, 'wb') as f:
+        f.write(datos)
+    print(f"{len(ordenes)} orden(es) escritas en {salida}")
+    return 0 if not faltantes else 2
+
+
+# =========================================================================
+# === CICLO DE VIDA ===
+# =========================================================================
+
+def estado(args):
+    _, compartidas, _ = _contexto()
+    numeros = list(dict.fromkeys(numeros_de(args.numeros)))
+    compartidas.sincronizar()
+    compartidas.cargar_numeros(min(numeros), max(numeros))
+    # Todos o ninguno: un número inexistente o una transición no permitida no guarda nada
+    compartidas.registrar_eventos([evento_estado(n, args.estado, args.usuario, args.nota) for n in numeros])
+    print(f"{len(numeros)} orden(es) pasaron a {ETIQUETAS[args.estado]}.")
+    return 0
+
+
+def pendientes(args):
+    _, compartidas, _ = _contexto()
+    # La cola se arma con las órdenes en memoria: se cargan también los años archivados
+    compartidas.sincronizar()
+    compartidas.cargar_anios()
+    total, ordenes = compartidas.trabajo(responsable=args.responsable, esperando_almacen=args.almacen)
+    for orden in ordenes:
+        numero = orden['Número de Orden']
+        print(f"{numero}\t{ETIQUETAS[compartidas.estados.estado(numero)]}\t{orden.get('Fecha')}\t"
+              f"{orden.get('Servicio Aplicado')}\t{orden.get('Responsable Designado')}")
+    print(f"Órdenes pendientes: {total}", file=sys.stderr)
+    return 0
+
+
+# =========================================================================
+# === PERSONAL (FIRMANTES) ===
+# =========================================================================
+
+def personal(args):
+    almacen, _, directorio = _contexto()
+    if args.accion == 'listar':
+        for rol in [args.rol] if args.rol else directorio.roles:
+            for clave, registro in directorio.como_dict().get(rol, {}).items():
+                print(f"{rol}\t{clave}\t{texto(registro['cc'])}")
+        return 0
+
+    # Como agregar_personal en la aplicación: la clave es "Nombre - Profesión"
+    nombre_key = f"{args.nombre} - {args.profesion}"
+    cambios = directorio.agregar(args.rol, nombre_key, args.cc)
+    almacen.aplicar_cambios_directorio(cambios, directorio.como_dict())
+    print(f"{nombre_key} (C.C. {args.cc}) agregado a la lista de {args.rol}.")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m nucleo',
+                                     description="Operaciones de órdenes de mantenimiento sin la aplicación web.")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    p = comandos.add_parser('crear', help="Crear órdenes desde JSON, CSV o XLSX asignando los consecutivos.")
+    p.add_argument('archivo')
+    p.add_argument('--simular', action='store_true', help="Solo validar; no guardar nada.")
+    p.set_defaults(funcion=crear)
+
+    p = comandos.add_parser('exportar', help="Exportar el historial (o un rango de fechas) a Excel.")
+    p.add_argument('salida', help="Archivo .xlsx de salida.")
+    p.add_argument('--desde', help="Fecha inicial AAAA-MM-DD (inclusiva).")
+    p.add_argument('--hasta', help="Fecha final AAAA-MM-DD (inclusiva).")
+    p.add_argument('--por-mes', action='store_true', help="Una hoja por mes.")
+    p.set_defaults(funcion=exportar)
+
+    p = comandos.add_parser('html', help="Generar el HTML de impresión de una o varias órdenes.")
+    p.add_argument('numeros', nargs='+', help="Números de orden o rangos (1205-1210).")
+    p.add_argument('--salida', help="Archivo de salida (por defecto, según el número de órdenes).")
+    p.add_argument('--zip', action='store_true', help="Un ZIP con un HTML por orden.")
+    p.set_defaults(funcion=html)
+
+    p = comandos.add_parser('personal', help="Listar o agregar firmantes del directorio.")
+    acciones = p.add_subparsers(dest='accion', required=True)
+    listar = acciones.add_parser('listar')
+    listar.add_argument('--rol', choices=ROLES)
+    agregar = acciones.add_parser('agregar')
+    agregar.add_argument('rol', choices=ROLES)
+    agregar.add_argument('nombre')
+    agregar.add_argument('profesion')
+    agregar.add_argument('cc')
+    p.set_defaults(funcion=personal)
+
+    p = comandos.add_parser('estado', help="Cambiar el estado de una o varias órdenes.")
+    p.add_argument('estado', choices=ESTADOS)
+    p.add_argument('numeros', nargs='+', help="Números de orden o rangos (1205-1210).")
+    p.add_argument('--usuario', help="Quién registra el cambio.")
+    p.add_argument('--nota')
+    p.set_defaults(funcion=estado)
+
+    p = comandos.add_parser('pendientes', help="Listar las órdenes abiertas y en ejecución.")
+    p.add_argument('--responsable', help="Solo las de este Responsable Designado.")
+    p.add_argument('--almacen', action='store_true', help="Solo las que esperan materiales de almacén.")
+    p.set_defaults(funcion=pendientes)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.funcion(args)
+    except (ErrorAlmacenamiento, ValueError, OSError) as e:
+        # Los mensajes del dominio traen negritas de Markdown para la aplicación
+        print(f"Error: {str(e).replace('**', '')}", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
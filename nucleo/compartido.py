@@ -0,0 +1,331 @@
+"""Almacén de órdenes compartido por todas las sesiones del proceso.
+
+Streamlit crea un hilo por pestaña abierta; en lugar de que cada sesión cargue su
+propia copia del historial, la aplicación guarda una única instancia de
+OrdenesCompartidas (vía st.cache_resource) y cada rerun obtiene una vista de solo
+lectura. La copia se refresca cuando cambia la firma del backend (stat de los
+archivos JSON o id máximo en SQLite), leyendo únicamente las órdenes nuevas.
+
+Con el backend particionado por año (nucleo.particiones) las posiciones de los
+años archivados quedan en None: sus números se conocen por el manifiesto y sus
+órdenes se cargan cuando una consulta, la vista o una exportación las pide.
+
+El estado y los despachos de cada orden (nucleo.estados) se sincronizan igual,
+leyendo solo los eventos nuevos del backend.
+
+Con el backend SQLite la copia en memoria se mantiene, porque la paginación, la
+búsqueda de texto, los estados y el catálogo trabajan sobre ella. La búsqueda
+por número y los filtros sobre columnas indexadas, en cambio, se consultan a la
+base, y sus ids se convierten en posiciones con la lista de ids de la copia.
+"""
+
+import bisect
+import threading
+from array import array
+from collections.abc import Sequence
+
+from nucleo.almacenamiento import filtrar_orden
+from nucleo.busqueda import IndiceTexto
+from nucleo.catalogo import CatalogoMateriales
+from nucleo.consultas import IndiceColumnas
+from nucleo.estados import ACTIVOS, EstadosOrdenes, con_despachos
+from nucleo.numeracion import IndiceConsecutivos
+
+
+class VistaOrdenes(Sequence):
+    """Vista de solo lectura de las primeras `n` órdenes de la lista compartida.
+
+    Como la lista solo crece por el final, la vista es una foto consistente sin
+    copiar los datos. Las órdenes son registros de solo lectura (nucleo.registro).
+    Una posición archivada (None) se carga con `cargar` al leerla; `tramos` son
+    los intervalos (inicio, fin) que ya estaban en memoria al tomar la vista y
+    `archivados` los de los años archivados que aún no (ver `resumir_archivado`).
+    """
+
+    __slots__ = ('_datos', '_n', '_cargar', 'tramos', 'archivados', '_resumir')
+
+    def __init__(self, datos, n, cargar=None, tramos=None, archivados=(), resumir=None):
+        self._datos = datos
+        self._n = n
+        self._cargar = cargar
+        self.tramos = ((0, n),) if tramos is None else tramos
+        self.archivados = archivados
+        self._resumir = resumir
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            posiciones = range(*indice.indices(self._n))
+            ordenes = [self._datos[i] for i in posiciones]
+            if self._cargar is not None and any(o is None for o in ordenes):
+                ordenes = [o if o is not None else self._cargar(i) for i, o in zip(posiciones, ordenes)]
+            return ordenes
+        if indice < 0:
+            indice += self._n
+        if not 0 <= indice < self._n:
+            raise IndexError('índice de orden fuera de rango')
+        orden = self._datos[indice]
+        if orden is None and self._cargar is not None:
+            orden = self._cargar(indice)
+        return orden
+
+    def __iter__(self):
+        datos = self._datos
+        for i in range(self._n):
+            orden = datos[i]
+            if orden is None and self._cargar is not None:
+                orden = self._cargar(i)
+            yield orden
+
+    def cargadas(self):
+        """Órdenes de los tramos en memoria, sin cargar años archivados."""
+        datos = self._datos
+        for inicio, fin in self.tramos:
+            for i in range(inicio, fin):
+                yield datos[i]
+
+    def resumir_archivado(self, inicio, desde, resumir, nombre):
+        """`resumir(órdenes)` de las posiciones `desde`..fin del tramo archivado que empieza en `inicio`.
+
+        No carga el año: usa el resumen guardado del segmento o lo lee del disco
+        sin incorporarlo a la lista compartida (AlmacenParticionado.resumir_archivado).
+        """
+        return self._resumir(inicio, desde, resumir, nombre)
+
+
+class OrdenesCompartidas:
+    """Copia única en memoria de las órdenes, sincronizada con el backend."""
+
+    def __init__(self, almacen):
+        self.almacen = almacen
+        self._lock = threading.Lock()
+        self._ordenes = []
+        self._marca = None
+        self._firma = object()
+        # Números usados y máximos, mantenidos orden por orden
+        self.indice = IndiceConsecutivos()
+        # Posiciones por valor de columna y por fecha, para filtrar sin recorrer todo
+        self.columnas = IndiceColumnas()
+        # Índice invertido del motivo, los materiales y el servicio
+        self.texto = IndiceTexto()
+        # Ítems distintos de los materiales, para autocompletar el formulario
+        self.materiales = CatalogoMateriales()
+        # Aumenta cada vez que entran órdenes nuevas; sirve como clave de caché
+        self.version = 0
+        # Segmentos de años archivados (backend particionado) y dónde empieza lo cargado al iniciar
+        self._archivados = []
+        self._inicio_activas = 0
+        # Número de orden -> posición; se arma con la primera búsqueda por número (buscar)
+        self._por_numero = None
+        self._por_numero_hasta = 0
+        # Estado, despachos y números por estado/responsable, desde los eventos del backend
+        self.estados = EstadosOrdenes()
+        self._marca_eventos = None
+        self._firma_eventos = object()
+        # Backend con consultas indexadas (SQLite): id de cada posición, para buscar y consultar en la base
+        self._ids = array('q') if getattr(almacen, 'indexado', False) else None
+
+    def sincronizar(self):
+        """Incorpora las órdenes y los eventos guardados por otras sesiones o procesos, si los hay."""
+        firma = self.almacen.firma_datos()
+        if firma != self._firma:
+            self._sincronizar_ordenes(firma)
+        firma = self.almacen.firma_eventos()
+        if firma != self._firma_eventos:
+            with self._lock:
+                eventos, self._marca_eventos = self.almacen.eventos_desde(self._marca_eventos)
+                self.estados.aplicar(eventos)
+                self._firma_eventos = firma
+
+    def _sincronizar_ordenes(self, firma):
+        with self._lock:
+            if self._marca is None and hasattr(self.almacen, 'archivados'):
+                self._iniciar_archivados()
+            anterior = self._marca
+            nuevas, self._marca = self.almacen.cambios_desde(self._marca)
+            if nuevas and self._ids is not None:
+                self._ids.extend(self.almacen.ids_entre(anterior, self._marca))
+            if nuevas:
+                inicio = len(self._ordenes)
+                self._ordenes.extend(nuevas)
+                self.indice.agregar_ordenes(nuevas)
+                self.columnas.agregar_ordenes(nuevas, inicio)
+                self.texto.agregar_ordenes(nuevas, inicio)
+                self.estados.agregar_ordenes(nuevas)
+                self.materiales.agregar_ordenes(nuevas)
+                self.version += 1
+            self._firma = firma
+
+    def vista(self):
+        """Vista de solo lectura del historial actual."""
+        self.sincronizar()
+        with self._lock:
+            n = len(self._ordenes)
+            if not self._archivados:
+                return VistaOrdenes(self._ordenes, n)
+            tramos = tuple((s["inicio"], s["fin"]) for s in self._archivados if s["cargado"])
+            archivados = tuple((s["inicio"], s["fin"]) for s in self._archivados if not s["cargado"])
+            return VistaOrdenes(self._ordenes, n, self._cargar_posicion, tramos + ((self._inicio_activas, n),),
+                                archivados, self._resumir_archivado)
+
+    # --- Años archivados (backend particionado) ---
+
+    def _iniciar_archivados(self):
+        archivadas, self._archivados = self.almacen.archivados()
+        # Posiciones reservadas; los números de esos años vienen del manifiesto
+        self._ordenes.extend([None] * archivadas)
+        for segmento in self._archivados:
+            self.indice.agregar_numeros(segmento["ordenes"], segmento["solicitudes"], segmento["otras_solicitudes"])
+        self._inicio_activas = self._marca = archivadas
+
+    def anios_archivados(self):
+        """Años con órdenes archivadas que aún no se han cargado."""
+        return sorted({s["anio"] for s in self._archivados if not s["cargado"]})
+
+    def _cargar_segmento(self, i):
+        with self._lock:
+            segmento = self._archivados[i]
+            if segmento["cargado"]:
+                return
+            ordenes = self.almacen.cargar_archivado(i)
+            self._ordenes[segmento["inicio"]:segmento["fin"]] = ordenes
+            self.indice.agregar_ordenes(ordenes)
+            self.columnas.agregar_ordenes(ordenes, segmento["inicio"])
+            self.texto.agregar_ordenes(ordenes, segmento["inicio"])
+            self.estados.agregar_ordenes(ordenes)
+            self.materiales.agregar_ordenes(ordenes)
+            if self._por_numero is not None:
+                self._indexar_numeros(segmento["inicio"], segmento["fin"])
+            segmento["cargado"] = True
+            self.version += 1
+
+    def _cargar_posicion(self, posicion):
+        for i, segmento in enumerate(self._archivados):
+            if segmento["inicio"] <= posicion < segmento["fin"]:
+                self._cargar_segmento(i)
+                break
+        return self._ordenes[posicion]
+
+    def _resumir_archivado(self, inicio, desde, resumir, nombre):
+        i = next(i for i, s in enumerate(self._archivados) if s["inicio"] == inicio)
+        return self.almacen.resumir_archivado(i, desde - inicio, resumir, nombre)
+
+    def cargar_anios(self, desde=None, hasta=None):
+        """Carga los años archivados entre las fechas `desde` y `hasta` ('YYYY-MM-DD', inclusivas)."""
+        for i, segmento in enumerate(self._archivados):
+            if not segmento["cargado"] and (not desde or segmento["anio"] >= desde[:4]) \
+                    and (not hasta or segmento["anio"] <= hasta[:4]):
+                self._cargar_segmento(i)
+
+    def cargar_numeros(self, desde, hasta):
+        """Carga los años archivados con números de orden entre `desde` y `hasta`."""
+        for i, segmento in enumerate(self._archivados):
+            if not segmento["cargado"] and segmento["min_orden"] is not None \
+                    and segmento["min_orden"] <= hasta and segmento["max_orden"] >= desde:
+                self._cargar_segmento(i)
+
+    # --- Búsqueda por número ---
+
+    def _indexar_numeros(self, inicio, fin):
+        for posicion in range(inicio, fin):
+            orden = self._ordenes[posicion]
+            if orden is not None:
+                self._por_numero[orden.get('Número de Orden')] = posicion
+
+    def buscar(self, numero):
+        """Orden con ese número de orden (cargando su año si está archivado), o None."""
+        self.sincronizar()
+        if not self.indice.existe_orden(numero):
+            return None
+        self.cargar_numeros(numero, numero)
+        return self._buscar_cargada(numero)
+
+    def _posicion_de_id(self, id_, n):
+        i = bisect.bisect_left(self._ids, id_) if id_ is not None else n
+        return i if i < n and self._ids[i] == id_ else None
+
+    def _buscar_cargada(self, numero):
+        if self._ids is not None:
+            posicion = self._posicion_de_id(self.almacen.id_de_orden(numero), len(self._ordenes))
+            return None if posicion is None else self._ordenes[posicion]
+        with self._lock:
+            n = len(self._ordenes)
+            if self._por_numero is None:
+                self._por_numero = {}
+                self._indexar_numeros(0, n)
+            elif self._por_numero_hasta < n:
+                # Solo lo anexado desde la última búsqueda (los años archivados se indexan al cargarse)
+                self._indexar_numeros(self._por_numero_hasta, n)
+            self._por_numero_hasta = n
+            posicion = self._por_numero.get(numero)
+            return None if posicion is None else self._ordenes[posicion]
+
+    def consultar(self, vista, filtros, texto=None):
+        """Posiciones en `vista` de las órdenes que cumplen `filtros`.
+
+        Sin `texto` van de la más reciente a la más antigua; con `texto`, solo las
+        que contienen todos sus términos y de mayor a menor relevancia.
+        """
+        if self._archivados:
+            # Un filtro o una búsqueda necesita los índices de los años que abarca;
+            # sin ninguno, las páginas cargan su año al mostrarse
+            desde, hasta = filtros.get('desde'), filtros.get('hasta')
+            if (texto and texto.strip()) or any(v is not None for v in filtros.values()):
+                self.cargar_anios(desde, hasta)
+        if texto and texto.strip():
+            coincidencias = self.texto.buscar(texto, len(vista))
+            if not any(v is not None for v in filtros.values()):
+                return coincidencias
+            permitidas = set(self.consultar(vista, filtros))
+            return [p for p in coincidencias if p in permitidas]
+        posiciones = None
+        if self._ids is not None and any(v is not None for v in filtros.values()):
+            ids = self.almacen.ids_filtrados(filtros)
+            if ids is not None:
+                posiciones = [p for p in (self._posicion_de_id(i, len(vista)) for i in ids) if p is not None]
+        if posiciones is None:
+            posiciones = self.columnas.consultar(filtros, len(vista))
+        if posiciones is None:
+            # Filtro sobre un campo sin índice: recorrido completo
+            posiciones = [i for i in range(len(vista) - 1, -1, -1) if filtrar_orden(vista[i], filtros)]
+        return posiciones
+
+    def agregar(self, orden):
+        """Persiste la orden en el backend y la incorpora a la copia compartida."""
+        self.almacen.agregar_orden(orden)
+        self.sincronizar()
+
+    def agregar_lote(self, ordenes):
+        """Persiste varias órdenes en una sola operación del backend (todas o ninguna)."""
+        self.almacen.agregar_ordenes(ordenes)
+        self.sincronizar()
+
+    # --- Ciclo de vida (nucleo.estados) ---
+
+    def registrar_eventos(self, eventos):
+        """Valida y persiste eventos de estado o despacho (todos o ninguno).
+
+        La validación y el anexado ocurren bajo el bloqueo de eventos del backend,
+        así que dos sesiones no pueden, por ejemplo, cerrar y anular la misma orden.
+        Lanza estados.CambioNoPermitido si algún evento no aplica.
+        """
+        with self.almacen.bloqueo_eventos():
+            self.sincronizar()
+            self.estados.validar(eventos, self.buscar)
+            self.almacen.agregar_eventos(eventos)
+        self.sincronizar()
+
+    def con_despachos(self, orden):
+        """La orden con sus cantidades despachadas y valores unitarios (para imprimir)."""
+        return con_despachos(orden, self.estados.despachos(orden['Número de Orden']))
+
+    def trabajo(self, estados=None, responsable=None, esperando_almacen=False, limite=None):
+        """Órdenes cargadas por estado, responsable y/o esperando almacén, de la más reciente a la más antigua.
+
+        Devuelve (total, órdenes) con a lo sumo `limite` órdenes materializadas.
+        """
+        self.sincronizar()
+        numeros = self.estados.consultar(estados or ACTIVOS, responsable, esperando_almacen)
+        return len(numeros), [self._buscar_cargada(n) for n in numeros[:limite]]
@@ -0,0 +1,111 @@
+"""Índices por columna para consultar el historial sin recorrerlo completo.
+
+IndiceColumnas guarda, para cada campo filtrable, las posiciones de las órdenes
+en la lista compartida agrupadas por valor, y las posiciones por día con la
+lista ordenada de días distintos para los rangos. Se actualiza con cada orden nueva (OrdenesCompartidas.sincronizar),
+así que una consulta solo cruza listas de posiciones y el historial se
+materializa únicamente para la página visible.
+
+Los filtros usan el mismo formato que almacenamiento.filtrar_orden: 'desde' y
+'hasta' son fechas 'YYYY-MM-DD' inclusivas y el resto son campos de la orden
+comparados por igualdad; un filtro en None no se aplica.
+"""
+
+import bisect
+
+CAMPOS_INDEXADOS = (
+    "Servicio Aplicado", "Dependencia Solicitante", "Tipo de Mantenimiento", "Responsable Designado",
+)
+
+
+class IndiceColumnas:
+    """Posiciones de las órdenes por valor de cada campo y por fecha."""
+
+    def __init__(self, campos=CAMPOS_INDEXADOS):
+        self.campos = tuple(campos)
+        self._por_valor = {campo: {} for campo in self.campos}
+        self._por_dia = {}
+        self._dias = []
+        self._total = 0
+        # Listas de opciones memorizadas: campo -> (generación, valores ordenados)
+        self._valores = {}
+        self._generacion = 0
+
+    def agregar_ordenes(self, ordenes, inicio=None):
+        """Indexa órdenes anexadas al final de la lista compartida.
+
+        Con `inicio` se indexan a partir de esa posición (años archivados que se
+        cargan después que los recientes; ver nucleo.particiones).
+        """
+        posicion = self._total if inicio is None else inicio
+        for orden in ordenes:
+            for campo in self.campos:
+                por_valor = self._por_valor[campo]
+                valor = orden.get(campo)
+                if valor not in por_valor:
+                    por_valor[valor] = []
+                    # Valor nuevo: invalida las listas de opciones memorizadas
+                    self._generacion += 1
+                por_valor[valor].append(posicion)
+            fecha = orden.get('Fecha') or ''
+            posiciones_dia = self._por_dia.get(fecha)
+            if posiciones_dia is None:
+                # Días distintos: unos pocos miles aunque haya años de historial
+                posiciones_dia = self._por_dia[fecha] = []
+                bisect.insort(self._dias, fecha)
+            posiciones_dia.append(posicion)
+            posicion += 1
+        self._total = max(self._total, posicion)
+
+    def valores(self, campo):
+        """Valores distintos de un campo indexado, ordenados (para las listas de opciones).
+
+        Se memorizan hasta que aparece un valor nuevo en cualquier campo, así que
+        en un rerun normal no se vuelve a ordenar nada.
+        """
+        generacion = self._generacion
+        memo = self._valores.get(campo)
+        if memo is None or memo[0] != generacion:
+            memo = self._valores[campo] = (generacion, sorted(v for v in list(self._por_valor[campo]) if v is not None))
+        return list(memo[1])
+
+    def dias(self, desde=None, hasta=None):
+        """(día, posiciones) de cada día del rango, del más antiguo al más reciente."""
+        inicio = bisect.bisect_left(self._dias, desde) if desde else 0
+        fin = bisect.bisect_right(self._dias, hasta) if hasta else len(self._dias)
+        return [(dia, self._por_dia[dia]) for dia in self._dias[inicio:fin]]
+
+    def _posiciones_rango(self, desde, hasta):
+        posiciones = []
+        for _, posiciones_dia in self.dias(desde, hasta):
+            posiciones.extend(posiciones_dia)
+        return posiciones
+
+    def consultar(self, filtros, n=None):
+        """Posiciones (de la más reciente a la más antigua) que cumplen `filtros`; admite len y slicing.
+
+        `n` limita el resultado a las primeras `n` órdenes, para que coincida con
+        la vista tomada por la sesión. Devuelve None si algún filtro no está
+        indexado; en ese caso hay que recorrer las órdenes con filtrar_orden.
+        """
+        n = self._total if n is None else min(n, self._total)
+        candidatos = []
+        desde, hasta = filtros.get('desde'), filtros.get('hasta')
+        if desde or hasta:
+            candidatos.append(self._posiciones_rango(desde, hasta))
+        for campo, valor in filtros.items():
+            if campo in ('desde', 'hasta') or valor is None:
+                continue
+            if campo not in self._por_valor:
+                return None
+            candidatos.append(self._por_valor[campo].get(valor, ()))
+
+        if not candidatos:
+            return range(n - 1, -1, -1)
+        candidatos.sort(key=len)
+        resultado = {p for p in candidatos[0] if p < n}
+        for posiciones in candidatos[1:]:
+            if not resultado:
+                break
+            resultado.intersection_update(posiciones)
+        return sorted(resultado, reverse=True)
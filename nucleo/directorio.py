@@ -0,0 +1,200 @@
+"""Directorio de firmantes (Elaboró / Revisó / Aprobó) con índices por rol.
+
+El formato persistido no cambia: {rol: {clave: {"display": ..., "cc": ...}}}.
+DirectorioFirmantes lo envuelve y mantiene por rol dos diccionarios,
+display -> registro y C.C. -> registro, para que buscar la C.C. de un firmante
+(tres veces por orden renderizada) o comprobar duplicados sea O(1).
+
+La C.C. es única dentro de cada rol: una misma persona puede firmar en dos roles
+distintos, pero dos registros del mismo rol no pueden compartir identificación.
+
+Los cambios del editor del directorio se calculan con una comparación por
+columnas entre la tabla mostrada y la editada (`diferencias`), y solo los
+registros que cambiaron se escriben en el backend.
+
+`version` es un resumen sha256 del contenido (firmantes y C.C. por rol): cambia
+con cada alta, edición o baja y no depende del proceso ni de la sesión, así que
+un mismo directorio da la misma versión en todas las sesiones y después de
+reiniciar. Con ella se comparten la caché de órdenes renderizadas
+(renderizado.CACHE_CUERPOS) y los lotes exportados en disco (nucleo.tareas).
+"""
+
+import hashlib
+import json
+
+from nucleo.almacenamiento import ErrorAlmacenamiento
+
+ROLES = ("Elaboro", "Reviso", "Aprobo")
+# Columnas de la tabla editable de la pestaña de personal
+COLUMNAS_EDITOR = ["ID_Rol", "Rol de Firma", "Nombre - Cargo", "CC"]
+
+# Directorio inicial de firmantes, usado mientras no exista el archivo del directorio
+DIRECTORIO_INICIAL = {
+    "Elaboro": {
+        "Magaly Gómez - Técnica": {"display": "Magaly Gómez - Técnica", "cc": "111111"},
+        "Oscar Muñoz - Operario": {"display": "Oscar Muñoz - Operario", "cc": "222222"}
+    },
+    "Reviso": {
+        "Danna Hernandez - Coordinadora Mantenimiento": {"display": "Danna Hernandez - Coordinadora Mantenimiento", "cc": "333333"},
+        "Hery Peña - Biomédico": {"display": "Hery Peña - Biomédico", "cc": "444444"},
+        "Jefe de Mantenimiento - Ingeniería": {"display": "Jefe de Mantenimiento - Ingeniería", "cc": "555555"}
+    },
+    "Aprobo": {
+        "Gerente de Operaciones - Gerente": {"display": "Gerente de Operaciones - Gerente", "cc": "666666"},
+        "Jefe de Almacén - Logística": {"display": "Jefe de Almacén - Logística", "cc": "777777"}
+    }
+}
+
+
+class CedulaDuplicada(ErrorAlmacenamiento):
+    """Ya existe en el rol un firmante con esa C.C. (o con ese nombre)."""
+
+
+def _texto(valor):
+    return "" if valor is None else str(valor).strip()
+
+
+class DirectorioFirmantes:
+    """Firmantes por rol con índices display -> registro y C.C. -> registro."""
+
+    def __init__(self, datos=None, roles=ROLES):
+        self._datos = {rol: {} for rol in roles}
+        for rol, personas in (datos or {}).items():
+            self._datos.setdefault(rol, {})
+            for clave, registro in personas.items():
+                self._datos[rol][clave] = {"display": registro.get("display", clave), "cc": registro.get("cc")}
+        self._reindexar()
+
+    def _reindexar(self):
+        for rol, personas in self._datos.items():
+            # Orden alfabético, como lo dejaba agregar_personal
+            self._datos[rol] = dict(sorted(personas.items()))
+        self._por_display = {rol: {r["display"]: r for r in p.values()} for rol, p in self._datos.items()}
+        self._por_cc = {rol: {_texto(r["cc"]): r for r in p.values() if _texto(r["cc"])} for rol, p in self._datos.items()}
+        self._ccs = None
+        self._opciones = {}
+        self.version = self._resumen()
+
+    def _resumen(self):
+        # Como tareas.hash_clave: JSON de las tuplas ordenadas, estable entre procesos
+        filas = sorted((rol, display, cc) for rol, ccs in self.indice_cc().items() for display, cc in ccs.items())
+        texto = json.dumps(filas, ensure_ascii=False)
+        return hashlib.sha256(texto.encode('utf-8')).hexdigest()[:32]
+
+    # --- Consultas ---
+
+    @property
+    def roles(self):
+        return list(self._datos)
+
+    def como_dict(self):
+        """Estructura persistida {rol: {clave: {"display", "cc"}}}."""
+        return self._datos
+
+    def opciones(self, rol):
+        """Nombres para mostrar de un rol (listas de selección del formulario), memorizados."""
+        opciones = self._opciones.get(rol)
+        if opciones is None:
+            opciones = self._opciones[rol] = list(self._por_display.get(rol, {}))
+        return opciones
+
+    def responsables(self):
+        """Opciones de Responsable Designado: firmantes de Elaboró o Revisó, ordenados y sin repetir."""
+        opciones = self._opciones.get(None)
+        if opciones is None:
+            opciones = self._opciones[None] = sorted(set(self.opciones("Elaboro")) | set(self.opciones("Reviso")))
+        return opciones
+
+    def cc_de(self, rol, display, default="N/A"):
+        registro = self._por_display.get(rol, {}).get(display)
+        return registro["cc"] if registro else default
+
+    def buscar_cc(self, rol, cc):
+        """Registro del rol con esa C.C., o None."""
+        return self._por_cc.get(rol, {}).get(_texto(cc))
+
+    def indice_cc(self):
+        """Por rol, diccionario display -> C.C. (formato de renderizado.indice_cc), memorizado."""
+        if self._ccs is None:
+            self._ccs = {rol: {d: r["cc"] for d, r in p.items()} for rol, p in self._por_display.items()}
+        return self._ccs
+
+    # --- Cambios ---
+
+    def agregar(self, rol, display, cc):
+        """Agrega un firmante; devuelve los cambios a persistir (ver `aplicar`)."""
+        if rol not in self._datos:
+            raise ValueError(f"Rol de firma no válido: {rol!r}.")
+        if display in self._datos[rol]:
+            raise CedulaDuplicada(f"**{display}** ya existe en la lista de **{rol}**.")
+        existente = self.buscar_cc(rol, cc)
+        if existente:
+            raise CedulaDuplicada(f"La C.C. {cc} ya está registrada en **{rol}** para **{existente['display']}**.")
+        cambios = {"eliminar": [], "guardar": [(rol, display, {"display": display, "cc": _texto(cc)})]}
+        self.aplicar(cambios)
+        return cambios
+
+    def aplicar(self, cambios):
+        """Aplica {'eliminar': [(rol, clave)], 'guardar': [(rol, clave, registro)]} y reindexa."""
+        for rol, clave in cambios["eliminar"]:
+            self._datos.get(rol, {}).pop(clave, None)
+        for rol, clave, registro in cambios["guardar"]:
+            self._datos.setdefault(rol, {})[clave] = registro
+        self._reindexar()
+
+    # --- Tabla del editor ---
+
+    def tabla(self):
+        """DataFrame para st.data_editor (una fila por firmante)."""
+        import pandas as pd
+
+        filas = [(rol, rol, clave, _texto(r["cc"])) for rol, p in self._datos.items() for clave, r in p.items()]
+        return pd.DataFrame(filas, columns=COLUMNAS_EDITOR)
+
+    def diferencias(self, original, editado):
+        """Cambios entre la tabla mostrada (`original`, de `tabla()`) y la devuelta por el editor.
+
+        Las filas conservan su índice en el editor, así que se alinean por índice:
+        las que faltan son bajas, las nuevas son altas y en las comunes se comparan
+        todas las columnas a la vez. Devuelve (cambios, avisos); lanza
+        CedulaDuplicada si el resultado repetiría C.C. o nombre dentro de un rol.
+        """
+        import pandas as pd
+
+        avisos = []
+        editado = editado.reindex(columns=COLUMNAS_EDITOR)
+        editado = editado.assign(**{
+            "Nombre - Cargo": editado["Nombre - Cargo"].fillna('').astype(str).str.strip(),
+            "CC": editado["CC"].fillna('').astype(str).str.strip(),
+            "Rol de Firma": editado["Rol de Firma"].fillna('').astype(str),
+        })
+
+        # Filas incompletas: se descartan como antes (si eran existentes, equivale a borrarlas)
+        completas = editado["Nombre - Cargo"].ne('') & editado["CC"].ne('')
+        rol_valido = editado["Rol de Firma"].isin(list(self._datos))
+        for rol in editado.loc[completas & ~rol_valido, "Rol de Firma"].unique():
+            avisos.append(f"Rol '{rol}' no válido. Omitiendo empleado.")
+        final = editado[completas & rol_valido]
+
+        repetidas = final.duplicated(["Rol de Firma", "CC"], keep=False)
+        if repetidas.any():
+            detalle = ", ".join(f"{r} (C.C. {c})" for r, c in final.loc[repetidas, ["Rol de Firma", "CC"]].drop_duplicates().values)
+            raise CedulaDuplicada(f"C.C. repetida dentro del mismo rol: {detalle}.")
+        repetidas = final.duplicated(["Rol de Firma", "Nombre - Cargo"], keep=False)
+        if repetidas.any():
+            detalle = ", ".join(f"{r}: {n}" for r, n in final.loc[repetidas, ["Rol de Firma", "Nombre - Cargo"]].drop_duplicates().values)
+            raise CedulaDuplicada(f"Firmante repetido dentro del mismo rol: {detalle}.")
+
+        comunes = original.index.intersection(final.index)
+        antes = original.loc[comunes, ["ID_Rol", "Nombre - Cargo", "CC"]].astype(str)
+        despues = final.loc[comunes, ["Rol de Firma", "Nombre - Cargo", "CC"]]
+        cambio_clave = antes["ID_Rol"].ne(despues["Rol de Firma"]) | antes["Nombre - Cargo"].ne(despues["Nombre - Cargo"])
+        cambio_cc = antes["CC"].ne(despues["CC"])
+
+        bajas = original.loc[original.index.difference(final.index)]
+        movidas = antes[cambio_clave]
+        eliminar = list(zip(bajas["ID_Rol"], bajas["Nombre - Cargo"])) + list(zip(movidas["ID_Rol"], movidas["Nombre - Cargo"]))
+        escribir = pd.concat([final.loc[final.index.difference(original.index)], despues[cambio_clave | cambio_cc]])
+        guardar = [(rol, nombre, {"display": nombre, "cc": cc})
+                   for rol, nombre, cc in escribir[["Rol de Firma", "Nombre - Cargo", "CC"]].values]
+        return {"eliminar": eliminar, "guardar": guardar}, avisos
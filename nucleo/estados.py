@@ -0,0 +1,213 @@
+"""Ciclo de vida de las órdenes: estados, despachos de almacén y cola de trabajo abierto.
+
+La orden se escribe una sola vez. Lo que ocurre después se guarda como eventos
+pequeños en un registro de solo anexado del backend (un archivo JSONL o una tabla
+en SQLite), nunca reescribiendo la orden:
+
+    {"orden": 1205, "tipo": "estado", "estado": "en_ejecucion", "fecha": "2025-03-04T10:12:00", "usuario": "..."}
+    {"orden": 1205, "tipo": "despacho", "materiales": [[0, 3, 12500], [2, 1, null]], "fecha": "...", "usuario": "..."}
+
+Una orden sin eventos está abierta. Un despacho fija, por línea de material
+(posición en Materiales Solicitados), la cantidad despachada y el valor unitario;
+un despacho posterior de la misma línea la reemplaza.
+
+EstadosOrdenes reproduce los eventos en memoria (OrdenesCompartidas.sincronizar)
+y mantiene los números de orden por estado, por responsable y los que esperan
+almacén, así que "mis órdenes abiertas" o "esperando almacén" son cruces de
+conjuntos y no recorridos del historial. Con el backend particionado, las
+órdenes de años archivados entran a estos conjuntos cuando su año se carga.
+"""
+
+from datetime import datetime
+
+from nucleo.almacenamiento import ErrorAlmacenamiento
+from nucleo.materiales import CAMPO_MATERIALES
+
+ABIERTA, EN_EJECUCION, CERRADA, ANULADA = 'abierta', 'en_ejecucion', 'cerrada', 'anulada'
+ESTADOS = (ABIERTA, EN_EJECUCION, CERRADA, ANULADA)
+ETIQUETAS = {ABIERTA: "Abierta", EN_EJECUCION: "En ejecución", CERRADA: "Cerrada", ANULADA: "Anulada"}
+# Estados con trabajo pendiente (admiten despachos)
+ACTIVOS = frozenset((ABIERTA, EN_EJECUCION))
+TRANSICIONES = {
+    ABIERTA: (EN_EJECUCION, CERRADA, ANULADA),
+    EN_EJECUCION: (CERRADA, ANULADA),
+    CERRADA: (),
+    ANULADA: (),
+}
+
+EVENTO_ESTADO = 'estado'
+EVENTO_DESPACHO = 'despacho'
+
+
+class CambioNoPermitido(ErrorAlmacenamiento):
+    """El evento no es válido para el estado actual de la orden."""
+
+
+def _ahora():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def evento_estado(numero, estado, usuario=None, nota=None):
+    """Evento de cambio de estado de la orden `numero`."""
+    evento = {"orden": int(numero), "tipo": EVENTO_ESTADO, "estado": estado, "fecha": _ahora(), "usuario": usuario}
+    if nota:
+        evento["nota"] = nota
+    return evento
+
+
+def evento_despacho(numero, lineas, usuario=None):
+    """Evento de despacho; `lineas` son tuplas (posición del material, cantidad, valor unitario o None)."""
+    return {"orden": int(numero), "tipo": EVENTO_DESPACHO, "materiales": [list(linea) for linea in lineas],
+            "fecha": _ahora(), "usuario": usuario}
+
+
+def _es_cantidad(valor):
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool) and valor >= 0
+
+
+def con_despachos(orden, despachos):
+    """Orden (diccionario) con la cantidad despachada y el valor unitario de `despachos` en sus materiales.
+
+    Sin despachos devuelve la misma orden; sirve para el HTML de impresión y la API.
+    """
+    if not despachos:
+        return orden
+    registro = orden.como_dict() if hasattr(orden, 'como_dict') else dict(orden)
+    materiales = []
+    for linea, material in enumerate(registro.get(CAMPO_MATERIALES) or ()):
+        material = dict(material)
+        if linea in despachos:
+            material["cantidad_despachada"], material["valor_unitario"] = despachos[linea]
+        materiales.append(material)
+    registro[CAMPO_MATERIALES] = materiales
+    return registro
+
+
+class EstadosOrdenes:
+    """Estado y despachos de cada orden, con conjuntos de números por estado y por responsable."""
+
+    def __init__(self):
+        # Solo las órdenes con algún cambio de estado (las demás están abiertas)
+        self._estado = {}
+        # Número -> {línea: (cantidad despachada, valor unitario)}
+        self._despachos = {}
+        # Cantidades pedidas por línea, solo de las órdenes activas (para saber qué falta despachar)
+        self._pedidas = {}
+        self.por_estado = {estado: set() for estado in ESTADOS}
+        self.por_responsable = {}
+        self.esperando_almacen = set()
+        # Aumenta con cada evento aplicado; sirve como clave de caché
+        self.version = 0
+        # Eventos aplicados en total: igual en todos los procesos (clave de los archivos en disco)
+        self.aplicados = 0
+
+    def estado(self, numero):
+        return self._estado.get(numero, ABIERTA)
+
+    def despachos(self, numero):
+        return self._despachos.get(numero, {})
+
+    # --- Reproducción ---
+
+    def agregar_ordenes(self, ordenes):
+        """Incorpora órdenes recién cargadas a los conjuntos (su estado puede venir de eventos previos)."""
+        for orden in ordenes:
+            numero = orden.get('Número de Orden')
+            estado = self.estado(numero)
+            self.por_estado[estado].add(numero)
+            responsable = orden.get('Responsable Designado')
+            if responsable not in self.por_responsable:
+                self.por_responsable[responsable] = set()
+            self.por_responsable[responsable].add(numero)
+            if estado in ACTIVOS:
+                self._pedidas[numero] = tuple(m.get("cantidad") if _es_cantidad(m.get("cantidad")) else 0
+                                              for m in orden.get(CAMPO_MATERIALES) or ())
+                self._revisar_almacen(numero)
+
+    def aplicar(self, eventos):
+        """Aplica eventos leídos del registro (ya validados al escribirse)."""
+        for evento in eventos:
+            numero = evento.get("orden")
+            if evento.get("tipo") == EVENTO_ESTADO:
+                nuevo = evento.get("estado")
+                if nuevo not in self.por_estado:
+                    continue
+                anterior = self.estado(numero)
+                if numero in self.por_estado[anterior]:
+                    self.por_estado[anterior].discard(numero)
+                    self.por_estado[nuevo].add(numero)
+                self._estado[numero] = nuevo
+                if nuevo not in ACTIVOS:
+                    self._pedidas.pop(numero, None)
+            elif evento.get("tipo") == EVENTO_DESPACHO:
+                despachos = self._despachos.setdefault(numero, {})
+                for linea, cantidad, valor in evento.get("materiales") or ():
+                    despachos[linea] = (cantidad, valor)
+            else:
+                continue
+            self._revisar_almacen(numero)
+        if eventos:
+            self.version += 1
+            self.aplicados += len(eventos)
+
+    def _revisar_almacen(self, numero):
+        pedidas = self._pedidas.get(numero)
+        despachos = self._despachos.get(numero, {})
+        if pedidas is not None and any(
+                cantidad > 0 and (despachos.get(linea) or (0,))[0] < cantidad for linea, cantidad in enumerate(pedidas)):
+            self.esperando_almacen.add(numero)
+        else:
+            self.esperando_almacen.discard(numero)
+
+    # --- Consultas ---
+
+    def consultar(self, estados=ACTIVOS, responsable=None, esperando_almacen=False):
+        """Números de orden (de mayor a menor) en `estados`, del `responsable` y/o esperando almacén."""
+        numeros = set().union(*(self.por_estado[e] for e in estados))
+        if responsable is not None:
+            numeros &= self.por_responsable.get(responsable, set())
+        if esperando_almacen:
+            numeros &= self.esperando_almacen
+        return sorted(numeros, reverse=True)
+
+    def conteos(self):
+        """Órdenes cargadas por estado y esperando almacén."""
+        conteos = {estado: len(numeros) for estado, numeros in self.por_estado.items()}
+        conteos['esperando_almacen'] = len(self.esperando_almacen)
+        return conteos
+
+    # --- Validación ---
+
+    def validar(self, eventos, buscar):
+        """Comprueba eventos nuevos contra el estado actual; `buscar(numero)` devuelve la orden o None.
+
+        Los eventos de un mismo lote se validan en secuencia (abrir -> ejecutar -> cerrar).
+        Lanza CambioNoPermitido con el primer problema.
+        """
+        estados = {}
+        for evento in eventos:
+            numero = evento.get("orden")
+            orden = buscar(numero)
+            if orden is None:
+                raise CambioNoPermitido(f"No existe la orden {numero}.")
+            actual = estados.get(numero) or self.estado(numero)
+            if evento.get("tipo") == EVENTO_ESTADO:
+                nuevo = evento.get("estado")
+                if nuevo not in TRANSICIONES.get(actual, ()):
+                    raise CambioNoPermitido(
+                        f"La orden {numero} está **{ETIQUETAS[actual]}**; no puede pasar a "
+                        f"**{ETIQUETAS.get(nuevo, nuevo)}**.")
+                estados[numero] = nuevo
+            elif evento.get("tipo") == EVENTO_DESPACHO:
+                if actual not in ACTIVOS:
+                    raise CambioNoPermitido(
+                        f"La orden {numero} está **{ETIQUETAS[actual]}**; ya no admite despachos.")
+                lineas = len(orden.get(CAMPO_MATERIALES) or ())
+                for linea in evento.get("materiales") or ():
+                    if len(linea) != 3 or not isinstance(linea[0], int) or not 0 <= linea[0] < lineas:
+                        raise CambioNoPermitido(f"Línea de material no válida en el despacho de la orden {numero}.")
+                    if not _es_cantidad(linea[1]) or not (linea[2] is None or _es_cantidad(linea[2])):
+                        raise CambioNoPermitido(
+                            f"Cantidad o valor unitario no válido en el despacho de la orden {numero}.")
+            else:
+                raise CambioNoPermitido(f"Tipo de evento desconocido: {evento.get('tipo')!r}.")
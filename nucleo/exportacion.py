@@ -0,0 +1,80 @@
+"""Exportación del historial a Excel (xlsx) en modo de escritura en streaming.
+
+escribir_excel toma las posiciones del rango pedido del índice por fecha de la
+copia compartida (IndiceColumnas), agrupadas por mes, y convierte cada orden a
+su fila en el momento de escribirla: no se guarda ninguna copia de las filas
+entre exportaciones. Con años archivados (backend particionado) el llamador
+carga antes los años que va a exportar.
+El libro se escribe con openpyxl en modo write_only, que vuelca las filas a
+disco a medida que se agregan, y se guarda directamente en el archivo de salida
+(el temporal de la tarea, ver nucleo.tareas) en lugar de armarlo en memoria.
+"""
+
+from nucleo.materiales import CAMPO_MATERIALES, formatear_materiales
+
+COLUMNAS_EXCEL = [
+    "Número de Orden", "Solicitud N°", "Fecha", "Dependencia Solicitante", "Servicio Aplicado",
+    "Responsable Designado", "Motivo", "Tipo de Mantenimiento", CAMPO_MATERIALES,
+    "Elaboró", "Revisó", "Aprobó",
+]
+HOJA_HISTORIAL = 'Ordenes_Mantenimiento'
+# Parte del avance que corresponde a escribir las filas (el resto es guardar el libro)
+FRACCION_FILAS = 0.8
+
+
+def fila_excel(orden, columnas=COLUMNAS_EXCEL):
+    """Valores de una orden en el orden de `columnas` (materiales como texto legible)."""
+    fila = []
+    for columna in columnas:
+        valor = orden.get(columna)
+        if columna == CAMPO_MATERIALES:
+            valor = formatear_materiales(valor)
+        elif isinstance(valor, (list, dict)):
+            valor = str(valor)
+        fila.append(valor)
+    return tuple(fila)
+
+
+def meses_de(ordenes, indice, desde=None, hasta=None):
+    """Posiciones de las órdenes entre `desde` y `hasta` agrupadas por mes: [(mes, posiciones)].
+
+    Sale del índice por fecha (IndiceColumnas), sin recorrer el historial. Los
+    meses van en orden cronológico y, dentro de cada uno, las órdenes en orden de llegada.
+    """
+    meses = {}
+    for dia, posiciones in indice.dias(desde, hasta):
+        meses.setdefault(dia[:7], []).extend(p for p in posiciones if p < len(ordenes))
+    return [(mes, sorted(posiciones)) for mes, posiciones in meses.items() if posiciones]
+
+
+def escribir_excel(salida, ordenes, indice, desde=None, hasta=None, por_mes=False, progreso=None,
+                   columnas=COLUMNAS_EXCEL):
+    """Escribe en `salida` (ruta o archivo binario) el xlsx de `ordenes`; `desde`/`hasta` son fechas 'YYYY-MM-DD' inclusivas.
+
+    `indice` es el IndiceColumnas de `ordenes`. `progreso(fraccion)`, si se pasa,
+    se llama al terminar cada mes y antes de guardar el libro (tareas en segundo
+    plano, ver nucleo.tareas).
+    """
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    meses = meses_de(ordenes, indice, desde, hasta)
+    total = sum(len(posiciones) for _, posiciones in meses)
+    hoja = None
+    if not por_mes or not meses:
+        hoja = libro.create_sheet(title=HOJA_HISTORIAL if not por_mes else 'Sin datos')
+        hoja.append(columnas)
+    hechas = 0
+    for mes, posiciones in meses:
+        if por_mes:
+            hoja = libro.create_sheet(title=mes or 'Sin fecha')
+            hoja.append(columnas)
+        for posicion in posiciones:
+            hoja.append(fila_excel(ordenes[posicion], columnas))
+        hechas += len(posiciones)
+        if progreso:
+            progreso(FRACCION_FILAS * hechas / total)
+
+    if progreso:
+        progreso(FRACCION_FILAS, "Guardando el libro")
+    libro.save(salida)
@@ -0,0 +1,182 @@
+"""Importación masiva de órdenes históricas desde Excel (xlsx) o CSV.
+
+El archivo se lee con pandas, sus columnas se asocian al esquema de la orden por
+nombre (sin distinguir tildes, mayúsculas ni signos) y todas las validaciones se
+hacen por columna sobre el DataFrame completo:
+
+- Número de Orden entero positivo, sin repetir en el archivo ni en el historial.
+- Solicitud N° con formato 09-XX, sin repetir en el archivo ni en el historial.
+- Fecha reconocible.
+- Servicio Aplicado y Dependencia Solicitante dentro de las listas conocidas.
+
+Las filas válidas se guardan con una sola operación del backend (un anexado al
+diario o una transacción SQLite) y las demás quedan en un reporte por fila.
+
+Uso:
+    python -m nucleo.importacion archivo.xlsx [--hoja NOMBRE] [--simular] [--rechazos rechazos.csv]
+"""
+
+import argparse
+import os
+import re
+import sys
+
+from nucleo.almacenamiento import ErrorAlmacenamiento, crear_almacen
+from nucleo.busqueda import normalizar_texto
+from nucleo.materiales import CAMPO_MATERIALES, normalizar_materiales
+from nucleo.opciones import DEPENDENCIAS, SERVICIOS_SOLICITUD
+
+# Campo de la orden -> nombres de columna aceptados (ya normalizados por _clave)
+COLUMNAS_IMPORTACION = {
+    "Número de Orden": ("numerodeorden", "numeroorden", "orden", "ordenn", "nroorden", "norden"),
+    "Solicitud N°": ("solicitudn", "solicitud", "nrosolicitud", "numerodesolicitud", "nsolicitud"),
+    "Fecha": ("fecha",),
+    "Dependencia Solicitante": ("dependenciasolicitante", "dependencia"),
+    "Servicio Aplicado": ("servicioaplicado", "servicio"),
+    "Responsable Designado": ("responsabledesignado", "responsable"),
+    "Motivo": ("motivo", "descripcion"),
+    "Tipo de Mantenimiento": ("tipodemantenimiento", "tipo"),
+    CAMPO_MATERIALES: ("materialessolicitados", "materiales"),
+    "Elaboró": ("elaboro",),
+    "Revisó": ("reviso",),
+    "Aprobó": ("aprobo",),
+}
+COLUMNAS_OBLIGATORIAS = ("Número de Orden", "Solicitud N°", "Fecha", "Dependencia Solicitante", "Servicio Aplicado")
+
+_PATRON_SOLICITUD = r'^\s*0?9\s*-\s*(\d+)\s*$'
+
+
+def _clave(nombre):
+    return re.sub(r'[^a-z0-9]', '', normalizar_texto(str(nombre)))
+
+
+def leer_archivo(origen, nombre=None, hoja=0):
+    """DataFrame (todo como texto) desde una ruta o un archivo subido; el tipo se deduce de la extensión."""
+    import pandas as pd
+
+    nombre = nombre or getattr(origen, 'name', None) or str(origen)
+    extension = os.path.splitext(nombre)[1].lower()
+    if extension in ('.xlsx', '.xlsm', '.xls'):
+        return pd.read_excel(origen, sheet_name=hoja, dtype=str, keep_default_na=False)
+    if extension in ('.csv', '.txt'):
+        # sep=None detecta ',' o ';' (Excel en español exporta con ';')
+        return pd.read_csv(origen, dtype=str, keep_default_na=False, sep=None, engine='python', encoding='utf-8-sig')
+    raise ValueError(f"Formato no soportado: {extension or nombre!r} (use .xlsx o .csv).")
+
+
+def mapear_columnas(df, obligatorias=COLUMNAS_OBLIGATORIAS):
+    """Renombra las columnas reconocidas al esquema de la orden; descarta las demás."""
+    alias = {a: campo for campo, nombres in COLUMNAS_IMPORTACION.items() for a in nombres}
+    renombres = {}
+    for columna in df.columns:
+        campo = alias.get(_clave(columna))
+        if campo and campo not in renombres.values():
+            renombres[columna] = campo
+    faltantes = [c for c in obligatorias if c not in renombres.values()]
+    if faltantes:
+        raise ValueError("Faltan columnas obligatorias: " + ", ".join(faltantes))
+    df = df[list(renombres)].rename(columns=renombres)
+    for campo in COLUMNAS_IMPORTACION:
+        if campo not in df.columns:
+            df[campo] = ''
+    return df[list(COLUMNAS_IMPORTACION)]
+
+
+def validar(df, indice, servicios=SERVICIOS_SOLICITUD, dependencias=DEPENDENCIAS):
+    """Valida un DataFrame ya mapeado contra el historial (`indice`: IndiceConsecutivos).
+
+    Devuelve (ordenes, rechazos): la lista de órdenes válidas y un DataFrame con
+    'Fila' (número de fila en el archivo), número de orden, solicitud y motivos.
+    """
+    import pandas as pd
+
+    df = df.fillna('').astype(str).apply(lambda columna: columna.str.strip())
+    motivos = pd.Series('', index=df.index)
+
+    def rechazar(mascara, motivo):
+        nonlocal motivos
+        motivos = motivos.mask(mascara, motivos + motivo + '; ')
+
+    numero = pd.to_numeric(df["Número de Orden"], errors='coerce')
+    numero_valido = numero.notna() & (numero > 0) & (numero % 1 == 0)
+    rechazar(~numero_valido, "Número de Orden inválido")
+    numero = numero.where(numero_valido).astype('Int64')
+    rechazar(numero_valido & numero.isin(indice.ordenes), "Número de Orden ya existe en el historial")
+    rechazar(numero_valido & numero.duplicated(keep=False), "Número de Orden repetido en el archivo")
+
+    sufijo = pd.to_numeric(df["Solicitud N°"].str.extract(_PATRON_SOLICITUD, expand=False), errors='coerce')
+    solicitud_valida = sufijo.notna()
+    rechazar(~solicitud_valida, "Solicitud N° sin formato 09-XX")
+    # Misma forma que generar_solicitud_nro: '09-05'
+    solicitud = ('09-' + sufijo.astype('Int64').astype(str).str.zfill(2)).where(solicitud_valida)
+    rechazar(solicitud_valida & solicitud.isin(indice.solicitudes), "Solicitud N° ya existe en el historial")
+    rechazar(solicitud_valida & solicitud.duplicated(keep=False), "Solicitud N° repetida en el archivo")
+
+    # ISO ('2019-05-02', también como lo entrega Excel) y, si no, día/mes/año como en Colombia
+    fecha = pd.to_datetime(df["Fecha"], errors='coerce', format='ISO8601')
+    fecha = fecha.fillna(pd.to_datetime(df["Fecha"].where(fecha.isna()), errors='coerce', format='mixed', dayfirst=True))
+    rechazar(fecha.isna(), "Fecha inválida")
+
+    rechazar(~df["Servicio Aplicado"].isin(servicios), "Servicio Aplicado desconocido")
+    rechazar(~df["Dependencia Solicitante"].isin(dependencias), "Dependencia Solicitante desconocida")
+
+    validas = motivos.eq('')
+    rechazos = pd.DataFrame({
+        'Fila': df.index[~validas] + 2,  # +1 por el encabezado y +1 porque las hojas cuentan desde 1
+        'Número de Orden': df.loc[~validas, "Número de Orden"],
+        'Solicitud N°': df.loc[~validas, "Solicitud N°"],
+        'Motivo del rechazo': motivos[~validas].str.rstrip('; '),
+    }).reset_index(drop=True)
+
+    aceptadas = df[validas].copy()
+    aceptadas["Número de Orden"] = numero[validas].astype(int)
+    aceptadas["Solicitud N°"] = solicitud[validas]
+    aceptadas["Fecha"] = fecha[validas].dt.strftime("%Y-%m-%d")
+    ordenes = aceptadas.to_dict('records')
+    for orden in ordenes:
+        orden["Número de Orden"] = int(orden["Número de Orden"])
+        orden[CAMPO_MATERIALES] = normalizar_materiales(orden[CAMPO_MATERIALES])
+    return ordenes, rechazos
+
+
+def preparar_importacion(origen, indice, nombre=None, hoja=0, servicios=SERVICIOS_SOLICITUD, dependencias=DEPENDENCIAS):
+    """Lee, mapea y valida un archivo; devuelve (ordenes, rechazos)."""
+    return validar(mapear_columnas(leer_archivo(origen, nombre, hoja)), indice, servicios, dependencias)
+
+
+def main(argv=None):
+    from nucleo.asignador import AsignadorConsecutivos
+    from nucleo.compartido import OrdenesCompartidas
+
+    parser = argparse.ArgumentParser(description="Importa órdenes históricas desde Excel (xlsx) o CSV.")
+    parser.add_argument('archivo', help="Archivo .xlsx o .csv con una orden por fila.")
+    parser.add_argument('--hoja', default=0, help="Hoja del libro de Excel (nombre o posición).")
+    parser.add_argument('--simular', action='store_true', help="Solo validar; no guardar nada.")
+    parser.add_argument('--rechazos', help="Ruta CSV donde escribir el reporte de filas rechazadas.")
+    args = parser.parse_args(argv)
+    hoja = int(args.hoja) if str(args.hoja).isdigit() else args.hoja
+
+    ordenes_compartidas = OrdenesCompartidas(crear_almacen())
+    try:
+        ordenes_compartidas.sincronizar()
+        ordenes, rechazos = preparar_importacion(args.archivo, ordenes_compartidas.indice, hoja=hoja)
+        if ordenes and not args.simular:
+            AsignadorConsecutivos(ordenes_compartidas).confirmar_lote(ordenes)
+    except (ErrorAlmacenamiento, ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    accion = "válidas (simulación, no se guardó nada)" if args.simular else "importadas"
+    print(f"Órdenes {accion}: {len(ordenes)}; rechazadas: {len(rechazos)}")
+    if len(rechazos):
+        if args.rechazos:
+            rechazos.to_csv(args.rechazos, index=False, encoding='utf-8-sig')
+            print(f"Reporte de rechazos: {args.rechazos}")
+        else:
+            for fila in rechazos.itertuples(index=False):
+                print(f"  Fila {fila[0]} (orden {fila[1]} / solicitud {fila[2]}): {fila[3]}", file=sys.stderr)
+    return 0 if not len(rechazos) else 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
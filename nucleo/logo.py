@@ -0,0 +1,85 @@
+"""Logo institucional embebido como data URI para que las órdenes no dependan de la red.
+
+Orden de búsqueda (una sola vez por proceso):
+1. Copia ya reducida en LOGO_CACHE_FILE.
+2. Archivo local LOGO_FILE (o el indicado en MC_ORDENES_LOGO).
+3. Descarga única de LOGO_URL, que queda guardada en la caché de disco.
+Si todo falla se usa la URL remota, como antes.
+"""
+
+import base64
+import functools
+import io
+import os
+import urllib.request
+
+try:
+    from PIL import Image
+except ImportError:  # Sin Pillow se embebe la imagen sin reducir
+    Image = None
+
+LOGO_URL = "https://yt3.googleusercontent.com/ytc/AIdro_mbSWHDUC7Kw_vwBstPvA2M0-SynIdMOdiq1oLmPP6RAGw=s900-c-k-c0x00ffffff-no-rj"
+LOGO_FILE = 'logo.png'
+LOGO_CACHE_FILE = os.path.join('.cache', 'logo_80px.png')
+# Ancho con el que se imprime el logo (.logo-cell img { max-width: 80px; })
+LOGO_ANCHO_PX = 80
+TIEMPO_ESPERA_DESCARGA = 5
+
+
+def _reducir(contenido):
+    """Reduce la imagen al ancho de impresión; devuelve (bytes, tipo MIME)."""
+    if Image is None:
+        return contenido, 'image/png' if contenido[:8] == b'\x89PNG\r\n\x1a\n' else 'image/jpeg'
+    with Image.open(io.BytesIO(contenido)) as imagen:
+        imagen.thumbnail((LOGO_ANCHO_PX, LOGO_ANCHO_PX * 4))
+        if imagen.mode not in ('RGB', 'RGBA'):
+            imagen = imagen.convert('RGBA')
+        salida = io.BytesIO()
+        imagen.save(salida, format='PNG', optimize=True)
+    return salida.getvalue(), 'image/png'
+
+
+def _guardar_cache(contenido):
+    try:
+        os.makedirs(os.path.dirname(LOGO_CACHE_FILE), exist_ok=True)
+        tmp_path = LOGO_CACHE_FILE + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(contenido)
+        os.replace(tmp_path, LOGO_CACHE_FILE)
+    except OSError:
+        pass
+
+
+def _leer(ruta):
+    try:
+        with open(ruta, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _descargar():
+    try:
+        with urllib.request.urlopen(LOGO_URL, timeout=TIEMPO_ESPERA_DESCARGA) as respuesta:
+            return respuesta.read()
+    except Exception:
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def logo_src():
+    """`src` del logo: data URI base64 memorizado para todo el proceso (o LOGO_URL si no hay imagen)."""
+    en_cache = _leer(LOGO_CACHE_FILE)
+    if en_cache:
+        return 'data:image/png;base64,' + base64.b64encode(en_cache).decode('ascii')
+
+    original = _leer(os.environ.get('MC_ORDENES_LOGO') or LOGO_FILE) or _descargar()
+    if not original:
+        return LOGO_URL
+    try:
+        contenido, mime = _reducir(original)
+    except Exception:
+        return LOGO_URL
+    if mime == 'image/png':
+        _guardar_cache(contenido)
+    return f'data:{mime};base64,' + base64.b64encode(contenido).decode('ascii')
@@ -0,0 +1,118 @@
+"""Modelo estructurado de los materiales solicitados en una orden.
+
+Antes el campo 'Materiales Solicitados' era un texto como
+"1. Bombillo LED (3 UNIDAD); 2. Cable (10 METRO)" que se volvía a partir al
+renderizar. Ahora es una lista de registros:
+
+    {"item": "Bombillo LED", "unidad": "UNIDAD", "cantidad": 3,
+     "cantidad_despachada": None, "valor_unitario": None}
+
+Los registros antiguos se convierten al leerlos (migrar_orden); el análisis del
+texto solo ocurre una vez por registro.
+"""
+
+import re
+
+CAMPO_MATERIALES = 'Materiales Solicitados'
+
+# "1. Bombillo LED (3 UNIDAD)" -> ("Bombillo LED", "3", "UNIDAD")
+_PATRON_LEGADO = re.compile(r'^(?:\d+\.\s+)?(?P<item>.*?)\s*\((?P<cantidad>\d+(?:[.,]\d+)?)\s*(?P<unidad>[^()]*)\)\s*$')
+
+_CLAVES_MATERIAL = frozenset(("item", "unidad", "cantidad", "cantidad_despachada", "valor_unitario"))
+
+
+def nuevo_material(item, unidad='UNIDAD', cantidad=1, cantidad_despachada=None, valor_unitario=None):
+    """Crea el registro de un material solicitado."""
+    return {
+        "item": item,
+        "unidad": unidad or 'UNIDAD',
+        "cantidad": cantidad,
+        "cantidad_despachada": cantidad_despachada,
+        "valor_unitario": valor_unitario,
+    }
+
+
+def _numero(texto):
+    valor = float(texto.replace(',', '.'))
+    return int(valor) if valor.is_integer() else valor
+
+
+def parsear_materiales_legado(texto):
+    """Convierte el texto '; '-separado del formato anterior en registros."""
+    materiales = []
+    for parte in texto.split('; '):
+        parte = parte.strip()
+        if not parte:
+            continue
+        coincidencia = _PATRON_LEGADO.match(parte)
+        if coincidencia:
+            materiales.append(nuevo_material(
+                coincidencia['item'], coincidencia['unidad'].strip() or 'UNIDAD',
+                _numero(coincidencia['cantidad'])))
+        else:
+            # Texto sin el formato esperado: se conserva completo como nombre del ítem
+            materiales.append(nuevo_material(re.sub(r'^\d+\.\s+', '', parte), None, None))
+    return materiales
+
+
+def normalizar_materiales(valor):
+    """Devuelve siempre una lista de registros, venga el campo como lista, texto o vacío."""
+    if not valor:
+        return []
+    if isinstance(valor, str):
+        return parsear_materiales_legado(valor)
+    return [m if set(m) == _CLAVES_MATERIAL else nuevo_material(**{k: m.get(k) for k in _CLAVES_MATERIAL})
+            for m in valor]
+
+
+def errores_materiales(valor):
+    """Problemas de forma del campo recibido de fuera (API, CLI); vacío si normalizar_materiales lo acepta."""
+    if not valor or isinstance(valor, str):
+        return []
+    if not isinstance(valor, list):
+        return [f"{CAMPO_MATERIALES} debe ser una lista de materiales o un texto."]
+    errores = []
+    for i, m in enumerate(valor, 1):
+        if not isinstance(m, dict):
+            errores.append(f"Material {i}: debe ser un objeto con 'item' y 'cantidad'.")
+            continue
+        for campo in ("item", "unidad"):
+            if m.get(campo) is not None and not isinstance(m[campo], str):
+                errores.append(f"Material {i}: '{campo}' debe ser un texto.")
+        for campo in ("cantidad", "cantidad_despachada", "valor_unitario"):
+            if m.get(campo) is not None and (isinstance(m[campo], bool) or not isinstance(m[campo], (int, float))):
+                errores.append(f"Material {i}: '{campo}' debe ser un número.")
+    return errores
+
+
+def migrar_orden(orden):
+    """Convierte en sitio una orden del formato anterior (materiales en texto) al actual."""
+    valor = orden.get(CAMPO_MATERIALES)
+    if isinstance(valor, list) and all(isinstance(m, dict) and set(m) == _CLAVES_MATERIAL for m in valor):
+        return orden
+    orden[CAMPO_MATERIALES] = normalizar_materiales(valor)
+    return orden
+
+
+def formatear_materiales(materiales):
+    """Texto legible para tablas y Excel: 'Bombillo LED (3 UNIDAD); Cable (10 METRO)'."""
+    if isinstance(materiales, str):
+        return materiales
+    partes = []
+    for m in materiales or ():
+        if m.get("cantidad") is None:
+            partes.append(m["item"])
+        else:
+            partes.append(f"{m['item']} ({m['cantidad']} {m.get('unidad') or 'UNIDAD'})")
+    return '; '.join(partes)
+
+
+def valor_total(material):
+    """Cantidad despachada (o pedida) por valor unitario; None si falta el valor."""
+    valor_unitario = material.get("valor_unitario")
+    if valor_unitario is None:
+        return None
+    cantidad = material.get("cantidad_despachada")
+    if cantidad is None:
+        cantidad = material.get("cantidad") or 0
+    return cantidad * valor_unitario
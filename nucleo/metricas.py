@@ -0,0 +1,171 @@
+"""Medición de tiempos por etapa de cada rerun (panel de administración y Prometheus).
+
+Se activa con MC_ORDENES_METRICAS=1. Desactivado, `medir` devuelve siempre el
+mismo contexto vacío y `cronometrado` deja la función sin envolver, así que el
+costo es una llamada y una comparación por etapa.
+
+Cada etapa guarda sus últimas VENTANA duraciones en un RegistroTiempos: uno
+global del proceso (REGISTRO_PROCESO) y, si la aplicación lo pasa, otro por
+sesión. Los percentiles se calculan al consultarlos, no al medir.
+
+El panel de la aplicación solo se muestra si MC_ORDENES_ADMIN_CLAVE está
+definida y la URL trae ?admin=<clave> (ver `es_admin`).
+
+`escribir_prometheus` deja los resúmenes en METRICAS_FILE en formato de
+exposición de texto de Prometheus (para node_exporter --collector.textfile o
+similar).
+"""
+
+import contextlib
+import functools
+import hmac
+import os
+import threading
+import time
+from collections import deque
+
+HABILITADO = os.environ.get('MC_ORDENES_METRICAS', '').lower() in ('1', 'true', 'si', 'sí')
+METRICAS_FILE = os.environ.get('MC_ORDENES_METRICAS_ARCHIVO', 'metricas_ordenes.prom')
+# Duraciones recientes que se conservan por etapa
+VENTANA = 500
+CUANTILES = (0.5, 0.9, 0.99)
+# Intervalo mínimo entre escrituras del archivo de métricas (segundos)
+INTERVALO_ESCRITURA = 10
+CLAVE_ADMIN = os.environ.get('MC_ORDENES_ADMIN_CLAVE', '')
+
+_NULO = contextlib.nullcontext()
+
+
+class RegistroTiempos:
+    """Duraciones recientes por etapa, con total y cantidad acumulados."""
+
+    def __init__(self, ventana=VENTANA):
+        self.ventana = ventana
+        self._lock = threading.Lock()
+        self._recientes = {}
+        self._totales = {}
+
+    def registrar(self, etapa, segundos):
+        with self._lock:
+            recientes = self._recientes.get(etapa)
+            if recientes is None:
+                recientes = self._recientes[etapa] = deque(maxlen=self.ventana)
+                self._totales[etapa] = [0, 0.0]
+            recientes.append(segundos)
+            totales = self._totales[etapa]
+            totales[0] += 1
+            totales[1] += segundos
+
+    def resumen(self, cuantiles=CUANTILES):
+        """{etapa: {'cantidad', 'suma', 'ultimo', cuantil: segundos, ...}} de la ventana reciente."""
+        with self._lock:
+            copia = {etapa: (sorted(r), r[-1], tuple(self._totales[etapa])) for etapa, r in self._recientes.items()}
+        resumen = {}
+        for etapa, (ordenados, ultimo, (cantidad, suma)) in sorted(copia.items()):
+            fila = {'cantidad': cantidad, 'suma': suma, 'ultimo': ultimo}
+            for q in cuantiles:
+                fila[q] = ordenados[min(len(ordenados) - 1, int(q * len(ordenados)))]
+            resumen[etapa] = fila
+        return resumen
+
+
+REGISTRO_PROCESO = RegistroTiempos()
+
+
+class _Medicion:
+    __slots__ = ('etapa', 'registros', 'inicio')
+
+    def __init__(self, etapa, registros):
+        self.etapa = etapa
+        self.registros = registros
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        segundos = time.perf_counter() - self.inicio
+        for registro in self.registros:
+            registro.registrar(self.etapa, segundos)
+        return False
+
+
+def medir(etapa, sesion=None):
+    """Contexto que mide la etapa en el registro del proceso (y en el de la sesión, si se da)."""
+    if not HABILITADO:
+        return _NULO
+    return _Medicion(etapa, (REGISTRO_PROCESO, sesion) if sesion is not None else (REGISTRO_PROCESO,))
+
+
+def registrar(etapa, segundos, sesion=None):
+    """Registra una duración medida a mano (p. ej. el rerun completo, que no cabe en un `with`)."""
+    if not HABILITADO:
+        return
+    REGISTRO_PROCESO.registrar(etapa, segundos)
+    if sesion is not None:
+        sesion.registrar(etapa, segundos)
+
+
+def cronometrado(etapa):
+    """Decorador equivalente a `with medir(etapa):` alrededor de la función (solo en el proceso)."""
+    def decorador(funcion):
+        if not HABILITADO:
+            return funcion
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with _Medicion(etapa, (REGISTRO_PROCESO,)):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def es_admin(clave):
+    """True si `clave` coincide con MC_ORDENES_ADMIN_CLAVE (sin clave configurada no hay panel)."""
+    return bool(CLAVE_ADMIN) and hmac.compare_digest(str(clave or ''), CLAVE_ADMIN)
+
+
+def tabla(registro):
+    """DataFrame del resumen en milisegundos (panel de administración)."""
+    import pandas as pd
+
+    filas = [{"Etapa": etapa, "Mediciones": fila['cantidad'], "Última (ms)": fila['ultimo'] * 1000,
+              **{f"p{round(q * 100):g} (ms)": fila[q] * 1000 for q in CUANTILES}}
+             for etapa, fila in registro.resumen().items()]
+    return pd.DataFrame(filas)
+
+
+def formato_prometheus(registro=REGISTRO_PROCESO, prefijo='mc_ordenes_etapa_segundos'):
+    """Texto en formato de exposición de Prometheus (un summary por etapa)."""
+    lineas = [
+        f'# HELP {prefijo} Duración de cada etapa del rerun de la aplicación de órdenes.',
+        f'# TYPE {prefijo} summary',
+    ]
+    for etapa, fila in registro.resumen().items():
+        etiqueta = etapa.replace('\\', '\\\\').replace('"', '\\"')
+        for q in CUANTILES:
+            lineas.append(f'{prefijo}{{etapa="{etiqueta}",quantile="{q}"}} {fila[q]:.6f}')
+        lineas.append(f'{prefijo}_sum{{etapa="{etiqueta}"}} {fila["suma"]:.6f}')
+        lineas.append(f'{prefijo}_count{{etapa="{etiqueta}"}} {fila["cantidad"]}')
+    return '\n'.join(lineas) + '\n'
+
+
+_ultima_escritura = [0.0]
+
+
+def escribir_prometheus(ruta=METRICAS_FILE, forzar=False):
+    """Escribe las métricas del proceso (temporal + rename) como mucho cada INTERVALO_ESCRITURA segundos."""
+    if not HABILITADO:
+        return False
+    ahora = time.monotonic()
+    if not forzar and ahora - _ultima_escritura[0] < INTERVALO_ESCRITURA:
+        return False
+    _ultima_escritura[0] = ahora
+    tmp_path = f'{ruta}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(formato_prometheus())
+        os.replace(tmp_path, ruta)
+    except OSError:
+        return False
+    return True
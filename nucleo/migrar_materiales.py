@@ -0,0 +1,27 @@
+"""Migración única de 'Materiales Solicitados' de texto a lista de registros.
+
+Las órdenes antiguas ya se convierten al leerlas; este script deja el cambio
+escrito en disco para que la conversión no se repita en cada arranque.
+
+Uso:
+    python -m nucleo.migrar_materiales
+"""
+
+import sys
+
+from nucleo.almacenamiento import ErrorAlmacenamiento, crear_almacen
+
+
+def main(argv=None):
+    almacen = crear_almacen()
+    try:
+        reescritas = almacen.reescribir_ordenes()
+    except ErrorAlmacenamiento as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Órdenes reescritas en el esquema actual ({almacen.nombre}): {reescritas}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
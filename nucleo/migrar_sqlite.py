@@ -0,0 +1,84 @@
+"""Migración única de los archivos JSON (órdenes, eventos del ciclo de vida y directorio) a la base SQLite.
+
+Uso:
+    python -m nucleo.migrar_sqlite [--db ordenes.db] [--forzar]
+
+Después de migrar, arranque la aplicación con MC_ORDENES_ALMACEN=sqlite.
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+
+from nucleo.almacenamiento import (
+    DIRECTORIO_DATA_FILE, ORDENES_DATA_FILE, ORDENES_DB_FILE, ORDENES_DIARIO_FILE, ORDENES_EVENTOS_FILE,
+    ErrorAlmacenamiento, cargar_json, cargar_ordenes, leer_diario,
+)
+from nucleo.almacen_sqlite import AlmacenSQLite, fila_orden
+
+
+def migrar(db_path=ORDENES_DB_FILE, ordenes_path=ORDENES_DATA_FILE, diario_path=ORDENES_DIARIO_FILE,
+           directorio_path=DIRECTORIO_DATA_FILE, forzar=False, eventos_path=ORDENES_EVENTOS_FILE):
+    """Copia órdenes y eventos (estados y despachos) a SQLite en una transacción, y luego el directorio.
+
+    Devuelve (migradas, rechazadas, eventos) donde `rechazadas` lista las órdenes
+    que violan los índices únicos (número de orden o solicitud repetidos) y
+    `eventos` es la cantidad de eventos copiados. Los eventos solo se copian si la
+    base aún no tiene ninguno: repetirlos aplicaría dos veces cada despacho.
+    """
+    almacen = AlmacenSQLite(db_path)
+    con_eventos = almacen.firma_eventos() is not None
+    if (almacen.contar_ordenes() or con_eventos) and not forzar:
+        raise ErrorAlmacenamiento(f"{db_path} ya contiene órdenes o eventos; use --forzar para añadir de todos modos.")
+
+    ordenes = cargar_ordenes(ordenes_path, diario_path)
+    eventos = [] if con_eventos else [e for e in leer_diario(eventos_path)[0] if isinstance(e, dict) and 'orden' in e]
+    directorio = cargar_json(directorio_path, None)
+
+    conexion = almacen._conexion()
+    migradas, rechazadas = 0, []
+    with conexion:
+        for orden in ordenes:
+            try:
+                conexion.execute(
+                    'INSERT INTO ordenes (numero, solicitud, solicitud_num, fecha, servicio, responsable, datos) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)', fila_orden(orden))
+                migradas += 1
+            except (sqlite3.IntegrityError, KeyError, ValueError) as e:
+                rechazadas.append((orden.get('Número de Orden'), orden.get('Solicitud N°'), str(e)))
+        # En el orden del registro: el estado de cada orden se reconstruye reproduciéndolos
+        conexion.executemany('INSERT INTO eventos (numero, datos) VALUES (?, ?)',
+                             ((e['orden'], json.dumps(e)) for e in eventos))
+    if directorio:
+        almacen.guardar_directorio(directorio)
+    return migradas, rechazadas, len(eventos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Migra ordenes_data.json, ordenes_eventos.jsonl y directorio_data.json a SQLite.")
+    parser.add_argument('--db', default=ORDENES_DB_FILE, help="Ruta de la base SQLite destino.")
+    parser.add_argument('--ordenes', default=ORDENES_DATA_FILE)
+    parser.add_argument('--diario', default=ORDENES_DIARIO_FILE)
+    parser.add_argument('--eventos', default=ORDENES_EVENTOS_FILE, help="Registro de estados y despachos (JSONL).")
+    parser.add_argument('--directorio', default=DIRECTORIO_DATA_FILE)
+    parser.add_argument('--forzar', action='store_true',
+                        help="Migrar aunque la base ya tenga órdenes (los eventos solo se copian a una base sin eventos).")
+    args = parser.parse_args(argv)
+
+    try:
+        migradas, rechazadas, eventos = migrar(args.db, args.ordenes, args.diario, args.directorio, args.forzar,
+                                               args.eventos)
+    except ErrorAlmacenamiento as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Órdenes migradas: {migradas}; eventos migrados: {eventos}")
+    for numero, solicitud, motivo in rechazadas:
+        print(f"  Rechazada orden {numero} / solicitud {solicitud}: {motivo}", file=sys.stderr)
+    return 0 if not rechazadas else 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""Numeración consecutiva: índice de números de orden y de solicitud usados.
+
+El índice se actualiza orden por orden (al cargar y al guardar), de modo que
+comprobar duplicados, conocer el máximo o buscar el siguiente número libre no
+depende del tamaño del historial.
+"""
+
+import threading
+
+# Valores iniciales cuando aún no hay órdenes (la orden física #928 y la solicitud 09-10)
+ORDEN_INICIAL = 928
+SOLICITUD_INICIAL = 10
+
+
+def generar_solicitud_nro(current_num):
+    """Genera el formato de solicitud (ej. '09-11') a partir del número base."""
+    return f"09-{current_num:02d}"
+
+
+def numero_solicitud(solicitud):
+    """Extrae el sufijo numérico de una solicitud '09-XX' (None si no tiene ese formato)."""
+    if not isinstance(solicitud, str) or not solicitud.startswith('09-'):
+        return None
+    sufijo = solicitud.split('-')[-1]
+    return int(sufijo) if sufijo.isdigit() else None
+
+
+class ConjuntoNumeros:
+    """Conjunto de enteros usados con máximo acumulado y búsqueda del siguiente libre.
+
+    `siguiente_libre` salta los tramos ocupados con punteros comprimidos (como en
+    union-find), así que recorrer un bloque largo de números consecutivos se paga
+    una sola vez.
+    """
+
+    __slots__ = ('_usados', '_saltos', 'maximo')
+
+    def __init__(self):
+        self._usados = set()
+        self._saltos = {}
+        self.maximo = None
+
+    def __contains__(self, numero):
+        return numero in self._usados
+
+    def __len__(self):
+        return len(self._usados)
+
+    def __iter__(self):
+        return iter(self._usados)
+
+    def agregar(self, numero):
+        self._usados.add(numero)
+        if self.maximo is None or numero > self.maximo:
+            self.maximo = numero
+
+    def agregar_rango(self, inicio, fin):
+        """Agrega los números de `inicio` a `fin`, ambos inclusive."""
+        self._usados.update(range(inicio, fin + 1))
+        if self.maximo is None or fin > self.maximo:
+            self.maximo = fin
+
+    def siguiente_libre(self, despues_de):
+        """Menor número libre estrictamente mayor que `despues_de`."""
+        candidato = despues_de + 1
+        camino = []
+        while candidato in self._usados:
+            camino.append(candidato)
+            candidato = self._saltos.get(candidato, candidato + 1)
+        # Los números solo se agregan, nunca se quitan: el salto sigue siendo válido
+        for numero in camino:
+            self._saltos[numero] = candidato
+        return candidato
+
+    def huecos(self, desde, hasta):
+        """Números libres en el rango [desde, hasta]."""
+        return [n for n in range(desde, hasta + 1) if n not in self._usados]
+
+
+class IndiceConsecutivos:
+    """Números de orden y de solicitud ya usados, con sus máximos."""
+
+    def __init__(self, ordenes=()):
+        self._lock = threading.Lock()
+        self.ordenes = ConjuntoNumeros()
+        self.solicitudes = set()
+        self.sufijos_solicitud = ConjuntoNumeros()
+        self.agregar_ordenes(ordenes)
+
+    def agregar_orden(self, orden):
+        with self._lock:
+            self._agregar(orden)
+
+    def agregar_ordenes(self, ordenes):
+        with self._lock:
+            for orden in ordenes:
+                self._agregar(orden)
+
+    def agregar_numeros(self, rangos_orden=(), rangos_solicitud=(), otras_solicitudes=()):
+        """Registra números usados sin las órdenes completas.
+
+        Los rangos son pares [inicio, fin] inclusivos de números de orden y de
+        sufijos de solicitud '09-XX' (ver nucleo.particiones); `otras_solicitudes`
+        son las solicitudes que no tienen ese formato.
+        """
+        with self._lock:
+            for inicio, fin in rangos_orden:
+                self.ordenes.agregar_rango(inicio, fin)
+            for inicio, fin in rangos_solicitud:
+                self.sufijos_solicitud.agregar_rango(inicio, fin)
+                self.solicitudes.update(generar_solicitud_nro(s) for s in range(inicio, fin + 1))
+            for solicitud in otras_solicitudes:
+                self.solicitudes.add(solicitud)
+                sufijo = numero_solicitud(solicitud)
+                if sufijo is not None:
+                    self.sufijos_solicitud.agregar(sufijo)
+
+    def _agregar(self, orden):
+        try:
+            self.ordenes.agregar(int(orden['Número de Orden']))
+        except (KeyError, TypeError, ValueError):
+            pass
+        solicitud = orden.get('Solicitud N°')
+        if solicitud is not None:
+            self.solicitudes.add(solicitud)
+            sufijo = numero_solicitud(solicitud)
+            if sufijo is not None:
+                self.sufijos_solicitud.agregar(sufijo)
+
+    # --- Consultas O(1) ---
+
+    def existe_orden(self, numero):
+        return numero in self.ordenes
+
+    def existe_solicitud(self, solicitud):
+        return solicitud in self.solicitudes
+
+    @property
+    def ultima_orden(self):
+        return self.ordenes.maximo if self.ordenes.maximo is not None else ORDEN_INICIAL
+
+    @property
+    def ultima_solicitud(self):
+        return self.sufijos_solicitud.maximo if self.sufijos_solicitud.maximo is not None else SOLICITUD_INICIAL
+
+    def siguiente_orden(self):
+        return self.ultima_orden + 1
+
+    def siguiente_solicitud(self):
+        return self.ultima_solicitud + 1
+
+    # --- Detección de huecos ---
+
+    def siguiente_orden_libre(self, despues_de):
+        with self._lock:
+            return self.ordenes.siguiente_libre(despues_de)
+
+    def siguiente_solicitud_libre(self, despues_de):
+        with self._lock:
+            return self.sufijos_solicitud.siguiente_libre(despues_de)
+
+    def huecos_orden(self, desde=None, hasta=None):
+        """Números de orden sin usar entre `desde` (por defecto ORDEN_INICIAL + 1) y el máximo."""
+        desde = ORDEN_INICIAL + 1 if desde is None else desde
+        hasta = self.ultima_orden if hasta is None else hasta
+        return self.ordenes.huecos(desde, hasta)
@@ -0,0 +1,15 @@
+"""Listas de opciones fijas del formulario de órdenes.
+
+Viven aquí (y no solo en la aplicación) porque también las usan la importación
+masiva y los scripts de línea de comandos para validar los datos.
+"""
+
+DEPENDENCIAS = ["Electrico", "Infraestructura", "Biomedico", "Otro"]
+TIPOS_MANTENIMIENTO = ["Correctivo", "Preventivo", "Predictivo", "Inspección", "Instalación"]
+
+SERVICIOS_SOLICITUD = [
+    "UCI ADULTOS", "PEDIATRIA", "GINECOLOGIA", "CALL CENTER", 
+    "CONSULTA EXTERNA", "APS", "UCI NEONATAL", "UCI INTERMEDIA", 
+    "CIRUGIA", "HOSPITALIZACION", "URGENCIAS", "ODONTOLOGÍA", 
+    "FISIOTERAPIA", "P Y P", "LABORATORIO", "GASTROENTEROLOGÍA", "OTRO"
+]
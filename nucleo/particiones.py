@@ -0,0 +1,522 @@
+"""Historial de órdenes particionado por año (backend 'particionado').
+
+Las órdenes viven en una carpeta (ORDENES_PARTICIONES_DIR) con archivos JSON de
+un solo año según el campo Fecha y un manifiesto pequeño (`manifiesto.json`):
+
+    {"segmentos": [{"anio": "2024", "archivo": "ordenes_2024.json", "cantidad": 8123,
+                    "min_orden": 1, "max_orden": 8123, "max_solicitud": 8120,
+                    "desde": "2024-01-02", "hasta": "2024-12-30",
+                    "ordenes": [[1, 8123]], "solicitudes": [[1, 8120]], "otras_solicitudes": []},
+                   ...],
+     "particiones": {"2024": {"cantidad": 8123, "max_orden": 8123, "max_solicitud": 8120,
+                              "archivos": ["ordenes_2024.json"]}, ...}}
+
+El orden de los segmentos es el orden de llegada del historial, así que la
+posición de cada orden es la misma en todos los procesos. Normalmente hay un
+segmento por año; si se importan órdenes de un año anterior después de las del
+año en curso, van a un segmento nuevo de ese año en lugar de reordenar todo.
+
+Como en el backend JSON, cada orden guardada se anexa a un diario (JSONL) que se
+compacta al superar DIARIO_MAX_BYTES: cada tramo seguido del mismo año se agrega
+al último segmento si es de ese año o abre uno nuevo.
+
+Al iniciar solo se leen los segmentos desde el primero del año en curso. Los
+anteriores quedan archivados y se cargan completos la primera vez que los pide
+una consulta, una exportación o una reimpresión (OrdenesCompartidas.cargar_anios
+y cargar_numeros). Los números de orden y de solicitud de todos los años están en
+el manifiesto como rangos, así que los consecutivos y la detección de duplicados
+no necesitan leer los años archivados.
+
+El registro de estados y despachos (nucleo.estados) vive también en la carpeta.
+Para pasar un historial de un solo archivo (ordenes_data.json + diario + eventos)
+a particiones, con la aplicación detenida:
+
+    python -m nucleo.particiones [--ordenes ordenes_data.json] [--diario ordenes_diario.jsonl]
+                                 [--eventos ordenes_eventos.jsonl] [--carpeta ordenes_anuales]
+
+y luego arrancar la aplicación con MC_ORDENES_ALMACEN=particionado.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from datetime import date
+
+from nucleo.almacenamiento import (
+    DIARIO_MAX_BYTES, DIRECTORIO_DATA_FILE, ORDENES_DATA_FILE, ORDENES_DIARIO_FILE, ORDENES_EVENTOS_FILE,
+    ORDENES_PARTICIONES_DIR,
+    SUFIJO_BLOQUEO, SUFIJO_COMPACTANDO, AlmacenJSON, ErrorAlmacenamiento, anexar_al_diario, bloqueo_archivo,
+    cargar_json, cargar_ordenes, guardar_json_atomico, lanzar_compactacion, leer_diario, marcar_compactacion,
+    _firma_archivo, _lock_compactacion, _lock_diario, _reproducir,
+)
+from nucleo.numeracion import IndiceConsecutivos, generar_solicitud_nro, numero_solicitud
+from nucleo.registro import a_json, leer_orden
+
+MANIFIESTO_FILE = 'manifiesto.json'
+# Partición de las órdenes sin fecha reconocible (queda entre las archivadas)
+ANIO_SIN_FECHA = '0000'
+
+
+# =========================================================================
+# === MANIFIESTO Y SEGMENTOS ===
+# =========================================================================
+
+def anio_de(orden):
+    """Año ('YYYY') de la orden según su Fecha."""
+    fecha = str(orden.get('Fecha') or '')
+    return fecha[:4] if fecha[:4].isdigit() else ANIO_SIN_FECHA
+
+
+def rangos(numeros):
+    """Pares [inicio, fin] inclusivos que cubren los enteros de `numeros`."""
+    resultado = []
+    for numero in sorted(set(numeros)):
+        if resultado and numero == resultado[-1][1] + 1:
+            resultado[-1][1] = numero
+        else:
+            resultado.append([numero, numero])
+    return resultado
+
+
+def resumen_segmento(anio, archivo, ordenes):
+    """Entrada del manifiesto para un segmento: cantidad, máximos, fechas y rangos de números."""
+    numeros, sufijos, otras, fechas = [], [], [], []
+    for orden in ordenes:
+        try:
+            numeros.append(int(orden['Número de Orden']))
+        except (KeyError, TypeError, ValueError):
+            pass
+        solicitud = orden.get('Solicitud N°')
+        sufijo = numero_solicitud(solicitud)
+        if sufijo is not None and generar_solicitud_nro(sufijo) == solicitud:
+            sufijos.append(sufijo)
+        elif solicitud is not None:
+            otras.append(solicitud)
+        if orden.get('Fecha'):
+            fechas.append(orden['Fecha'])
+    sufijos_todos = sufijos + [s for s in map(numero_solicitud, otras) if s is not None]
+    return {
+        "anio": anio,
+        "archivo": archivo,
+        "cantidad": len(ordenes),
+        "min_orden": min(numeros, default=None),
+        "max_orden": max(numeros, default=None),
+        "max_solicitud": max(sufijos_todos, default=None),
+        "desde": min(fechas, default=None),
+        "hasta": max(fechas, default=None),
+        "ordenes": rangos(numeros),
+        "solicitudes": rangos(sufijos),
+        "otras_solicitudes": sorted(set(otras)),
+    }
+
+
+def resumen_particiones(segmentos):
+    """Por año: cantidad, máximos de orden y solicitud y archivos de sus segmentos."""
+    particiones = {}
+    for segmento in segmentos:
+        p = particiones.setdefault(segmento["anio"], {"cantidad": 0, "max_orden": None, "max_solicitud": None, "archivos": []})
+        p["cantidad"] += segmento["cantidad"]
+        for campo in ("max_orden", "max_solicitud"):
+            if segmento[campo] is not None and (p[campo] is None or segmento[campo] > p[campo]):
+                p[campo] = segmento[campo]
+        p["archivos"].append(segmento["archivo"])
+    return dict(sorted(particiones.items()))
+
+
+def cargar_manifiesto(carpeta):
+    """Manifiesto de la carpeta (vacío si aún no existe)."""
+    ruta = os.path.join(carpeta, MANIFIESTO_FILE)
+    manifiesto = cargar_json(ruta, None)
+    if manifiesto is None:
+        return {"segmentos": [], "particiones": {}}
+    if not isinstance(manifiesto, dict) or not isinstance(manifiesto.get("segmentos"), list):
+        raise ErrorAlmacenamiento(f"{ruta} no es un manifiesto de particiones válido.")
+    return manifiesto
+
+
+def guardar_manifiesto(carpeta, segmentos):
+    guardar_json_atomico({"segmentos": segmentos, "particiones": resumen_particiones(segmentos)},
+                         os.path.join(carpeta, MANIFIESTO_FILE))
+
+
+def leer_segmento(carpeta, segmento, cantidad=None):
+    """Órdenes de un segmento en el esquema actual (compactas, ver nucleo.registro).
+
+    Solo se toman las `cantidad` primeras (por defecto las que registra el
+    manifiesto): una compactación interrumpida pudo dejar el archivo más largo.
+    """
+    ruta = os.path.join(carpeta, segmento["archivo"])
+    cantidad = segmento["cantidad"] if cantidad is None else cantidad
+    ordenes = cargar_json(ruta, [])
+    if not isinstance(ordenes, list) or len(ordenes) < cantidad:
+        raise ErrorAlmacenamiento(f"{ruta} no contiene las {cantidad} órdenes que indica el manifiesto.")
+    return [leer_orden(orden) for orden in ordenes[:cantidad]]
+
+
+def _nombre_archivo(anio, segmentos):
+    usados = {s["archivo"] for s in segmentos}
+    nombre, k = f'ordenes_{anio}.json', 2
+    while nombre in usados:
+        nombre, k = f'ordenes_{anio}_{k}.json', k + 1
+    return nombre
+
+
+def indice_de_segmentos(segmentos):
+    """IndiceConsecutivos con los números de todos los segmentos, sin leer sus archivos."""
+    indice = IndiceConsecutivos()
+    for segmento in segmentos:
+        indice.agregar_numeros(segmento["ordenes"], segmento["solicitudes"], segmento["otras_solicitudes"])
+    return indice
+
+
+class _Vistos:
+    """Números de orden de un IndiceConsecutivos con la interfaz de conjunto que usa _reproducir."""
+
+    __slots__ = ('_numeros',)
+
+    def __init__(self, indice):
+        self._numeros = indice.ordenes
+
+    def __contains__(self, numero):
+        try:
+            return int(numero) in self._numeros
+        except (TypeError, ValueError):
+            return False
+
+    def add(self, numero):
+        try:
+            self._numeros.agregar(int(numero))
+        except (TypeError, ValueError):
+            pass
+
+
+def anexar_a_segmentos(carpeta, segmentos, ordenes):
+    """Escribe `ordenes` (en orden de llegada, sin duplicados) en los segmentos; devuelve los segmentos nuevos.
+
+    Cada tramo seguido del mismo año va al final del último segmento si es de ese
+    año o a un segmento nuevo, así que las posiciones existentes no cambian.
+    """
+    segmentos = list(segmentos)
+    tramos = []
+    for orden in ordenes:
+        anio = anio_de(orden)
+        if tramos and tramos[-1][0] == anio:
+            tramos[-1][1].append(orden)
+        else:
+            tramos.append((anio, [orden]))
+    for anio, tramo in tramos:
+        if segmentos and segmentos[-1]["anio"] == anio:
+            ultimo = segmentos.pop()
+            archivo, tramo = ultimo["archivo"], leer_segmento(carpeta, ultimo) + tramo
+        else:
+            archivo = _nombre_archivo(anio, segmentos)
+        guardar_json_atomico(tramo, os.path.join(carpeta, archivo))
+        segmentos.append(resumen_segmento(anio, archivo, tramo))
+    return segmentos
+
+
+def escribir_particiones(ordenes, carpeta):
+    """Escribe un historial completo como un segmento por año (en orden de año) y su manifiesto."""
+    por_anio = {}
+    for orden in ordenes:
+        por_anio.setdefault(anio_de(orden), []).append(orden)
+    os.makedirs(carpeta, exist_ok=True)
+    segmentos = []
+    for anio in sorted(por_anio):
+        archivo = _nombre_archivo(anio, segmentos)
+        guardar_json_atomico(por_anio[anio], os.path.join(carpeta, archivo))
+        segmentos.append(resumen_segmento(anio, archivo, por_anio[anio]))
+    guardar_manifiesto(carpeta, segmentos)
+    return segmentos
+
+
+# =========================================================================
+# === DIARIO Y COMPACTACIÓN ===
+# =========================================================================
+
+def _pendientes_del_diario(segmentos, diario_path):
+    """Registros del diario (pendiente de compactar + actual) que aún no están en los segmentos."""
+    ordenes = []
+    vistos = _Vistos(indice_de_segmentos(segmentos))
+    for ruta in (diario_path + SUFIJO_COMPACTANDO, diario_path):
+        _reproducir(ordenes, vistos, leer_diario(ruta)[0])
+    return ordenes
+
+
+def compactar_particiones(carpeta, diario_path):
+    """Integra el diario en los segmentos (ver anexar_a_segmentos) y lo vacía.
+
+    Mismo protocolo que almacenamiento.compactar_ordenes: el diario se renombra a
+    `*.compactando`, los segmentos se escriben antes que el manifiesto, se deja
+    la marca de la compactación y el renombrado se borra al final.
+    """
+    manifiesto_path = os.path.join(carpeta, MANIFIESTO_FILE)
+    if not _lock_compactacion.acquire(blocking=False):
+        return False
+    try:
+        with bloqueo_archivo(manifiesto_path + SUFIJO_BLOQUEO, bloqueante=False) as adquirido:
+            if not adquirido:
+                return False
+            compactando = diario_path + SUFIJO_COMPACTANDO
+            with _lock_diario, bloqueo_archivo(diario_path + SUFIJO_BLOQUEO):
+                if not os.path.exists(compactando):
+                    if not os.path.exists(diario_path):
+                        return False
+                    os.replace(diario_path, compactando)
+
+            inodo = os.stat(compactando).st_ino
+            segmentos = cargar_manifiesto(carpeta)["segmentos"]
+            nuevas = []
+            _reproducir(nuevas, _Vistos(indice_de_segmentos(segmentos)), leer_diario(compactando)[0])
+            segmentos = anexar_a_segmentos(carpeta, segmentos, nuevas)
+            guardar_manifiesto(carpeta, segmentos)
+            marcar_compactacion(manifiesto_path, inodo, sum(s["cantidad"] for s in segmentos))
+            os.unlink(compactando)
+            return True
+    finally:
+        _lock_compactacion.release()
+
+
+# =========================================================================
+# === BACKEND ===
+# =========================================================================
+
+class AlmacenParticionado(AlmacenJSON):
+    """Backend JSON particionado por año: segmentos + manifiesto + diario, con años archivados perezosos.
+
+    En la lista en memoria las posiciones de los segmentos archivados valen None
+    hasta que se cargan (cargar_archivado). Qué segmentos están archivados se fija
+    en la primera lectura y no cambia durante la vida del proceso.
+    """
+
+    nombre = 'particionado'
+
+    def __init__(self, carpeta=ORDENES_PARTICIONES_DIR, diario_path=None, directorio_path=DIRECTORIO_DATA_FILE,
+                 anio_actual=None):
+        super().__init__(ordenes_path=os.path.join(carpeta, MANIFIESTO_FILE),
+                         diario_path=diario_path or os.path.join(carpeta, ORDENES_DIARIO_FILE),
+                         directorio_path=directorio_path,
+                         eventos_path=os.path.join(carpeta, ORDENES_EVENTOS_FILE))
+        # Instalación nueva: el diario se crea dentro de la carpeta de particiones
+        os.makedirs(carpeta, exist_ok=True)
+        self.carpeta = carpeta
+        self.anio_actual = anio_actual
+        # Posición donde empiezan los segmentos cargados al iniciar (antes: archivados)
+        self.archivadas = None
+        self._archivo = []
+
+    # --- Sincronización con disco ---
+
+    def _fijar_archivo(self, segmentos):
+        anio_actual = self.anio_actual or str(date.today().year)
+        inicio = 0
+        for segmento in segmentos:
+            if segmento["anio"] >= anio_actual:
+                break
+            self._archivo.append(dict(segmento, inicio=inicio, fin=inicio + segmento["cantidad"], cargado=False))
+            inicio += segmento["cantidad"]
+        self.archivadas = inicio
+
+    def _recargar(self):
+        while True:
+            firma = _firma_archivo(self.ordenes_path)
+            segmentos = cargar_manifiesto(self.carpeta)["segmentos"]
+            if self.archivadas is None:
+                self._fijar_archivo(segmentos)
+            if self._ordenes is None:
+                ordenes = [None] * self.archivadas
+                for segmento in self._archivo:
+                    segmento["cargado"] = False
+            else:
+                ordenes = self._ordenes[:self.archivadas]
+
+            inicio = 0
+            for segmento in segmentos:
+                fin = inicio + segmento["cantidad"]
+                if fin > self.archivadas:
+                    ordenes.extend(leer_segmento(self.carpeta, segmento)[max(inicio, self.archivadas) - inicio:])
+                inicio = fin
+            if inicio < self.archivadas:
+                raise ErrorAlmacenamiento(
+                    f"{self.ordenes_path} cambió y tiene menos órdenes que al iniciar; reinicie la aplicación.")
+
+            indice = indice_de_segmentos(segmentos)
+            self._empezar(ordenes, _Vistos(indice), firma)
+            if self._seguir_diario():
+                break
+        indice.agregar_ordenes(self._ordenes[inicio:])
+        self._indice = indice
+
+    def _registrar(self, ordenes):
+        try:
+            escrito = anexar_al_diario(ordenes, self.diario_path)
+        except OSError as e:
+            raise ErrorAlmacenamiento(f"No se pudieron anexar las órdenes a {self.diario_path}: {e}") from e
+        if escrito and escrito[2] >= DIARIO_MAX_BYTES:
+            lanzar_compactacion(compactar_particiones, self.carpeta, self.diario_path)
+        return escrito
+
+    # --- Años archivados ---
+
+    def archivados(self):
+        """(posición donde empieza lo cargado al iniciar, copia de los segmentos archivados)."""
+        with self._lock:
+            self._sincronizar()
+            return self.archivadas, [dict(s) for s in self._archivo]
+
+    def cargar_archivado(self, i):
+        """Órdenes del segmento archivado `i` (se leen del disco la primera vez)."""
+        with self._lock:
+            self._sincronizar()
+            segmento = self._archivo[i]
+            if not segmento["cargado"]:
+                self._ordenes[segmento["inicio"]:segmento["fin"]] = leer_segmento(
+                    self.carpeta, segmento, segmento["fin"] - segmento["inicio"])
+                segmento["cargado"] = True
+            return self._ordenes[segmento["inicio"]:segmento["fin"]]
+
+    def resumir_archivado(self, i, desde, resumir, nombre, renovar=False):
+        """`resumir(órdenes)` del segmento archivado `i` a partir de su orden `desde`, sin cargarlo.
+
+        El resumen del segmento completo se guarda junto a él
+        (`ordenes_2024.<nombre>.json`) con la firma del archivo, así que cada año
+        archivado se lee una sola vez aunque reinicie el proceso (`renovar` lo
+        recalcula). Un resumen parcial se calcula leyendo el archivo y no se guarda.
+        """
+        with self._lock:
+            self._sincronizar()
+            segmento = dict(self._archivo[i])
+            cantidad = segmento["fin"] - segmento["inicio"]
+            cargadas = self._ordenes[segmento["inicio"]:segmento["fin"]] if segmento["cargado"] else None
+        if desde:
+            return resumir((cargadas or leer_segmento(self.carpeta, segmento, cantidad))[desde:])
+        ruta = os.path.join(self.carpeta, segmento["archivo"])
+        cache_path = os.path.splitext(ruta)[0] + f'.{nombre}.json'
+        firma = list(_firma_archivo(ruta) or ())
+        if not renovar:
+            try:
+                guardado = cargar_json(cache_path, None)
+            except ErrorAlmacenamiento:
+                guardado = None
+            if isinstance(guardado, dict) and guardado.get("firma") == firma and guardado.get("cantidad") == cantidad:
+                return guardado["datos"]
+        datos = resumir(cargadas or leer_segmento(self.carpeta, segmento, cantidad))
+        try:
+            guardar_json_atomico({"firma": firma, "cantidad": cantidad, "datos": datos}, cache_path, indent=None)
+        except OSError as e:
+            print(f"Aviso: no se guardó {cache_path}: {e}", file=sys.stderr)
+        return datos
+
+    def cargar_anios(self, desde=None, hasta=None):
+        """Carga los segmentos archivados de los años entre las fechas `desde` y `hasta` (inclusivas)."""
+        with self._lock:
+            self._sincronizar()
+            for i, segmento in enumerate(self._archivo):
+                if (not desde or segmento["anio"] >= desde[:4]) and (not hasta or segmento["anio"] <= hasta[:4]):
+                    self.cargar_archivado(i)
+
+    # --- Órdenes ---
+
+    def cargar_ordenes(self):
+        with self._lock:
+            self.cargar_anios()
+            return list(self._ordenes)
+
+    def reescribir_ordenes(self):
+        """Reescribe todos los segmentos en el esquema actual e integra el diario.
+
+        Conserva la segmentación (y por tanto las posiciones); devuelve la cantidad de órdenes escritas.
+        """
+        with self._lock, bloqueo_archivo(self.ordenes_path + SUFIJO_BLOQUEO), \
+                _lock_diario, bloqueo_archivo(self.diario_path + SUFIJO_BLOQUEO):
+            segmentos = []
+            for segmento in cargar_manifiesto(self.carpeta)["segmentos"]:
+                ordenes = leer_segmento(self.carpeta, segmento)
+                guardar_json_atomico(ordenes, os.path.join(self.carpeta, segmento["archivo"]))
+                segmentos.append(resumen_segmento(segmento["anio"], segmento["archivo"], ordenes))
+            segmentos = anexar_a_segmentos(self.carpeta, segmentos, _pendientes_del_diario(segmentos, self.diario_path))
+            guardar_manifiesto(self.carpeta, segmentos)
+            for ruta in (self.diario_path, self.diario_path + SUFIJO_COMPACTANDO):
+                if os.path.exists(ruta):
+                    os.unlink(ruta)
+            self._cerrar_flujo()
+            self._ordenes = None
+            return sum(s["cantidad"] for s in segmentos)
+
+
+# =========================================================================
+# === DIVISIÓN DE UN HISTORIAL DE UN SOLO ARCHIVO ===
+# =========================================================================
+
+def copiar_eventos(eventos_path, destino):
+    """Lleva el registro de eventos `eventos_path` a `destino`; devuelve cuántos eventos se agregaron.
+
+    Si `destino` ya tiene eventos, se unen sin repetir ninguno y en orden de fecha
+    (a igual fecha, primero los de `eventos_path`): el estado de cada orden se
+    reconstruye reproduciéndolos en ese orden.
+    """
+    origen = [e for e in leer_diario(eventos_path)[0] if isinstance(e, dict) and 'orden' in e]
+    with bloqueo_archivo(destino + SUFIJO_BLOQUEO):
+        existentes = leer_diario(destino)[0]
+        claves = {json.dumps(e, sort_keys=True, default=a_json) for e in existentes}
+        nuevos = [e for e in origen if json.dumps(e, sort_keys=True, default=a_json) not in claves]
+        if not nuevos:
+            return 0
+        eventos = sorted(nuevos + existentes, key=lambda e: e.get('fecha') or '')
+        fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', suffix='.jsonl', dir=os.path.dirname(os.path.abspath(destino)))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(e, default=a_json) + '\n' for e in eventos)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, destino)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+    return len(nuevos)
+
+
+def dividir(ordenes_path=ORDENES_DATA_FILE, diario_path=ORDENES_DIARIO_FILE, carpeta=ORDENES_PARTICIONES_DIR,
+            forzar=False, eventos_path=ORDENES_EVENTOS_FILE):
+    """Reparte instantánea + diario del backend JSON en segmentos por año y copia el registro de eventos.
+
+    Devuelve (segmentos, eventos copiados). Los archivos originales no se tocan
+    (quedan como respaldo).
+    """
+    if os.path.exists(os.path.join(carpeta, MANIFIESTO_FILE)) and not forzar:
+        raise ErrorAlmacenamiento(f"{carpeta} ya tiene un manifiesto; use --forzar para reescribirlo.")
+    segmentos = escribir_particiones(cargar_ordenes(ordenes_path, diario_path), carpeta)
+    return segmentos, copiar_eventos(eventos_path, os.path.join(carpeta, ORDENES_EVENTOS_FILE))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Divide ordenes_data.json (+ diario) en un archivo por año y copia ordenes_eventos.jsonl.")
+    parser.add_argument('--ordenes', default=ORDENES_DATA_FILE)
+    parser.add_argument('--diario', default=ORDENES_DIARIO_FILE)
+    parser.add_argument('--eventos', default=ORDENES_EVENTOS_FILE, help="Registro de estados y despachos (JSONL).")
+    parser.add_argument('--carpeta', default=ORDENES_PARTICIONES_DIR, help="Carpeta destino de las particiones.")
+    parser.add_argument('--forzar', action='store_true', help="Reescribir aunque la carpeta ya tenga un manifiesto.")
+    args = parser.parse_args(argv)
+
+    try:
+        segmentos, eventos = dividir(args.ordenes, args.diario, args.carpeta, args.forzar, args.eventos)
+    except (ErrorAlmacenamiento, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    for anio, p in resumen_particiones(segmentos).items():
+        solicitud = generar_solicitud_nro(p["max_solicitud"]) if p["max_solicitud"] is not None else "-"
+        print(f"  {anio}: {p['cantidad']} órdenes (máx. orden {p['max_orden']}, máx. solicitud {solicitud})")
+    print(f"Eventos de estado y despacho copiados: {eventos}")
+    print(f"Particiones escritas en {args.carpeta}. Arranque la aplicación con MC_ORDENES_ALMACEN=particionado.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""Representación compacta de las órdenes en memoria.
+
+Cada orden del historial era el diccionario leído del JSON: doce claves largas
+y, en cada registro, su propia copia de textos que se repiten en miles de
+órdenes (fecha, servicio, dependencia, firmantes, tipo de mantenimiento, ítem y
+unidad de los materiales). Orden y Material guardan los valores en __slots__ y
+los textos categóricos internados en una tabla del proceso, así que todas las
+órdenes comparten el mismo objeto str para "UCI ADULTOS".
+
+Ambas clases son Mapping de solo lectura con las mismas claves que el esquema
+JSON, de modo que el resto del código las sigue leyendo como diccionarios
+(orden['Fecha'], orden.get(...)). La conversión ocurre en los bordes:
+`leer_orden` al leer del disco (almacenamiento, particiones, SQLite) y `a_json`
+como `default` de json.dump al escribir. Las órdenes nuevas se crean como
+diccionarios y se compactan cuando el backend las incorpora.
+
+`columnas` y `tabla` arman las columnas de un DataFrame directamente desde los
+slots, sin pasar por un diccionario por orden.
+"""
+
+from collections.abc import Mapping
+
+from nucleo.materiales import CAMPO_MATERIALES, migrar_orden
+
+# Campos del esquema, en el orden en que se escriben en el JSON
+CAMPOS_ORDEN = (
+    "Número de Orden", "Solicitud N°", "Fecha", "Dependencia Solicitante", "Servicio Aplicado",
+    "Responsable Designado", "Motivo", "Tipo de Mantenimiento", CAMPO_MATERIALES,
+    "Elaboró", "Revisó", "Aprobó",
+)
+# Campos con pocos valores distintos: se internan
+CAMPOS_CATEGORICOS = frozenset((
+    "Fecha", "Dependencia Solicitante", "Servicio Aplicado", "Responsable Designado",
+    "Tipo de Mantenimiento", "Elaboró", "Revisó", "Aprobó",
+))
+_ATRIBUTOS = dict(zip(CAMPOS_ORDEN, (
+    'numero', 'solicitud', 'fecha', 'dependencia', 'servicio',
+    'responsable', 'motivo', 'tipo', 'materiales',
+    'elaboro', 'reviso', 'aprobo',
+)))
+CAMPOS_MATERIAL = ("item", "unidad", "cantidad", "cantidad_despachada", "valor_unitario")
+
+# Texto -> la instancia compartida de ese texto
+_INTERNADOS = {}
+
+
+class _Falta:
+    """Marca de campo ausente en el registro original (se omite al volver a JSON)."""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return '<falta>'
+
+
+_FALTA = _Falta()
+
+
+def internar(valor):
+    """Devuelve la instancia compartida de un texto (los demás valores, sin cambios)."""
+    if type(valor) is not str:
+        return valor
+    # setdefault es atómico con el GIL: dos hilos no dejan dos copias distintas
+    return _INTERNADOS.setdefault(valor, valor)
+
+
+def textos_internados():
+    """Cantidad de textos distintos en la tabla de internado (panel de rendimiento, pruebas)."""
+    return len(_INTERNADOS)
+
+
+class Material(Mapping):
+    """Material solicitado con las claves de materiales.nuevo_material, en slots."""
+
+    __slots__ = CAMPOS_MATERIAL
+
+    def __init__(self, item, unidad, cantidad, cantidad_despachada, valor_unitario):
+        self.item = internar(item)
+        self.unidad = internar(unidad)
+        self.cantidad = cantidad
+        self.cantidad_despachada = cantidad_despachada
+        self.valor_unitario = valor_unitario
+
+    def __getitem__(self, clave):
+        if clave not in CAMPOS_MATERIAL:
+            raise KeyError(clave)
+        return getattr(self, clave)
+
+    def get(self, clave, default=None):
+        return getattr(self, clave) if clave in CAMPOS_MATERIAL else default
+
+    def __iter__(self):
+        return iter(CAMPOS_MATERIAL)
+
+    def __len__(self):
+        return len(CAMPOS_MATERIAL)
+
+    def como_dict(self):
+        return {clave: getattr(self, clave) for clave in CAMPOS_MATERIAL}
+
+    def __repr__(self):
+        return f"Material({self.como_dict()!r})"
+
+    def __reduce__(self):
+        return (Material, tuple(getattr(self, clave) for clave in CAMPOS_MATERIAL))
+
+
+class Orden(Mapping):
+    """Orden de solo lectura con los campos del esquema en slots y los categóricos internados.
+
+    Las claves fuera de CAMPOS_ORDEN (registros antiguos o importados) se
+    conservan en `extra` para que la orden vuelva a JSON sin pérdidas.
+    """
+
+    __slots__ = tuple(_ATRIBUTOS.values()) + ('extra',)
+
+    def __init__(self, registro):
+        for campo, atributo in _ATRIBUTOS.items():
+            valor = registro.get(campo, _FALTA)
+            if campo in CAMPOS_CATEGORICOS:
+                valor = internar(valor)
+            elif campo == CAMPO_MATERIALES and isinstance(valor, list):
+                valor = tuple(m if isinstance(m, Material) else Material(*(m.get(c) for c in CAMPOS_MATERIAL))
+                              for m in valor)
+            setattr(self, atributo, valor)
+        extra = {campo: valor for campo, valor in registro.items() if campo not in _ATRIBUTOS}
+        self.extra = extra or None
+
+    def __getitem__(self, campo):
+        atributo = _ATRIBUTOS.get(campo)
+        if atributo is None:
+            if self.extra is None:
+                raise KeyError(campo)
+            return self.extra[campo]
+        valor = getattr(self, atributo)
+        if valor is _FALTA:
+            raise KeyError(campo)
+        return valor
+
+    def get(self, campo, default=None):
+        atributo = _ATRIBUTOS.get(campo)
+        if atributo is None:
+            return default if self.extra is None else self.extra.get(campo, default)
+        valor = getattr(self, atributo)
+        return default if valor is _FALTA else valor
+
+    def __contains__(self, campo):
+        return self.get(campo, _FALTA) is not _FALTA
+
+    def __iter__(self):
+        for campo, atributo in _ATRIBUTOS.items():
+            if getattr(self, atributo) is not _FALTA:
+                yield campo
+        if self.extra is not None:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def como_dict(self):
+        """Diccionario en el esquema JSON (materiales como lista de diccionarios)."""
+        registro = {}
+        for campo in self:
+            valor = self[campo]
+            if campo == CAMPO_MATERIALES and isinstance(valor, tuple):
+                valor = [m.como_dict() for m in valor]
+            registro[campo] = valor
+        return registro
+
+    def __repr__(self):
+        return f"Orden({self.como_dict()!r})"
+
+    def __reduce__(self):
+        # Pickle (pool de procesos del renderizado, cachés de Streamlit) vía el esquema JSON
+        return (Orden, (self.como_dict(),))
+
+
+def compactar(orden):
+    """Orden compacta a partir de un diccionario ya en el esquema actual (o la misma si ya lo es)."""
+    return orden if isinstance(orden, Orden) else Orden(orden)
+
+
+def leer_orden(registro):
+    """Orden compacta desde un registro leído del disco, migrado antes al esquema actual."""
+    return compactar(migrar_orden(registro))
+
+
+def a_json(valor):
+    """`default` para json.dump/json.dumps: convierte Orden y Material al esquema JSON."""
+    if isinstance(valor, (Orden, Material)):
+        return valor.como_dict()
+    raise TypeError(f"Object of type {type(valor).__name__} is not JSON serializable")
+
+
+# =========================================================================
+# === COLUMNAS PARA DATAFRAMES ===
+# =========================================================================
+
+def columnas(ordenes, campos=CAMPOS_ORDEN):
+    """{campo: [valores]} de una secuencia de órdenes (compactas o diccionarios).
+
+    De las órdenes compactas se leen los slots directamente; los campos
+    ausentes quedan en None.
+    """
+    ordenes = list(ordenes)
+    compactas = all(type(o) is Orden for o in ordenes)
+    resultado = {}
+    for campo in campos:
+        atributo = _ATRIBUTOS.get(campo)
+        if atributo is not None and compactas:
+            valores = [getattr(o, atributo) for o in ordenes]
+            if any(v is _FALTA for v in valores):
+                valores = [None if v is _FALTA else v for v in valores]
+        else:
+            valores = [o.get(campo) for o in ordenes]
+        resultado[campo] = valores
+    return resultado
+
+
+def tabla(ordenes, campos=CAMPOS_ORDEN):
+    """DataFrame con una fila por orden y las columnas `campos`, armado por columnas."""
+    import pandas as pd
+
+    return pd.DataFrame(columnas(ordenes, campos), columns=list(campos))
@@ -0,0 +1,415 @@
+"""Renderizado HTML de órdenes (formato institucional) para imprimir a PDF.
+
+La hoja de estilos y la plantilla se preparan una sola vez al importar el
+módulo; renderizar una orden es solo rellenar los campos. Para reimpresiones
+masivas hay un documento multipágina con saltos de página CSS o un ZIP con un
+archivo por orden, y los lotes grandes se reparten en un pool de procesos.
+
+Los cuerpos ya renderizados se guardan en CACHE_CUERPOS, una LRU del proceso
+compartida por todas las sesiones. Una orden guardada no cambia, así que su
+HTML solo queda viejo si cambian los firmantes (C.C.) o almacén registra un
+despacho; ambas cosas forman parte de la clave (ver `clave_cuerpo`), y
+reimprimir una orden o repetir un lote solo arma el documento.
+"""
+
+import html
+import io
+import string
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from nucleo.logo import logo_src as logo_embebido
+from nucleo.materiales import CAMPO_MATERIALES, normalizar_materiales, valor_total
+
+# A partir de cuántas órdenes vale la pena repartir el trabajo entre procesos
+UMBRAL_PROCESOS = 2000
+TAMANO_BLOQUE = 500
+# Cuerpos renderizados que conserva la caché (unos 5 KB cada uno)
+CUERPOS_MAX = 2000
+# Parte del avance de un ZIP que corresponde a renderizar (el resto es comprimir)
+FRACCION_RENDER = 0.8
+
+ESTILO = """
+body { font-family: Arial, sans-serif; font-size: 9pt; padding: 10px 20px; }
+.container { border: 1px solid #000; padding: 0; }
+h2, h3 { color: #333; margin: 0; padding: 0; text-align: center; font-size: 11pt; }
+table { width: 100%; border-collapse: collapse; margin-bottom: 5px; }
+th, td { border: 1px solid #000; padding: 4px; text-align: left; font-size: 9pt; vertical-align: middle; }
+th { background-color: #f0f0f0; text-align: center; font-weight: bold; }
+.header-table td { border: none; padding: 2px 4px; font-size: 8pt; }
+.logo-cell { width: 15%; text-align: center; }
+.logo-cell img { max-width: 80px; height: auto; }
+.title-cell { width: 50%; text-align: center; font-size: 12pt; font-weight: bold; }
+.info-cell { width: 35%; }
+.info-table td { border: 1px solid #000; padding: 4px; }
+.signature-area { display: flex; justify-content: space-around; margin-top: 20px; text-align: center; }
+.signature-box { width: 30%; padding-top: 5px; margin-top: 15px; }
+.signature-line { border-top: 1px solid #000; padding-top: 5px; margin-bottom: 5px; }
+.firma-info { font-size: 8pt; }
+.celda-vacia { height: 20px; }
+.recepcion-box {
+    margin-top: 10px;
+    font-size: 9pt;
+    border: 1px solid #000;
+    padding: 5px;
+    /* Estilo específico para la línea de recibido */
+    display: flex;
+    justify-content: space-between;
+}
+.recepcion-text {
+     white-space: nowrap;
+     overflow: hidden;
+     text-overflow: clip;
+     flex-grow: 1;
+}
+"""
+
+# Cada orden de un lote empieza en una hoja nueva al imprimir
+ESTILO_LOTE = """
+.pagina { page-break-after: always; break-after: page; }
+.pagina:last-child { page-break-after: auto; break-after: auto; }
+"""
+
+
+class PlantillaCompilada:
+    """Plantilla con campos {nombre} analizada una sola vez (a diferencia de un f-string)."""
+
+    def __init__(self, texto):
+        self._partes = [(literal, campo) for literal, campo, _, _ in string.Formatter().parse(texto)]
+
+    def render(self, valores):
+        salida = []
+        for literal, campo in self._partes:
+            salida.append(literal)
+            if campo is not None:
+                salida.append(valores[campo])
+        return ''.join(salida)
+
+
+PLANTILLA_CUERPO = PlantillaCompilada("""
+<div class="container">
+    <table class="header-table">
+        <tr>
+            <td rowspan="4" class="logo-cell" style="border-right: 1px solid #000;">
+                <img src="{logo_src}" alt="Logo del Hospital">
+            </td>
+            <td colspan="2" class="title-cell" style="border-bottom: 1px solid #000;">
+                HOSPITAL REGIONAL ALFONSO JARAMILLO SALAZAR
+            </td>
+            <td class="info-cell" style="width: 20%;">
+                <strong>Código:</strong> GTAF-A-05-P-EEC-FPA-01
+            </td>
+        </tr>
+        <tr>
+            <td colspan="2" class="title-cell" style="border-bottom: 1px solid #000;">
+                GESTIÓN DE LA TECNOLOGÍA Y DEL AMBIENTE FÍSICO
+            </td>
+            <td class="info-cell">
+                <strong>Versión:</strong> 02
+            </td>
+        </tr>
+        <tr>
+            <td colspan="2" class="title-cell">
+                FORMATO: ORDEN DE MANTENIMIENTO
+            </td>
+            <td class="info-cell">
+                <strong>Fecha Aprobación:</strong> 2014/01/02
+            </td>
+        </tr>
+    </table>
+
+    <table>
+        <tr>
+            <td style="width: 50%;"><strong>DEPENDENCIA SOLICITANTE:</strong> {dependencia}</td>
+            <td style="width: 25%;"><strong>FECHA:</strong> {fecha}</td>
+            <td style="width: 25%;"><strong>SOLICITUD N°:</strong> {solicitud}</td>
+        </tr>
+        <tr>
+            <td colspan="3"><strong>SERVICIO APLICADO:</strong> {servicio}</td>
+        </tr>
+        <tr>
+            <td colspan="3" class="celda-vacia"></td>
+        </tr>
+        <tr>
+            <td colspan="3" style="text-align: center; background-color: #f0f0f0;"><strong>ORDEN DE MANTENIMIENTO N°:</strong> {numero}</td>
+        </tr>
+        <tr>
+            <td colspan="3"><strong>RESPONSABLE DESIGNADO:</strong> {responsable}</td>
+        </tr>
+        <tr>
+            <td colspan="3"><strong>TIPO DE MANTENIMIENTO:</strong> {tipo}</td>
+        </tr>
+        <tr>
+            <td colspan="3"><strong>MOTIVO / DESCRIPCIÓN DEL TRABAJO:</strong> {motivo}</td>
+        </tr>
+    </table>
+
+    <h3>MATERIALES SOLICITADOS (PEDIDO ALMACÉN)</h3>
+    <table>
+        <tr>
+            <th style="width: 35%;">DETALLE</th>
+            <th style="width: 15%;">UNIDAD DE MEDIDA</th>
+            <th style="width: 10%;">CANTIDAD PEDIDA</th>
+            <th style="width: 10%;">CANTIDAD DESPACHADA</th>
+            <th style="width: 10%;">VALOR UNITARIO</th>
+            <th style="width: 20%;">VALOR TOTAL</th>
+        </tr>
+        {materiales_html}
+    </table>
+
+    <div style="padding: 5px;">
+        <p style="font-size: 9pt;"><strong>OBSERVACIONES / CONCLUSIONES:</strong> __________________________________________________________________________________________________________________________________________________________</p>
+
+        <table style="margin-top: 15px; border: none;">
+            <tr style="border: none;">
+                <td style="width: 33%; border: 1px solid #000; text-align: center; padding-bottom: 15px;">
+                    <div class="signature-line"></div>
+                    <span class="firma-info"><strong>ELABORÓ:</strong> {elaboro}</span><br>
+                    <span class="firma-info">C.C.: {elaboro_cc}</span>
+                </td>
+                <td style="width: 34%; border: 1px solid #000; text-align: center; padding-bottom: 15px;">
+                    <div class="signature-line"></div>
+                    <span class="firma-info"><strong>REVISÓ:</strong> {reviso}</span><br>
+                    <span class="firma-info">C.C.: {reviso_cc}</span>
+                </td>
+                <td style="width: 33%; border: 1px solid #000; text-align: center; padding-bottom: 15px;">
+                    <div class="signature-line"></div>
+                    <span class="firma-info"><strong>APROBÓ:</strong> {aprobo}</span><br>
+                    <span class="firma-info">C.C.: {aprobo_cc}</span>
+                </td>
+            </tr>
+        </table>
+
+        <div class="recepcion-box">
+            <span style="white-space: nowrap;">RECIBIDO POR: ____________________________________________________________________</span>
+            <span style="white-space: nowrap;">C.C.: _______________________________________________________________________</span>
+        </div>
+
+    </div>
+
+</div>
+""")
+
+PLANTILLA_DOCUMENTO = PlantillaCompilada("""
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{titulo}</title>
+    <style>
+        {estilo}
+    </style>
+</head>
+<body>
+{cuerpo}
+</body>
+</html>
+""")
+
+FILA_VACIA = "<tr><td></td><td></td><td></td><td></td><td></td><td></td></tr>"
+
+
+def indice_cc(directorio):
+    """Por rol, diccionario display -> C.C. (evita recorrer el directorio en cada firma).
+
+    Acepta el diccionario persistido o un DirectorioFirmantes, que ya lo tiene calculado.
+    """
+    if hasattr(directorio, 'indice_cc'):
+        return directorio.indice_cc()
+    return {
+        rol: {datos.get("display"): datos.get("cc", "N/A") for datos in personas.values()}
+        for rol, personas in directorio.items()
+    }
+
+
+def _texto(valor):
+    return "" if valor is None else html.escape(str(valor))
+
+
+def _filas_materiales(orden):
+    filas = []
+    for material in normalizar_materiales(orden.get(CAMPO_MATERIALES)):
+        filas.append(
+            f"<tr><td>{_texto(material['item'])}</td><td>{_texto(material['unidad'])}</td>"
+            f"<td>{_texto(material['cantidad'])}</td><td>{_texto(material['cantidad_despachada'])}</td>"
+            f"<td>{_texto(material['valor_unitario'])}</td><td>{_texto(valor_total(material))}</td></tr>"
+        )
+    return "".join(filas) if filas else FILA_VACIA * 3
+
+
+def renderizar_cuerpo(orden, ccs, logo_src=None):
+    """HTML de una orden (sin <html>/<head>); `ccs` es el resultado de indice_cc."""
+    logo_src = logo_src or logo_embebido()
+    return PLANTILLA_CUERPO.render({
+        "numero": _texto(orden['Número de Orden']),
+        "dependencia": _texto(orden.get('Dependencia Solicitante')),
+        "fecha": _texto(orden.get('Fecha')),
+        "solicitud": _texto(orden.get('Solicitud N°')),
+        "servicio": _texto(orden.get('Servicio Aplicado')),
+        "responsable": _texto(orden.get('Responsable Designado')),
+        "tipo": _texto(orden.get('Tipo de Mantenimiento')),
+        "motivo": _texto(orden.get('Motivo')),
+        "materiales_html": _filas_materiales(orden),
+        "elaboro": _texto(orden.get('Elaboró')),
+        "elaboro_cc": _texto(ccs.get("Elaboro", {}).get(orden.get('Elaboró'), "N/A")),
+        "reviso": _texto(orden.get('Revisó')),
+        "reviso_cc": _texto(ccs.get("Reviso", {}).get(orden.get('Revisó'), "N/A")),
+        "aprobo": _texto(orden.get('Aprobó')),
+        "aprobo_cc": _texto(ccs.get("Aprobo", {}).get(orden.get('Aprobó'), "N/A")),
+        "logo_src": logo_src,
+    })
+
+
+def _documento(titulo, cuerpo, estilo=ESTILO):
+    return PLANTILLA_DOCUMENTO.render({"titulo": _texto(titulo), "estilo": estilo, "cuerpo": cuerpo})
+
+
+def _documento_orden(numero, cuerpo):
+    return _documento(f"Orden de Mantenimiento N° {numero}", cuerpo)
+
+
+def generar_html_orden(orden, directorio, logo_src=None):
+    """Genera una página HTML estructurada para la impresión a PDF, incluyendo el logo y formato institucional."""
+    cuerpo, = _renderizar([orden], directorio, logo_src, procesos=1)
+    return _documento_orden(orden['Número de Orden'], cuerpo)
+
+
+# =========================================================================
+# === CACHÉ DE CUERPOS RENDERIZADOS ===
+# =========================================================================
+
+class CacheCuerpos:
+    """LRU de cuerpos HTML por clave (`clave_cuerpo`), con contadores de aciertos y fallos."""
+
+    def __init__(self, maximo=CUERPOS_MAX):
+        self.maximo = maximo
+        self._lock = threading.Lock()
+        self._cuerpos = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def __len__(self):
+        return len(self._cuerpos)
+
+    def obtener(self, clave):
+        """Cuerpo guardado para `clave` (lo marca como reciente), o None."""
+        with self._lock:
+            cuerpo = self._cuerpos.get(clave)
+            if cuerpo is None:
+                self.fallos += 1
+                return None
+            self._cuerpos.move_to_end(clave)
+            self.aciertos += 1
+            return cuerpo
+
+    def guardar(self, clave, cuerpo):
+        with self._lock:
+            self._cuerpos[clave] = cuerpo
+            self._cuerpos.move_to_end(clave)
+            while len(self._cuerpos) > self.maximo:
+                self._cuerpos.popitem(last=False)
+
+    def vaciar(self):
+        with self._lock:
+            self._cuerpos.clear()
+
+    def estadisticas(self):
+        """{'aciertos', 'fallos', 'cuerpos', 'maximo'} (panel de administración)."""
+        with self._lock:
+            return {"aciertos": self.aciertos, "fallos": self.fallos, "cuerpos": len(self._cuerpos),
+                    "maximo": self.maximo}
+
+
+CACHE_CUERPOS = CacheCuerpos()
+
+
+def clave_cuerpo(orden, directorio, logo_src):
+    """(número, versión del directorio, despachos, logo), o None si el directorio no tiene versión.
+
+    Los despachos son los que trae la orden (estados.con_despachos), así que un
+    despacho nuevo cambia la clave; un diccionario de firmantes sin `version`
+    (no es DirectorioFirmantes) no se memoriza.
+    """
+    version = getattr(directorio, 'version', None)
+    if version is None:
+        return None
+    materiales = orden.get(CAMPO_MATERIALES)
+    despachos = () if isinstance(materiales, str) else tuple(
+        (m.get("cantidad_despachada"), m.get("valor_unitario")) for m in materiales or ())
+    return (orden['Número de Orden'], version, despachos, logo_src)
+
+
+# =========================================================================
+# === LOTES (MULTIPÁGINA / ZIP) ===
+# =========================================================================
+
+def _renderizar_bloque(args):
+    """Trabajo de un proceso del pool: renderiza un bloque de órdenes."""
+    ordenes, ccs, logo_src = args
+    return [renderizar_cuerpo(orden, ccs, logo_src) for orden in ordenes]
+
+
+def _unir(partes, total, progreso):
+    resultado = []
+    for hechos, parte in enumerate(partes, 1):
+        resultado.extend(parte)
+        if progreso:
+            progreso(hechos / total)
+    return resultado
+
+
+def _renderizar_faltantes(ordenes, ccs, logo_src, procesos, progreso):
+    en_proceso = len(ordenes) < UMBRAL_PROCESOS or procesos == 1
+    if en_proceso and not progreso:
+        return _renderizar_bloque((ordenes, ccs, logo_src))
+    # En el proceso actual también va por bloques si hay que informar el avance
+    bloques = [(ordenes[i:i + TAMANO_BLOQUE], ccs, logo_src) for i in range(0, len(ordenes), TAMANO_BLOQUE)]
+    if en_proceso:
+        return _unir(map(_renderizar_bloque, bloques), len(bloques), progreso)
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        return _unir(pool.map(_renderizar_bloque, bloques), len(bloques), progreso)
+
+
+def _renderizar(ordenes, directorio, logo_src, procesos, progreso=None):
+    """Cuerpos de `ordenes` en el mismo orden; solo se renderizan los que no están en CACHE_CUERPOS."""
+    ordenes = list(ordenes)
+    # Se resuelve aquí para que los procesos del pool no vuelvan a buscar el logo
+    logo_src = logo_src or logo_embebido()
+    claves = [clave_cuerpo(orden, directorio, logo_src) for orden in ordenes]
+    cuerpos = [None if clave is None else CACHE_CUERPOS.obtener(clave) for clave in claves]
+    faltantes = [i for i, cuerpo in enumerate(cuerpos) if cuerpo is None]
+    if faltantes:
+        nuevos = _renderizar_faltantes([ordenes[i] for i in faltantes], indice_cc(directorio), logo_src,
+                                       procesos, progreso)
+        for i, cuerpo in zip(faltantes, nuevos):
+            cuerpos[i] = cuerpo
+            if claves[i] is not None:
+                CACHE_CUERPOS.guardar(claves[i], cuerpo)
+    return cuerpos
+
+
+def generar_html_lote(ordenes, directorio, logo_src=None, procesos=None, progreso=None):
+    """Un solo documento HTML con una orden por hoja (saltos de página CSS).
+
+    `progreso(fraccion)`, si se pasa, se llama tras cada bloque renderizado.
+    """
+    cuerpos = _renderizar(ordenes, directorio, logo_src, procesos, progreso)
+    paginas = "".join(f'<div class="pagina">{cuerpo}</div>' for cuerpo in cuerpos)
+    return _documento(f"Órdenes de Mantenimiento ({len(cuerpos)})", paginas, ESTILO + ESTILO_LOTE)
+
+
+def generar_zip_lote(ordenes, directorio, logo_src=None, procesos=None, progreso=None, salida=None):
+    """Archivo ZIP con un HTML por orden: se escribe en `salida` (archivo binario) o se devuelve en bytes."""
+    avance_render = (lambda fraccion: progreso(FRACCION_RENDER * fraccion)) if progreso else None
+    ordenes = list(ordenes)
+    cuerpos = _renderizar(ordenes, directorio, logo_src, procesos, avance_render)
+    destino = io.BytesIO() if salida is None else salida
+    with zipfile.ZipFile(destino, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for escritos, (orden, cuerpo) in enumerate(zip(ordenes, cuerpos), 1):
+            numero = orden['Número de Orden']
+            zf.writestr(f'Orden_Mantenimiento_N_{numero}.html', _documento_orden(numero, cuerpo).encode('utf-8'))
+            if progreso and escritos % TAMANO_BLOQUE == 0:
+                progreso(FRACCION_RENDER + (1 - FRACCION_RENDER) * escritos / len(cuerpos))
+    return destino.getvalue() if salida is None else None
@@ -0,0 +1,208 @@
+"""Exportaciones en segundo plano (Excel del historial y reimpresión por lote).
+
+Generar el Excel de todo el historial o un lote de miles de órdenes toma varios
+segundos; hecho dentro del rerun, la sesión queda bloqueada hasta que termina.
+GestorTareas lo corre en un pool de hilos del proceso, compartido por todas las
+sesiones: la sesión recibe el id de la tarea, consulta su avance en cada rerun y
+descarga el archivo cuando está listo.
+
+Cada tarea se envía con una clave que reúne todo lo que determina el resultado
+(tipo, filtros, cantidad de órdenes, eventos, firmantes...). El archivo terminado
+se guarda en TAREAS_DIR con el hash de la clave como nombre, así que volver a
+pedir lo mismo, desde otra sesión o después de reiniciar, lo entrega sin
+recalcular mientras no venza (DURACION_RESULTADO). Una tarea igual que sigue en
+curso se comparte en lugar de repetirse. Los archivos vencidos se borran al
+enviar tareas nuevas.
+
+La función de la tarea recibe `progreso(fraccion, mensaje=None)` y el archivo de
+salida (binario, un temporal de TAREAS_DIR que se renombra al terminar) y escribe
+en él el resultado; corre fuera del hilo de la sesión, así que no usa Streamlit.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+TAREAS_DIR = os.environ.get('MC_ORDENES_TAREAS_DIR', 'exportaciones')
+# Segundos que un archivo terminado sigue disponible para descargarse
+DURACION_RESULTADO = int(os.environ.get('MC_ORDENES_TAREAS_DURACION', 6 * 3600))
+# Exportaciones simultáneas (el lote grande reparte además su trabajo en procesos)
+TRABAJADORES = 2
+# Tareas que se recuerdan en memoria (las más antiguas se olvidan, su archivo queda en disco)
+TAREAS_MAX = 200
+
+EN_COLA, EN_CURSO, LISTA, FALLIDA = 'en_cola', 'en_curso', 'lista', 'fallida'
+TERMINADAS = frozenset((LISTA, FALLIDA))
+
+# Archivos propios de TAREAS_DIR: resultados (hash de la clave + extensión) y temporales
+ARCHIVO_PROPIO = re.compile(r'([0-9a-f]{32}(\.[A-Za-z0-9]+)?|\.tmp_.*)')
+
+
+class SinResultado(Exception):
+    """La tarea terminó sin nada que exportar (p. ej. un rango sin órdenes); se informa como aviso."""
+
+
+def hash_clave(clave):
+    """Nombre estable (mismo en todos los procesos) de una clave serializable a JSON."""
+    texto = json.dumps(clave, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()[:32]
+
+
+class Tarea:
+    """Estado de una exportación; `como_dict` es la copia que consulta la sesión."""
+
+    __slots__ = ('id', 'hash', 'descripcion', 'nombre', 'mime', 'estado', 'progreso', 'mensaje',
+                 'creada', 'terminada', 'archivo', 'aviso', 'error')
+
+    def __init__(self, hash_, descripcion, nombre, mime):
+        self.id = uuid.uuid4().hex
+        self.hash = hash_
+        self.descripcion = descripcion
+        self.nombre = nombre
+        self.mime = mime
+        self.estado = EN_COLA
+        self.progreso = 0.0
+        self.mensaje = None
+        self.creada = time.time()
+        self.terminada = None
+        self.archivo = None
+        self.aviso = False
+        # Excepción de una tarea fallida (no la de SinResultado, que es solo un aviso)
+        self.error = None
+
+    def como_dict(self):
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+
+class GestorTareas:
+    """Pool de hilos para exportaciones, con resultados en disco reutilizables por clave."""
+
+    def __init__(self, carpeta=TAREAS_DIR, duracion=DURACION_RESULTADO, trabajadores=TRABAJADORES):
+        self.carpeta = carpeta
+        self.duracion = duracion
+        self._pool = ThreadPoolExecutor(max_workers=trabajadores, thread_name_prefix='exportacion')
+        self._lock = threading.Lock()
+        self._tareas = OrderedDict()
+        # Hash de la clave -> tarea aún no terminada (para compartirla)
+        self._en_curso = {}
+
+    def _ruta(self, hash_, nombre):
+        return os.path.join(self.carpeta, hash_ + os.path.splitext(nombre)[1])
+
+    def _vigente(self, ruta, ahora=None):
+        try:
+            return (ahora or time.time()) - os.path.getmtime(ruta) < self.duracion
+        except OSError:
+            return False
+
+    def enviar(self, clave, funcion, descripcion, nombre, mime):
+        """Encola `funcion(progreso, salida)` y devuelve el id de la tarea.
+
+        Si ya hay un archivo vigente para la clave, la tarea nace lista; si hay una
+        tarea igual en curso, se devuelve su id.
+        """
+        hash_ = hash_clave(clave)
+        ruta = self._ruta(hash_, nombre)
+        with self._lock:
+            tarea = self._en_curso.get(hash_)
+            if tarea is not None:
+                return tarea.id
+            tarea = Tarea(hash_, descripcion, nombre, mime)
+            self._tareas[tarea.id] = tarea
+            while len(self._tareas) > TAREAS_MAX:
+                self._tareas.popitem(last=False)
+            if self._vigente(ruta):
+                tarea.estado, tarea.progreso, tarea.archivo = LISTA, 1.0, ruta
+                tarea.terminada = time.time()
+                return tarea.id
+            self._en_curso[hash_] = tarea
+        self.limpiar()
+        self._pool.submit(self._ejecutar, tarea, funcion, ruta)
+        return tarea.id
+
+    def _ejecutar(self, tarea, funcion, ruta):
+        def progreso(fraccion, mensaje=None):
+            tarea.progreso = min(max(float(fraccion), 0.0), 1.0)
+            if mensaje is not None:
+                tarea.mensaje = mensaje
+
+        tarea.estado = EN_CURSO
+        try:
+            self._escribir(partial(funcion, progreso), ruta)
+            tarea.archivo, tarea.progreso, tarea.mensaje = ruta, 1.0, None
+            tarea.estado = LISTA
+        except SinResultado as e:
+            tarea.estado, tarea.mensaje, tarea.aviso = FALLIDA, str(e), True
+        except Exception as e:
+            print(f"Aviso: falló la exportación {tarea.descripcion}: {e}", file=sys.stderr)
+            tarea.estado, tarea.mensaje, tarea.error = FALLIDA, f"{type(e).__name__}: {e}", e
+        finally:
+            tarea.terminada = time.time()
+            with self._lock:
+                self._en_curso.pop(tarea.hash, None)
+
+    def _escribir(self, escribir, ruta):
+        """Escritura atómica (temporal + rename): un archivo a medias nunca parece terminado."""
+        os.makedirs(self.carpeta, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', dir=self.carpeta)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                escribir(f)
+            os.replace(tmp_path, ruta)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def consultar(self, tarea_id):
+        """Copia del estado de la tarea, o None si no existe o su archivo ya venció."""
+        with self._lock:
+            tarea = self._tareas.get(tarea_id)
+            if tarea is None:
+                return None
+            if tarea.estado == LISTA and not self._vigente(tarea.archivo):
+                del self._tareas[tarea_id]
+                return None
+            return tarea.como_dict()
+
+    def datos(self, tarea_id):
+        """Bytes del archivo de una tarea lista (se leen al descargar, no en cada rerun)."""
+        tarea = self._tareas.get(tarea_id)
+        if tarea is None or tarea.archivo is None:
+            raise FileNotFoundError(f"La exportación {tarea_id} ya no está disponible.")
+        with open(tarea.archivo, 'rb') as f:
+            return f.read()
+
+    def limpiar(self):
+        """Borra los archivos vencidos de la carpeta; devuelve cuántos.
+
+        Solo toca los nombres que genera el gestor (ARCHIVO_PROPIO): la carpeta es
+        configurable y puede contener otros archivos.
+        """
+        try:
+            nombres = os.listdir(self.carpeta)
+        except OSError:
+            return 0
+        ahora, borrados = time.time(), 0
+        for nombre in nombres:
+            if not ARCHIVO_PROPIO.fullmatch(nombre):
+                continue
+            ruta = os.path.join(self.carpeta, nombre)
+            if not self._vigente(ruta, ahora):
+                try:
+                    os.unlink(ruta)
+                    borrados += 1
+                except OSError:
+                    pass
+        return borrados
@@ -0,0 +1,80 @@
+"""Validación de órdenes nuevas que no vienen del formulario (CLI y API HTTP).
+
+Aplica las mismas reglas que el formulario de la aplicación: listas cerradas de
+dependencias, servicios y tipos de mantenimiento; firmantes del directorio;
+motivo y al menos un material con cantidad > 0. Los consecutivos son
+opcionales: los que falten los asigna AsignadorConsecutivos.asignar_lote.
+"""
+
+from datetime import date
+
+from nucleo.materiales import CAMPO_MATERIALES, errores_materiales, normalizar_materiales
+from nucleo.numeracion import numero_solicitud
+from nucleo.opciones import DEPENDENCIAS, SERVICIOS_SOLICITUD, TIPOS_MANTENIMIENTO
+from nucleo.registro import CAMPOS_ORDEN
+
+# Campo de firma -> rol del directorio
+FIRMAS = {"Elaboró": "Elaboro", "Revisó": "Reviso", "Aprobó": "Aprobo"}
+
+
+def texto(valor):
+    return "" if valor is None else str(valor).strip()
+
+
+def preparar_orden(registro, directorio, hoy=None):
+    """Valida un registro con las mismas reglas del formulario; devuelve (orden, errores).
+
+    Los números vacíos quedan en None para que el asignador los complete.
+    """
+    errores = []
+    orden = {campo: registro.get(campo) for campo in CAMPOS_ORDEN}
+
+    numero = orden["Número de Orden"]
+    if numero not in (None, ''):
+        try:
+            numero = int(numero)
+            if numero <= 0:
+                raise ValueError
+        except (TypeError, ValueError):
+            errores.append("El Número de Orden debe ser un número entero positivo.")
+    orden["Número de Orden"] = numero if numero != '' else None
+
+    solicitud = texto(orden["Solicitud N°"]) or None
+    if solicitud is not None and numero_solicitud(solicitud) is None:
+        errores.append("El Número de Solicitud debe seguir el formato '09-XX'.")
+    orden["Solicitud N°"] = solicitud
+
+    fecha = texto(orden["Fecha"]) or (hoy or date.today()).strftime("%Y-%m-%d")
+    try:
+        date.fromisoformat(fecha)
+    except ValueError:
+        errores.append(f"Fecha inválida: {fecha!r} (use AAAA-MM-DD).")
+    orden["Fecha"] = fecha
+
+    for campo, opciones in (("Dependencia Solicitante", DEPENDENCIAS), ("Servicio Aplicado", SERVICIOS_SOLICITUD)):
+        orden[campo] = texto(orden[campo])
+        if orden[campo] not in opciones:
+            errores.append(f"{campo} desconocido: {orden[campo]!r}.")
+    # Como en el formulario, el tipo por defecto es la primera opción
+    orden["Tipo de Mantenimiento"] = texto(orden["Tipo de Mantenimiento"]) or TIPOS_MANTENIMIENTO[0]
+    if orden["Tipo de Mantenimiento"] not in TIPOS_MANTENIMIENTO:
+        errores.append(f"Tipo de Mantenimiento desconocido: {orden['Tipo de Mantenimiento']!r}.")
+
+    for campo, rol in FIRMAS.items():
+        orden[campo] = texto(orden[campo]) or None
+        if orden[campo] is not None and orden[campo] not in directorio.opciones(rol):
+            errores.append(f"{campo}: {orden[campo]!r} no está en la lista de {rol}.")
+    orden["Responsable Designado"] = texto(orden["Responsable Designado"]) or None
+    if orden["Responsable Designado"] is not None and orden["Responsable Designado"] not in directorio.responsables():
+        errores.append(f"Responsable Designado desconocido: {orden['Responsable Designado']!r}.")
+
+    orden["Motivo"] = texto(orden["Motivo"])
+    errores_formato = errores_materiales(orden[CAMPO_MATERIALES])
+    errores.extend(errores_formato)
+    # Solo ítems con nombre y cantidad > 0, como en la tabla de materiales del formulario
+    materiales = [] if errores_formato else normalizar_materiales(orden[CAMPO_MATERIALES])
+    orden[CAMPO_MATERIALES] = [m for m in materiales
+                               if texto(m["item"]) and isinstance(m["cantidad"], (int, float)) and m["cantidad"] > 0]
+    if not orden["Motivo"] or (not orden[CAMPO_MATERIALES] and not errores_formato):
+        errores.append("Falta el Motivo o al menos un ítem de Materiales (Cantidad > 0).")
+    return orden, errores
@@ -0,0 +1,29 @@
+"""Utilidades comunes de las pruebas (se ejecutan con `python -m pytest` desde la raíz)."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nucleo.numeracion import generar_solicitud_nro  # noqa: E402
+
+
+def nueva_orden(numero, fecha='2025-03-10', **campos):
+    """Orden mínima con número, solicitud y fecha."""
+    orden = {'Número de Orden': numero, 'Solicitud N°': generar_solicitud_nro(numero), 'Fecha': fecha,
+             'Descripción': f'Orden {numero}', 'Materiales Solicitados': []}
+    orden.update(campos)
+    return orden
+
+
+def numeros(ordenes):
+    return [o['Número de Orden'] for o in ordenes]
+
+
+@pytest.fixture
+def carpeta(tmp_path, monkeypatch):
+    """Carpeta temporal como directorio de trabajo (los archivos por defecto son relativos)."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,213 @@
+import multiprocessing
+import os
+
+import pytest
+
+from conftest import nueva_orden, numeros
+from nucleo import almacenamiento, particiones
+from nucleo.almacenamiento import (
+    SUFIJO_COMPACTANDO, AlmacenJSON, compactar_ordenes, esperar_compactaciones, guardar_json_atomico,
+)
+from nucleo.asignador import AsignadorConsecutivos, ConsecutivoNoDisponible
+from nucleo.compartido import OrdenesCompartidas
+from nucleo.particiones import AlmacenParticionado, compactar_particiones
+
+
+@pytest.fixture
+def almacen(carpeta):
+    return AlmacenJSON(str(carpeta / 'ordenes.json'), str(carpeta / 'diario.jsonl'),
+                       str(carpeta / 'directorio.json'), str(carpeta / 'eventos.jsonl'))
+
+
+def otro(almacen):
+    """Segunda instancia sobre los mismos archivos (otro proceso)."""
+    return AlmacenJSON(almacen.ordenes_path, almacen.diario_path, almacen.directorio_path, almacen.eventos_path)
+
+
+def sin_recargas(monkeypatch, almacen):
+    def recargar():
+        raise AssertionError("no debería releer el historial")
+    monkeypatch.setattr(almacen, '_recargar', recargar)
+
+
+# === Reproducción del diario tras una compactación interrumpida ===
+
+def test_caida_tras_renombrar_el_diario(almacen):
+    almacen.agregar_ordenes([nueva_orden(n) for n in range(1, 4)])
+    # La compactación murió justo después de renombrar: el diario quedó como *.compactando
+    os.replace(almacen.diario_path, almacen.diario_path + SUFIJO_COMPACTANDO)
+    otro(almacen).agregar_ordenes([nueva_orden(4)])
+
+    assert numeros(otro(almacen).cargar_ordenes()) == [1, 2, 3, 4]
+    assert compactar_ordenes(almacen.ordenes_path, almacen.diario_path)
+    assert not os.path.exists(almacen.diario_path + SUFIJO_COMPACTANDO)
+    # La reanudación integra solo el renombrado; el diario nuevo queda para la siguiente
+    assert numeros(otro(almacen).cargar_ordenes()) == [1, 2, 3, 4]
+
+
+def test_caida_tras_escribir_la_instantanea(almacen):
+    ordenes = [nueva_orden(n) for n in range(1, 4)]
+    almacen.agregar_ordenes(ordenes)
+    # La instantánea ya tiene el diario, pero el renombrado no alcanzó a borrarse
+    guardar_json_atomico(ordenes, almacen.ordenes_path)
+    os.replace(almacen.diario_path, almacen.diario_path + SUFIJO_COMPACTANDO)
+
+    recuperado = otro(almacen)
+    assert numeros(recuperado.cargar_ordenes()) == [1, 2, 3]
+    recuperado.agregar_ordenes([nueva_orden(4)])
+    assert compactar_ordenes(almacen.ordenes_path, almacen.diario_path)
+    assert numeros(otro(almacen).cargar_ordenes()) == [1, 2, 3, 4]
+
+
+def test_linea_cortada_al_final_del_diario(almacen):
+    almacen.agregar_ordenes([nueva_orden(1)])
+    with open(almacen.diario_path, 'a') as f:
+        f.write('{"Número de Orden": 2, "Fe')
+    otro(almacen).agregar_ordenes([nueva_orden(3)])
+    assert numeros(otro(almacen).cargar_ordenes()) == [1, 3]
+
+
+# === Seguimiento del diario a través de la compactación ===
+
+def test_sigue_el_diario_sin_releer_tras_compactar(almacen, monkeypatch):
+    escritor = otro(almacen)
+    escritor.agregar_ordenes([nueva_orden(n) for n in range(1, 4)])
+    _, marca = almacen.cambios_desde(0)
+    sin_recargas(monkeypatch, almacen)
+
+    escritor.agregar_ordenes([nueva_orden(4)])
+    os.replace(almacen.diario_path, almacen.diario_path + SUFIJO_COMPACTANDO)
+    escritor.agregar_ordenes([nueva_orden(5)])
+    # A mitad de la compactación: el renombrado y el diario nuevo se leen por la cola
+    nuevas, marca = almacen.cambios_desde(marca)
+    assert numeros(nuevas) == [4, 5]
+
+    assert compactar_ordenes(almacen.ordenes_path, almacen.diario_path)
+    escritor.agregar_ordenes([nueva_orden(6)])
+    nuevas, marca = almacen.cambios_desde(marca)
+    assert numeros(nuevas) == [6]
+    almacen.agregar_ordenes([nueva_orden(7)])
+    assert numeros(almacen.cargar_ordenes()) == numeros(otro(almacen).cargar_ordenes()) == list(range(1, 8))
+
+
+def test_compactacion_automatica_sin_recargas(almacen, monkeypatch):
+    monkeypatch.setattr(almacenamiento, 'DIARIO_MAX_BYTES', 2000)
+    lector = otro(almacen)
+    lector.cargar_ordenes()
+    sin_recargas(monkeypatch, lector)
+    for n in range(1, 61):
+        almacen.agregar_ordenes([nueva_orden(n)])
+        assert numeros(lector.cambios_desde(n - 1)[0]) == [n]
+    assert numeros(otro(almacen).cargar_ordenes()) == list(range(1, 61))
+
+
+def test_instantanea_reemplazada_por_otra_causa_recarga(almacen):
+    almacen.agregar_ordenes([nueva_orden(1)])
+    almacen.cargar_ordenes()
+    guardar_json_atomico([nueva_orden(1), nueva_orden(2)], almacen.ordenes_path)
+    assert numeros(almacen.cargar_ordenes()) == [1, 2]
+
+
+def test_particionado_sigue_el_diario_tras_compactar(carpeta, monkeypatch):
+    ruta = str(carpeta / 'anuales')
+    escritor = AlmacenParticionado(ruta, anio_actual='2025')
+    lector = AlmacenParticionado(ruta, anio_actual='2025')
+    escritor.agregar_ordenes([nueva_orden(1, '2024-05-01'), nueva_orden(2)])
+    _, marca = lector.cambios_desde(0)
+    sin_recargas(monkeypatch, lector)
+
+    escritor.agregar_ordenes([nueva_orden(3)])
+    assert compactar_particiones(ruta, escritor.diario_path)
+    escritor.agregar_ordenes([nueva_orden(4)])
+    nuevas, marca = lector.cambios_desde(marca)
+    assert numeros(nuevas) == [3, 4]
+    assert numeros(AlmacenParticionado(ruta, anio_actual='2025').cargar_ordenes()) == [1, 2, 3, 4]
+    assert particiones.cargar_manifiesto(ruta)["particiones"]["2025"]["cantidad"] == 2
+
+
+# === Importación en lote ===
+
+class HiloInmediato:
+    """Sustituto de threading.Thread que corre la compactación antes de volver (el peor caso)."""
+
+    def __init__(self, target, args=(), daemon=None):
+        self.target, self.args = target, args
+
+    def start(self):
+        self.target(*self.args)
+
+    def is_alive(self):
+        return False
+
+    def join(self):
+        pass
+
+
+@pytest.mark.parametrize('diario_previo', [False, True])
+def test_lote_que_dispara_la_compactacion_no_relee(almacen, monkeypatch, diario_previo):
+    monkeypatch.setattr(almacenamiento, 'DIARIO_MAX_BYTES', 5000)
+    monkeypatch.setattr(almacenamiento.threading, 'Thread', HiloInmediato)
+    compartidas = OrdenesCompartidas(almacen)
+    if diario_previo:
+        compartidas.agregar(nueva_orden(1))
+    compartidas.sincronizar()
+    sin_recargas(monkeypatch, almacen)
+
+    lote = [nueva_orden(n) for n in range(2, 202)]
+    AsignadorConsecutivos(compartidas, reservas_path=almacen.ordenes_path + '.reservas').confirmar_lote(lote)
+
+    assert not os.path.exists(almacen.diario_path)
+    esperadas = list(range(1 if diario_previo else 2, 202))
+    assert numeros(compartidas.vista()) == numeros(otro(almacen).cargar_ordenes()) == esperadas
+    with pytest.raises(ConsecutivoNoDisponible):
+        AsignadorConsecutivos(compartidas, reservas_path=almacen.ordenes_path + '.reservas').confirmar_lote(
+            [nueva_orden(150)])
+
+
+# === Varios procesos anexando mientras se compacta ===
+
+def abrir(tipo, carpeta):
+    if tipo == 'json':
+        return AlmacenJSON(str(carpeta / 'ordenes.json'), str(carpeta / 'diario.jsonl'),
+                           str(carpeta / 'directorio.json'), str(carpeta / 'eventos.jsonl'))
+    return AlmacenParticionado(str(carpeta / 'anuales'), anio_actual='2025')
+
+
+def escribir_ordenes(tipo, carpeta, primero, cantidad):
+    """Proceso hijo: anexa de a una orden y espera sus compactaciones antes de salir."""
+    almacen = abrir(tipo, carpeta)
+    for n in range(primero, primero + cantidad):
+        almacen.agregar_ordenes([nueva_orden(n, '2024-06-01' if n % 3 == 0 else '2025-03-10')])
+    esperar_compactaciones()
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason="requiere fork")
+@pytest.mark.parametrize('tipo', ['json', 'particionado'])
+def test_procesos_anexando_durante_la_compactacion(carpeta, monkeypatch, tipo):
+    # Los hijos heredan por fork el umbral bajo: compactan muchas veces mientras otros anexan
+    monkeypatch.setattr(almacenamiento, 'DIARIO_MAX_BYTES', 1500)
+    monkeypatch.setattr(particiones, 'DIARIO_MAX_BYTES', 1500)
+    lector = abrir(tipo, carpeta)
+    lector.cargar_ordenes()
+    contexto = multiprocessing.get_context('fork')
+    procesos = [contexto.Process(target=escribir_ordenes, args=(tipo, carpeta, 1000 * k, 40)) for k in range(1, 5)]
+    for p in procesos:
+        p.start()
+
+    vistas, marca = [], 0
+    while any(p.is_alive() for p in procesos):
+        nuevas, marca = lector.cambios_desde(marca)
+        vistas.extend(numeros(nuevas))
+    for p in procesos:
+        p.join()
+        assert p.exitcode == 0
+    nuevas, marca = lector.cambios_desde(marca)
+    vistas.extend(numeros(nuevas))
+
+    esperadas = sorted(n for k in range(1, 5) for n in range(1000 * k, 1000 * k + 40))
+    # Ni duplicadas ni perdidas, tanto siguiendo el diario como leyendo desde cero
+    assert sorted(vistas) == esperadas
+    assert sorted(numeros(abrir(tipo, carpeta).cargar_ordenes())) == esperadas
+    # Hubo compactaciones (la instantánea o el manifiesto solo los escribe la compactación)
+    assert os.path.exists(lector.ordenes_path)
+    assert not os.path.exists(lector.diario_path + SUFIJO_COMPACTANDO)
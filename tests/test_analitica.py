@@ -0,0 +1,99 @@
+import json
+import pathlib
+
+import pytest
+
+from conftest import nueva_orden
+from nucleo import particiones
+from nucleo.analitica import IndicadoresOrdenes, recalcular
+from nucleo.compartido import OrdenesCompartidas
+from nucleo.particiones import AlmacenParticionado, escribir_particiones
+
+
+def historial(n):
+    return [nueva_orden(i, f'2025-0{1 + i % 3}-10', **{
+        'Servicio Aplicado': 'URGENCIAS' if i % 2 else 'CIRUGIA', 'Tipo de Mantenimiento': 'Correctivo',
+        'Materiales Solicitados': [{'item': 'Cable', 'cantidad': i, 'unidad': 'm'}]}) for i in range(1, n + 1)]
+
+
+def en_disco(carpeta):
+    return json.loads((carpeta / 'indicadores_data.json').read_text(encoding='utf-8'))
+
+
+def test_suma_en_el_lugar_y_escribe_cada_intervalo(carpeta):
+    ordenes = historial(30)
+    indicadores = IndicadoresOrdenes(intervalo=3600)
+    indicadores.actualizar(ordenes[:10])
+    assert en_disco(carpeta)['procesadas'] == 10
+    vivos = indicadores._datos
+    for n in range(11, 31):
+        indicadores.actualizar(ordenes[:n])
+    # Sin copias por orden y sin escribir antes del intervalo
+    assert indicadores._datos is vivos and vivos['procesadas'] == 30
+    assert en_disco(carpeta)['procesadas'] == 10
+    indicadores.guardar()
+    assert en_disco(carpeta) == recalcular(ordenes)
+
+
+def test_lo_no_escrito_se_suma_al_arrancar(carpeta):
+    ordenes = historial(20)
+    IndicadoresOrdenes(intervalo=3600).actualizar(ordenes[:5])
+    otra = IndicadoresOrdenes(intervalo=3600)
+    assert otra.datos(ordenes) == recalcular(ordenes)
+
+
+def test_copia_para_mostrar(carpeta):
+    ordenes = historial(12)
+    indicadores = IndicadoresOrdenes()
+    copia = indicadores.datos(ordenes[:6])
+    assert indicadores.datos(ordenes[:6]) is copia
+    indicadores.actualizar(ordenes)
+    assert copia['procesadas'] == 6 and copia == recalcular(ordenes[:6])
+    assert indicadores.datos(ordenes)['procesadas'] == 12
+
+
+def test_archivo_adelantado_se_recalcula(carpeta):
+    ordenes = historial(8)
+    IndicadoresOrdenes().actualizar(ordenes)
+    assert IndicadoresOrdenes().datos(ordenes[:3]) == recalcular(ordenes[:3])
+
+
+@pytest.fixture
+def particionadas(carpeta):
+    """Historial particionado con 2023 y 2024 archivados (año en curso: 2025)."""
+    ordenes = [nueva_orden(i, f'{2023 + i % 3}-0{1 + i % 9}-10', **{
+        'Servicio Aplicado': 'URGENCIAS' if i % 2 else 'CIRUGIA',
+        'Materiales Solicitados': [{'item': 'Cable', 'cantidad': i, 'unidad': 'm'}]}) for i in range(1, 61)]
+    escribir_particiones(ordenes, str(carpeta / 'ordenes_anuales'))
+
+    def nuevas():
+        return OrdenesCompartidas(AlmacenParticionado(anio_actual='2025'))
+    return nuevas, sorted(ordenes, key=lambda o: o['Fecha'][:4])
+
+
+def test_anios_archivados_por_resumen_sin_cargarlos(particionadas, monkeypatch):
+    nuevas, ordenes = particionadas
+    compartidas = nuevas()
+    assert IndicadoresOrdenes().datos(compartidas.vista()) == recalcular(ordenes)
+    assert compartidas.anios_archivados() == ['2023', '2024']
+
+    # Otro proceso sin archivo de contadores: los resúmenes guardados evitan leer los años archivados
+    leer_segmento = particiones.leer_segmento
+
+    def solo_activos(carpeta, segmento, cantidad=None):
+        assert segmento["anio"] == '2025', f"leyó el año archivado {segmento['anio']}"
+        return leer_segmento(carpeta, segmento, cantidad)
+    monkeypatch.setattr(particiones, 'leer_segmento', solo_activos)
+    pathlib.Path('indicadores_data.json').unlink()
+    otra = nuevas()
+    assert IndicadoresOrdenes().datos(otra.vista()) == recalcular(ordenes)
+    assert otra.anios_archivados() == ['2023', '2024']
+
+
+def test_contadores_a_mitad_de_un_anio_archivado(particionadas):
+    nuevas, ordenes = particionadas
+    # Contadores guardados cuando 2023 aún era el año en curso y tenía menos órdenes
+    IndicadoresOrdenes().reemplazar(recalcular(ordenes[:7]))
+    compartidas = nuevas()
+    assert IndicadoresOrdenes().datos(compartidas.vista()) == recalcular(ordenes)
+    assert compartidas.anios_archivados() == ['2023', '2024']
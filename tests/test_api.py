@@ -0,0 +1,87 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from nucleo import api
+from nucleo.almacenamiento import AlmacenJSON
+
+ORDEN = {"Dependencia Solicitante": "Electrico", "Servicio Aplicado": "UCI ADULTOS", "Motivo": "Falla de luz",
+         "Materiales Solicitados": [{"item": "Bombillo", "cantidad": 2}]}
+
+
+@pytest.fixture
+def servidor(carpeta):
+    srv = api.crear_servidor('127.0.0.1', 0, AlmacenJSON())
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+    srv.receptor.detener()
+
+
+def pedir(srv, metodo, ruta, cuerpo=None):
+    datos = None if cuerpo is None else json.dumps(cuerpo).encode('utf-8')
+    peticion = urllib.request.Request(f'http://127.0.0.1:{srv.server_address[1]}{ruta}', data=datos, method=metodo,
+                                      headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(peticion, timeout=10) as r:
+            return r.status, json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def esperar_envio(srv, envio_id):
+    for _ in range(100):
+        estado = pedir(srv, 'GET', f'/envios/{envio_id}')[1]
+        if estado["estado"] != "en_cola":
+            return estado
+        time.sleep(0.05)
+    raise AssertionError(f"el envío {envio_id} sigue en cola")
+
+
+@pytest.mark.parametrize('materiales, mensaje', [
+    ([1, 2], "Material 1: debe ser un objeto"),
+    ([{"item": "Cable", "cantidad": "dos"}], "'cantidad' debe ser un número"),
+    ([{"item": ["Cable"], "cantidad": 1}], "'item' debe ser un texto"),
+    ({"item": "Cable"}, "debe ser una lista"),
+])
+def test_materiales_mal_formados_responden_422(servidor, materiales, mensaje):
+    codigo, cuerpo = pedir(servidor, 'POST', '/ordenes', dict(ORDEN, **{"Materiales Solicitados": materiales}))
+    assert codigo == 422
+    assert any(mensaje in error for error in cuerpo["rechazos"][0]["errores"])
+    assert servidor.receptor.pendientes() == 0
+
+
+def test_orden_valida_se_guarda(servidor):
+    codigo, cuerpo = pedir(servidor, 'POST', '/ordenes', ORDEN)
+    assert codigo == 202
+    estado = esperar_envio(servidor, cuerpo["id"])
+    assert estado["estado"] == "guardado"
+    numero = estado["numeros"][0]["orden"]
+    codigo, cuerpo = pedir(servidor, 'GET', f'/ordenes/{numero}')
+    assert codigo == 200 and cuerpo["estado"] == "abierta"
+    assert cuerpo["orden"]["Materiales Solicitados"][0]["item"] == "Bombillo"
+
+
+def test_error_inesperado_rechaza_el_lote_y_el_guardador_sigue(servidor, monkeypatch):
+    asignar_lote = servidor.receptor.asignador.asignar_lote
+    llamadas = []
+
+    def fallar_la_primera(ordenes):
+        llamadas.append(len(ordenes))
+        if len(llamadas) == 1:
+            raise RuntimeError("fallo de prueba")
+        return asignar_lote(ordenes)
+
+    monkeypatch.setattr(servidor.receptor.asignador, 'asignar_lote', fallar_la_primera)
+    primero = pedir(servidor, 'POST', '/ordenes', ORDEN)[1]["id"]
+    estado = esperar_envio(servidor, primero)
+    assert estado["estado"] == "rechazado" and "fallo de prueba" in estado["error"]
+
+    segundo = pedir(servidor, 'POST', '/ordenes', ORDEN)[1]["id"]
+    assert esperar_envio(servidor, segundo)["estado"] == "guardado"
+    assert servidor.receptor.pendientes() == 0
@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+from nucleo.directorio import DIRECTORIO_INICIAL, DirectorioFirmantes
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Lo que la app importa al arrancar, antes de abrir cualquier pestaña
+MODULOS_APP = ['almacenamiento', 'asignador', 'compartido', 'directorio', 'exportacion', 'analitica',
+               'estados', 'importacion', 'metricas', 'registro', 'renderizado', 'tareas', 'materiales',
+               'numeracion', 'opciones']
+
+
+def test_nucleo_no_carga_pandas_ni_openpyxl():
+    codigo = (f"import sys; from nucleo import {', '.join(MODULOS_APP)}; "
+              "print(' '.join(m for m in ('pandas', 'openpyxl', 'streamlit') if m in sys.modules))")
+    salida = subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, check=True,
+                            capture_output=True, text=True).stdout.strip()
+    assert salida == ''
+
+
+def test_opciones_memorizadas_hasta_un_cambio():
+    directorio = DirectorioFirmantes(DIRECTORIO_INICIAL)
+    opciones, responsables = directorio.opciones("Reviso"), directorio.responsables()
+    assert directorio.opciones("Reviso") is opciones and directorio.responsables() is responsables
+    directorio.agregar("Reviso", "Ana Ruiz - Supervisora", "888888")
+    assert "Ana Ruiz - Supervisora" in directorio.opciones("Reviso")
+    assert "Ana Ruiz - Supervisora" in directorio.responsables()
+    assert directorio.responsables() == sorted(directorio.responsables())
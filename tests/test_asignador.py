@@ -0,0 +1,102 @@
+import threading
+import uuid
+
+import pytest
+
+from conftest import nueva_orden
+from nucleo.almacen_sqlite import AlmacenSQLite
+from nucleo.almacenamiento import AlmacenJSON
+from nucleo.asignador import AsignadorConsecutivos, ConsecutivoNoDisponible
+from nucleo.compartido import OrdenesCompartidas
+from nucleo.numeracion import generar_solicitud_nro
+
+SESIONES = 6
+POR_SESION = 15
+
+
+def crear_almacen(backend, carpeta):
+    return AlmacenJSON() if backend == 'json' else AlmacenSQLite(str(carpeta / 'ordenes.db'))
+
+
+def orden_reservada(reserva):
+    return nueva_orden(reserva['orden'], **{'Solicitud N°': generar_solicitud_nro(reserva['solicitud'])})
+
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+@pytest.mark.parametrize('compartido', [True, False], ids=['mismo_proceso', 'procesos'])
+def test_reservas_concurrentes_sin_duplicados(backend, compartido, carpeta):
+    # Sesiones de un mismo proceso comparten el historial; procesos distintos tienen cada uno el suyo
+    unico = OrdenesCompartidas(crear_almacen(backend, carpeta))
+    errores, conflictos = [], []
+
+    def sesion():
+        ordenes = unico if compartido else OrdenesCompartidas(crear_almacen(backend, carpeta))
+        asignador, token, guardadas = AsignadorConsecutivos(ordenes), uuid.uuid4().hex, 0
+        try:
+            while guardadas < POR_SESION:
+                try:
+                    asignador.confirmar(token, orden_reservada(asignador.reservar(token)))
+                    guardadas += 1
+                except ConsecutivoNoDisponible as e:
+                    conflictos.append(e)
+        except Exception as e:
+            errores.append(e)
+
+    hilos = [threading.Thread(target=sesion) for _ in range(SESIONES)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert not errores
+    # Cada sesión recibe números propios: ninguna confirmación choca con otra
+    assert not conflictos
+    ordenes = OrdenesCompartidas(crear_almacen(backend, carpeta)).vista()
+    numeros = [o['Número de Orden'] for o in ordenes]
+    solicitudes = [o['Solicitud N°'] for o in ordenes]
+    assert len(ordenes) == SESIONES * POR_SESION
+    # Sin huecos: ningún número quedó reservado y sin usar
+    assert sorted(numeros) == list(range(min(numeros), min(numeros) + SESIONES * POR_SESION))
+    assert len(set(solicitudes)) == len(solicitudes)
+
+
+def test_numero_de_otra_reserva_no_se_confirma(carpeta):
+    asignador = AsignadorConsecutivos(OrdenesCompartidas(AlmacenJSON()))
+    primera = asignador.reservar('a')
+    segunda = asignador.reservar('b')
+    assert (primera['orden'], primera['solicitud']) != (segunda['orden'], segunda['solicitud'])
+    # La sesión "b" edita el formulario y escribe el número reservado por "a"
+    with pytest.raises(ConsecutivoNoDisponible, match="reservado"):
+        asignador.confirmar('b', orden_reservada(dict(segunda, orden=primera['orden'])))
+    asignador.confirmar('a', orden_reservada(primera))
+    with pytest.raises(ConsecutivoNoDisponible, match="guardado"):
+        asignador.confirmar('b', orden_reservada(dict(segunda, orden=primera['orden'])))
+    # Una reserva renovada conserva sus números
+    assert asignador.reservar('b')['orden'] == segunda['orden']
+
+
+def test_asignar_lote_normaliza_y_detecta_duplicados(carpeta):
+    compartidas = OrdenesCompartidas(AlmacenJSON())
+    asignador = AsignadorConsecutivos(compartidas)
+    asignador.asignar_lote([nueva_orden(10, **{'Solicitud N°': '09-05'})])
+    # '09-5' es la misma solicitud que '09-05', ya guardada
+    with pytest.raises(ConsecutivoNoDisponible):
+        asignador.asignar_lote([{'Fecha': '2025-03-10', 'Solicitud N°': '09-5'}])
+    # Repetida dentro del mismo lote con otra escritura
+    with pytest.raises(ConsecutivoNoDisponible):
+        asignador.asignar_lote([{'Fecha': '2025-03-10', 'Solicitud N°': '09-7'},
+                                {'Fecha': '2025-03-10', 'Solicitud N°': ' 09-07'}])
+    with pytest.raises(ValueError, match="09-XX"):
+        asignador.asignar_lote([{'Fecha': '2025-03-10', 'Solicitud N°': 'SOL-7'}])
+    ordenes = asignador.asignar_lote([{'Fecha': '2025-03-10', 'Solicitud N°': '09-7'}, {'Fecha': '2025-03-10'}])
+    assert [o['Solicitud N°'] for o in ordenes] == ['09-07', '09-06']
+    assert len(compartidas.vista()) == 3
+
+
+def test_confirmar_lote_detecta_duplicados_del_lote(carpeta):
+    asignador = AsignadorConsecutivos(OrdenesCompartidas(AlmacenJSON()))
+    with pytest.raises(ConsecutivoNoDisponible):
+        asignador.confirmar_lote([nueva_orden(1, **{'Solicitud N°': '09-3'}), nueva_orden(2, **{'Solicitud N°': '09-03'})])
+    with pytest.raises(ConsecutivoNoDisponible):
+        asignador.confirmar_lote([nueva_orden(1), nueva_orden(1, **{'Solicitud N°': '09-99'})])
+    assert not len(asignador.ordenes.vista())
@@ -0,0 +1,38 @@
+import json
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('pandas')
+pytest.importorskip('openpyxl')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import bench_ordenes  # noqa: E402
+
+ETAPAS = {'carga_inicial', 'consecutivos', 'duplicados', 'guardar_orden', 'excel', 'excel_incremental',
+          'html_orden', 'dataframe_historial', 'busqueda', 'indicadores'}
+
+
+def test_datos_sinteticos_reproducibles():
+    ordenes = bench_ordenes.generar_ordenes(50)
+    assert ordenes == bench_ordenes.generar_ordenes(50)
+    assert [o['Número de Orden'] for o in ordenes] == list(range(1, 51))
+    assert [o['Fecha'] for o in ordenes] == sorted(o['Fecha'] for o in ordenes)
+    assert all(1 <= len(o['Materiales Solicitados']) <= bench_ordenes.MAX_MATERIALES for o in ordenes)
+
+
+@pytest.mark.parametrize('almacen', ['json', 'sqlite', 'particionado'])
+def test_corrida_pequena_anexa_resultados(carpeta, almacen, capsys):
+    salida = str(carpeta / 'resultados.jsonl')
+    argumentos = ['--escalas', '200', '--almacen', almacen, '--repeticiones', '2', '--salida', salida]
+    assert bench_ordenes.main(argumentos) == 0
+    assert bench_ordenes.main(argumentos + ['--comparar']) == 0
+    assert ' vs ' in capsys.readouterr().out
+
+    with open(salida, encoding='utf-8') as f:
+        corridas = [json.loads(linea) for linea in f]
+    assert len(corridas) == 2 and corridas[0]["almacen"] == almacen
+    resultados = corridas[-1]["resultados"]["200"]
+    assert set(resultados) == ETAPAS and all(segundos >= 0 for segundos in resultados.values())
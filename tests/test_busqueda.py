@@ -0,0 +1,100 @@
+import unicodedata
+
+import pytest
+
+from nucleo.busqueda import IndiceTexto, normalizar_texto, tokenizar
+
+
+@pytest.mark.parametrize('plural, singular', [
+    ('cables', 'cable'), ('llaves', 'llave'), ('clases', 'clase'), ('lamparas', 'lampara'),
+    ('ventiladores', 'ventilador'), ('canales', 'canal'), ('paredes', 'pared'), ('luces', 'luz'),
+    ('interruptores', 'interruptor'), ('conexiones', 'conexion'), ('tomacorrientes', 'tomacorriente'),
+    ('dulces', 'dulce'), ('relojes', 'reloj'), ('breakers', 'breaker'),
+    ('meses', 'mes'), ('autobuses', 'autobus'), ('países', 'pais'), ('faxes', 'fax'), ('leyes', 'ley'),
+    ('aires', 'aire'), ('torres', 'torre'),
+])
+def test_plural_a_singular(plural, singular):
+    assert tokenizar(plural) == tokenizar(singular) == [singular]
+
+
+def test_singular_terminado_en_s_coincide_con_su_plural():
+    assert tokenizar('intereses') == tokenizar('interés')
+    assert tokenizar('lunes clases') == tokenizar('lunes clase')
+
+
+@pytest.mark.parametrize('forma', ['NFC', 'NFD'])
+def test_normalizar_conserva_la_enie(forma):
+    texto = unicodedata.normalize(forma, 'Baño PEQUEÑO, cañería y canción')
+    assert normalizar_texto(texto) == 'baño pequeño, cañeria y cancion'
+    assert tokenizar(texto) == ['baño', 'pequeño', 'cañeria', 'y', 'cancion']
+
+
+def test_terminos_cortos_y_numeros_no_cambian():
+    assert tokenizar('gas tres 2025 mes') == ['gas', 'tres', '2025', 'mes']
+
+
+@pytest.fixture
+def indice():
+    ordenes = [
+        {"Motivo": "Cambio de cables quemados", "Materiales Solicitados": [{"item": "Cable"}]},
+        {"Motivo": "Reparar llave del lavamanos", "Materiales Solicitados": [{"item": "Llaves de paso"}]},
+        {"Motivo": "Luces fundidas en el pasillo", "Materiales Solicitados": [{"item": "Lámpara LED"}]},
+        {"Motivo": "Revisión del ventilador", "Materiales Solicitados": [{"item": "Motor"}]},
+    ]
+    indice = IndiceTexto()
+    indice.agregar_ordenes(ordenes)
+    return indice
+
+
+@pytest.mark.parametrize('consulta, posiciones', [
+    ('cable', [0]), ('cables', [0]),
+    ('llave', [1]), ('llaves', [1]),
+    ('luz', [2]), ('luces', [2]), ('lamparas', [2]),
+    ('ventiladores', [3]), ('ventila', [3]), ('motores', [3]),
+    ('cable pasillo', []),
+])
+def test_buscar_en_singular_y_plural(indice, consulta, posiciones):
+    assert sorted(indice.buscar(consulta)) == posiciones
+
+
+# === Ranking BM25 ===
+
+def indice_de(*motivos):
+    indice = IndiceTexto()
+    indice.agregar_ordenes([{"Motivo": motivo} for motivo in motivos])
+    return indice
+
+
+def test_mas_apariciones_primero():
+    indice = indice_de("Revisar breaker", "Breaker disparado, cambiar breaker y revisar breaker", "Pintar pared")
+    assert indice.buscar('breaker') == [1, 0]
+
+
+def test_orden_corta_antes_que_larga():
+    indice = indice_de("Fuga en la tubería del baño principal del segundo piso junto al ascensor",
+                       "Fuga en tubería")
+    assert indice.buscar('fuga') == [1, 0]
+
+
+def test_termino_raro_pesa_mas():
+    indice = indice_de("Cambio de lámpara", "Cambio de lámpara y balasto", "Cambio de chapa", "Cambio de vidrio")
+    # "cambio" está en todas; "balasto" solo en una
+    assert indice.buscar('cambio balasto') == [1]
+    assert indice.buscar('cambio lampara')[0] == 0
+
+
+def test_empates_primero_la_mas_reciente_y_limite():
+    indice = indice_de("Revisar aire", "Revisar aire", "Revisar aire")
+    assert indice.buscar('aire') == [2, 1, 0]
+    assert indice.buscar('aire', limite=2) == [2, 1]
+    assert indice.buscar('aire', n=2) == [1, 0]
+
+
+def test_prefijos_y_ordenes_nuevas():
+    indice = indice_de("Ventilador ruidoso")
+    assert indice.buscar('ve') == [] and indice.buscar('ven') == [0]
+    # El vocabulario nuevo entra en la siguiente búsqueda por prefijo
+    indice.agregar_ordenes([{"Motivo": "Ventana rota"}])
+    assert indice.buscar('vent') == [1, 0]
+    assert indice.buscar('ventana') == [1]
+    assert indice.buscar('zzz') == [] and indice.buscar('') == []
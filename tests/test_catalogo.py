@@ -0,0 +1,60 @@
+from conftest import nueva_orden
+from nucleo.almacenamiento import AlmacenJSON
+from nucleo.catalogo import CatalogoMateriales, clave_material
+from nucleo.compartido import OrdenesCompartidas
+from nucleo.materiales import CAMPO_MATERIALES, nuevo_material
+
+
+def con_materiales(numero, *materiales):
+    return nueva_orden(numero, **{CAMPO_MATERIALES: [nuevo_material(item, unidad, 1) for item, unidad in materiales]})
+
+
+def catalogo_de(*ordenes):
+    catalogo = CatalogoMateriales()
+    catalogo.agregar_ordenes(ordenes)
+    return catalogo
+
+
+def test_clave_sin_tildes_mayusculas_ni_espacios_de_mas():
+    assert clave_material("  Tubería   PVC ½ ") == clave_material("tuberia pvc ½") == "tuberia pvc ½"
+    assert clave_material("") == clave_material(None) == ''
+
+
+def test_escrituras_de_un_mismo_item_se_unen():
+    catalogo = catalogo_de(
+        con_materiales(1, ("Bombillo LED", "UNIDAD"), ("Cable", "METRO")),
+        con_materiales(2, ("BOMBILLO  led", "CAJA")),
+        con_materiales(3, ("Bombillo LED", "UNIDAD")))
+    assert len(catalogo) == 2
+    # Se sugiere la escritura y la unidad más usadas
+    assert catalogo.buscar("bombillo led") == ("Bombillo LED", "UNIDAD")
+    assert catalogo.buscar("Breaker") is None
+
+
+def test_prefijo_del_nombre_antes_que_de_palabra_y_por_frecuencia():
+    catalogo = catalogo_de(
+        con_materiales(1, ("Led 18W", "UNIDAD"), ("Bombillo LED 18W", "UNIDAD"), ("Lámpara", "UNIDAD")),
+        con_materiales(2, ("Bombillo LED 18W", "UNIDAD"), ("Lámina de yeso", "UNIDAD")),
+        con_materiales(3, ("Lámina de yeso", "UNIDAD")))
+    assert [s[0] for s in catalogo.sugerir("la")] == ["Lámina de yeso", "Lámpara"]
+    assert catalogo.sugerir("led 18") == [("Led 18W", "UNIDAD", 1), ("Bombillo LED 18W", "UNIDAD", 2)]
+    assert [s[0] for s in catalogo.sugerir("led", limite=1)] == ["Led 18W"]
+    assert catalogo.sugerir("  ") == [] and catalogo.sugerir("tornillo") == []
+
+
+def test_memo_se_vacia_con_cada_cambio():
+    catalogo = catalogo_de(con_materiales(1, ("Cable", "METRO")))
+    sugerencias = catalogo.sugerir("ca")
+    assert catalogo.sugerir("ca") is sugerencias
+    catalogo.agregar_ordenes([con_materiales(2, ("Canaleta", "METRO")), con_materiales(3, ("Canaleta", "METRO"))])
+    assert [s[0] for s in catalogo.sugerir("ca")] == ["Canaleta", "Cable"]
+
+
+def test_historial_compartido_actualiza_el_catalogo(carpeta):
+    compartidas = OrdenesCompartidas(AlmacenJSON())
+    compartidas.agregar(con_materiales(1, ("Cable", "METRO")))
+    assert compartidas.materiales.buscar("cable") == ("Cable", "METRO")
+    # Lo guardado por otro proceso llega con la siguiente sincronización
+    OrdenesCompartidas(AlmacenJSON()).agregar(con_materiales(2, ("Canaleta", "METRO")))
+    compartidas.sincronizar()
+    assert [s[0] for s in compartidas.materiales.sugerir("ca")] == ["Cable", "Canaleta"]
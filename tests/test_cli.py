@@ -0,0 +1,18 @@
+import pytest
+
+from nucleo.cli import main, numeros_de
+
+
+def test_numeros_y_rangos():
+    assert numeros_de(['1200', '1205-1207', '1210-1210']) == [1200, 1205, 1206, 1207, 1210]
+
+
+@pytest.mark.parametrize('argumento', ['1210-1205', 'abc', '12-x'])
+def test_argumento_invalido(argumento):
+    with pytest.raises(ValueError, match=argumento):
+        numeros_de([argumento])
+
+
+def test_rango_invertido_en_la_linea_de_comandos(carpeta, capsys):
+    assert main(['html', '1210-1205']) == 1
+    assert "invertido" in capsys.readouterr().err
@@ -0,0 +1,97 @@
+import pytest
+
+from conftest import nueva_orden, numeros
+from nucleo.almacen_sqlite import AlmacenSQLite
+from nucleo.almacenamiento import AlmacenJSON
+from nucleo.compartido import OrdenesCompartidas
+
+SERVICIOS = ("UCI ADULTOS", "URGENCIAS", "CIRUGIA")
+
+
+def lote(desde, hasta):
+    return [nueva_orden(n, f'2025-0{1 + n % 4}-{1 + n % 27:02d}', **{
+        "Servicio Aplicado": SERVICIOS[n % 3], "Dependencia Solicitante": "Electrico" if n % 2 else "Civil"})
+        for n in range(desde, hasta)]
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def compartidas(request, carpeta):
+    almacen = AlmacenJSON() if request.param == 'json' else AlmacenSQLite(str(carpeta / 'ordenes.db'))
+    compartidas = OrdenesCompartidas(almacen)
+    compartidas.agregar_lote(lote(1, 40))
+    return compartidas
+
+
+@pytest.mark.parametrize('filtros', [
+    {"Servicio Aplicado": "URGENCIAS"},
+    {"desde": "2025-02-01", "hasta": "2025-03-15"},
+    {"Servicio Aplicado": "CIRUGIA", "desde": "2025-03-01"},
+    # Campo sin columna en SQLite: lo resuelve el índice en memoria
+    {"Dependencia Solicitante": "Civil", "hasta": "2025-02-28"},
+    {"Servicio Aplicado": "NINGUNO"},
+])
+def test_consultar_igual_que_recorrer(compartidas, filtros):
+    vista = compartidas.vista()
+    esperadas = [i for i in range(len(vista) - 1, -1, -1)
+                 if all(v is None or (vista[i]['Fecha'] >= v if c == 'desde' else vista[i]['Fecha'] <= v if c == 'hasta'
+                                      else vista[i].get(c) == v) for c, v in filtros.items())]
+    assert list(compartidas.consultar(vista, filtros)) == esperadas
+
+
+def test_consultar_se_limita_a_la_vista(compartidas):
+    vista = compartidas.vista()
+    compartidas.agregar_lote(lote(40, 50))
+    posiciones = compartidas.consultar(vista, {"Servicio Aplicado": "UCI ADULTOS"})
+    assert posiciones and all(p < len(vista) for p in posiciones)
+
+
+def test_buscar_por_numero(compartidas):
+    compartidas.agregar(nueva_orden(77))
+    assert compartidas.buscar(77)['Número de Orden'] == 77
+    assert compartidas.buscar(12) is compartidas.vista()[11]
+    assert compartidas.buscar(999) is None
+    assert numeros(compartidas.trabajo()[1][:2]) == [77, 39]
+    if compartidas.almacen.nombre == 'sqlite':
+        # Resuelto con la base: no se arma el diccionario número -> posición
+        assert compartidas._por_numero is None
+
+
+# === Una sola copia para todas las sesiones ===
+
+def otro_proceso(compartidas):
+    """Backend independiente sobre los mismos datos (otro proceso de Streamlit o la CLI)."""
+    almacen = compartidas.almacen
+    return AlmacenJSON() if almacen.nombre == 'json' else AlmacenSQLite(almacen.db_path)
+
+
+def test_sincroniza_solo_lo_nuevo(compartidas, monkeypatch):
+    vista = compartidas.vista()
+    version = compartidas.version
+    otro_proceso(compartidas).agregar_ordenes([nueva_orden(60), nueva_orden(61)])
+
+    leidas = []
+    cambios_desde = compartidas.almacen.cambios_desde
+
+    def contar(marca):
+        nuevas, marca = cambios_desde(marca)
+        leidas.extend(numeros(nuevas))
+        return nuevas, marca
+    monkeypatch.setattr(compartidas.almacen, 'cambios_desde', contar)
+
+    nueva = compartidas.vista()
+    assert leidas == [60, 61]
+    assert numeros(nueva[-2:]) == [60, 61] and compartidas.version == version + 1
+    assert compartidas.indice.existe_orden(61) and compartidas.buscar(60)['Número de Orden'] == 60
+    # La vista anterior sigue siendo la misma foto
+    assert len(vista) == len(nueva) - 2 and vista[-1] is nueva[-3]
+
+    # Sin cambios en el backend no se vuelve a leer
+    compartidas.vista()
+    assert leidas == [60, 61] and compartidas.version == version + 1
+
+
+def test_vista_es_de_solo_lectura(compartidas):
+    vista = compartidas.vista()
+    with pytest.raises(TypeError):
+        vista[0] = nueva_orden(100)
+    assert not hasattr(vista, 'append')
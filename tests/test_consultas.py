@@ -0,0 +1,68 @@
+from conftest import nueva_orden
+from nucleo.consultas import IndiceColumnas
+
+
+def orden(numero, fecha, servicio, tipo='Correctivo'):
+    return nueva_orden(numero, fecha, **{"Servicio Aplicado": servicio, "Tipo de Mantenimiento": tipo})
+
+
+def indice_de(ordenes):
+    indice = IndiceColumnas()
+    indice.agregar_ordenes(ordenes)
+    return indice
+
+
+ORDENES = [
+    orden(1, '2025-01-05', 'URGENCIAS'),
+    orden(2, '2025-01-05', 'UCI ADULTOS', 'Preventivo'),
+    orden(3, '2025-02-10', 'URGENCIAS', 'Preventivo'),
+    orden(4, '2025-01-20', 'CIRUGIA'),
+    orden(5, '2025-03-01', 'URGENCIAS'),
+]
+
+
+def test_sin_filtros_todas_de_la_mas_reciente_a_la_mas_antigua():
+    posiciones = indice_de(ORDENES).consultar({})
+    assert len(posiciones) == 5 and list(posiciones[:2]) == [4, 3]
+
+
+def test_filtros_cruzados():
+    indice = indice_de(ORDENES)
+    assert indice.consultar({"Servicio Aplicado": "URGENCIAS"}) == [4, 2, 0]
+    assert indice.consultar({"Servicio Aplicado": "URGENCIAS", "Tipo de Mantenimiento": "Preventivo"}) == [2]
+    assert indice.consultar({"desde": "2025-01-05", "hasta": "2025-01-31"}) == [3, 1, 0]
+    assert indice.consultar({"Servicio Aplicado": "URGENCIAS", "desde": "2025-02-01"}) == [4, 2]
+    assert indice.consultar({"Servicio Aplicado": "NINGUNO", "desde": "2025-01-01"}) == []
+    # Un filtro en None no se aplica
+    assert indice.consultar({"Servicio Aplicado": None, "hasta": "2025-01-05"}) == [1, 0]
+
+
+def test_campo_sin_indice_pide_recorrer():
+    assert indice_de(ORDENES).consultar({"Motivo": "Orden 3"}) is None
+
+
+def test_limitado_a_la_vista():
+    indice = indice_de(ORDENES)
+    assert indice.consultar({"Servicio Aplicado": "URGENCIAS"}, n=3) == [2, 0]
+    assert list(indice.consultar({}, n=2)) == [1, 0]
+
+
+def test_posiciones_cargadas_despues():
+    # Año archivado cargado después de las órdenes recientes (posiciones 0 y 1)
+    indice = IndiceColumnas()
+    indice.agregar_ordenes([orden(3, '2025-02-10', 'URGENCIAS')], inicio=2)
+    indice.agregar_ordenes([orden(1, '2024-05-01', 'URGENCIAS'), orden(2, '2024-06-01', 'CIRUGIA')], inicio=0)
+    assert indice.consultar({"Servicio Aplicado": "URGENCIAS"}) == [2, 0]
+    assert [dia for dia, _ in indice.dias()] == ['2024-05-01', '2024-06-01', '2025-02-10']
+    assert indice.dias('2024-06-01', '2024-12-31') == [('2024-06-01', [1])]
+
+
+def test_opciones_memorizadas_hasta_un_valor_nuevo():
+    indice = indice_de(ORDENES)
+    opciones = indice.valores("Servicio Aplicado")
+    assert opciones == ['CIRUGIA', 'UCI ADULTOS', 'URGENCIAS']
+    memo = indice._valores["Servicio Aplicado"]
+    indice.agregar_ordenes([orden(6, '2025-03-02', 'CIRUGIA')])
+    assert indice._valores["Servicio Aplicado"] is memo and indice.valores("Servicio Aplicado") == opciones
+    indice.agregar_ordenes([orden(7, '2025-03-03', 'PEDIATRIA')])
+    assert indice.valores("Servicio Aplicado") == ['CIRUGIA', 'PEDIATRIA', 'UCI ADULTOS', 'URGENCIAS']
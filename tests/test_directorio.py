@@ -0,0 +1,119 @@
+import copy
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from nucleo.almacenamiento import AlmacenJSON
+from nucleo.directorio import DIRECTORIO_INICIAL, CedulaDuplicada, DirectorioFirmantes
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def version_en_proceso(semilla):
+    codigo = ("from nucleo.directorio import DIRECTORIO_INICIAL, DirectorioFirmantes; "
+              "print(DirectorioFirmantes(DIRECTORIO_INICIAL).version)")
+    entorno = dict(os.environ, PYTHONHASHSEED=str(semilla))
+    return subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, env=entorno, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+def test_version_igual_entre_procesos():
+    assert version_en_proceso(1) == version_en_proceso(2) == DirectorioFirmantes(DIRECTORIO_INICIAL).version
+
+
+def test_version_cambia_con_el_contenido():
+    directorio = DirectorioFirmantes(DIRECTORIO_INICIAL)
+    inicial = directorio.version
+    directorio.agregar("Reviso", "Ana Ruiz - Supervisora", "888888")
+    assert directorio.version != inicial
+    directorio.aplicar({"eliminar": [("Reviso", "Ana Ruiz - Supervisora")], "guardar": []})
+    assert directorio.version == inicial
+    directorio.aplicar({"eliminar": [], "guardar": [
+        ("Elaboro", "Oscar Muñoz - Operario", {"display": "Oscar Muñoz - Operario", "cc": "999999"})]})
+    assert directorio.version != inicial
+
+
+# === Búsquedas por C.C. y nombre ===
+
+@pytest.fixture
+def directorio():
+    return DirectorioFirmantes(copy.deepcopy(DIRECTORIO_INICIAL))
+
+
+def test_busquedas(directorio):
+    assert directorio.cc_de("Reviso", "Hery Peña - Biomédico") == "444444"
+    assert directorio.cc_de("Reviso", "Nadie") == "N/A"
+    assert directorio.buscar_cc("Aprobo", " 777777 ")["display"] == "Jefe de Almacén - Logística"
+    assert directorio.buscar_cc("Elaboro", "777777") is None
+    assert directorio.opciones("Elaboro") == ["Magaly Gómez - Técnica", "Oscar Muñoz - Operario"]
+    assert "Hery Peña - Biomédico" in directorio.responsables()
+
+
+def test_cedula_unica_por_rol(directorio):
+    with pytest.raises(CedulaDuplicada):
+        directorio.agregar("Reviso", "Ana Ruiz - Supervisora", "444444")
+    with pytest.raises(CedulaDuplicada):
+        directorio.agregar("Reviso", "Hery Peña - Biomédico", "999999")
+    # La misma persona puede firmar en otro rol
+    directorio.agregar("Aprobo", "Hery Peña - Biomédico", "444444")
+    assert directorio.cc_de("Aprobo", "Hery Peña - Biomédico") == "444444"
+    # Los índices memorizados se rehacen con el cambio
+    assert "Hery Peña - Biomédico" in directorio.opciones("Aprobo")
+
+
+# === Guardado del editor por diferencias ===
+
+@pytest.fixture
+def original(directorio):
+    pytest.importorskip('pandas')
+    return directorio.tabla()
+
+
+def fila(tabla, nombre):
+    return tabla.index[tabla["Nombre - Cargo"] == nombre][0]
+
+
+def test_diferencias_solo_lo_que_cambio(directorio, original):
+    editado = original.copy()
+    editado.loc[fila(original, "Oscar Muñoz - Operario"), "CC"] = "222223"
+    editado.loc[fila(original, "Hery Peña - Biomédico"), "Nombre - Cargo"] = "Hery Peña - Ingeniero Biomédico"
+    editado = editado.drop(fila(original, "Jefe de Almacén - Logística"))
+    editado.loc[100] = ["Elaboro", "Elaboro", "Luis Díaz - Técnico", "888888"]
+    editado.loc[101] = ["Otro", "Otro", "Sin Rol - X", "1"]
+
+    cambios, avisos = directorio.diferencias(original, editado)
+    assert sorted(cambios["eliminar"]) == [("Aprobo", "Jefe de Almacén - Logística"), ("Reviso", "Hery Peña - Biomédico")]
+    assert sorted(c[:2] for c in cambios["guardar"]) == [
+        ("Elaboro", "Luis Díaz - Técnico"), ("Elaboro", "Oscar Muñoz - Operario"),
+        ("Reviso", "Hery Peña - Ingeniero Biomédico")]
+    assert avisos == ["Rol 'Otro' no válido. Omitiendo empleado."]
+
+    directorio.aplicar(cambios)
+    assert directorio.cc_de("Elaboro", "Oscar Muñoz - Operario") == "222223"
+    assert directorio.buscar_cc("Aprobo", "777777") is None
+
+
+def test_diferencias_rechaza_cedula_repetida(directorio, original):
+    editado = original.copy()
+    editado.loc[100] = ["Reviso", "Reviso", "Ana Ruiz - Supervisora", "333333"]
+    with pytest.raises(CedulaDuplicada):
+        directorio.diferencias(original, editado)
+
+
+def test_guardado_parcial_no_pisa_otra_sesion(carpeta, directorio):
+    almacen = AlmacenJSON()
+    almacen.aplicar_cambios_directorio({"eliminar": [], "guardar": []}, directorio.como_dict())
+    # Otra sesión agrega un firmante; esta solo cambia una C.C.
+    otra = DirectorioFirmantes(copy.deepcopy(DIRECTORIO_INICIAL))
+    almacen.aplicar_cambios_directorio(otra.agregar("Aprobo", "Ana Ruiz - Supervisora", "888888"), otra.como_dict())
+    cambios = {"eliminar": [], "guardar": [
+        ("Elaboro", "Oscar Muñoz - Operario", {"display": "Oscar Muñoz - Operario", "cc": "222223"})]}
+    almacen.aplicar_cambios_directorio(cambios, directorio.como_dict())
+
+    with open(almacen.directorio_path) as f:
+        guardado = json.load(f)
+    assert guardado["Aprobo"]["Ana Ruiz - Supervisora"]["cc"] == "888888"
+    assert guardado["Elaboro"]["Oscar Muñoz - Operario"]["cc"] == "222223"
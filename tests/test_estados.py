@@ -0,0 +1,80 @@
+import pytest
+
+from conftest import nueva_orden
+from nucleo.estados import (
+    ABIERTA, ANULADA, CERRADA, EN_EJECUCION, ESTADOS, TRANSICIONES, CambioNoPermitido, EstadosOrdenes,
+    evento_despacho, evento_estado,
+)
+
+MATERIALES = [{'item': 'Cable', 'cantidad': 10, 'unidad': 'm'}, {'item': 'Tubo', 'cantidad': 2, 'unidad': 'UNIDAD'}]
+
+
+@pytest.fixture
+def ordenes():
+    return {n: nueva_orden(n, **{'Materiales Solicitados': MATERIALES}) for n in (1, 2)}
+
+
+@pytest.fixture
+def estados(ordenes):
+    estados = EstadosOrdenes()
+    estados.agregar_ordenes(ordenes.values())
+    return estados
+
+
+def llevar_a(estados, ordenes, numero, destino):
+    """Aplica el camino más corto desde abierta hasta `destino`."""
+    camino = {ABIERTA: [], EN_EJECUCION: [EN_EJECUCION], CERRADA: [EN_EJECUCION, CERRADA], ANULADA: [ANULADA]}
+    eventos = [evento_estado(numero, e) for e in camino[destino]]
+    estados.validar(eventos, ordenes.get)
+    estados.aplicar(eventos)
+
+
+@pytest.mark.parametrize('actual', ESTADOS)
+@pytest.mark.parametrize('nuevo', ESTADOS)
+def test_transiciones(estados, ordenes, actual, nuevo):
+    llevar_a(estados, ordenes, 1, actual)
+    evento = [evento_estado(1, nuevo)]
+    if nuevo in TRANSICIONES[actual]:
+        estados.validar(evento, ordenes.get)
+    else:
+        with pytest.raises(CambioNoPermitido):
+            estados.validar(evento, ordenes.get)
+
+
+def test_lote_se_valida_en_secuencia(estados, ordenes):
+    estados.validar([evento_estado(1, EN_EJECUCION), evento_estado(1, CERRADA)], ordenes.get)
+    with pytest.raises(CambioNoPermitido):
+        estados.validar([evento_estado(1, CERRADA), evento_estado(1, ANULADA)], ordenes.get)
+    # Validar no cambia el estado
+    assert estados.estado(1) == ABIERTA
+
+
+def test_orden_inexistente(estados, ordenes):
+    with pytest.raises(CambioNoPermitido, match="No existe"):
+        estados.validar([evento_estado(99, EN_EJECUCION)], ordenes.get)
+
+
+@pytest.mark.parametrize('lineas', [[(2, 1, None)], [(0, 'x', None)], [(0, 1)], [(0, 1, 'caro')]])
+def test_despacho_invalido(estados, ordenes, lineas):
+    with pytest.raises(CambioNoPermitido):
+        estados.validar([evento_despacho(1, lineas)], ordenes.get)
+
+
+@pytest.mark.parametrize('estado', [CERRADA, ANULADA])
+def test_sin_despachos_en_orden_terminada(estados, ordenes, estado):
+    llevar_a(estados, ordenes, 1, estado)
+    with pytest.raises(CambioNoPermitido, match="despachos"):
+        estados.validar([evento_despacho(1, [(0, 5, None)])], ordenes.get)
+
+
+def test_aplicar_mueve_conjuntos_y_espera_almacen(estados, ordenes):
+    assert estados.esperando_almacen == {1, 2}
+    eventos = [evento_estado(1, EN_EJECUCION), evento_despacho(1, [(0, 10, 1500), (1, 2, None)])]
+    estados.validar(eventos, ordenes.get)
+    estados.aplicar(eventos)
+    assert estados.por_estado[EN_EJECUCION] == {1} and estados.por_estado[ABIERTA] == {2}
+    assert estados.despachos(1) == {0: (10, 1500), 1: (2, None)}
+    assert estados.esperando_almacen == {2}
+    llevar_a(estados, ordenes, 2, ANULADA)
+    assert estados.esperando_almacen == set()
+    assert estados.consultar() == [1]
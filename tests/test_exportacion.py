@@ -0,0 +1,65 @@
+import io
+import os
+
+import pytest
+
+from conftest import nueva_orden
+from nucleo.almacenamiento import AlmacenJSON
+from nucleo.compartido import OrdenesCompartidas
+from nucleo.exportacion import HOJA_HISTORIAL, escribir_excel
+from nucleo.tareas import FALLIDA, LISTA, GestorTareas, SinResultado
+
+openpyxl = pytest.importorskip('openpyxl')
+
+
+@pytest.fixture
+def compartidas(carpeta):
+    compartidas = OrdenesCompartidas(AlmacenJSON())
+    # Llegan fuera de orden de fecha: dentro de cada mes se respeta el orden de llegada
+    compartidas.agregar_lote([nueva_orden(n, f'2025-0{1 + n % 3}-{28 - n:02d}') for n in range(1, 13)])
+    return compartidas
+
+
+def libro(compartidas, *args, **kwargs):
+    salida = io.BytesIO()
+    escribir_excel(salida, compartidas.vista(), compartidas.columnas, *args, **kwargs)
+    return openpyxl.load_workbook(salida)
+
+
+def numeros_hoja(hoja):
+    return [fila[0] for fila in hoja.iter_rows(min_row=2, values_only=True)]
+
+
+def test_historial_completo_por_mes(compartidas):
+    hojas = libro(compartidas, por_mes=True)
+    assert hojas.sheetnames == ['2025-01', '2025-02', '2025-03']
+    assert numeros_hoja(hojas['2025-02']) == [1, 4, 7, 10]
+
+
+def test_rango_de_fechas(compartidas):
+    hoja = libro(compartidas, '2025-02-20', '2025-03-31')[HOJA_HISTORIAL]
+    assert numeros_hoja(hoja) == [1, 4, 7, 2, 5, 8, 11]
+
+
+def test_rango_vacio(compartidas):
+    assert libro(compartidas, '2030-01-01', por_mes=True).sheetnames == ['Sin datos']
+
+
+def test_tarea_escribe_en_su_temporal(compartidas, carpeta):
+    gestor = GestorTareas(str(carpeta / 'exportaciones'), trabajadores=1)
+
+    def exportar(progreso, salida):
+        escribir_excel(salida, compartidas.vista(), compartidas.columnas, progreso=progreso)
+
+    def vacia(progreso, salida):
+        raise SinResultado("Nada que exportar.")
+
+    lista = gestor.enviar(('excel',), exportar, "Historial", 'historial.xlsx', 'application/octet-stream')
+    fallida = gestor.enviar(('vacia',), vacia, "Vacía", 'vacia.xlsx', 'application/octet-stream')
+    gestor._pool.shutdown(wait=True)
+
+    assert gestor.consultar(lista)['estado'] == LISTA
+    assert numeros_hoja(openpyxl.load_workbook(io.BytesIO(gestor.datos(lista))).active) == [3, 6, 9, 12, 1, 4, 7, 10, 2, 5, 8, 11]
+    assert gestor.consultar(fallida)['estado'] == FALLIDA
+    # Sin temporales a medias en la carpeta
+    assert [n for n in os.listdir(carpeta / 'exportaciones') if n.startswith('.tmp_')] == []
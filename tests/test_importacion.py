@@ -0,0 +1,64 @@
+import pytest
+
+from conftest import nueva_orden, numeros
+from nucleo import importacion
+from nucleo.almacenamiento import AlmacenJSON
+from nucleo.compartido import OrdenesCompartidas
+from nucleo.numeracion import IndiceConsecutivos
+
+pytest.importorskip('pandas')
+
+# Encabezados como los escribiría alguien a mano en Excel
+CSV = """N° Orden;SOLICITUD;fecha;Dependencia;Servicio;Descripción;Columna ajena
+10;9-5;2019-05-02;Electrico;URGENCIAS;Cambio de toma;x
+11;09-06;03/04/2019;Biomedico;CIRUGIA;Monitor;x
+12;09-07;no es fecha;Electrico;URGENCIAS;;x
+1;09-08;2019-05-02;Electrico;URGENCIAS;;x
+13;0x;2019-05-02;Electrico;MARTE;;x
+14;09-09;2019-05-02;Electrico;URGENCIAS;;x
+14;09-10;2019-05-02;Electrico;URGENCIAS;;x
+"""
+
+
+@pytest.fixture
+def archivo(carpeta):
+    ruta = carpeta / 'historico.csv'
+    ruta.write_text(CSV, encoding='utf-8')
+    return str(ruta)
+
+
+def test_valida_por_columna_y_reporta_por_fila(archivo):
+    ordenes, rechazos = importacion.preparar_importacion(archivo, IndiceConsecutivos([nueva_orden(1)]))
+    assert [(o['Número de Orden'], o['Solicitud N°'], o['Fecha']) for o in ordenes] == [
+        (10, '09-05', '2019-05-02'), (11, '09-06', '2019-04-03')]
+    assert ordenes[0]['Motivo'] == 'Cambio de toma' and 'Columna ajena' not in ordenes[0]
+    motivos = dict(zip(rechazos['Fila'], rechazos['Motivo del rechazo']))
+    assert motivos == {
+        4: "Fecha inválida",
+        5: "Número de Orden ya existe en el historial",
+        6: "Solicitud N° sin formato 09-XX; Servicio Aplicado desconocido",
+        7: "Número de Orden repetido en el archivo",
+        8: "Número de Orden repetido en el archivo",
+    }
+
+
+def test_columnas_obligatorias_y_formato(carpeta):
+    ruta = carpeta / 'incompleto.csv'
+    ruta.write_text("Orden;Fecha\n1;2019-05-02\n", encoding='utf-8')
+    with pytest.raises(ValueError, match="Solicitud N°"):
+        importacion.preparar_importacion(str(ruta), IndiceConsecutivos())
+    with pytest.raises(ValueError, match="Formato no soportado"):
+        importacion.leer_archivo('historico.pdf')
+
+
+def test_linea_de_comandos_guarda_las_validas(archivo, capsys):
+    OrdenesCompartidas(AlmacenJSON()).agregar(nueva_orden(1))
+    assert importacion.main([archivo, '--simular']) == 2
+    assert numeros(AlmacenJSON().cargar_ordenes()) == [1]
+
+    assert importacion.main([archivo, '--rechazos', 'rechazos.csv']) == 2
+    assert "importadas: 2; rechazadas: 5" in capsys.readouterr().out
+    assert numeros(AlmacenJSON().cargar_ordenes()) == [1, 10, 11]
+    # Repetir la importación ya no acepta ninguna fila
+    assert importacion.main([archivo]) == 2
+    assert numeros(AlmacenJSON().cargar_ordenes()) == [1, 10, 11]
@@ -0,0 +1,62 @@
+import base64
+import io
+import os
+
+import pytest
+
+from nucleo import logo
+
+Image = pytest.importorskip('PIL.Image')
+
+
+@pytest.fixture(autouse=True)
+def sin_red(carpeta, monkeypatch):
+    """Cada prueba empieza sin logo memorizado y falla si intenta descargarlo."""
+    descargas = []
+
+    def urlopen(url, timeout=None):
+        descargas.append(url)
+        raise OSError("sin red")
+    monkeypatch.setattr(logo.urllib.request, 'urlopen', urlopen)
+    monkeypatch.delenv('MC_ORDENES_LOGO', raising=False)
+    logo.logo_src.cache_clear()
+    yield
+    logo.logo_src.cache_clear()
+    assert descargas == []
+
+
+def imagen_png(ruta, ancho=400, alto=200):
+    Image.new('RGB', (ancho, alto), (200, 30, 30)).save(ruta, format='PNG')
+
+
+def ancho(src):
+    prefijo, datos = src.split(',', 1)
+    assert prefijo == 'data:image/png;base64'
+    with Image.open(io.BytesIO(base64.b64decode(datos))) as imagen:
+        return imagen.size[0]
+
+
+def test_archivo_local_se_embebe_reducido_y_se_guarda(carpeta):
+    imagen_png(logo.LOGO_FILE)
+    src = logo.logo_src()
+    assert ancho(src) == logo.LOGO_ANCHO_PX
+    # Memorizado en el proceso y en disco: otro proceso no vuelve a leer ni reducir el original
+    assert logo.logo_src() is src
+    os.unlink(logo.LOGO_FILE)
+    logo.logo_src.cache_clear()
+    assert logo.logo_src() == src
+
+
+def test_ruta_de_la_variable_de_entorno(carpeta, monkeypatch):
+    imagen_png('institucional.png', 60, 60)
+    monkeypatch.setenv('MC_ORDENES_LOGO', 'institucional.png')
+    assert ancho(logo.logo_src()) == 60
+
+
+def test_sin_imagen_ni_red_usa_la_url(monkeypatch):
+    intentos = []
+    monkeypatch.setattr(logo, '_descargar', lambda: intentos.append(1))
+    assert logo.logo_src() == logo.LOGO_URL and logo.logo_src() == logo.LOGO_URL
+    # Una sola vez por proceso
+    assert intentos == [1]
+    assert not os.path.exists(logo.LOGO_CACHE_FILE)
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from conftest import nueva_orden
+from nucleo import migrar_materiales
+from nucleo.almacenamiento import AlmacenJSON, guardar_json_atomico
+from nucleo.materiales import (
+    CAMPO_MATERIALES, errores_materiales, formatear_materiales, normalizar_materiales, nuevo_material,
+    parsear_materiales_legado, valor_total,
+)
+
+LEGADO = "1. Bombillo LED (3 UNIDAD); 2. Cable (10,5 METRO); 3. Cinta aislante"
+
+
+def test_texto_legado_a_registros():
+    assert parsear_materiales_legado(LEGADO) == [
+        nuevo_material("Bombillo LED", "UNIDAD", 3),
+        nuevo_material("Cable", "METRO", 10.5),
+        # Sin el formato "(cantidad unidad)": se conserva como nombre del ítem
+        nuevo_material("Cinta aislante", None, None),
+    ]
+    assert formatear_materiales(parsear_materiales_legado(LEGADO)) == \
+        "Bombillo LED (3 UNIDAD); Cable (10.5 METRO); Cinta aislante"
+
+
+def test_normalizar_cualquier_forma():
+    assert normalizar_materiales(None) == normalizar_materiales('') == []
+    # Claves de menos o de más: siempre el registro completo
+    assert normalizar_materiales([{"item": "Breaker", "cantidad": 2, "otra": 1}]) == [
+        nuevo_material("Breaker", None, 2)]
+    registros = [nuevo_material("Breaker", "UNIDAD", 2)]
+    assert normalizar_materiales(registros) == registros
+
+
+@pytest.mark.parametrize('valor, errores', [
+    ([{"item": "Cable", "cantidad": 2}], 0),
+    ("1. Cable (2 METRO)", 0),
+    ({"item": "Cable"}, 1),
+    (["Cable"], 1),
+    ([{"item": 3, "cantidad": "dos", "valor_unitario": True}], 3),
+])
+def test_errores_de_forma(valor, errores):
+    assert len(errores_materiales(valor)) == errores
+
+
+def test_valor_total_usa_lo_despachado():
+    assert valor_total(nuevo_material("Cable", cantidad=10, valor_unitario=1500)) == 15000
+    assert valor_total(nuevo_material("Cable", cantidad=10, cantidad_despachada=4, valor_unitario=1500)) == 6000
+    assert valor_total(nuevo_material("Cable", cantidad=10)) is None
+
+
+def test_ordenes_antiguas_se_leen_y_se_reescriben(carpeta):
+    guardar_json_atomico([nueva_orden(929, **{CAMPO_MATERIALES: LEGADO})], 'ordenes_data.json')
+    orden = AlmacenJSON().cargar_ordenes()[0]
+    assert [m['item'] for m in orden[CAMPO_MATERIALES]] == ["Bombillo LED", "Cable", "Cinta aislante"]
+
+    assert migrar_materiales.main([]) == 0
+    with open('ordenes_data.json') as f:
+        assert json.load(f)[0][CAMPO_MATERIALES][1] == nuevo_material("Cable", "METRO", 10.5)
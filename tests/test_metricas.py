@@ -0,0 +1,68 @@
+import pytest
+
+from nucleo import metricas
+from nucleo.metricas import RegistroTiempos
+
+
+@pytest.fixture
+def habilitado(monkeypatch):
+    monkeypatch.setattr(metricas, 'HABILITADO', True)
+    # El registro del proceso queda como argumento por defecto de formato_prometheus: se vacía en su lugar
+    monkeypatch.setattr(metricas.REGISTRO_PROCESO, '_recientes', {})
+    monkeypatch.setattr(metricas.REGISTRO_PROCESO, '_totales', {})
+    monkeypatch.setattr(metricas, '_ultima_escritura', [0.0])
+    return metricas.REGISTRO_PROCESO
+
+
+def test_deshabilitado_no_cuesta_nada(monkeypatch):
+    monkeypatch.setattr(metricas, 'HABILITADO', False)
+
+    def funcion():
+        return 1
+    assert metricas.medir('carga') is metricas.medir('otra')
+    assert metricas.cronometrado('carga')(funcion) is funcion
+    assert not metricas.escribir_prometheus(forzar=True)
+
+
+def test_mide_en_el_proceso_y_en_la_sesion(habilitado):
+    sesion = RegistroTiempos()
+    with metricas.medir('carga', sesion):
+        pass
+    metricas.registrar('rerun', 0.25, sesion)
+    metricas.cronometrado('excel')(lambda: None)()
+
+    assert set(habilitado.resumen()) == {'carga', 'excel', 'rerun'}
+    assert set(sesion.resumen()) == {'carga', 'rerun'}
+    assert sesion.resumen()['rerun']['ultimo'] == 0.25
+
+
+def test_percentiles_de_la_ventana():
+    registro = RegistroTiempos(ventana=100)
+    for ms in range(1, 201):
+        registro.registrar('etapa', ms / 1000)
+    fila = registro.resumen()['etapa']
+    # Totales de todas las mediciones, percentiles solo de las últimas 100
+    assert fila['cantidad'] == 200 and fila['suma'] == pytest.approx(20.1)
+    assert fila[0.5] == pytest.approx(0.151) and fila[0.99] == pytest.approx(0.200)
+
+
+def test_formato_prometheus(habilitado, carpeta):
+    metricas.registrar('busqueda "texto"', 0.5)
+    texto = metricas.formato_prometheus()
+    assert '# TYPE mc_ordenes_etapa_segundos summary' in texto
+    assert 'mc_ordenes_etapa_segundos{etapa="busqueda \\"texto\\"",quantile="0.9"} 0.500000' in texto
+    assert 'mc_ordenes_etapa_segundos_count{etapa="busqueda \\"texto\\""} 1' in texto
+
+    ruta = str(carpeta / 'metricas.prom')
+    assert metricas.escribir_prometheus(ruta)
+    # Como mucho una escritura cada INTERVALO_ESCRITURA segundos
+    assert not metricas.escribir_prometheus(ruta)
+    with open(ruta, encoding='utf-8') as f:
+        assert f.read() == texto
+
+
+def test_panel_solo_con_clave(monkeypatch):
+    monkeypatch.setattr(metricas, 'CLAVE_ADMIN', '')
+    assert not metricas.es_admin('') and not metricas.es_admin(None)
+    monkeypatch.setattr(metricas, 'CLAVE_ADMIN', 's3creta')
+    assert metricas.es_admin('s3creta') and not metricas.es_admin('otra') and not metricas.es_admin(None)
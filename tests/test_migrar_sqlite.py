@@ -0,0 +1,42 @@
+import pytest
+
+from conftest import nueva_orden, numeros
+from nucleo.almacen_sqlite import AlmacenSQLite
+from nucleo.almacenamiento import AlmacenJSON, ErrorAlmacenamiento
+from nucleo.compartido import OrdenesCompartidas
+from nucleo.estados import ANULADA, CERRADA, EN_EJECUCION, evento_despacho, evento_estado
+from nucleo.migrar_sqlite import migrar
+
+
+@pytest.fixture
+def origen(carpeta):
+    """Órdenes y eventos escritos con el backend JSON, como antes de migrar."""
+    compartidas = OrdenesCompartidas(AlmacenJSON())
+    compartidas.agregar_lote([nueva_orden(n, **{'Materiales Solicitados': [
+        {'item': 'Cable', 'cantidad': 10, 'unidad': 'm'}]}) for n in range(1, 6)])
+    compartidas.registrar_eventos([evento_estado(1, EN_EJECUCION), evento_despacho(1, [(0, 4, None)])])
+    compartidas.registrar_eventos([evento_estado(2, CERRADA), evento_estado(3, ANULADA)])
+    return compartidas
+
+
+def test_migra_ordenes_y_eventos(origen, carpeta):
+    migradas, rechazadas, eventos = migrar(str(carpeta / 'ordenes.db'))
+    assert (migradas, rechazadas, eventos) == (5, [], 4)
+
+    destino = OrdenesCompartidas(AlmacenSQLite(str(carpeta / 'ordenes.db')))
+    assert numeros(destino.vista()) == numeros(origen.vista())
+    for numero in range(1, 6):
+        assert destino.estados.estado(numero) == origen.estados.estado(numero)
+        assert destino.estados.despachos(numero) == origen.estados.despachos(numero)
+    assert destino.estados.aplicados == origen.estados.aplicados
+
+
+def test_no_repite_eventos_al_forzar(origen, carpeta):
+    db = str(carpeta / 'ordenes.db')
+    migrar(db)
+    with pytest.raises(ErrorAlmacenamiento):
+        migrar(db)
+    assert migrar(db, forzar=True)[2] == 0
+    destino = OrdenesCompartidas(AlmacenSQLite(db))
+    destino.sincronizar()
+    assert destino.estados.despachos(1) == origen.estados.despachos(1)
@@ -0,0 +1,51 @@
+from conftest import nueva_orden
+from nucleo.numeracion import (
+    ORDEN_INICIAL, SOLICITUD_INICIAL, ConjuntoNumeros, IndiceConsecutivos, generar_solicitud_nro, numero_solicitud,
+)
+
+
+def test_solicitudes():
+    assert generar_solicitud_nro(7) == '09-07' and generar_solicitud_nro(123) == '09-123'
+    assert numero_solicitud('09-07') == 7
+    assert numero_solicitud('08-07') is None and numero_solicitud('09-A1') is None and numero_solicitud(None) is None
+
+
+def test_indice_vacio_parte_de_los_valores_iniciales():
+    indice = IndiceConsecutivos()
+    assert indice.siguiente_orden() == ORDEN_INICIAL + 1
+    assert indice.siguiente_solicitud() == SOLICITUD_INICIAL + 1
+    assert not indice.existe_orden(ORDEN_INICIAL + 1)
+
+
+def test_duplicados_y_maximos():
+    indice = IndiceConsecutivos([nueva_orden(930), nueva_orden(935)])
+    indice.agregar_orden({'Número de Orden': '940', 'Solicitud N°': 'EXTERNA-1'})
+    # Órdenes sin número válido no rompen el índice
+    indice.agregar_ordenes([{'Número de Orden': None}, {'Solicitud N°': None}])
+
+    assert indice.existe_orden(930) and indice.existe_orden(940) and not indice.existe_orden(931)
+    assert indice.existe_solicitud('09-930') and indice.existe_solicitud('EXTERNA-1')
+    assert indice.siguiente_orden() == 941
+    assert indice.siguiente_solicitud() == 936
+    assert indice.huecos_orden(929) == [929, 931, 932, 933, 934, 936, 937, 938, 939]
+
+
+def test_numeros_sin_las_ordenes():
+    indice = IndiceConsecutivos()
+    indice.agregar_numeros([[929, 950]], [[11, 30]], ['09-40', 'OTRA'])
+    assert indice.existe_orden(940) and indice.existe_solicitud('09-25')
+    assert indice.existe_solicitud('OTRA') and indice.ultima_solicitud == 40
+    assert indice.siguiente_orden_libre(930) == 951
+    assert indice.siguiente_solicitud_libre(20) == 31
+
+
+def test_siguiente_libre_salta_tramos_ocupados():
+    numeros = ConjuntoNumeros()
+    numeros.agregar_rango(1, 10000)
+    numeros.agregar(10002)
+    assert numeros.siguiente_libre(0) == 10001
+    # El tramo ya recorrido queda comprimido: la segunda búsqueda no lo vuelve a recorrer
+    assert numeros._saltos[1] == 10001
+    numeros.agregar(10001)
+    assert numeros.siguiente_libre(5) == 10003
+    assert len(numeros) == 10002 and numeros.maximo == 10002
@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from conftest import nueva_orden
+from nucleo.almacenamiento import AlmacenJSON
+from nucleo.compartido import OrdenesCompartidas
+from nucleo.estados import ANULADA, CERRADA, EN_EJECUCION, evento_despacho, evento_estado
+from nucleo import particiones
+from nucleo.particiones import AlmacenParticionado, escribir_particiones, main
+
+MATERIALES = [{'item': 'Cable', 'cantidad': 10, 'unidad': 'm'}]
+
+
+@pytest.fixture
+def origen(carpeta):
+    """Historial de dos años con estados y despachos, escrito con el backend JSON."""
+    compartidas = OrdenesCompartidas(AlmacenJSON())
+    compartidas.agregar_lote([nueva_orden(n, '2024-06-01' if n <= 3 else '2025-02-01',
+                                          **{'Materiales Solicitados': MATERIALES}) for n in range(1, 7)])
+    compartidas.registrar_eventos([evento_estado(1, EN_EJECUCION), evento_despacho(1, [(0, 4, 1200)])])
+    compartidas.registrar_eventos([evento_estado(2, CERRADA), evento_estado(5, ANULADA)])
+    compartidas.registrar_eventos([evento_despacho(6, [(0, 10, None)])])
+    return compartidas
+
+
+def estados_de(compartidas):
+    compartidas.sincronizar()
+    return {n: (compartidas.estados.estado(n), compartidas.estados.despachos(n)) for n in range(1, 7)}
+
+
+def particionadas():
+    return OrdenesCompartidas(AlmacenParticionado(anio_actual='2025'))
+
+
+def test_division_conserva_estados_y_despachos(origen, capsys):
+    assert main([]) == 0
+    assert "copiados: 5" in capsys.readouterr().out
+    destino = particionadas()
+    assert estados_de(destino) == estados_de(origen)
+    # Los conjuntos cubren las órdenes cargadas: 2024 queda archivado hasta que se pide
+    assert destino.estados.esperando_almacen == {4}
+    destino.cargar_anios()
+    assert destino.estados.esperando_almacen == origen.estados.esperando_almacen == {1, 3, 4}
+
+
+def test_division_repetida_no_duplica_eventos(origen, carpeta):
+    assert main([]) == 0
+    destino = particionadas()
+    # Un evento registrado ya con el backend particionado se conserva al volver a dividir
+    destino.registrar_eventos([evento_estado(1, CERRADA)])
+    assert main(['--forzar']) == 0
+    registro = (carpeta / 'ordenes_anuales' / 'ordenes_eventos.jsonl').read_text(encoding='utf-8').splitlines()
+    assert len(registro) == 6
+    assert json.loads(registro[-1])['estado'] == CERRADA
+    assert estados_de(particionadas())[1][0] == CERRADA
+
+
+@pytest.fixture
+def lecturas(carpeta, monkeypatch):
+    """Tres años escritos por partición (2023 y 2024 archivados); devuelve los años leídos del disco."""
+    escribir_particiones([nueva_orden(n, f'{2022 + (n + 3) // 4}-05-0{1 + n % 4}', **{
+        'Servicio Aplicado': 'URGENCIAS' if n % 2 else 'CIRUGIA'}) for n in range(1, 13)],
+        str(carpeta / 'ordenes_anuales'))
+    leidos = []
+    leer_segmento = particiones.leer_segmento
+
+    def registrar(carpeta, segmento, cantidad=None):
+        leidos.append(segmento["anio"])
+        return leer_segmento(carpeta, segmento, cantidad)
+    monkeypatch.setattr(particiones, 'leer_segmento', registrar)
+    return leidos
+
+
+def test_arranque_solo_lee_el_anio_en_curso(lecturas):
+    compartidas = particionadas()
+    vista = compartidas.vista()
+    assert lecturas == ['2025'] and len(vista) == 12
+    assert compartidas.anios_archivados() == ['2023', '2024']
+    assert vista.archivados == ((0, 4), (4, 8)) and vista.tramos == ((8, 12),)
+    # Consecutivos y duplicados salen del manifiesto
+    assert compartidas.indice.siguiente_orden() == 13 and compartidas.indice.existe_orden(2)
+    assert lecturas == ['2025']
+
+
+def test_leer_una_posicion_carga_solo_su_anio(lecturas):
+    compartidas = particionadas()
+    assert compartidas.vista()[5]['Número de Orden'] == 6
+    assert lecturas == ['2025', '2024'] and compartidas.anios_archivados() == ['2023']
+    assert compartidas.vista().tramos == ((4, 8), (8, 12))
+
+
+def test_buscar_por_numero_carga_su_anio(lecturas):
+    compartidas = particionadas()
+    assert compartidas.buscar(99) is None and lecturas == ['2025']
+    assert compartidas.buscar(3)['Fecha'] == '2023-05-04'
+    assert compartidas.anios_archivados() == ['2024']
+
+
+def test_filtros_cargan_los_anios_del_rango(lecturas):
+    compartidas = particionadas()
+    vista = compartidas.vista()
+    assert compartidas.consultar(vista, {'desde': '2024-01-01', 'Servicio Aplicado': None}) == list(range(11, 3, -1))
+    assert sorted(lecturas) == ['2024', '2025'] and compartidas.anios_archivados() == ['2023']
+    assert compartidas.consultar(vista, {'Servicio Aplicado': 'CIRUGIA'}) == [11, 9, 7, 5, 3, 1]
+    assert compartidas.anios_archivados() == []
+    # Lo cargado queda en la lista compartida: no se vuelve a leer
+    assert [o['Número de Orden'] for o in compartidas.vista()] == list(range(1, 13))
+    assert sorted(lecturas) == ['2023', '2024', '2025']
@@ -0,0 +1,69 @@
+import json
+import pickle
+
+import pytest
+
+from conftest import nueva_orden
+from nucleo import registro
+from nucleo.almacenamiento import AlmacenJSON
+from nucleo.materiales import CAMPO_MATERIALES, nuevo_material
+from nucleo.registro import Material, Orden, a_json, leer_orden
+
+
+def orden(numero, **campos):
+    return leer_orden(json.loads(json.dumps(nueva_orden(numero, **{
+        "Servicio Aplicado": "UCI ADULTOS", CAMPO_MATERIALES: [nuevo_material("Toma doble", "UNIDAD", 2)],
+        **campos}))))
+
+
+def test_lee_como_diccionario():
+    o = orden(7, Motivo="Cambio de toma")
+    assert isinstance(o, Orden) and o['Número de Orden'] == 7 and o.get('Motivo') == "Cambio de toma"
+    assert o.get('No existe', 'x') == 'x' and 'No existe' not in o
+    with pytest.raises(KeyError):
+        o['No existe']
+    material = o[CAMPO_MATERIALES][0]
+    assert isinstance(material, Material) and material['item'] == "Toma doble" and material.get('otra') is None
+
+
+def test_solo_lectura_y_sin_diccionario_por_instancia():
+    o = orden(1)
+    with pytest.raises(TypeError):
+        o['Motivo'] = 'otro'
+    with pytest.raises(TypeError):
+        o[CAMPO_MATERIALES][0]['cantidad'] = 5
+    assert not hasattr(o, '__dict__') and not hasattr(o[CAMPO_MATERIALES][0], '__dict__')
+
+
+def test_categoricos_comparten_el_mismo_texto():
+    a, b = orden(1), orden(2)
+    # Cada orden sale de su propio json.loads: sin internar serían copias distintas
+    assert a['Servicio Aplicado'] is b['Servicio Aplicado'] and a['Fecha'] is b['Fecha']
+    assert a[CAMPO_MATERIALES][0]['item'] is b[CAMPO_MATERIALES][0]['item']
+    antes = registro.textos_internados()
+    orden(3)
+    assert registro.textos_internados() == antes
+
+
+def test_vuelve_a_json_sin_perdidas():
+    # nueva_orden no trae firmantes y usa la clave antigua 'Descripción'
+    original = nueva_orden(5, **{CAMPO_MATERIALES: [nuevo_material("Cable", "METRO", 10)]})
+    o = leer_orden(json.loads(json.dumps(original)))
+    assert o.extra == {"Descripción": "Orden 5"} and "Revisó" not in o and len(o) == len(original)
+    assert json.loads(json.dumps(o, default=a_json)) == original
+    assert pickle.loads(pickle.dumps(o)) == o
+
+
+def test_backend_guarda_y_devuelve_ordenes_compactas(carpeta):
+    almacen = AlmacenJSON()
+    almacen.agregar_orden(nueva_orden(1))
+    cargadas = AlmacenJSON().cargar_ordenes()
+    assert type(cargadas[0]) is Orden and cargadas[0].como_dict() == nueva_orden(1)
+
+
+def test_columnas_desde_los_slots():
+    ordenes = [orden(1, Motivo="Una"), orden(2, Motivo="Otra"), orden(3)]
+    columnas = registro.columnas(ordenes, ("Número de Orden", "Motivo"))
+    assert columnas == {"Número de Orden": [1, 2, 3], "Motivo": ["Una", "Otra", None]}
+    # Mezcla con diccionarios (órdenes nuevas aún sin compactar)
+    assert registro.columnas([orden(1), nueva_orden(9)], ("Número de Orden",)) == {"Número de Orden": [1, 9]}
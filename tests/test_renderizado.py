@@ -0,0 +1,120 @@
+import io
+import zipfile
+
+import pytest
+
+from conftest import nueva_orden
+from nucleo import renderizado
+from nucleo.directorio import DIRECTORIO_INICIAL, DirectorioFirmantes
+from nucleo.materiales import CAMPO_MATERIALES, nuevo_material
+from nucleo.renderizado import CacheCuerpos, clave_cuerpo, generar_html_lote, generar_html_orden, generar_zip_lote
+
+LOGO = 'data:image/png;base64,AAAA'
+
+
+@pytest.fixture(autouse=True)
+def cache_vacia():
+    renderizado.CACHE_CUERPOS.vaciar()
+    yield
+    renderizado.CACHE_CUERPOS.vaciar()
+
+
+def orden(numero):
+    return nueva_orden(numero, **{
+        "Motivo": f"Cambio <tomas> #{numero}", "Elaboró": "Magaly Gómez - Técnica",
+        CAMPO_MATERIALES: [nuevo_material("Toma doble", "UNIDAD", 2)]})
+
+
+def test_orden_individual():
+    documento = generar_html_orden(orden(929), DIRECTORIO_INICIAL, LOGO)
+    assert "<title>Orden de Mantenimiento N° 929</title>" in documento
+    # Textos escapados, C.C. del firmante y materiales en filas
+    assert "Cambio &lt;tomas&gt; #929" in documento and "<tomas>" not in documento
+    assert "111111" in documento and "<td>Toma doble</td><td>UNIDAD</td><td>2</td>" in documento
+    assert LOGO in documento
+
+
+def test_lote_multipagina_en_orden():
+    documento = generar_html_lote([orden(n) for n in (931, 929, 930)], DIRECTORIO_INICIAL, LOGO)
+    assert documento.count('<div class="pagina">') == 3
+    assert documento.index("#931") < documento.index("#929") < documento.index("#930")
+    assert renderizado.ESTILO_LOTE in documento
+
+
+def test_zip_con_un_archivo_por_orden():
+    avance = []
+    contenido = generar_zip_lote([orden(n) for n in range(929, 934)], DIRECTORIO_INICIAL, LOGO,
+                                 progreso=avance.append)
+    with zipfile.ZipFile(io.BytesIO(contenido)) as zf:
+        nombres = zf.namelist()
+        assert nombres == [f'Orden_Mantenimiento_N_{n}.html' for n in range(929, 934)]
+        assert "#931" in zf.read(nombres[2]).decode('utf-8')
+    assert avance and avance == sorted(avance) and avance[-1] <= 1
+
+
+def test_pool_de_procesos_da_lo_mismo(monkeypatch):
+    ordenes = [orden(n) for n in range(929, 939)]
+    en_proceso = generar_html_lote(ordenes, DIRECTORIO_INICIAL, LOGO, procesos=1)
+    monkeypatch.setattr(renderizado, 'UMBRAL_PROCESOS', 4)
+    monkeypatch.setattr(renderizado, 'TAMANO_BLOQUE', 3)
+    avance = []
+    assert generar_html_lote(ordenes, DIRECTORIO_INICIAL, LOGO, procesos=2, progreso=avance.append) == en_proceso
+    assert avance == [1 / 4, 2 / 4, 3 / 4, 1]
+
+
+@pytest.fixture
+def renderizados(monkeypatch):
+    """Números de las órdenes que se renderizan de verdad (no salen de la caché)."""
+    numeros = []
+    renderizar_cuerpo = renderizado.renderizar_cuerpo
+
+    def contar(orden, ccs, logo_src=None):
+        numeros.append(orden['Número de Orden'])
+        return renderizar_cuerpo(orden, ccs, logo_src)
+    monkeypatch.setattr(renderizado, 'renderizar_cuerpo', contar)
+    return numeros
+
+
+def test_reimpresion_sale_de_la_cache(renderizados):
+    directorio = DirectorioFirmantes(DIRECTORIO_INICIAL)
+    documento = generar_html_lote([orden(929), orden(930)], directorio, LOGO)
+    # La reimpresión y un lote en otro orden reusan los cuerpos
+    assert "#930" in generar_html_orden(orden(930), directorio, LOGO)
+    otro = generar_html_lote([orden(930), orden(929)], directorio, LOGO)
+    assert otro.index("#930") < otro.index("#929") and len(otro) == len(documento)
+    assert renderizados == [929, 930]
+    assert renderizado.CACHE_CUERPOS.estadisticas()["aciertos"] == 3
+
+
+def test_firmantes_despachos_y_logo_cambian_la_clave(renderizados):
+    directorio = DirectorioFirmantes(DIRECTORIO_INICIAL)
+    clave = clave_cuerpo(orden(929), directorio, LOGO)
+    assert clave_cuerpo(orden(929), directorio, LOGO) == clave
+    assert clave_cuerpo(orden(929), directorio, 'otro.png') != clave
+    despachada = nueva_orden(929, **{CAMPO_MATERIALES: [dict(nuevo_material("Toma doble", "UNIDAD", 2),
+                                                              cantidad_despachada=2, valor_unitario=1500)]})
+    assert clave_cuerpo(despachada, directorio, LOGO) != clave
+    generar_html_orden(orden(929), directorio, LOGO)
+    # Cambia la C.C. de quien elaboró la orden
+    directorio.aplicar({"eliminar": [], "guardar": [("Elaboro", "Magaly Gómez - Técnica",
+                                                     {"display": "Magaly Gómez - Técnica", "cc": "999999"})]})
+    assert clave_cuerpo(orden(929), directorio, LOGO) != clave
+    assert "999999" in generar_html_orden(orden(929), directorio, LOGO)
+    assert renderizados == [929, 929]
+
+
+def test_directorio_sin_version_no_se_memoriza(renderizados):
+    assert clave_cuerpo(orden(929), DIRECTORIO_INICIAL, LOGO) is None
+    generar_html_orden(orden(929), DIRECTORIO_INICIAL, LOGO)
+    generar_html_orden(orden(929), DIRECTORIO_INICIAL, LOGO)
+    assert renderizados == [929, 929] and len(renderizado.CACHE_CUERPOS) == 0
+
+
+def test_lru_descarta_el_menos_reciente():
+    cache = CacheCuerpos(maximo=2)
+    cache.guardar('a', '<a>')
+    cache.guardar('b', '<b>')
+    assert cache.obtener('a') == '<a>'
+    cache.guardar('c', '<c>')
+    assert cache.obtener('b') is None and cache.obtener('a') == '<a>' and cache.obtener('c') == '<c>'
+    assert cache.estadisticas() == {"aciertos": 3, "fallos": 1, "cuerpos": 2, "maximo": 2}
@@ -0,0 +1,76 @@
+import os
+import time
+
+import pytest
+
+from nucleo.tareas import FALLIDA, LISTA, GestorTareas, SinResultado, hash_clave
+
+
+@pytest.fixture
+def gestor(carpeta):
+    return GestorTareas(str(carpeta / 'exportaciones'), trabajadores=1)
+
+
+def terminar(gestor):
+    gestor._pool.shutdown(wait=True)
+
+
+def escribir(texto):
+    def funcion(progreso, salida):
+        progreso(0.5, "A medias")
+        salida.write(texto.encode('utf-8'))
+    return funcion
+
+
+def test_falla_guarda_la_excepcion(gestor):
+    def rota(progreso, salida):
+        raise ValueError("columna desconocida")
+
+    def vacia(progreso, salida):
+        raise SinResultado("Nada que exportar.")
+
+    fallida = gestor.enviar(('rota',), rota, "Historial", 'historial.xlsx', 'application/octet-stream')
+    aviso = gestor.enviar(('vacia',), vacia, "Lote", 'lote.zip', 'application/zip')
+    terminar(gestor)
+
+    tarea = gestor.consultar(fallida)
+    assert tarea['estado'] == FALLIDA and not tarea['aviso']
+    assert isinstance(tarea['error'], ValueError)
+    assert tarea['mensaje'] == "ValueError: columna desconocida"
+    # Un rango sin órdenes es un aviso, no un error
+    tarea = gestor.consultar(aviso)
+    assert tarea['estado'] == FALLIDA and tarea['aviso'] and tarea['error'] is None
+
+
+def test_misma_clave_reutiliza_el_archivo(gestor, carpeta):
+    primera = gestor.enviar(('excel', 1), escribir("uno"), "Historial", 'historial.xlsx', 'application/octet-stream')
+    terminar(gestor)
+    assert gestor.consultar(primera)['estado'] == LISTA
+
+    # Otro proceso (u otro arranque) con la misma clave: nace lista, sin recalcular
+    otro = GestorTareas(gestor.carpeta, trabajadores=1)
+
+    def no_llamar(progreso, salida):
+        raise AssertionError("no debería recalcular")
+
+    segunda = otro.enviar(('excel', 1), no_llamar, "Historial", 'historial.xlsx', 'application/octet-stream')
+    assert otro.consultar(segunda)['estado'] == LISTA
+    assert otro.datos(segunda) == b"uno"
+    assert os.listdir(carpeta / 'exportaciones') == [hash_clave(('excel', 1)) + '.xlsx']
+
+
+def test_limpiar_solo_borra_archivos_propios(gestor, carpeta):
+    tarea = gestor.enviar(('excel', 2), escribir("dos"), "Historial", 'historial.xlsx', 'application/octet-stream')
+    terminar(gestor)
+    carpeta_tareas = carpeta / 'exportaciones'
+    ajenos = ['notas.txt', 'informe.xlsx', hash_clave('x')[:31] + '.zip']
+    for nombre in ajenos + ['.tmp_abandonado']:
+        (carpeta_tareas / nombre).write_text("x")
+    # Todo vencido
+    antiguo = time.time() - gestor.duracion - 60
+    for nombre in os.listdir(carpeta_tareas):
+        os.utime(carpeta_tareas / nombre, (antiguo, antiguo))
+
+    assert gestor.limpiar() == 2
+    assert sorted(os.listdir(carpeta_tareas)) == sorted(ajenos)
+    assert gestor.consultar(tarea) is None